@@ -0,0 +1,107 @@
+"""Compare the two ways Zakat Summary B-D read the Stocks/Cash/Debts totals.
+
+No spreadsheet engine is available in CI, so this measures the two things
+that drive Excel's recalculation cost for these cells, straight from the
+generated formulas:
+
+* precedent cells -- how many cells each formula references (a whole-sheet
+  ``$1:$1048576`` range is 16,384 x 1,048,576 cells, a header ``$3:$3``
+  match scans up to 16,384);
+* dirtied by an edit -- how many Summary cells become dirty when one
+  Stocks/Cash/Debts data cell changes, averaged over all of them.
+
+    python benchmarks/asset_refs.py --years 50
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from zakat_logbook import LogbookOptions, generate  # noqa: E402
+from zakat_logbook import layout as L  # noqa: E402
+from zakat_logbook.generator import ASSET_REFS, ASSET_SOURCES  # noqa: E402
+from zakat_logbook.reader import SharedFormulas  # noqa: E402
+from zakat_logbook.xlsx import col_index  # noqa: E402
+
+MAX_ROW, MAX_COL = 1_048_576, 16_384
+NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+REF = re.compile(r"(\w+)!\$?([A-Z]*)\$?(\d*)(?::\$?([A-Z]*)\$?(\d*))?")
+
+
+def parse_range(c1, r1, c2, r2):
+    """Return (col1, row1, col2, row2) for the parts of an A1 reference."""
+    if c2 is None and r2 is None:
+        c2, r2 = c1, r1
+    cols = (col_index(c1) if c1 else 1, col_index(c2) if c2 else MAX_COL)
+    rows = (int(r1) if r1 else 1, int(r2) if r2 else MAX_ROW)
+    return cols[0], rows[0], cols[1], rows[1]
+
+
+def summary_formulas(path, sheet_index=3):
+    with zipfile.ZipFile(path) as z:
+        root = ElementTree.fromstring(z.read(f"xl/worksheets/sheet{sheet_index}.xml"))
+    out, shared = {}, SharedFormulas()
+    for c in root.iterfind(".//m:c", NS):
+        f = c.find("m:f", NS)
+        ref = c.get("r")
+        if f is not None:
+            text = shared.text(ref, f.text, f.get("t"), f.get("si"))
+            if ref[0] in "BCD":
+                out[ref] = text
+    return out
+
+
+def measure(options):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.xlsx")
+        start = time.perf_counter()
+        generate(path, options)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+        formulas = summary_formulas(path)
+
+    first, last = L.SUMMARY_FIRST_ROW, L.summary_last_row(options.years)
+    cells = {ref: f for ref, f in formulas.items() if first <= int(ref[1:]) <= last}
+    ranges = {ref: [(m.group(1), parse_range(*m.group(2, 3, 4, 5))) for m in REF.finditer(f)]
+              for ref, f in cells.items()}
+    precedents = sum((c2 - c1 + 1) * (r2 - r1 + 1)
+                     for refs in ranges.values() for _, (c1, r1, c2, r2) in refs)
+
+    dirtied = edits = 0
+    for sheet, accounts, _ in ASSET_SOURCES:
+        for row in range(L.ASSET_FIRST_ROW, L.ASSET_FIRST_ROW + options.years):
+            for col in range(2, len(accounts) + 3):
+                edits += 1
+                # An account edit recalculates the row's Total, so count
+                # Summary cells that depend on either.
+                touched = {(col, row), (len(accounts) + 2, row)}
+                dirtied += sum(
+                    any(s == sheet and any(c1 <= c <= c2 and r1 <= r <= r2 for c, r in touched)
+                        for s, (c1, r1, c2, r2) in refs)
+                    for refs in ranges.values())
+    return len(cells), precedents, dirtied / edits, elapsed, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    print(f"{args.years}-year workbook, Zakat Summary columns B-D")
+    print(f"{'layout':>8} {'formulas':>9} {'precedent cells':>18} {'dirtied/edit':>13} "
+          f"{'generate s':>11} {'bytes':>9}")
+    for mode in ASSET_REFS:
+        n, precedents, dirtied, elapsed, size = measure(
+            LogbookOptions(years=args.years, asset_refs=mode))
+        print(f"{mode:>8} {n:>9} {precedents:>18,} {dirtied:>13.2f} {elapsed:>11.3f} {size:>9,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compare reading the Ledger from the workbook and from columnar files.
+
+For each Ledger size a workbook is generated with synthetic entries and
+copied to Parquet and Arrow IPC with :func:`zakat_logbook.columnar.load`.
+Reported per source, best of ``--repeat``:
+
+* bytes  -- the file on disk;
+* all s  -- reading every Ledger column into a ``Ledger``;
+* engine s -- reading only the columns the Zakat Summary needs (Date,
+  Type, Amount, Fees); the ``.xlsx`` still has to parse every cell.
+
+    python benchmarks/columnar.py --rows 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from synthetic import synthetic_ledger  # noqa: E402
+
+from zakat_logbook import LogbookOptions, columnar, generate, reader  # noqa: E402
+
+
+def best_of(repeat, fn, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'source':>8} {'bytes':>12} {'all s':>8} {'engine s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        book = os.path.join(tmp, "book.xlsx")
+        for rows in args.rows:
+            generate(book, LogbookOptions(ledger_rows=rows), synthetic_ledger(rows, args.years))
+            read = best_of(args.repeat, reader.read_ledger, book)
+            print(f"{rows:>10,} {'xlsx':>8} {os.path.getsize(book):>12,} {read:>8.3f} {read:>9.3f}")
+            for fmt in columnar.FORMATS:
+                columnar.load(book, tmp, fmt)
+                path = columnar.paths(tmp, fmt)[0]
+                full = best_of(args.repeat, columnar.read_ledger, path)
+                engine = best_of(args.repeat, columnar.read_ledger, path, columnar.ENGINE_COLUMNS)
+                print(f"{'':>10} {fmt:>8} {os.path.getsize(path):>12,} {full:>8.3f} {engine:>9.3f}"
+                      f"  ({read / full:.0f}x, {read / engine:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Time Umm al-Qura conversions of a Ledger-sized column of dates.
+
+Random dates inside the calendar table are converted with
+:mod:`zakat_logbook.hijri`, once per operation, and against a per-date
+Python loop over the month table (a binary search per date) on a sample,
+scaled to the full count.
+
+    python benchmarks/hijri.py --dates 1000000
+"""
+
+import argparse
+import bisect
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from zakat_logbook import hijri  # noqa: E402
+from zakat_logbook.ummalqura import MONTH_OFFSETS  # noqa: E402
+
+
+def _loop(dates):
+    """Hijri year, month and day of each date, one date at a time."""
+    out = []
+    for offset in (dates - hijri.EPOCH).astype(int).tolist():
+        month = bisect.bisect_right(MONTH_OFFSETS, offset) - 1
+        out.append((hijri.FIRST_YEAR + month // 12, month % 12 + 1, offset - MONTH_OFFSETS[month] + 1))
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dates", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    dates = hijri.EPOCH + rng.integers(0, hijri.DAYS, args.dates)
+    years, months, days = hijri.to_hijri(dates)
+    for label, run in (("to_hijri", lambda: hijri.to_hijri(dates)),
+                       ("to_gregorian", lambda: hijri.to_gregorian(years, months, days)),
+                       ("add_years", lambda: hijri.add_years(dates)),
+                       ("labels", lambda: hijri.labels(dates))):
+        start = time.perf_counter()
+        run()
+        print(f"{label:<14} {args.dates:>10,} dates  {time.perf_counter() - start:>8.3f} s")
+    sample = dates[:args.sample]
+    start = time.perf_counter()
+    _loop(sample)
+    loop = (time.perf_counter() - start) * args.dates / len(sample)
+    print(f"{'python loop':<14} {args.dates:>10,} dates  {loop:>8.3f} s  (from {len(sample):,})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Time the Nisab and Zakat Due of every year under each Nisab standard.
+
+Ten synthetic Zakat years (gold and silver prices, assets) for each of
+``--households`` households are compared across the gold, silver and
+lower-of-two standards by :func:`zakat_logbook.engine.compare_nisab_methods`,
+one array of thresholds for all of them, against running
+:func:`zakat_logbook.engine.compute_summary` once per standard, as
+recalculating the workbook per standard would.
+
+    python benchmarks/nisab.py --households 1000 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from synthetic import synthetic_years  # noqa: E402
+
+from zakat_logbook.data import YearInputs  # noqa: E402
+from zakat_logbook.engine import compare_nisab_methods, compute_summary  # noqa: E402
+from zakat_logbook.layout import NISAB_METHODS  # noqa: E402
+
+FIELDS = ("dates", "gold_price", "gold_oz", "stocks", "cash", "debts", "silver_price")
+
+
+def household_years(households, years=10):
+    """``years`` rows per household, every household's the same."""
+    one = synthetic_years(years)
+    return YearInputs(*(np.tile(getattr(one, name), households) for name in FIELDS))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--households", type=int, nargs="+", default=[1, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print(f"{'years':>9} {'compare ms':>11} {'per standard ms':>16}")
+    for households in args.households:
+        years = household_years(households)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            compared = compare_nisab_methods(years)
+        together = (time.perf_counter() - start) / args.repeat
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            separate = {method: compute_summary(years, method=method) for method in NISAB_METHODS}
+        apart = (time.perf_counter() - start) / args.repeat
+        assert all((compared[m][1] == separate[m].zakat_due).all() for m in NISAB_METHODS)
+        print(f"{len(years):>9,} {together * 1000:>11.2f} {apart * 1000:>16.2f}"
+              f"  ({apart / together:,.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compare the two ways of computing Zakat Summary K (Paid This Period).
+
+``scan`` tests every Ledger row against every year's window, as the SUMIFS
+formula does: O(years x rows).  ``sorted`` sorts Zakat rows once and takes
+each window as the difference of two binary searches into a running sum:
+O(rows log rows) once, then O(years log rows) per recalculation.
+
+    python benchmarks/paid_lookup.py --rows 10000 100000 1000000 --years 10 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from zakat_logbook.data import Ledger  # noqa: E402
+from zakat_logbook.engine import ZakatIndex, paid_per_period, paid_per_period_scan  # noqa: E402
+
+TYPES = np.array(["Zakat", "Sadaqah", "Fitrana", "Qurbani"], dtype=object)
+
+
+def synthetic_ledger(rows, years, rng):
+    start = np.datetime64("2000-01-01")
+    dates = (start + rng.integers(0, 365 * years, rows)).astype("datetime64[D]")
+    blank = [""] * rows
+    return Ledger(dates, rng.choice(TYPES, rows), blank, blank, blank,
+                  rng.integers(1, 100_000, rows) / 100, rng.integers(0, 500, rows) / 100)
+
+
+def year_dates(years):
+    return np.arange(np.datetime64("2000-12-31"), np.datetime64("2000-12-31") + 365 * years, 365)
+
+
+def best_of(repeat, fn, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--years", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(2024)
+    print(f"{'rows':>10} {'years':>6} {'index s':>9} {'scan s':>9} {'lookup s':>10} {'per recalc':>11}")
+    for rows in args.rows:
+        for years in args.years:
+            ledger = synthetic_ledger(rows, years, rng)
+            dates = year_dates(years)
+            # Building the index is paid once per Ledger change; a recalc of
+            # the Summary (new year, new gold price) reuses it.
+            build, index = best_of(args.repeat, ZakatIndex, ledger)
+            scan, expected = best_of(args.repeat, paid_per_period_scan, dates, ledger)
+            lookup, result = best_of(args.repeat, paid_per_period, dates, index)
+            if not np.allclose(expected, result, equal_nan=True):
+                raise SystemExit(f"mismatch at {rows} rows / {years} years")
+            print(f"{rows:>10,} {years:>6} {build:>9.4f} {scan:>9.4f} {lookup:>10.6f} "
+                  f"{scan / lookup:>10.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Time loading a price history and backfilling household-years from it.
+
+A synthetic history of weekday gold and silver closes is written as CSV,
+Arrow and Parquet and each is loaded with
+:meth:`zakat_logbook.prices.PriceHistory.load`.  Then ``--households``
+years of Zakat Summary inputs, with random dates and a third of the gold
+and silver prices already typed in, are filled by
+:func:`zakat_logbook.prices.fill_year_inputs` under each policy, and
+against a per-date Python loop (a binary search per date) on the same
+rows.
+
+    python benchmarks/prices.py --households 10000
+"""
+
+import argparse
+import bisect
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from zakat_logbook.data import YearInputs  # noqa: E402
+from zakat_logbook.prices import MAX_GAP_DAYS, POLICIES, PriceHistory, fill_year_inputs  # noqa: E402
+
+
+def synthetic_history(start="1970-01-01", end="2025-12-31", seed=0):
+    """Weekday closes following a random walk, with silver missing on some days."""
+    rng = np.random.default_rng(seed)
+    dates = np.arange(np.datetime64(start), np.datetime64(end) + 1)
+    dates = dates[np.is_busday(dates)]
+    gold = 35 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, len(dates))))
+    silver = gold / 70 * np.exp(rng.normal(0, 0.05, len(dates)))
+    silver[rng.random(len(dates)) < 0.02] = np.nan
+    return PriceHistory(dates, np.round(gold, 2), np.round(silver, 2))
+
+
+def _loop(history, dates, prices):
+    """Previous-close gold and silver prices for blank rows, one date at a time."""
+    filled = []
+    for metal in ("gold", "silver"):
+        closes, values = history.series(metal)
+        closes, values = closes.astype(int).tolist(), values.tolist()
+        out = []
+        for date, price in zip(dates.astype(int).tolist(), prices.tolist()):
+            i = bisect.bisect_right(closes, date) - 1
+            if price == 0 and i >= 0 and date - closes[i] <= MAX_GAP_DAYS:
+                price = values[i]
+            out.append(price)
+        filled.append(out)
+    return filled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--households", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    history = synthetic_history()
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ("csv", "arrow", "parquet"):
+            path = os.path.join(tmp, f"prices.{ext}")
+            history.save(path)
+            start = time.perf_counter()
+            PriceHistory.load(path)
+            print(f"load .{ext:<8} {len(history):>10,} days   {time.perf_counter() - start:>8.4f} s")
+
+    rng = np.random.default_rng(1)
+    n = args.households
+    dates = np.datetime64("1975-01-01") + rng.integers(0, 18_000, n)
+    prices = np.where(rng.random(n) < 1 / 3, np.round(rng.uniform(100, 2000, n), 2), 0.0)
+    years = YearInputs(dates, prices, np.ones(n), np.zeros(n), np.zeros(n), np.zeros(n), prices / 80)
+    for policy in POLICIES:
+        for metal in ("gold", "silver"):
+            history.breakpoints(metal, policy)   # built once per history, like the generator does
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            fill_year_inputs(years, history, policy)
+        seconds = (time.perf_counter() - start) / args.repeat
+        print(f"fill {policy:<9} {n:>10,} years  {seconds:>8.4f} s")
+    start = time.perf_counter()
+    _loop(history, dates, prices)
+    print(f"{'python loop':<14} {n:>10,} years  {time.perf_counter() - start:>8.4f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Time incremental recalculation against a full one.
+
+For each Ledger size and target a workbook is generated with synthetic
+entries (and cached results) and loaded into
+:class:`zakat_logbook.recalc.Recalculator`.  Reported:
+
+* load s    -- reading formulas and values;
+* full s    -- recalculating every formula cell, and how many results
+  differ from the cached ones written by the generator (expected 0);
+* then, per edit, the formula cells marked dirty, those re-evaluated
+  (dirty cells whose precedents kept their values are skipped), the
+  values that changed per sheet, and the time taken.
+
+The edits are one Ledger amount in the middle of the data, the same amount
+in the first data row (the longest Running Total tail) and choosing a
+person in Reports C4.
+
+    python benchmarks/recalc.py --rows 1000 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from synthetic import synthetic_ledger  # noqa: E402
+
+from zakat_logbook import LogbookOptions, generate  # noqa: E402
+from zakat_logbook import layout as L  # noqa: E402
+from zakat_logbook.recalc import Recalculator  # noqa: E402
+
+TARGETS = {"2016": False, "365": True}
+SHORT = {L.LEDGER: "ledger", L.SUMMARY: "summary", L.REPORTS: "reports"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.xlsx")
+        for rows in args.rows:
+            ledger = synthetic_ledger(rows, args.years)
+            first = L.LEDGER_FIRST_ROW
+            edits = {"amount (middle)": (L.LEDGER, f"F{first + rows // 2}", 1234.56),
+                     "amount (first)": (L.LEDGER, f"F{first}", 1234.56),
+                     "person": (L.REPORTS, "C4", ledger.recipients[0])}
+            for target, dynamic in TARGETS.items():
+                generate(path, LogbookOptions(ledger_rows=rows, dynamic_arrays=dynamic), ledger)
+                start = time.perf_counter()
+                calc = Recalculator(path)
+                load = time.perf_counter() - start
+                full = calc.recalculate_all()
+                volatile = len(set(full.changed) & set(calc.graph.volatile_cells()))
+                print(f"{rows:,} rows, {target}: {len(calc.graph.formulas):,} formulas, "
+                      f"load {load:.3f} s, full {full.seconds:.3f} s, "
+                      f"{len(full.changed) - volatile} mismatches")
+                for label, (sheet, ref, value) in edits.items():
+                    result = calc.set(sheet, ref, value)
+                    changed = ", ".join(f"{SHORT.get(name, name)} {count:,}"
+                                        for name, count in result.by_sheet().items())
+                    print(f"  {label:<16} dirty {result.dirty:>7,}  evaluated {result.evaluated:>7,}"
+                          f"  {result.seconds:>7.3f} s  ({full.seconds / result.seconds:,.0f}x)"
+                          f"  changed: {changed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare answering queries from a running server with re-reading the workbook.
+
+For each Ledger size a workbook is generated with synthetic entries and
+served by :func:`zakat_logbook.server.make_server` on a Unix socket.
+Reported, per query:
+
+* open s  -- what a tool that opens the workbook itself pays: reading the
+  logbook (:class:`zakat_logbook.server.Logbook`) and answering once;
+* served ms -- the same answer from the running server, round trip
+  included, mean of ``--repeat`` requests.
+
+    python benchmarks/server.py --rows 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from synthetic import synthetic_ledger  # noqa: E402
+
+from zakat_logbook import LogbookOptions, generate  # noqa: E402
+from zakat_logbook.server import Logbook, answer, make_server, query  # noqa: E402
+
+QUERIES = ["/period?start=2005-01-01&end=2005-12-31", "/recipients", "/hawl", "/balance"]
+
+
+class _Fresh:
+    """A cache that reads the workbook on every request, as a standalone tool does."""
+
+    def __init__(self, path):
+        self.path, self.reloads, self.error = path, 0, None
+
+    def current(self):
+        return Logbook(self.path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>9} {'query':<42} {'open s':>8} {'served ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        book, sock = os.path.join(tmp, "book.xlsx"), os.path.join(tmp, "logbook.sock")
+        for rows in args.rows:
+            generate(book, LogbookOptions(ledger_rows=rows), synthetic_ledger(rows, args.years))
+            server = make_server(book, sock, quiet=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                for target in QUERIES:
+                    start = time.perf_counter()
+                    answer(_Fresh(book), target)
+                    fresh = time.perf_counter() - start
+                    start = time.perf_counter()
+                    for _ in range(args.repeat):
+                        query(target, sock)
+                    served = (time.perf_counter() - start) / args.repeat
+                    print(f"{rows:>9,} {target:<42} {fresh:>8.3f} {served * 1000:>10.2f}"
+                          f"  ({fresh / served:,.0f}x)")
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    main()
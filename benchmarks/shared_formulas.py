@@ -0,0 +1,107 @@
+"""Compare workbooks written with and without shared formulas.
+
+For each Ledger size the workbook is generated twice, pre-filled with the
+same synthetic entries: once with repeated column formulas written as
+Excel shared formulas (the default) and once with every formula in full
+(``--no-shared-formulas``).  Reported per layout:
+
+* bytes     -- the ``.xlsx`` on disk;
+* xml       -- the uncompressed worksheet parts, which is what a
+  spreadsheet has to inflate and tokenise on open;
+* parse s   -- inflating and expat-parsing every worksheet part, the floor
+  of any reader's open time;
+* openpyxl s -- ``openpyxl.load_workbook``, when openpyxl is installed.
+  openpyxl turns every shared-formula cell back into its own formula text
+  with a regex translator, so it loads shared workbooks more slowly;
+  spreadsheet applications keep the shared formula parsed once.
+
+No spreadsheet application is available in CI, so the parse time stands in
+for the XML part of the open time.
+
+    python benchmarks/shared_formulas.py --rows 1000 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import xml.parsers.expat
+import zipfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from synthetic import synthetic_ledger  # noqa: E402
+
+from zakat_logbook import LogbookOptions, generate  # noqa: E402
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+def sheet_xml_bytes(path):
+    with zipfile.ZipFile(path) as zf:
+        return sum(info.file_size for info in zf.infolist() if info.filename.startswith("xl/worksheets/"))
+
+
+def parse_sheets(path):
+    with zipfile.ZipFile(path) as zf:
+        for name in zf.namelist():
+            if name.startswith("xl/worksheets/"):
+                parser = xml.parsers.expat.ParserCreate()
+                with zf.open(name) as stream:
+                    parser.ParseFile(stream)
+
+
+def load_openpyxl(path):
+    openpyxl.load_workbook(path).close()
+
+
+def best_of(repeat, fn, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(path, rows, ledger, shared, repeat, use_openpyxl):
+    generate(path, LogbookOptions(ledger_rows=rows, shared_formulas=shared), ledger)
+    return (os.path.getsize(path), sheet_xml_bytes(path), best_of(repeat, parse_sheets, path),
+            best_of(repeat, load_openpyxl, path) if use_openpyxl else None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-openpyxl", action="store_true",
+                        help="skip the openpyxl load even when it is installed")
+    args = parser.parse_args(argv)
+    use_openpyxl = openpyxl is not None and not args.no_openpyxl
+
+    print(f"{'rows':>9} {'formulas':>9} {'bytes':>12} {'xml':>13} {'parse s':>8} {'openpyxl s':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.xlsx")
+        for rows in args.rows:
+            ledger = synthetic_ledger(rows, args.years)
+            results = {}
+            for shared in (False, True):
+                results[shared] = measure(path, rows, ledger, shared, args.repeat, use_openpyxl)
+                size, xml, parse, load = results[shared]
+                load = f"{load:>11.3f}" if load is not None else f"{'-':>11}"
+                print(f"{rows:>9,} {'shared' if shared else 'full':>9} {size:>12,} {xml:>13,} "
+                      f"{parse:>8.3f} {load}")
+            (size, xml, parse, load), (ssize, sxml, sparse, sload) = results[False], results[True]
+            ratio = f", openpyxl {load / sload:.2f}x" if load is not None else ""
+            print(f"{'':>9} {'saved':>9} {1 - ssize / size:>11.0%} {1 - sxml / xml:>12.0%} "
+                  f"{'':>8}  parse {parse / sparse:.2f}x{ratio}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Time the whole pipeline on synthetic Ledgers of growing size.
+
+For every combination of Ledger rows and Zakat years this measures
+
+* generate  -- writing the workbook with the Ledger pre-filled;
+* load      -- reading the Ledger and Summary inputs back from the file;
+* summary   -- computing every Zakat Summary column with the engine;
+* reports   -- building the Reports cubes, the person detail index and the
+  distinct payee list;
+
+and writes the timings, the file size and the environment to JSON.  Pass
+an earlier result with ``--compare`` to print the change for each step.
+
+    python benchmarks/suite.py -o benchmarks/results.json
+    python benchmarks/suite.py --rows 1000 10000 --years 10 --compare benchmarks/results.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from synthetic import synthetic_ledger, synthetic_years  # noqa: E402
+
+from zakat_logbook import LogbookOptions, generate  # noqa: E402
+from zakat_logbook.engine import compute_summary  # noqa: E402
+from zakat_logbook.reader import read_ledger, read_year_inputs  # noqa: E402
+from zakat_logbook.reports import DetailIndex, build_cubes, distinct_recipients  # noqa: E402
+
+STEPS = ("generate", "load", "summary", "reports")
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def reports(ledger):
+    cube, fees = build_cubes(ledger)
+    details = DetailIndex(ledger)
+    for name in distinct_recipients(ledger):
+        cube.person_report(name)
+        details.positions(name)
+    fees.by_service()
+
+
+def run_case(rows, years, seed, directory):
+    ledger = synthetic_ledger(rows, years, seed)
+    inputs = synthetic_years(years, seed)
+    path = os.path.join(directory, f"bench-{rows}-{years}.xlsx")
+    result = {"rows": rows, "years": years}
+    result["generate"], _ = timed(generate, path, LogbookOptions(ledger_rows=rows, years=years),
+                                  ledger)
+    result["file_mb"] = round(os.path.getsize(path) / 1e6, 3)
+    result["load"], loaded = timed(lambda: (read_ledger(path), read_year_inputs(path)))
+    if len(loaded[0]) != rows or len(loaded[1]) != years:
+        raise SystemExit(f"read back {len(loaded[0])} rows / {len(loaded[1])} years "
+                         f"from {path}, expected {rows} / {years}")
+    result["summary"], _ = timed(compute_summary, inputs, ledger)
+    result["reports"], _ = timed(reports, ledger)
+    os.remove(path)
+    return {key: round(value, 5) if isinstance(value, float) else value
+            for key, value in result.items()}
+
+
+def environment(seed):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(__file__) or ".").stdout.strip()
+    except OSError:
+        commit = ""
+    return {"date": datetime.datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(), "seed": seed}
+
+
+def compare(results, baseline):
+    before = {(r["rows"], r["years"]): r for r in baseline["results"]}
+    print(f"\nChange against {baseline['environment'].get('commit') or 'baseline'}:")
+    for result in results:
+        old = before.get((result["rows"], result["years"]))
+        if old is None:
+            continue
+        changes = "  ".join(f"{step} {(result[step] / old[step] - 1) * 100:+6.1f}%"
+                            for step in STEPS if old.get(step))
+        print(f"{result['rows']:>10,} {result['years']:>6}  {changes}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--years", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="earlier JSON result to compare against")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'rows':>10} {'years':>6} {'MB':>8} " + " ".join(f"{s + ' s':>10}" for s in STEPS))
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            for years in args.years:
+                result = run_case(rows, years, args.seed, directory)
+                results.append(result)
+                print(f"{rows:>10,} {years:>6} {result['file_mb']:>8.1f} "
+                      + " ".join(f"{result[s]:>10.3f}" for s in STEPS), flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(args.seed), "results": results}, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
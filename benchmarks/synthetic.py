@@ -0,0 +1,62 @@
+"""Seeded synthetic Ledgers and Zakat years for the benchmarks.
+
+The mix follows a typical household: mostly Zakat and Sadaqah, some
+Fitrana and Qurbani, amounts sized per payment type, recipients and
+services drawn from the default Settings lists, and fees charged per
+service the way the providers price transfers.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from zakat_logbook import layout as L  # noqa: E402
+from zakat_logbook.data import Ledger, YearInputs  # noqa: E402
+
+TYPE_WEIGHTS = {"Zakat": 0.45, "Sadaqah": 0.40, "Fitrana": 0.10, "Qurbani": 0.05}
+# Typical amount per payment type: (median, spread) of a log-normal.
+TYPE_AMOUNTS = {"Zakat": (400, 1.0), "Sadaqah": (50, 1.2), "Fitrana": (15, 0.3),
+                "Qurbani": (250, 0.4)}
+# Fee per service: (fixed, percentage of the amount).
+SERVICE_FEES = {
+    "Remitly": (3.99, 0.0), "Western Union": (5.0, 0.01), "Wise (TransferWise)": (0.5, 0.006),
+    "PayPal": (0.30, 0.029), "Zelle": (0.0, 0.0), "Bank Transfer": (0.0, 0.0),
+    "Cash": (0.0, 0.0), "Check": (0.0, 0.0), "Venmo": (0.0, 0.0175), "CashApp": (0.0, 0.015),
+    "MoneyGram": (4.99, 0.0), "Other": (1.0, 0.0),
+}
+START = np.datetime64("2000-01-01")
+
+
+def synthetic_ledger(rows, years, seed=2024):
+    """A Ledger of ``rows`` entries spread over ``years`` years, in date order."""
+    rng = np.random.default_rng(seed)
+    dates = np.sort(START + rng.integers(0, 365 * years, rows)).astype("datetime64[D]")
+    types = rng.choice(np.array(list(TYPE_WEIGHTS), dtype=object), rows,
+                       p=list(TYPE_WEIGHTS.values()))
+    amounts = np.empty(rows)
+    for name, (median, spread) in TYPE_AMOUNTS.items():
+        mask = types == name
+        amounts[mask] = np.round(median * rng.lognormal(0.0, spread, mask.sum()), 2)
+    service = rng.integers(0, len(L.DEFAULT_SERVICES), rows)
+    services = np.array(L.DEFAULT_SERVICES, dtype=object)[service]
+    fixed, rate = np.array([SERVICE_FEES[name] for name in L.DEFAULT_SERVICES]).T
+    fees = np.round(fixed[service] + rate[service] * amounts, 2)
+    recipients = rng.choice(np.array(L.DEFAULT_RECIPIENTS, dtype=object), rows)
+    details = np.array([f"ref {i:07d}" for i in range(rows)], dtype=object)
+    return Ledger(dates, types, services, recipients, details, amounts, fees)
+
+
+def synthetic_years(years, seed=2024):
+    """One Zakat date per year with gold, stocks, cash and debts that drift over
+    time, and a silver price at a gold/silver ratio around 70."""
+    rng = np.random.default_rng(seed + 1)
+    dates = START + 364 + 365 * np.arange(years)
+    gold_price = 300 * np.cumprod(1 + rng.normal(0.05, 0.1, years))
+    return YearInputs(dates, gold_price, rng.uniform(0, 5, years),
+                      rng.uniform(5_000, 80_000, (years, len(L.STOCK_ACCOUNTS))),
+                      rng.uniform(1_000, 20_000, (years, len(L.CASH_ACCOUNTS))),
+                      rng.uniform(0, 10_000, (years, len(L.DEBT_ACCOUNTS))),
+                      gold_price / rng.uniform(50, 90, years))
@@ -0,0 +1,91 @@
+"""Compare the Excel 2016 layout with the Excel 365 dynamic-array target.
+
+For each Ledger size the workbook is generated for both targets, pre-filled
+with the same synthetic entries, and read back with
+:class:`zakat_logbook.volatile.FormulaGraph`.  Reported per target:
+
+* formulas  -- formula cells in the workbook (a spill or array formula
+  counts once), and how many of them are on Reports and the Zakat Summary;
+* bytes     -- the ``.xlsx`` on disk;
+* full      -- estimated cost of a full recalculation: every formula cell
+  once plus the cells its references read (clipped to the used area);
+* person    -- the same estimate for the cells dirtied by choosing a
+  person in Reports C4, the edit the Reports sheet exists for.
+
+No spreadsheet application is available in CI, so the cell-read estimates
+stand in for recalculation time.  They do not credit the 365 target for
+SUMIFS replacing SUMPRODUCT arrays (both read the same ranges, but SUMIFS
+builds no intermediate arrays), so they understate its advantage.
+
+    python benchmarks/targets.py --rows 1000 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from synthetic import synthetic_ledger  # noqa: E402
+
+from zakat_logbook import LogbookOptions, generate  # noqa: E402
+from zakat_logbook import layout as L  # noqa: E402
+from zakat_logbook.volatile import FormulaGraph  # noqa: E402
+
+TARGETS = {"2016": False, "365": True}
+
+
+def dirtied_by(graph, cell):
+    """Every formula cell that recalculates when ``cell`` changes."""
+    seen, queue = set(), deque([cell])
+    while queue:
+        for dep in graph.dependents(queue.popleft()):
+            if dep not in seen:
+                seen.add(dep)
+                queue.append(dep)
+    return seen
+
+
+def measure(path, rows, ledger, dynamic):
+    start = time.perf_counter()
+    generate(path, LogbookOptions(ledger_rows=rows, dynamic_arrays=dynamic), ledger)
+    seconds = time.perf_counter() - start
+    graph = FormulaGraph(path)
+    per_sheet = {name: sum(1 for sheet, _, _ in graph.formulas if sheet == name)
+                 for name in (L.REPORTS, L.SUMMARY)}
+    full = sum(graph.read_cost(cell) for cell in graph.formulas)
+    person = sum(graph.read_cost(cell) for cell in dirtied_by(graph, (L.REPORTS, 3, 4)))
+    return (len(graph.formulas), per_sheet[L.REPORTS], per_sheet[L.SUMMARY],
+            os.path.getsize(path), full, person, seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>9} {'target':>6} {'formulas':>9} {'reports':>8} {'summary':>8} "
+          f"{'bytes':>12} {'full':>14} {'person':>12} {'write s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.xlsx")
+        for rows in args.rows:
+            ledger = synthetic_ledger(rows, args.years)
+            results = {}
+            for target, dynamic in TARGETS.items():
+                results[target] = measure(path, rows, ledger, dynamic)
+                formulas, reports, summary, size, full, person, seconds = results[target]
+                print(f"{rows:>9,} {target:>6} {formulas:>9,} {reports:>8,} {summary:>8,} "
+                      f"{size:>12,} {full:>14,} {person:>12,} {seconds:>8.3f}")
+            legacy, dynamic = results["2016"], results["365"]
+            print(f"{'':>9} {'ratio':>6} {legacy[0] / dynamic[0]:>8.2f}x {legacy[1] / dynamic[1]:>7.1f}x "
+                  f"{legacy[2] / dynamic[2]:>7.1f}x {'':>12} {legacy[4] / dynamic[4]:>13.2f}x "
+                  f"{legacy[5] / dynamic[5]:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""Regenerate Zakat-LogBook.xlsx.
+
+Thin wrapper kept for the README workflow; the generator itself lives in the
+``zakat_logbook`` package.  ``python generate_zakat_logbook.py --help`` lists
+the options.
+"""
+
+from zakat_logbook.generator import VERSION, build_asset_sheet, generate, main  # noqa: F401
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from zakat_logbook import layout as L  # noqa: E402
+from zakat_logbook.data import Ledger, YearInputs, from_cents, to_cents  # noqa: E402
+from zakat_logbook.engine import (  # noqa: E402
+    RunningTotals, ZakatIndex, compute_summary, ledger_running_totals, paid_per_period,
+    paid_per_period_scan, zakat_due_cents)
+from zakat_logbook.store import LedgerStore  # noqa: E402
+
+D = datetime.date
+
+
+def ledger():
+    return Ledger.from_rows([
+        (D(2021, 5, 1), "Zakat", "Bank Transfer", "Masjid Noor", "", 100, 1),
+        (D(2021, 6, 1), "zakat", "Cash", "Abu Bakr", "", 50, None),
+        (D(2021, 6, 1), "Sadaqah", "Cash", "Abu Bakr", "", 999, 0),
+        (D(2022, 1, 1), "Zakat", "Cash", "Abu Bakr", "", 20, 0),
+        (None, "Zakat", "Cash", "Abu Bakr", "", 500, 0),
+        (D(2023, 1, 1), "Zakat", "LaunchGood", "Local Mosque", "", 250, ""),
+        (D(2024, 1, 1), "Zakat", "Cash", "Abu Bakr", "", 7, 0),
+    ])
+
+
+def years(dates, gold_price, gold_oz, stocks, cash, debts):
+    return YearInputs(np.array(dates, dtype="datetime64[D]"), gold_price, gold_oz,
+                      stocks, cash, debts)
+
+
+def test_summary_columns():
+    summary = compute_summary(years(
+        ["2021-06-01", "2022-05-21", "2023-05-10"],
+        gold_price=[1800, 1850, 2000], gold_oz=[1, 0, 2],
+        stocks=[4000, 100, 8000], cash=[2000, 0, 1000], debts=[0, 0, 1000]), ledger())
+
+    np.testing.assert_allclose(summary.gold_value, [1800, 0, 4000])
+    np.testing.assert_allclose(summary.net_assets, [7800, 100, 12000])
+    # Nisab is ROUND(E*D44, 2): 1850 * 2.7315 = 5053.275 rounds up.
+    np.testing.assert_array_equal(summary.nisab, [4916.70, 5053.28, 5463.00])
+    np.testing.assert_allclose(summary.zakat_due, [195, 0, 300])
+    # Case-insensitive "Zakat" rows only; undated and later rows never count.
+    np.testing.assert_allclose(summary.paid, [151, 20, 250])
+    np.testing.assert_allclose(summary.balance, [44, np.nan, 50])
+    assert list(summary.status) == [L.PARTIALLY_PAID, "", L.PARTIALLY_PAID]
+    np.testing.assert_allclose(summary.brought_forward, [0, 44, 0])
+
+
+def test_blank_rows():
+    summary = compute_summary(years(
+        ["2021-06-01", "NaT", "2023-05-10"],
+        gold_price=[1800, 0, 2000], gold_oz=[1, 0, 2],
+        stocks=[4000, 0, 8000], cash=[2000, 0, 1000], debts=[0, 0, 1000]), ledger())
+
+    # The row after a blank date has the text criterion ">" and takes nothing.
+    np.testing.assert_allclose(summary.paid, [151, np.nan, 0])
+    np.testing.assert_allclose(summary.balance, [44, np.nan, 300])
+    assert list(summary.status) == [L.PARTIALLY_PAID, "", L.NOT_STARTED]
+    np.testing.assert_allclose(summary.brought_forward, [0, np.nan, 0])
+    rows = list(summary.rows())
+    assert rows[1]["dates"] is None and rows[1]["paid"] is None and rows[1]["status"] is None
+
+
+def test_brought_forward_carries_balance():
+    summary = compute_summary(years(
+        ["2021-06-01", "2022-05-21", "2023-05-10"],
+        gold_price=[1800, 1850, 2000], gold_oz=[1, 1, 2],
+        stocks=[4000, 10000, 8000], cash=[2000, 2150, 1000], debts=[0, 0, 1000]), ledger())
+
+    np.testing.assert_allclose(summary.zakat_due, [195, 350, 300])
+    # Each due row carries the unpaid balance of the rows above.
+    np.testing.assert_allclose(summary.balance, [44, 374, 424])
+    np.testing.assert_allclose(summary.brought_forward, [0, 44, 374])
+    assert list(summary.status) == [L.PARTIALLY_PAID] * 3
+
+
+def test_paid_in_full_and_no_ledger():
+    inputs = years(["2021-06-01"], gold_price=[1800], gold_oz=[1],
+                   stocks=[4000], cash=[2000], debts=[0])
+    assert list(compute_summary(inputs).status) == [L.NOT_STARTED]
+    rows = [(D(2021, 6, 1), "Zakat", "Cash", "Abu Bakr", "", 195, 0)]
+    summary = compute_summary(inputs, Ledger.from_rows(rows))
+    assert list(summary.status) == [L.PAID_IN_FULL]
+    np.testing.assert_allclose(summary.balance, [0])
+
+
+def test_paid_per_period_windows():
+    dates = np.array(["2021-05-31", "2021-06-01", "2023-12-31"], dtype="datetime64[D]")
+    np.testing.assert_allclose(paid_per_period(dates, ledger()), [101, 50, 270])
+
+
+def test_paid_per_period_matches_scan():
+    rng = np.random.default_rng(3)
+    n = 300
+    days = rng.integers(0, 2000, n)
+    rows = Ledger(np.datetime64("2019-01-01") + days, rng.choice(["Zakat", "ZAKAT", "Sadaqah"], n),
+                  [""] * n, [""] * n, [""] * n, rng.integers(1, 500, n), rng.integers(0, 5, n))
+    rows.dates[::37] = np.datetime64("NaT")
+    dates = np.datetime64("2019-03-01") + np.sort(rng.choice(2000, 8, replace=False))
+    dates[4] = np.datetime64("NaT")
+    expected = paid_per_period_scan(dates, rows)
+    np.testing.assert_allclose(paid_per_period(dates, rows), expected)
+    np.testing.assert_allclose(paid_per_period(dates, ZakatIndex(rows)), expected)
+
+
+def test_out_of_order_dates_take_nothing():
+    """A Summary date on or before the row above has an empty window, as
+    SUMIFS and the store see it, never a negative total."""
+    dates = np.array(["2022-01-01", "2021-06-01", "2021-06-01", "2023-12-31", "2023-12-31",
+                      "2021-01-01"], dtype="datetime64[D]")
+    expected = [171, 0, 0, 270, 0, 0]
+    np.testing.assert_array_equal(paid_per_period_scan(dates, ledger()), expected)
+    np.testing.assert_array_equal(paid_per_period(dates, ledger()), expected)
+    with LedgerStore() as store:
+        store.add_ledger(ledger())
+        assert store.paid_per_period(dates) == expected
+
+
+def test_running_totals_match_full_recompute():
+    rng = np.random.default_rng(9)
+    totals = list(rng.choice([0.0, 12.5, 40.0, 99.99], 30))
+    running = RunningTotals(totals)
+    np.testing.assert_allclose(running.values, ledger_running_totals(totals))
+    for _ in range(200):
+        op = rng.integers(3)
+        value = float(rng.choice([0.0, 5.25, 60.0, 1000.0]))
+        if op == 0:
+            new = list(rng.choice([0.0, 7.5], rng.integers(1, 4)))
+            running.append(new)
+            totals += new
+        elif op == 1:
+            index = int(rng.integers(len(totals)))
+            running.set(index, value)
+            totals[index] = value
+        else:
+            index = int(rng.integers(len(totals) + 1))
+            running.insert(index, [value])
+            totals.insert(index, value)
+        np.testing.assert_allclose(running.values, ledger_running_totals(totals))
+    np.testing.assert_allclose(running.totals, totals)
+    with pytest.raises(IndexError):
+        running.set(len(totals), 1.0)
+
+
+def test_to_cents_rounds_halves_away_from_zero():
+    # 1.005 and 2.675 are stored just below the half cent; ROUND still rounds them up.
+    dollars = [1.005, -1.005, 2.675, 0.125, -0.125, 0.124999, 19.99, 0.0, 1e9 + 0.01]
+    assert to_cents(dollars).tolist() == [101, -101, 268, 13, -13, 12, 1999, 0, 100000000001]
+    assert to_cents(np.float64(0.1) + 0.2).item() == 30
+    assert from_cents(np.array([101, -5])).tolist() == [1.01, -0.05]
+
+
+def test_zakat_due_cents():
+    # 2.5% of 20 cents is half a cent, which rounds away from zero.
+    net = np.array([0, 1, 19, 20, 60, 100, -20, 1_000_020, 40 * 10**15])
+    assert zakat_due_cents(net).tolist() == [0, 0, 0, 1, 2, 3, -1, 25001, 10**15]
+
+
+def test_half_cent_zakat_due():
+    """10000.20 * 2.5% is 250.005 -- 250.00499... in floating point -- and
+    Zakat Due is 250.01, as ROUND(H*2.5%, 2) gives."""
+    summary = compute_summary(years(["2024-01-01"], gold_price=[0], gold_oz=[0],
+                                    stocks=[10000.20], cash=[0], debts=[0]))
+    assert summary.zakat_due.tolist() == [250.01]
+    assert summary.balance.tolist() == [250.01]
+
+
+def test_ledger_cents_are_exact():
+    n = 100_000
+    book = Ledger(np.full(n, np.datetime64("2024-01-01")), ["Zakat"] * n, [""] * n, [""] * n,
+                  [""] * n, np.full(n, 0.1), np.full(n, 0.2))
+    assert book.total_cents.sum() == 30 * n
+    inputs = years(["2024-01-01"], gold_price=[0], gold_oz=[0], stocks=[0], cash=[0], debts=[0])
+    assert compute_summary(inputs, book).paid.tolist() == [30_000.0]
+    running = RunningTotals(book.totals)
+    for i in range(0, n, 997):
+        running.set(i, 0.35)
+        running.set(i, 0.3)
+    assert running.values[-1] == 30_000.0
+
+
+def test_years_must_be_year_inputs():
+    with pytest.raises(TypeError):
+        compute_summary([])
@@ -0,0 +1,92 @@
+"""Umm al-Qura conversions against the month-length table."""
+
+import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from zakat_logbook.hijri import (add_years, gregorian_date, hijri_date, labels, next_hawl,  # noqa: E402
+                                 to_gregorian, to_hijri)
+from zakat_logbook.ummalqura import (FIRST_DATE, FIRST_YEAR, LAST_DATE, MONTH_LENGTHS,  # noqa: E402
+                                     MONTHS)
+
+ALL_DAYS = np.arange(np.datetime64(FIRST_DATE), np.datetime64(LAST_DATE) + 1)
+
+
+def test_every_day_round_trips():
+    years, months, days = to_hijri(ALL_DAYS)
+    assert (years >= FIRST_YEAR).all()
+    assert (to_gregorian(years, months, days) == ALL_DAYS).all()
+
+
+def test_every_hijri_date_round_trips():
+    month = np.repeat(np.arange(MONTHS), MONTH_LENGTHS)
+    day = np.concatenate([np.arange(1, n + 1) for n in MONTH_LENGTHS])
+    dates = to_gregorian(FIRST_YEAR + month // 12, month % 12 + 1, day)
+    assert (dates == ALL_DAYS).all()
+    years, months, days = to_hijri(dates)
+    assert (years == FIRST_YEAR + month // 12).all()
+    assert (months == month % 12 + 1).all()
+    assert (days == day).all()
+
+
+def test_known_dates():
+    assert hijri_date(FIRST_DATE) == (1343, 1, 1)
+    assert hijri_date(datetime.date(2025, 3, 1)) == (1446, 9, 1)
+    assert gregorian_date(1446, 9, 1) == datetime.date(2025, 3, 1)
+    assert labels(np.array(["2025-03-01", "NaT"], dtype="datetime64[D]")).tolist() == [
+        "1 Ramadan 1446", ""]
+
+
+def test_outside_the_table():
+    before = FIRST_DATE - datetime.timedelta(days=1)
+    after = LAST_DATE + datetime.timedelta(days=1)
+    assert hijri_date(before) is None and hijri_date(after) is None
+    assert np.isnat(to_gregorian([1446], [13], [1])[0])
+    with pytest.raises(ValueError):
+        gregorian_date(1342, 12, 29)
+    assert next_hawl(after) is None
+    assert next_hawl(after, 354) == after + datetime.timedelta(days=354)
+    assert np.isnat(add_years(np.array([LAST_DATE], dtype="datetime64[D]"))[0])
+
+
+def test_add_years_keeps_the_day():
+    """Same month a year on, on the same day or the target month's last."""
+    dates = ALL_DAYS[ALL_DAYS <= np.datetime64(LAST_DATE) - 400]
+    year, month, day = to_hijri(dates)
+    later_year, later_month, later_day = to_hijri(add_years(dates))
+    assert (later_year == year + 1).all()
+    assert (later_month == month).all()
+    length = np.array(MONTH_LENGTHS)[(later_year - FIRST_YEAR) * 12 + later_month - 1]
+    assert (later_day == np.minimum(day, length)).all()
+
+
+def test_add_years_moves_the_30th_to_the_29th():
+    shorter = next(m for m in range(MONTHS - 12)
+                   if MONTH_LENGTHS[m] == 30 and MONTH_LENGTHS[m + 12] == 29)
+    year, month = FIRST_YEAR + shorter // 12, shorter % 12 + 1
+    start = gregorian_date(year, month, 30)
+    due = next_hawl(start)
+    assert hijri_date(due) == (year + 1, month, 29)
+    assert add_years(np.array([start], dtype="datetime64[D]"), 2)[0] == np.datetime64(
+        gregorian_date(year + 2, month, min(30, MONTH_LENGTHS[shorter + 24])))
+
+
+def test_hawl_tracker_formula_agrees(tmp_path):
+    """The workbook's next due date is :func:`next_hawl`, the 30th included."""
+    from zakat_logbook import LogbookOptions, generate
+    from zakat_logbook import layout as L
+    from zakat_logbook.recalc import Recalculator
+    from zakat_logbook.formula import to_serial
+
+    shorter = [m for m in range(1200, MONTHS - 12)
+               if MONTH_LENGTHS[m] == 30 and MONTH_LENGTHS[m + 12] == 29][:3]
+    starts = [gregorian_date(FIRST_YEAR + m // 12, m % 12 + 1, 30) for m in shorter]
+    starts += [datetime.date(2024, 6, 16), LAST_DATE]
+    calc = Recalculator(generate(tmp_path / "logbook.xlsx", LogbookOptions(years=1)),
+                        datetime.date.today())
+    row = L.hawl_row(1) + 3
+    for start in starts:
+        calc.update({(L.SUMMARY, f"A{L.SUMMARY_FIRST_ROW}"): start})
+        assert calc.value(L.SUMMARY, f"C{row}") == to_serial(next_hawl(start, L.HAWL_DAYS))
@@ -0,0 +1,94 @@
+"""CSV import into a LedgerStore and its de-duplication."""
+
+import csv
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from zakat_logbook.importer import (ImportOptions, Rejected, import_csv, parse_money,  # noqa: E402
+                                    row_key)
+from zakat_logbook.store import LedgerStore  # noqa: E402
+
+HEADER = ("Posting Date", "Description", "Memo", "Amount")
+OPTIONS = ImportOptions({"date": "Posting Date", "given_to": "Description", "details": "Memo",
+                         "amount": "Amount"}, {"type": "Sadaqah", "service": "Bank Transfer"},
+                        date_format="%m/%d/%Y", chunk_rows=2)
+JAN = [
+    ("01/03/2024", "Local Mosque", "Jumu'ah", "-20.00"),
+    ("01/03/2024", "Local Mosque", "Jumu'ah", "-20.00"),     # the same gift twice that day
+    ("01/05/2024", "LaunchGood", "Gaza appeal", "(150.00)"),
+    ("01/09/2024", "Zakat Foundation", "", "$1,200.00"),
+]
+
+
+def write(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return path
+
+
+def imported(store, rows, tmp_path, name="statement.csv", **kwargs):
+    return import_csv(write(tmp_path / name, rows), store, OPTIONS, **kwargs)
+
+
+def test_reimport_adds_nothing(tmp_path):
+    with LedgerStore() as store:
+        first = imported(store, JAN, tmp_path)
+        assert (first.read, first.added, first.duplicates, first.rejected) == (4, 4, 0, 0)
+        again = imported(store, JAN, tmp_path)
+        assert (again.read, again.added, again.duplicates) == (4, 0, 4)
+        assert len(store) == 4
+
+
+def test_overlapping_statement_adds_only_new_rows(tmp_path):
+    with LedgerStore() as store:
+        imported(store, JAN[:3], tmp_path)
+        result = imported(store, JAN[1:] + [("01/12/2024", "Local Mosque", "Jumu'ah", "-20.00")],
+                          tmp_path, "overlap.csv")
+        assert (result.added, result.duplicates) == (2, 2)
+        assert len(store) == 5
+
+
+def test_repeated_rows_count_by_occurrence(tmp_path):
+    """A third identical payment on the same day is new; the first two are not."""
+    with LedgerStore() as store:
+        imported(store, JAN, tmp_path)
+        result = imported(store, JAN[:2] * 2, tmp_path, "three.csv")
+        assert (result.added, result.duplicates) == (2, 2)
+        assert len(store) == 6
+
+
+def test_spelling_and_case_do_not_make_rows_new(tmp_path):
+    with LedgerStore() as store:
+        imported(store, JAN, tmp_path)
+        shouted = [(d, name.upper(), memo.upper(), amount.strip("-()"))
+                   for d, name, memo, amount in JAN]
+        result = imported(store, shouted, tmp_path, "shouted.csv")
+        assert (result.added, result.duplicates) == (0, 4)
+        assert store.to_ledger().recipients.tolist()[0] == "Local Mosque"
+
+
+def test_rejected_rows_are_reported(tmp_path):
+    rows = JAN[:1] + [("2024-01-04", "Local Mosque", "", "5"), ("01/04/2024", "Nobody", "", "5"),
+                      ("01/04/2024", "Local Mosque", "", "0")]
+    with LedgerStore() as store:
+        result = imported(store, rows, tmp_path, rejects=tmp_path / "rejects.csv")
+        assert (result.read, result.added, result.rejected, result.duplicates) == (4, 1, 3, 0)
+    with open(tmp_path / "rejects.csv", newline="", encoding="utf-8") as f:
+        rejects = list(csv.reader(f))
+    assert rejects[0] == ["line", "reason", *HEADER]
+    assert [r[0] for r in rejects[1:]] == ["3", "4", "5"]
+
+
+def test_row_key_and_money():
+    row = ("2024-01-03", "Sadaqah", "Bank Transfer", "Local Mosque", "", 20.0, 0.0)
+    assert row_key(row, 1) != row_key(row, 2)
+    assert row_key(row, 1) == row_key(tuple(v.upper() if isinstance(v, str) else v for v in row), 1)
+    assert parse_money("$1,234.50") == 1234.5
+    assert parse_money("(12.00)") == -12.0
+    assert parse_money(" ") == 0.0
+    with pytest.raises(Rejected):
+        parse_money("n/a")
@@ -0,0 +1,87 @@
+"""PriceHistory.lookup under each policy, at the ties and gap limits."""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from zakat_logbook.data import YearInputs  # noqa: E402
+from zakat_logbook.prices import MAX_GAP_DAYS, PriceHistory, fill_year_inputs  # noqa: E402
+
+DAY0 = np.datetime64("2024-01-01")
+
+
+def history():
+    """Gold closes on days 0, 4 and 20; silver only on day 4."""
+    dates = DAY0 + np.array([0, 4, 20])
+    return PriceHistory(dates, [100.0, 200.0, 300.0], [math.nan, 2.0, math.nan])
+
+
+def lookup(days, policy, metal="gold", max_gap=MAX_GAP_DAYS):
+    return history().lookup(DAY0 + np.array(days), metal, policy, max_gap).tolist()
+
+
+def nan(values):
+    return [None if v != v else v for v in values]
+
+
+def test_previous():
+    assert nan(lookup([-1, 0, 3, 4, 11, 12, 20, 27, 28], "previous")) == [
+        None, 100.0, 100.0, 200.0, 200.0, None, 300.0, 300.0, None]
+
+
+def test_nearest_tie_goes_to_the_earlier_close():
+    assert nan(lookup([1, 2, 3], "nearest")) == [100.0, 100.0, 200.0]
+    assert nan(lookup([11, 12, 13], "nearest")) == [200.0, None, 300.0]
+
+
+def test_nearest_gap_edges():
+    """Exactly ``max_gap`` days from the close is found, one more is not."""
+    assert nan(lookup([-8, -7, 27, 28], "nearest")) == [None, 100.0, 300.0, None]
+    assert nan(lookup([-3, -2, 24, 25], "nearest", max_gap=2)) == [None, 100.0, None, None]
+
+
+def test_missing_closes_are_skipped():
+    assert nan(lookup([0, 4, 11, 12], "previous", "silver")) == [None, 2.0, 2.0, None]
+    assert nan(lookup([-4, -3, 11, 12], "nearest", "silver")) == [None, 2.0, 2.0, None]
+
+
+@pytest.mark.parametrize("policy", ("previous", "nearest"))
+def test_matches_a_scan(policy):
+    rng = np.random.default_rng(3)
+    dates = np.unique(DAY0 + rng.integers(0, 400, 120))
+    prices = np.round(rng.uniform(10, 20, len(dates)), 2)
+    days = DAY0 - 20 + np.arange(450)
+    found = PriceHistory(dates, prices).lookup(days, "gold", policy)
+    for day, price in zip(days, found):
+        gap = (day - dates).astype(int)
+        if policy == "previous":
+            candidates = np.flatnonzero(gap >= 0)
+            i = candidates[-1] if len(candidates) else None
+        else:
+            i = int(np.argmin(np.abs(gap)))     # the first, so the earlier close on a tie
+        if i is None or abs(gap[i]) > MAX_GAP_DAYS:
+            assert math.isnan(price)
+        else:
+            assert price == prices[i]
+
+
+def test_blank_dates_and_policy_check():
+    assert math.isnan(history().lookup(np.array(["NaT"], dtype="datetime64[D]"))[0])
+    with pytest.raises(ValueError):
+        history().lookup(np.array([DAY0]), policy="next")
+
+
+def test_fill_keeps_typed_prices():
+    years = YearInputs(DAY0 + np.array([3, 3, 30]), [0.0, 150.0, 0.0], [], [], [], [], [])
+    filled = fill_year_inputs(years, history(), "nearest")
+    assert filled.gold_price.tolist() == [200.0, 150.0, 0.0]
+    assert filled.silver_price.tolist() == [2.0, 2.0, 0.0]
+
+
+def test_csv_round_trip(tmp_path):
+    path = history().save(tmp_path / "prices.csv")
+    loaded = PriceHistory.load(path)
+    assert (loaded.dates == history().dates).all()
+    assert nan(loaded.silver.tolist()) == [None, 2.0, None]
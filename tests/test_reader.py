@@ -0,0 +1,134 @@
+"""Round trips through the streaming reader."""
+
+import datetime
+import re
+import zipfile
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from zakat_logbook import LogbookOptions, generate  # noqa: E402
+from zakat_logbook import layout as L  # noqa: E402
+from zakat_logbook.data import Ledger  # noqa: E402
+from zakat_logbook.reader import (  # noqa: E402
+    AssetRecord, iter_assets, iter_rows, read_ledger, read_settings_lists, read_year_inputs)
+
+D = datetime.date
+
+ROWS = [
+    (D(2021, 5, 1), "Zakat", "Bank Transfer", "Masjid Noor", "Ramadan <food> & rent", 100.0, 1.5),
+    (D(1900, 3, 1), "Sadaqah", "Cash", "Abu Bakr", "", 0.1, 0.2),
+    (None, "", "", "", "", 0.0, 0.0),
+    (None, "Zakat", "Cash", "مسجد", "no date", 20.0, 0.0),
+    (D(2024, 2, 29), "zakat", "", "", "  leading space", 0.0, 12.0),
+]
+
+
+def excel_saved(src, dst):
+    """Copy ``src`` moving every inline string into a shared string table,
+    as Excel does when it saves; odd entries are written as rich-text runs
+    with a phonetic run that is not part of the value."""
+    strings = {}
+
+    def shared(match):
+        index = strings.setdefault(match.group(2), len(strings))
+        return f'{match.group(1)} t="s"><v>{index}</v></c>'
+
+    inline = re.compile(r'(<c r="[A-Z]+\d+"(?: s="\d+")?) t="inlineStr"><is><t[^>]*>(.*?)</t></is></c>',
+                        re.DOTALL)
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst, "w") as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename.startswith("xl/worksheets/"):
+                data = inline.sub(shared, data.decode()).encode()
+            elif item.filename == "xl/_rels/workbook.xml.rels":
+                data = data.replace(b"</Relationships>", (
+                    b'<Relationship Id="rIdSST" Type="http://schemas.openxmlformats.org/'
+                    b'officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+                    b"</Relationships>"))
+            zout.writestr(item, data)
+        items = []
+        for text, index in strings.items():
+            if index % 2:
+                items.append(f'<si><r><t xml:space="preserve">{text}</t></r>'
+                             f'<rPh sb="0" eb="1"><t>PHONETIC</t></rPh></si>')
+            else:
+                items.append(f'<si><t xml:space="preserve">{text}</t></si>')
+        zout.writestr("xl/sharedStrings.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            f'count="{len(items)}" uniqueCount="{len(items)}">{"".join(items)}</sst>'))
+    return dst
+
+
+@pytest.fixture(params=["inline", "shared"])
+def workbook(request, tmp_path):
+    path = generate(tmp_path / "logbook.xlsx", LogbookOptions(ledger_rows=12),
+                    Ledger.from_rows(ROWS))
+    if request.param == "shared":
+        path = excel_saved(path, tmp_path / "saved.xlsx")
+    return path
+
+
+def test_ledger_round_trip(workbook):
+    back = read_ledger(workbook)
+    assert len(back) == len(ROWS)
+    expected = Ledger.from_rows(ROWS)
+    np.testing.assert_array_equal(back.dates, expected.dates)
+    for name in ("types", "services", "recipients", "details"):
+        assert getattr(back, name).tolist() == getattr(expected, name).tolist()
+    assert back.amounts.tolist() == expected.amounts.tolist()
+    assert back.fees.tolist() == expected.fees.tolist()
+
+
+def test_date_serials_and_columns(workbook):
+    cells = dict(iter_rows(workbook, L.LEDGER, {L.L_DATE, L.L_AMOUNT}))
+    first = cells[L.LEDGER_FIRST_ROW]
+    assert set(first) == {L.L_DATE, L.L_AMOUNT}
+    assert first[L.L_DATE] == (D(2021, 5, 1) - D(1899, 12, 30)).days
+    assert isinstance(first[L.L_DATE], int) and first[L.L_AMOUNT] == 100
+
+
+def test_settings_lists(workbook):
+    types, services, recipients = read_settings_lists(workbook)
+    assert types == L.DEFAULT_TYPES and services == L.DEFAULT_SERVICES
+    assert recipients == L.DEFAULT_RECIPIENTS
+
+
+def test_year_inputs_of_a_new_workbook(tmp_path):
+    """Every Summary year row is read, however many the workbook has."""
+    for years in (1, 7):
+        path = generate(tmp_path / f"{years}.xlsx", LogbookOptions(ledger_rows=5, years=years))
+        for book in (path, excel_saved(path, tmp_path / f"{years}-saved.xlsx")):
+            inputs = read_year_inputs(book)
+            assert len(inputs) == years and np.isnat(inputs.dates).all()
+            for name in ("gold_price", "gold_oz", "stocks", "cash", "debts"):
+                assert getattr(inputs, name).tolist() == [0.0] * years
+
+
+def test_asset_round_trip(tmp_path):
+    """Renamed accounts, a blank year row and a dateless row come back as
+    written, and the Summary inputs take the totals row by row."""
+    assets = {
+        L.STOCKS: [AssetRecord(L.STOCKS, L.ASSET_FIRST_ROW, D(2021, 6, 1),
+                               {"Brokerage": 1000.5, "Pension": 250.0}, 1250.5),
+                   AssetRecord(L.STOCKS, L.ASSET_FIRST_ROW + 2, D(2023, 5, 10),
+                               {"Brokerage": 0.0, "Pension": 75.25}, 75.25)],
+        L.DEBTS: [AssetRecord(L.DEBTS, L.ASSET_FIRST_ROW + 1, None, {"Car loan": 300.0}, 300.0)],
+    }
+    path = generate(tmp_path / "logbook.xlsx", LogbookOptions(ledger_rows=5, years=2),
+                    assets=assets)
+    for book in (path, excel_saved(path, tmp_path / "saved.xlsx")):
+        for sheet, records in assets.items():
+            assert list(iter_assets(book, sheet)) == records
+        inputs = read_year_inputs(book)
+        assert len(inputs) == 3
+        assert inputs.stocks.tolist() == [1250.5, 0.0, 75.25]
+        assert inputs.debts.tolist() == [0.0, 300.0, 0.0]
+        assert inputs.cash.tolist() == [0.0] * 3
+
+
+def test_missing_sheet(workbook):
+    with pytest.raises(KeyError):
+        list(iter_rows(workbook, "No Such Sheet"))
@@ -0,0 +1,149 @@
+"""The generated formulas, evaluated by :mod:`zakat_logbook.recalc`, agree
+with the engine's cached results for every generator option."""
+
+import datetime
+import io
+import itertools
+import zipfile
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from zakat_logbook import LogbookOptions, generate  # noqa: E402
+from zakat_logbook import layout as L  # noqa: E402
+from zakat_logbook.data import Ledger, YearInputs  # noqa: E402
+from zakat_logbook.engine import compute_summary  # noqa: E402
+from zakat_logbook.generator import ASSET_SOURCES  # noqa: E402
+from zakat_logbook.prices import PriceHistory  # noqa: E402
+from zakat_logbook.reader import AssetRecord  # noqa: E402
+from zakat_logbook.recalc import Recalculator, check  # noqa: E402
+
+ZAKAT_DATES = [datetime.date(2021, 6, 1), datetime.date(2022, 5, 21), datetime.date(2023, 5, 10)]
+GOLD = [1850.0, 1820.0, 2010.0]
+SILVER = [27.5, 0.0, 24.0]
+
+
+def ledger():
+    rng = np.random.default_rng(7)
+    rows = 40
+    dates = np.sort(np.datetime64("2020-09-01") + rng.integers(0, 1000, rows))
+    names = np.array(L.DEFAULT_RECIPIENTS[:3] + ["Masjid Noor", "masjid noor", "Abu Bakr"],
+                     dtype=object)
+    return Ledger(dates, rng.choice(np.array(L.DEFAULT_TYPES, dtype=object), rows),
+                  rng.choice(np.array(L.DEFAULT_SERVICES, dtype=object), rows),
+                  rng.choice(names, rows), np.array([f"ref {i}" for i in range(rows)], dtype=object),
+                  np.round(rng.uniform(5, 900, rows), 2), np.round(rng.uniform(0, 9, rows), 2))
+
+
+def assets():
+    records = {}
+    for sheet, accounts, _ in ASSET_SOURCES:
+        records[sheet] = []
+        for i, date in enumerate(ZAKAT_DATES):
+            balances = {a: 1000.0 * (i + 1) + 10 * j for j, a in enumerate(accounts)}
+            records[sheet].append(AssetRecord(sheet, L.ASSET_FIRST_ROW + i, date, balances,
+                                              sum(balances.values())))
+    return records
+
+
+def price_history():
+    days = np.arange(np.datetime64("2021-01-04"), np.datetime64("2023-12-30"), 3)
+    gold = 1800 + np.arange(len(days)) * 0.5
+    return PriceHistory(days, gold, gold / 75)
+
+
+def recalculated(path):
+    calc = Recalculator(path, datetime.date.today())    # the day the results were cached
+    changed = calc.recalculate_all().changed
+    assert calc.unsupported == {}
+    assert changed == {}
+    return calc
+
+
+OPTIONS = list(itertools.product(("sumifs", "sorted"), ("match", "direct"), (False, True),
+                                 (True, False)))
+
+
+@pytest.mark.parametrize("paid_lookup, asset_refs, dynamic_arrays, shared_formulas", OPTIONS)
+def test_cached_values_match_formulas(tmp_path, paid_lookup, asset_refs, dynamic_arrays,
+                                      shared_formulas):
+    options = LogbookOptions(ledger_rows=60, years=4, paid_lookup=paid_lookup,
+                             asset_refs=asset_refs, dynamic_arrays=dynamic_arrays,
+                             shared_formulas=shared_formulas)
+    recalculated(generate(tmp_path / "logbook.xlsx", options, ledger(), assets()))
+
+
+@pytest.mark.parametrize("policy", L.PRICE_POLICIES)
+@pytest.mark.parametrize("method", L.NISAB_METHODS)
+def test_prices_and_nisab_methods(tmp_path, policy, method):
+    options = LogbookOptions(ledger_rows=60, years=4, price_policy=policy, nisab_method=method)
+    recalculated(generate(tmp_path / "logbook.xlsx", options, ledger(), assets(),
+                          prices=price_history()))
+
+
+@pytest.mark.parametrize("dynamic_arrays", (False, True))
+@pytest.mark.parametrize("method", L.NISAB_METHODS)
+def test_typed_years_match_engine(tmp_path, dynamic_arrays, method):
+    """Zakat years typed into the Summary give the engine's figures."""
+    options = LogbookOptions(ledger_rows=60, years=4, dynamic_arrays=dynamic_arrays,
+                             nisab_method=method)
+    book, records = ledger(), assets()
+    calc = recalculated(generate(tmp_path / "logbook.xlsx", options, book, records))
+    edits = {}
+    for i, date in enumerate(ZAKAT_DATES):
+        row = L.SUMMARY_FIRST_ROW + i
+        edits.update({(L.SUMMARY, f"A{row}"): date, (L.SUMMARY, f"E{row}"): GOLD[i],
+                      (L.SUMMARY, f"F{row}"): 1.5, (L.SUMMARY, f"P{row}"): SILVER[i] or None})
+    calc.update(edits)
+
+    totals = [[r.total for r in records[sheet]] for sheet in (L.STOCKS, L.CASH, L.DEBTS)]
+    years = YearInputs(ZAKAT_DATES, GOLD, [1.5] * 3, *totals, SILVER)
+    summary = compute_summary(years, book, method=method)
+    for i in range(len(ZAKAT_DATES)):
+        row = L.SUMMARY_FIRST_ROW + i
+        for col, field in (("H", "net_assets"), ("I", "nisab"), ("J", "zakat_due"),
+                           ("K", "paid"), ("L", "balance"), ("M", "status")):
+            expected = getattr(summary, field)[i]
+            if isinstance(expected, str):
+                assert calc.value(L.SUMMARY, f"{col}{row}") == expected
+            else:
+                assert calc.value(L.SUMMARY, f"{col}{row}") == pytest.approx(float(expected))
+
+
+def test_unsupported_function_is_reported_per_cell(tmp_path):
+    """A function the evaluator lacks gives #NAME? in that cell only, and
+    the rest of the workbook is still recalculated and checked."""
+    path = generate(tmp_path / "logbook.xlsx", LogbookOptions(ledger_rows=20), ledger(), assets())
+    edited = tmp_path / "edited.xlsx"
+    with zipfile.ZipFile(path) as zin, zipfile.ZipFile(edited, "w") as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename.startswith("xl/worksheets/"):
+                data = data.replace(b"TODAY()", b"NOWISH()")
+            zout.writestr(item, data)
+    calc = Recalculator(edited, datetime.date.today())
+    changed = calc.recalculate_all().changed
+    assert list(calc.unsupported.values()) == ["unsupported function NOWISH"]
+    assert set(changed) == set(calc.unsupported)
+    assert all(str(value) == "#NAME?" for value in changed.values())
+    out = io.StringIO()
+    check(calc, out=out)
+    assert "NOWISH" in out.getvalue()
+
+
+@pytest.mark.parametrize("dynamic_arrays", (False, True))
+@pytest.mark.parametrize("paid_lookup", ("sumifs", "sorted"))
+def test_out_of_order_years_pay_nothing(tmp_path, paid_lookup, dynamic_arrays):
+    """A Zakat date on or before the row above has an empty Paid This
+    Period window in both lookups, as in the engine."""
+    options = LogbookOptions(ledger_rows=60, years=4, paid_lookup=paid_lookup,
+                             dynamic_arrays=dynamic_arrays)
+    book = ledger()
+    calc = recalculated(generate(tmp_path / "logbook.xlsx", options, book, assets()))
+    dates = [ZAKAT_DATES[2], ZAKAT_DATES[0], ZAKAT_DATES[0], ZAKAT_DATES[1]]
+    calc.update({(L.SUMMARY, f"A{L.SUMMARY_FIRST_ROW + i}"): date for i, date in enumerate(dates)})
+    expected = compute_summary(YearInputs(dates, [], [], [], [], []), book).paid
+    assert expected[1] == expected[2] == 0 and expected[0] > 0
+    for i, paid in enumerate(expected):
+        assert calc.value(L.SUMMARY, f"K{L.SUMMARY_FIRST_ROW + i}") == pytest.approx(paid)
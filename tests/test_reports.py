@@ -0,0 +1,50 @@
+"""The Reports person list and the engine's distinct recipients."""
+
+import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from zakat_logbook import LogbookOptions, generate  # noqa: E402
+from zakat_logbook import layout as L  # noqa: E402
+from zakat_logbook.data import Ledger  # noqa: E402
+from zakat_logbook.recalc import Recalculator  # noqa: E402
+from zakat_logbook.reports import distinct_recipients, unlisted_recipients  # noqa: E402
+
+NAMES = ["Masjid Noor", "Local Mosque", "abu bakr", "masjid noor", "", "Abu Bakr", "LaunchGood"]
+
+
+def ledger(names=NAMES):
+    n = len(names)
+    return Ledger(np.datetime64("2023-01-01") + np.arange(n), ["Zakat"] * n, ["Cash"] * n, names,
+                  [""] * n, np.full(n, 10.0), np.zeros(n))
+
+
+def test_distinct_recipients():
+    assert distinct_recipients(ledger()) == ["abu bakr", "LaunchGood", "Local Mosque", "Masjid Noor"]
+    assert unlisted_recipients(ledger(), L.DEFAULT_RECIPIENTS) == ["abu bakr", "Masjid Noor"]
+    assert distinct_recipients(ledger([])) == []
+
+
+def test_person_list_follows_edits(tmp_path):
+    """Settings recipients found on the Ledger come first, then the other
+    names, one slot each, and edits to either sheet move the list."""
+    book = ledger()
+    path = generate(tmp_path / "logbook.xlsx", LogbookOptions(ledger_rows=20), book)
+    calc = Recalculator(path, datetime.date.today())
+    assert calc.recalculate_all().changed == {}
+
+    def names():
+        shown = [calc.value(L.REPORTS, f"K{row}") for row in range(4, 4 + L.LIST_SLOTS + 3)]
+        return [name for name in shown if name]
+
+    assert names() == ["LaunchGood", "Local Mosque", "abu bakr", "Masjid Noor"]
+    first = L.LEDGER_FIRST_ROW
+    calc.update({(L.LEDGER, f"D{first + i}"): "Abu Bakr" for i in range(len(book))})
+    assert names() == ["abu bakr"]
+    calc.update({(L.SETTINGS, f"F{L.LIST_FIRST_ROW + 9}"): "Zakat Fund",
+                 (L.LEDGER, f"D{first}"): "Zakat Fund"})
+    assert names() == ["Zakat Fund", "abu bakr"]
+    calc.update({(L.SETTINGS, f"F{L.LIST_FIRST_ROW + 10}"): "Abu Bakr"})
+    assert names() == ["Zakat Fund", "Abu Bakr"]     # listed once, under Settings
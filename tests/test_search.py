@@ -0,0 +1,84 @@
+"""LedgerSearch against a plain scan of the Ledger, as the C1 box searches."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from zakat_logbook import layout as L  # noqa: E402
+from zakat_logbook.data import Ledger  # noqa: E402
+from zakat_logbook.search import POSTINGS_LIMIT, LedgerSearch  # noqa: E402
+
+TYPES = ["Zakat", "ZAKAT", "Sadaqah", "Fitrah", ""]
+NAMES = ["Masjid Noor", "masjid noor", "Abu Bakr", "Straße School", "LaunchGood", ""]
+DETAILS = ["school fees", "Ramadan food packs", "", "Eid gifts", "rent? help"]
+
+
+def ledger(n=500, seed=5):
+    rng = np.random.default_rng(seed)
+    details = [f"{rng.choice(DETAILS)} #{i % 90}" for i in range(n)]
+    return Ledger(np.datetime64("2021-01-01") + rng.integers(0, 3 * 365, n),
+                  rng.choice(TYPES, n), ["Cash"] * n, rng.choice(NAMES, n), details,
+                  rng.integers(1, 300, n), np.zeros(n))
+
+
+def scan(book, query, year=None):
+    query = query.casefold()
+    hits = [i for i in range(len(book))
+            if any(query in str(getattr(book, name)[i]).casefold()
+                   for name in ("types", "recipients", "details"))]
+    if year is not None:
+        years = book.dates.astype("datetime64[Y]").astype(int) + 1970
+        hits = [i for i in hits if years[i] == year]
+    return hits
+
+
+@pytest.mark.parametrize("query", ["zakat", "ZAKAT", "masjid", "STRASSE", "straße", "fees",
+                                   "#1", "oo", "Noor School"])
+def test_substring_matches_scan(query):
+    book = ledger()
+    assert LedgerSearch(book).positions(query).tolist() == scan(book, query)
+
+
+def test_year_filter():
+    """A search narrowed to one year, as the person report and server do."""
+    book = ledger()
+    index = LedgerSearch(book)
+    years = book.dates.astype("datetime64[Y]")
+    for year in (2021, 2022, 2023):
+        found = index.positions("masjid")
+        found = found[years[found] == np.datetime64(str(year), "Y")]
+        assert found.tolist() == scan(book, "masjid", year)
+    assert index.rows("masjid")[0] == index.positions("masjid")[0] + L.LEDGER_FIRST_ROW
+
+
+def test_wildcards_and_words():
+    book = ledger()
+    index = LedgerSearch(book)
+    assert index.positions("masjid*noor").tolist() == scan(book, "masjid noor")
+    assert index.positions("rent~?").tolist() == scan(book, "rent?")
+    words = index.word_positions("FEES school")
+    assert words.tolist() == scan(book, "school fees")
+
+
+def test_empty_results():
+    index = LedgerSearch(ledger())
+    assert index.positions("").tolist() == []
+    assert index.positions("no such payee").tolist() == []
+    assert index.word_positions("  ").tolist() == []
+    assert index.word_positions("school zebra").tolist() == []
+    assert LedgerSearch().positions("zakat").tolist() == []
+
+
+def test_append_and_many_values():
+    """Appended rows extend the index, and a query matching more than
+    POSTINGS_LIMIT values takes the vectorised path with the same answer."""
+    first, second = ledger(300, 1), ledger(200, 2)
+    index = LedgerSearch(first)
+    index.append(second)
+    both = Ledger(*(np.concatenate([getattr(first, name), getattr(second, name)])
+                    for name in ("dates", "types", "services", "recipients", "details",
+                                 "amounts", "fees")))
+    assert len(index) == 500
+    assert index.positions("zakat").tolist() == scan(both, "zakat")
+    assert len({d for d in both.details if "#" in d}) > POSTINGS_LIMIT
+    assert index.positions("#").tolist() == scan(both, "#")
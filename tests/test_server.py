@@ -0,0 +1,101 @@
+"""Queries answered from a loaded logbook, directly and over a Unix socket."""
+
+import datetime
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from zakat_logbook import LogbookOptions, generate  # noqa: E402
+from zakat_logbook.data import Ledger  # noqa: E402
+from zakat_logbook.server import LogbookCache, QueryError, answer, make_server, query  # noqa: E402
+
+D = datetime.date
+
+ROWS = [
+    (D(2023, 3, 1), "Zakat", "Cash", "Masjid Noor", "", 100.0, 1.0),
+    (D(2023, 12, 31), "zakat", "Cash", "masjid noor", "", 50.0, 0.0),
+    (D(2024, 1, 1), "Sadaqah", "Cash", "Abu Bakr", "", 20.5, 0.0),
+    (D(2024, 6, 1), "Zakat", "LaunchGood", "Abu Bakr", "", 200.0, 2.5),
+    (None, "Zakat", "Cash", "Abu Bakr", "undated", 10.0, 0.0),
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    path = generate(tmp_path / "logbook.xlsx", LogbookOptions(ledger_rows=10),
+                    Ledger.from_rows(ROWS))
+    return LogbookCache(path)
+
+
+def test_period(cache):
+    status, body = answer(cache, "/period?start=2023-12-31&end=2024-06-01")
+    assert status == 200
+    assert body["by_type"] == {"Zakat": 252.5, "Sadaqah": 20.5}
+    assert body["total"] == 273.0 and body["entries"] == 3
+    _, body = answer(cache, "/period?end=2023-12-31&type=ZAKAT,Fitrana")
+    assert body["by_type"] == {"ZAKAT": 151.0, "Fitrana": 0.0}
+    assert body["entries"] == 2
+
+
+def test_recipients(cache):
+    _, body = answer(cache, "/recipients")
+    assert [(r["name"], r["total"], r["entries"]) for r in body["recipients"]] == [
+        ("Abu Bakr", 233.0, 3), ("Masjid Noor", 151.0, 2)]
+    _, body = answer(cache, "/recipients?year=2024")
+    assert body["year"] == "2024"
+    assert [(r["name"], r["total"]) for r in body["recipients"]] == [("Abu Bakr", 223.0)]
+    assert body["recipients"][0]["by_type"] == {"Zakat": 202.5, "Sadaqah": 20.5}
+
+    _, body = answer(cache, "/recipients?year=All%20Years")
+    assert body["year"] == "All Years" and len(body["recipients"]) == 2
+    _, body = answer(cache, "/recipients?year=1999")
+    assert body["recipients"] == []
+
+    status, body = answer(cache, "/recipient?name=MASJID%20NOOR&year=2023")
+    assert status == 200
+    assert (body["total"], body["entries"], body["by_type"]["Zakat"]) == (151.0, 2, 151.0)
+
+
+def test_balance_hawl_and_status(cache):
+    _, body = answer(cache, "/balance")
+    assert body["paid"] == 363.5 and body["owed"] == 0.0 and body["years"] == []
+    _, body = answer(cache, "/hawl?today=2025-01-01")
+    assert body["next_due"] is None and body["today"] == D(2025, 1, 1)
+    _, body = answer(cache, "/status")
+    assert body["ledger_rows"] == len(ROWS) and body["reloads"] == 0 and body["error"] is None
+
+
+def test_rejected_queries(cache):
+    assert answer(cache, "/period?start=2024-13-01")[0] == 400
+    assert answer(cache, "/recipient")[0] == 400
+    for target in ("/recipients?year=abc", "/recipient?name=Abu%20Bakr&year=20x4"):
+        status, body = answer(cache, target)
+        assert status == 400 and "year" in body["error"]
+    assert answer(cache, "/nothing")[0] == 404
+
+
+def test_reload_when_the_file_changes(cache):
+    generate(cache.path, LogbookOptions(ledger_rows=10), Ledger.from_rows(ROWS[:2]))
+    _, body = answer(cache, "/status")
+    assert body["ledger_rows"] == 2 and body["reloads"] == 1
+    with open(cache.path, "wb") as f:       # caught half-saved
+        f.write(b"PK\x03\x04")
+    _, body = answer(cache, "/status")
+    assert body["ledger_rows"] == 2 and body["error"]
+
+
+def test_unix_socket(cache, tmp_path):
+    socket_path = str(tmp_path / "zakat.sock")
+    server = make_server(cache.path, socket_path, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        body = query("/period?type=Zakat", socket_path)
+        assert body["total"] == 353.5 and body["start"] is None     # dated rows only
+        with pytest.raises(QueryError):
+            query("/hawl?today=soon", socket_path)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,11 @@
+"""Zakat-LogBook: generate and compute the annual Zakat workbook."""
+
+from .generator import (
+    VERSION,
+    LogbookOptions,
+    build_asset_sheet,
+    generate,
+    main,
+)
+
+__all__ = ["VERSION", "LogbookOptions", "build_asset_sheet", "generate", "main"]
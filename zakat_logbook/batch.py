@@ -0,0 +1,198 @@
+"""Recompute the Zakat Summary of many workbooks in parallel.
+
+Each workbook is read and computed in a worker process
+(:func:`summarize`), and per-year rows are written to one combined report
+as soon as each file finishes, so the report grows while the batch runs.
+A workbook that cannot be read gets a single row with the error and does
+not stop the batch.  The work per file is independent, so throughput grows
+with the number of worker processes until the disks or cores run out.
+
+    python -m zakat_logbook.batch clients/ -o year-end.csv
+    python -m zakat_logbook.batch --manifest households.txt -o year-end.parquet --jobs 16
+
+With ``--prices`` each blank gold and silver price (Summary E and P) is
+filled from a local price history (:mod:`~.prices`) before computing;
+every worker loads the file once, and Arrow files are memory-mapped, so
+the history is read from disk once for the whole batch.
+
+Parquet output needs the ``parquet`` extra (``pip install .[parquet]``).
+"""
+
+import argparse
+import csv
+import functools
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+from .layout import PRICE_POLICIES
+
+REPORT_COLUMNS = [
+    "file", "row", "date", "stocks", "cash", "debts", "gold_price", "gold_oz", "silver_price",
+    "gold_value", "net_assets", "nisab_method", "nisab", "zakat_due", "paid", "balance", "status",
+    "brought_forward", "error",
+]
+
+
+def summarize(path, prices=None, policy="previous"):
+    """Report rows for one workbook: one per Zakat Summary year, or one error row.
+
+    ``prices`` is a price history file that fills blank gold and silver prices
+    by ``policy``.
+    """
+    from . import layout as L
+    from .engine import compute_summary
+    from .reader import read_ledger, read_nisab_settings, read_year_inputs
+
+    path = str(path)
+    try:
+        years = read_year_inputs(path)
+        if prices is not None:
+            from .prices import fill_year_inputs, load_prices
+
+            years = fill_year_inputs(years, load_prices(prices), policy)
+        method, gold_oz, silver_oz = read_nisab_settings(path)
+        summary = compute_summary(years, read_ledger(path), gold_oz, silver_oz, method)
+    except Exception as exc:   # one bad file must not stop the batch
+        return [{"file": path, "error": f"{type(exc).__name__}: {exc}"}]
+    rows = []
+    for i, values in enumerate(summary.rows()):
+        if values["dates"] is None:
+            continue
+        row = {"file": path, "row": L.SUMMARY_FIRST_ROW + i, "date": values.pop("dates").isoformat(),
+               "nisab_method": method}
+        row.update(values)
+        rows.append(row)
+    return rows
+
+
+def find_workbooks(paths=(), manifest=None):
+    """Expand directories (recursively) and a manifest file (one path per line)."""
+    found = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            found.extend(sorted(p for p in path.rglob("*.xlsx") if not p.name.startswith("~$")))
+        else:
+            found.append(path)
+    if manifest:
+        base = Path(manifest).parent
+        with open(manifest, encoding="utf-8") as lines:
+            for line in lines:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    found.append(base / line)
+    return found
+
+
+class _CsvReport:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, REPORT_COLUMNS)
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetReport:
+    """Buffers rows and writes a Parquet row group every ``batch_rows`` rows."""
+
+    def __init__(self, path, batch_rows=50_000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install zakat-logbook[parquet]") from None
+        text = {"file", "date", "nisab_method", "status", "error"}
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.string() if name in text
+                                   else pa.int64() if name == "row" else pa.float64())
+                                  for name in REPORT_COLUMNS])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._rows = []
+        self._batch_rows = batch_rows
+
+    def write(self, rows):
+        self._rows.extend(rows)
+        if len(self._rows) >= self._batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            columns = {name: [row.get(name) for row in self._rows] for name in REPORT_COLUMNS}
+            self._writer.write_table(self._pa.table(columns, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def open_report(path):
+    return _ParquetReport(path) if str(path).endswith(".parquet") else _CsvReport(path)
+
+
+def run(workbooks, output, jobs=None, progress=sys.stderr, prices=None, policy="previous"):
+    """Summarise ``workbooks`` over ``jobs`` processes into ``output``,
+    filling blank gold and silver prices from the ``prices`` file by ``policy``.
+
+    Returns ``(files done, files failed, rows written)``.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    report = open_report(output)
+    done = failed = written = 0
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(jobs) as pool:
+            chunk = max(1, min(16, len(workbooks) // (jobs * 8)))
+            work = functools.partial(summarize, prices=prices, policy=policy)
+            for rows in pool.imap_unordered(work, workbooks, chunksize=chunk):
+                report.write(rows)
+                done += 1
+                written += len(rows)
+                failed += bool(rows and rows[0].get("error"))
+                if progress:
+                    rate = done / (time.perf_counter() - start)
+                    print(f"\r{done:,}/{len(workbooks):,} workbooks, {failed:,} failed, "
+                          f"{rate:,.1f}/s", end="", file=progress, flush=True)
+    finally:
+        report.close()
+    if progress:
+        print(file=progress)
+    return done, failed, written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recompute the Zakat Summary of many workbooks into one CSV or Parquet report.")
+    parser.add_argument("paths", nargs="*", help="workbooks or directories of workbooks")
+    parser.add_argument("--manifest", help="file listing one workbook path per line")
+    parser.add_argument("-o", "--output", default="zakat-report.csv",
+                        help="report to write; .parquet for Parquet (default: %(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--prices", metavar="FILE",
+                        help="gold and silver price history (.csv, .arrow or .parquet) that fills "
+                             "blank gold and silver prices")
+    parser.add_argument("--price-policy", choices=PRICE_POLICIES, default="previous",
+                        help="'previous' takes the last close on or before each date, 'nearest' "
+                             "the closest one (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    workbooks = find_workbooks(args.paths, args.manifest)
+    if not workbooks:
+        parser.error("no workbooks given")
+    done, failed, written = run(workbooks, args.output, args.jobs, prices=args.prices,
+                                policy=args.price_policy)
+    print(f"{args.output}: {written:,} rows from {done - failed:,} workbooks, {failed:,} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""Cached results for the formulas the generator writes.
+
+A formula cell can carry the value it last evaluated to (its ``<v>``).
+Readers that do not calculate -- Python libraries, file previewers, mobile
+apps -- show that value, and Excel can open the file without recalculating
+every formula.  :class:`WorkbookResults` works the values out for a freshly
+generated workbook with the engine and report functions, following the
+worksheet formulas exactly: where a formula shows ``""`` for blank inputs,
+so does the cached value.
+"""
+
+import datetime
+
+import numpy as np
+
+from . import layout as L
+from .data import Ledger, YearInputs, casefold_equals, factorize, from_cents
+from .engine import compute_summary, hawl_countdown, zakat_mask
+from .hijri import labels
+from .prices import fill_year_inputs
+from .reports import build_cubes, distinct_recipients, unlisted_recipients
+
+# Zakat Summary column -> Summary field, for the calculated columns.
+SUMMARY_FIELDS = {2: "stocks", 3: "cash", 4: "debts", 7: "gold_value", 8: "net_assets",
+                  9: "nisab", 10: "zakat_due", 11: "paid", 12: "balance", 13: "status",
+                  14: "brought_forward"}
+
+
+def cell_value(value):
+    """A computed value as a cached cell value: ``NaN`` is the blank ``""``."""
+    if isinstance(value, str):
+        return value
+    return "" if value != value else float(value)
+
+
+def _list_slots(items):
+    return [items[i] if i < len(items) else "" for i in range(L.LIST_SLOTS)]
+
+
+def _asset_totals(records, years):
+    """Each year row's Total column: the sum of the balances written there."""
+    totals = np.zeros(years)
+    for record in records:
+        totals[record.row - L.ASSET_FIRST_ROW] = sum(record.balances.values())
+    return totals
+
+
+class WorkbookResults:
+    """Values of the generated formulas for ``options``, ``ledger``,
+    ``assets`` (``{sheet: [AssetRecord, ...]}``) and ``prices`` (a
+    :class:`~.prices.PriceHistory`).
+
+    The Zakat Summary year rows are generated blank, the asset sheets blank
+    apart from ``assets``, the Reports person (C4) is blank and the year
+    filter is All Years.
+    """
+
+    def __init__(self, options, ledger=None, today=None, assets=None, prices=None):
+        self.ledger = ledger if ledger is not None else Ledger.empty()
+        self.capacity = options.ledger_rows
+        self.today = today or datetime.date.today()
+        blank = np.full(options.years, np.datetime64("NaT"), dtype="datetime64[D]")
+        totals = [_asset_totals((assets or {}).get(sheet, ()), options.years)
+                  for sheet in (L.STOCKS, L.CASH, L.DEBTS)]
+        years = YearInputs(blank, [], [], *totals)
+        if prices is not None:
+            years = fill_year_inputs(years, prices, options.price_policy)
+        self.prices = prices
+        self.summary = compute_summary(years, self.ledger, method=options.nisab_method)
+        self.hijri_dates = labels(self.summary.dates)
+        self._cubes = None
+
+    # -- Settings / asset sheets --------------------------------------------------
+
+    @staticmethod
+    def nisab_today(gold=0.0, silver=0.0):
+        """Settings D49 and D50 for today's gold (B49) and silver (F49) prices."""
+        if not gold:
+            return L.TODAY_PROMPT, ""
+        return gold * L.GOLD_NISAB_OZ, f"Silver Nisab = ${silver * L.SILVER_NISAB_OZ:,.2f}"
+
+    @staticmethod
+    def asset_total():
+        """Stocks/Cash/Debts Total column on a blank row (filled rows cache their own sum)."""
+        return 0.0
+
+    # -- Zakat Summary ------------------------------------------------------------
+
+    def summary_row(self, i):
+        """``{column: value}`` for the calculated columns of the ``i``-th year row."""
+        row = {col: cell_value(getattr(self.summary, name)[i]) for col, name in SUMMARY_FIELDS.items()}
+        row[15] = self.hijri_dates[i]
+        if self.prices is not None:
+            row[5] = float(self.summary.gold_price[i])
+            row[16] = float(self.summary.silver_price[i])
+        return row
+
+    def dashboard(self):
+        """The six dashboard cards, in :data:`~.generator.DASHBOARD_CARDS` order."""
+        due = np.nan_to_num(self.summary.zakat_due, nan=0.0)
+        owed = float(due[due > 0].sum())
+        paid = {t: self._paid(t) for t in L.DEFAULT_TYPES}
+        return [owed, paid["Zakat"], paid["Sadaqah"], paid["Fitrana"], paid["Qurbani"],
+                owed - paid["Zakat"]]
+
+    def _paid(self, kind):
+        return float(from_cents(self.ledger.total_cents[casefold_equals(self.ledger.types, kind)].sum()))
+
+    def hawl(self):
+        """Hawl Tracker A, C, E, G and J: last date, next due, days left, status, today."""
+        hawl = hawl_countdown(self.summary.dates, self.today)
+        if hawl is None:
+            return L.NO_DATES, "", "", "", self.today
+        last, due, left, status = hawl
+        return last, due, float(left), status, self.today
+
+    # -- Ledger helper columns ----------------------------------------------------
+
+    def zakat_to_date(self):
+        """Ledger K: cumulative Zakat paid through each filled row."""
+        ledger = self.ledger
+        zakat = np.where(zakat_mask(ledger) & ~np.isnat(ledger.dates), ledger.total_cents, 0)
+        return from_cents(np.cumsum(zakat))
+
+    # -- Reports ------------------------------------------------------------------
+
+    def person_list(self):
+        """Reports N, O and K without dynamic arrays: the candidate names
+        (Settings Recipients, then the Ledger's other names), the running
+        count of those found on the Ledger, and the names found in order."""
+        listed = list(L.DEFAULT_RECIPIENTS[:L.LIST_SLOTS])
+        listed += [""] * (L.LIST_SLOTS - len(listed))
+        candidates = listed + unlisted_recipients(self.ledger, listed)
+        on_ledger = {name.casefold() for name in factorize(self.ledger.recipients)[1]}
+        first_listed = {}
+        for i, name in enumerate(listed):
+            first_listed.setdefault(name.casefold(), i)
+        found = [name != "" and name.casefold() in on_ledger
+                 and first_listed.get(name.casefold(), i) == i
+                 for i, name in enumerate(candidates)]
+        names = [name for name, hit in zip(candidates, found) if hit]
+        return candidates, np.cumsum(found), names + [""] * (len(candidates) - len(names))
+
+    def sorted_names(self):
+        """The Excel 365 ``SORT(UNIQUE(...))`` name spill; ``[""]`` with no names."""
+        return distinct_recipients(self.ledger) or [""]
+
+    def ledger_years(self):
+        """The Excel 365 year-list spill: years with a dated entry, newest first."""
+        dates = self.ledger.dates[~np.isnat(self.ledger.dates)]
+        years = np.unique(dates.astype("datetime64[Y]").astype(int) + 1970)
+        return [float(y) for y in years[::-1]]
+
+    @staticmethod
+    def type_rows(types=L.DEFAULT_TYPES):
+        """Breakdown-by-type rows ``(A, F)`` with no person selected."""
+        return [(name, "—" if name else "") for name in _list_slots(list(types))]
+
+    def detail_rows(self, rows):
+        """The fixed transaction table with no person selected.
+
+        A blank C4 equals every blank Given To cell, so the table lists the
+        Ledger rows without a recipient, blank capacity rows included.
+        Returns ``(helper values, table rows)``; a table row is the cells
+        A-I, and ``None`` for a row past the last match.
+        """
+        ledger = self.ledger
+        blank = np.flatnonzero(ledger.recipients == "")
+        if len(blank) < rows:
+            tail = np.arange(len(ledger), min(self.capacity, len(ledger) + rows))
+            blank = np.concatenate([blank, tail])
+        positions = blank[:rows].tolist()
+        helper = [p + 1 for p in positions] + [""] * (rows - len(positions))
+        table = [self._detail_row(k, p) for k, p in enumerate(positions, 1)]
+        return helper, table + [None] * (rows - len(table))
+
+    def _detail_row(self, k, position):
+        """``INDEX`` of each detail column at a Ledger position.  An empty
+        cell reads as 0 and a blank Total Paid as ``""``."""
+        ledger = self.ledger
+        if position >= len(ledger):
+            return [k, 0, 0, 0, 0, 0, 0, 0, ""]
+        date = ledger.dates[position]
+        total = float(ledger.totals[position])
+        texts = [ledger.types[position], ledger.services[position],
+                 ledger.recipients[position], ledger.details[position]]
+        return [k, 0 if np.isnat(date) else date.item(), *[t or 0 for t in texts],
+                float(ledger.amounts[position]), float(ledger.fees[position]),
+                total if total else ""]
+
+    def fee_rows(self, services=L.DEFAULT_SERVICES):
+        """Fees-by-service rows ``(service, amount, fees, count)``; blank slots are ``""``."""
+        if self._cubes is None:
+            self._cubes = build_cubes(self.ledger)
+        named = [s for s in _list_slots(list(services)) if s]
+        rows = iter(self._cubes[1].by_service(named))
+        return [next(rows) if s else ("", "", "", "") for s in _list_slots(list(services))]
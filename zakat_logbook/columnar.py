@@ -0,0 +1,292 @@
+"""Columnar copies of the Ledger and the Stocks/Cash/Debts history.
+
+Analytics that re-read a workbook every night pay for inflating and parsing
+the whole ``.xlsx`` each time.  This module keeps the same data as Arrow
+tables on disk, one file per table:
+
+* ``ledger`` -- Ledger columns A-G, one row per worksheet row (blank rows
+  inside the data included, as :func:`~.reader.read_ledger` keeps them);
+* ``assets`` -- one row per account balance of each Stocks/Cash/Debts year
+  row (``sheet``, ``row``, ``date``, ``account``, ``balance``).
+
+Type, Service Used, Given To, ``sheet`` and ``account`` are dictionary
+encoded: each distinct spelling is stored once and the column holds
+integer codes.  Files ending in ``.arrow`` or ``.feather`` are written as
+uncompressed Arrow IPC and memory-mapped on read, so a reader that asks for
+a few columns (:data:`ENGINE_COLUMNS` for :func:`~.engine.compute_summary`)
+only pages those in; other files are Parquet, the smaller format.
+
+    python -m zakat_logbook.columnar load Zakat-LogBook.xlsx history/
+    python -m zakat_logbook.columnar export history/ -o Zakat-LogBook.xlsx
+
+Needs the ``parquet`` extra (``pip install .[parquet]``).
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from . import layout as L
+from .data import Ledger
+
+LEDGER_COLUMNS = ("date", "type", "service", "given_to", "details", "amount", "fees")
+ENGINE_COLUMNS = ("date", "type", "amount", "fees")
+ASSET_COLUMNS = ("sheet", "row", "date", "account", "balance")
+ASSET_SHEETS = (L.STOCKS, L.CASH, L.DEBTS)
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("columnar files need pyarrow: pip install zakat-logbook[parquet]") from None
+    return pa
+
+
+def _is_ipc(path):
+    return str(path).endswith((".arrow", ".feather"))
+
+
+def _schemas(pa):
+    category = pa.dictionary(pa.int32(), pa.string())
+    ledger = pa.schema([("date", pa.date32()), ("type", category), ("service", category),
+                        ("given_to", category), ("details", pa.string()),
+                        ("amount", pa.float64()), ("fees", pa.float64())])
+    assets = pa.schema([("sheet", category), ("row", pa.int32()), ("date", pa.date32()),
+                        ("account", category), ("balance", pa.float64())])
+    return ledger, assets
+
+
+def _dates(pa, dates):
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    return pa.array(dates, type=pa.date32(), mask=np.isnat(dates))
+
+
+def _category(pa, values):
+    return pa.array(np.asarray(values, dtype=object), type=pa.string()).dictionary_encode()
+
+
+def write_table(table, path):
+    """Write ``table`` as Arrow IPC (``.arrow``/``.feather``) or Parquet."""
+    pa = _arrow()
+    if _is_ipc(path):
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, str(path))
+    return path
+
+
+def read_table(path, columns=None):
+    """Read ``columns`` (all when None) of a table written by :func:`write_table`.
+
+    Arrow IPC files are memory-mapped, so unread columns are never loaded.
+    """
+    pa = _arrow()
+    columns = list(columns) if columns is not None else None
+    if _is_ipc(path):
+        table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        return table.select(columns) if columns is not None else table
+    import pyarrow.parquet as pq
+
+    return pq.read_table(str(path), columns=columns, memory_map=True)
+
+
+# -- column conversion -------------------------------------------------------------------
+
+def _text(column):
+    """A string or dictionary column as an object array, nulls as ``""``.
+
+    Dictionary columns are decoded by indexing the (small) dictionary with
+    the codes, not value by value.
+    """
+    pa = _arrow()
+    if not pa.types.is_dictionary(column.type):
+        return np.asarray(column.fill_null("").to_numpy(), dtype=object)
+    chunks = column.chunks      # sharing one dictionary, see _unified
+    if not chunks:
+        return np.empty(0, dtype=object)
+    labels = np.append(chunks[0].dictionary.to_numpy(zero_copy_only=False).astype(object), "")
+    codes = [chunk.indices.fill_null(len(labels) - 1).to_numpy() for chunk in chunks]
+    return labels[np.concatenate(codes)]
+
+
+def _unified(table):
+    """``table`` with each dictionary column's chunks sharing one dictionary."""
+    return table.unify_dictionaries()
+
+
+def _numbers(column):
+    return np.asarray(column.fill_null(0.0).to_numpy(), dtype=np.float64)
+
+
+def _date_array(column):
+    return np.array(column.to_numpy(), dtype="datetime64[D]")
+
+
+# -- Ledger ------------------------------------------------------------------------------
+
+def ledger_table(ledger):
+    """A :class:`~.data.Ledger` as an Arrow table."""
+    pa = _arrow()
+    schema, _ = _schemas(pa)
+    return pa.table([
+        _dates(pa, ledger.dates), _category(pa, ledger.types), _category(pa, ledger.services),
+        _category(pa, ledger.recipients), pa.array(ledger.details, type=pa.string()),
+        pa.array(ledger.amounts, type=pa.float64()), pa.array(ledger.fees, type=pa.float64()),
+    ], schema=schema)
+
+
+def table_ledger(table):
+    """An Arrow Ledger table as a :class:`~.data.Ledger`.  Columns missing
+    from ``table`` are left blank."""
+    table = _unified(table)
+    n = table.num_rows
+    names = set(table.column_names)
+
+    def column(name, convert, blank):
+        return convert(table.column(name)) if name in names else blank
+
+    return Ledger(column("date", _date_array, np.full(n, np.datetime64("NaT"), "datetime64[D]")),
+                  *[column(name, _text, np.full(n, "", dtype=object))
+                    for name in ("type", "service", "given_to", "details")],
+                  *[column(name, _numbers, np.zeros(n)) for name in ("amount", "fees")])
+
+
+def write_ledger(ledger, path):
+    return write_table(ledger_table(ledger), path)
+
+
+def read_ledger(path, columns=None):
+    """Read a Ledger file into a :class:`~.data.Ledger`.
+
+    Only ``columns`` (see :data:`LEDGER_COLUMNS`) are read; the rest are
+    blank, which is all :func:`~.engine.compute_summary` needs with
+    :data:`ENGINE_COLUMNS`.
+    """
+    return table_ledger(read_table(path, columns))
+
+
+# -- Stocks / Cash / Debts history --------------------------------------------------------
+
+def asset_table(assets):
+    """``{sheet: [AssetRecord, ...]}`` (as :func:`~.reader.iter_assets` yields
+    them) as one long Arrow table."""
+    pa = _arrow()
+    _, schema = _schemas(pa)
+    sheets, rows, dates, accounts, balances = [], [], [], [], []
+    for sheet, records in assets.items():
+        for record in records:
+            for account, balance in record.balances.items():
+                sheets.append(sheet)
+                rows.append(record.row)
+                dates.append(record.date or np.datetime64("NaT"))
+                accounts.append(account)
+                balances.append(balance)
+    return pa.table([
+        _category(pa, sheets), pa.array(rows, type=pa.int32()),
+        _dates(pa, np.array(dates, dtype="datetime64[D]")), _category(pa, accounts),
+        pa.array(balances, type=pa.float64()),
+    ], schema=schema)
+
+
+def table_assets(table):
+    """An Arrow asset table as ``{sheet: [AssetRecord, ...]}``; each record's
+    total is the sum of its balances, as the sheet's Total column computes."""
+    from .reader import AssetRecord
+
+    table = _unified(table)
+    sheets, accounts = _text(table.column("sheet")), _text(table.column("account"))
+    rows = table.column("row").to_numpy()
+    dates, balances = _date_array(table.column("date")), _numbers(table.column("balance"))
+    out, current = {}, None
+    for sheet, row, date, account, balance in zip(sheets.tolist(), rows.tolist(), dates,
+                                                  accounts.tolist(), balances.tolist()):
+        if current is None or (current.sheet, current.row) != (sheet, row):
+            current = AssetRecord(sheet, row, None if np.isnat(date) else date.item(), {}, 0.0)
+            out.setdefault(sheet, []).append(current)
+        current.balances[account] = balance
+        current.total += balance
+    return out
+
+
+def write_assets(assets, path):
+    return write_table(asset_table(assets), path)
+
+
+def read_assets(path):
+    return table_assets(read_table(path))
+
+
+# -- xlsx round trip ---------------------------------------------------------------------
+
+def paths(directory, fmt="parquet"):
+    """``(ledger, assets)`` file paths inside ``directory`` for ``fmt``."""
+    suffix = FORMATS[fmt]
+    return (os.path.join(directory, "ledger" + suffix), os.path.join(directory, "assets" + suffix))
+
+
+def load(workbook, directory, fmt="parquet"):
+    """Copy a workbook's Ledger and asset history into ``directory``.
+
+    Returns ``(ledger rows, asset records)`` written.
+    """
+    from . import reader
+
+    ledger = reader.read_ledger(workbook)
+    assets = {sheet: list(reader.iter_assets(workbook, sheet)) for sheet in ASSET_SHEETS}
+    os.makedirs(directory, exist_ok=True)
+    ledger_path, assets_path = paths(directory, fmt)
+    write_ledger(ledger, ledger_path)
+    write_assets(assets, assets_path)
+    return len(ledger), sum(len(records) for records in assets.values())
+
+
+def find_tables(directory):
+    """The ``(ledger, assets)`` paths of whichever format ``directory`` holds."""
+    for fmt in FORMATS:
+        found = paths(directory, fmt)
+        if os.path.exists(found[0]):
+            return found
+    raise FileNotFoundError(f"{directory}: no ledger.parquet or ledger.arrow file")
+
+
+def export(directory, path, options=None):
+    """Write a logbook workbook pre-filled from the tables in ``directory``
+    (see :func:`~.generator.generate`)."""
+    from .generator import generate
+
+    ledger_path, assets_path = find_tables(directory)
+    assets = read_assets(assets_path) if os.path.exists(assets_path) else None
+    return generate(path, options, read_ledger(ledger_path), assets)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Keep the Ledger and asset history in columnar Parquet/Arrow files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    copy = commands.add_parser("load", help="write a workbook's Ledger and asset history")
+    copy.add_argument("workbook")
+    copy.add_argument("directory")
+    copy.add_argument("--format", choices=FORMATS, default="parquet",
+                      help="'arrow' writes memory-mappable Arrow IPC files (default: %(default)s)")
+    out = commands.add_parser("export", help="write a workbook from a directory of tables")
+    out.add_argument("directory")
+    out.add_argument("-o", "--output", default="Zakat-LogBook.xlsx",
+                     help="workbook to write (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        rows, records = load(args.workbook, args.directory, args.format)
+        print(f"{args.directory}: {rows:,} Ledger rows, {records:,} asset rows")
+    else:
+        export(args.directory, args.output)
+        print(f"{args.output}: exported from {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
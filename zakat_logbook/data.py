@@ -0,0 +1,213 @@
+"""Column stores for the data the workbook holds.
+
+:class:`Ledger` mirrors Ledger columns A-G and :class:`YearInputs` the
+per-year inputs of the Zakat Summary (A, E, F) together with the Stocks /
+Cash / Debts totals that columns B-D pull in.  Everything is kept as NumPy
+arrays so the engine can work on whole columns at once.
+
+Blank cells are represented the way the formulas see them: ``NaT`` for a
+missing date, ``0.0`` for a missing number and ``""`` for missing text.
+Money is kept as the dollars typed into the sheet; the engine does its
+arithmetic on whole cents (:func:`to_cents`) and converts back only for
+display (:func:`from_cents`).
+"""
+
+import datetime
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from .xlsx import EXCEL_EPOCH
+
+_EPOCH = np.datetime64(EXCEL_EPOCH, "D")
+
+
+def to_dates(values):
+    """Return ``values`` as a ``datetime64[D]`` array.
+
+    Accepts dates, datetimes, ISO strings, Excel serial numbers and
+    ``None``/``""`` (which become ``NaT``).
+    """
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind == "M":
+            return values.astype("datetime64[D]")
+        if values.dtype.kind in "iuf":
+            out = np.full(values.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+            valid = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(values.shape, bool)
+            out[valid] = _EPOCH + values[valid].astype(np.int64)
+            return out
+    out = np.empty(len(values), dtype="datetime64[D]")
+    for i, value in enumerate(values):
+        if value is None or value == "":
+            out[i] = np.datetime64("NaT")
+        elif isinstance(value, datetime.datetime):
+            out[i] = np.datetime64(value.date(), "D")
+        elif isinstance(value, (datetime.date, str)):
+            out[i] = np.datetime64(value, "D")
+        else:
+            out[i] = _EPOCH + int(value)
+    return out
+
+
+def to_serial(dates):
+    """Return Excel serial day numbers (float, NaN for ``NaT``) for a date array."""
+    dates = to_dates(dates)
+    serial = (dates - _EPOCH).astype(np.float64)
+    serial[np.isnat(dates)] = np.nan
+    return serial
+
+
+def to_money(values):
+    """Return ``values`` as float64 with blanks (None, "", NaN) read as 0."""
+    arr = np.asarray([0.0 if v is None or v == "" else v for v in values]
+                     if not isinstance(values, np.ndarray) else values, dtype=np.float64)
+    return np.nan_to_num(arr, nan=0.0)
+
+
+def to_cents(dollars):
+    """Dollar amounts as int64 whole cents, half a cent rounded away from zero.
+
+    This is Excel's ``ROUND(x, 2)``: the product is first cleaned of binary
+    representation error (``1.005`` is stored as ``1.00499999...``), so
+    amounts typed with two decimals always land on their own cent.
+    """
+    scaled = np.round(np.abs(np.asarray(dollars, dtype=np.float64)) * 100, 6)
+    return (np.sign(dollars) * np.floor(scaled + 0.5)).astype(np.int64)
+
+
+def from_cents(cents):
+    """int64 cents as float dollars, for display and for the workbook."""
+    return np.asarray(cents) / 100
+
+
+def to_text(values):
+    """Return ``values`` as an object array of str with None read as ""."""
+    if isinstance(values, np.ndarray) and values.dtype == object:
+        return values
+    return np.array(["" if v is None else str(v) for v in values], dtype=object)
+
+
+def casefold_equals(values, target):
+    """Vectorised case-insensitive ``values == target``, as SUMIF criteria match.
+
+    Only the distinct values are case-folded; the column itself is tested
+    with one set lookup per cell.
+    """
+    target = target.casefold()
+    hits = {v for v in set(values.tolist()) if str(v).casefold() == target}
+    if not hits:
+        return np.zeros(len(values), dtype=bool)
+    return np.frompyfunc(hits.__contains__, 1, 1)(values).astype(bool)
+
+
+def factorize(values):
+    """Encode text as integer codes using hash lookups.
+
+    Values that differ only in case share a code, as they do for Excel's
+    ``=`` and SUMIF matching.  Returns ``(codes, labels)`` where ``labels``
+    holds the first spelling seen for each code.
+    """
+    values = to_text(values)
+    index, labels, code_of = {}, [], {}
+    for value in dict.fromkeys(values.tolist()):
+        key = str(value).casefold()
+        if key not in index:
+            index[key] = len(labels)
+            labels.append(value)
+        code_of[value] = index[key]
+    if not len(values):
+        return np.empty(0, dtype=np.int64), labels
+    codes = np.frompyfunc(code_of.__getitem__, 1, 1)(values).astype(np.int64)
+    return codes, labels
+
+
+def calendar_years(dates):
+    """Calendar year of each date as int64, with -1 for ``NaT``."""
+    years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    years[np.isnat(dates)] = -1
+    return years
+
+
+@dataclass
+class Ledger:
+    """Ledger columns A-G; the derived H (Total Paid) is :attr:`totals`."""
+
+    dates: np.ndarray
+    types: np.ndarray
+    services: np.ndarray
+    recipients: np.ndarray
+    details: np.ndarray
+    amounts: np.ndarray
+    fees: np.ndarray
+
+    def __post_init__(self):
+        self.dates = to_dates(self.dates)
+        for name in ("types", "services", "recipients", "details"):
+            setattr(self, name, to_text(getattr(self, name)))
+        self.amounts = to_money(self.amounts)
+        self.fees = to_money(self.fees)
+        n = len(self.dates)
+        for f in fields(self):
+            if len(getattr(self, f.name)) != n:
+                raise ValueError(f"Ledger column {f.name!r} has {len(getattr(self, f.name))} "
+                                 f"entries, expected {n}")
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from ``(date, type, service, given_to, details, amount, fees)`` tuples."""
+        rows = list(rows)
+        if not rows:
+            return cls.empty()
+        return cls(*zip(*rows))
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, "datetime64[D]"), [], [], [], [], np.empty(0), np.empty(0))
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def totals(self):
+        """Column H: Amount + Fees."""
+        return self.amounts + self.fees
+
+    @property
+    def total_cents(self):
+        """Column H as int64 cents, each of Amount and Fees rounded to the cent."""
+        return to_cents(self.amounts) + to_cents(self.fees)
+
+
+@dataclass
+class YearInputs:
+    """One entry per Zakat Summary row.
+
+    ``stocks``, ``cash`` and ``debts`` may be 1-D sheet totals or 2-D
+    ``(years, accounts)`` balances, which are summed like the Total columns.
+    ``silver_price`` (column P) only matters for the silver and lower-of-two
+    Nisab methods and may be left out.
+    """
+
+    dates: np.ndarray
+    gold_price: np.ndarray
+    gold_oz: np.ndarray
+    stocks: np.ndarray
+    cash: np.ndarray
+    debts: np.ndarray
+    silver_price: np.ndarray = ()
+
+    def __post_init__(self):
+        self.dates = to_dates(self.dates)
+        n = len(self.dates)
+        for name in ("gold_price", "gold_oz", "stocks", "cash", "debts", "silver_price"):
+            values = getattr(self, name)
+            arr = np.asarray(values, dtype=np.float64) if len(values) else np.zeros(n)
+            arr = np.nan_to_num(arr, nan=0.0)
+            if arr.ndim == 2:
+                arr = arr.sum(axis=1)
+            if len(arr) < n:
+                arr = np.concatenate([arr, np.zeros(n - len(arr))])
+            setattr(self, name, arr[:n])
+
+    def __len__(self):
+        return len(self.dates)
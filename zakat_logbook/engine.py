@@ -0,0 +1,397 @@
+"""Headless calculation of the Zakat Summary.
+
+:func:`compute_summary` reproduces Zakat Summary columns B-N for every year
+in one vectorised pass, without a spreadsheet application, so the figures
+can be produced in bulk and checked against a workbook.
+:func:`compare_nisab_methods` gives the Nisab and Zakat Due of every year
+under each Nisab method side by side, from one array of thresholds.
+
+Blank results follow the formulas: numeric cells that show ``""`` are
+``NaN`` and the Status column holds ``""``.
+
+Money is computed in int64 whole cents, so sums over any number of
+payments are exact and the Status test (balance <= 0) never fails on a
+stray fraction of a cent.  Every product that makes money -- Gold Value,
+Nisab and the 2.5% Zakat Due -- is rounded to the cent, half a cent away
+from zero, as the workbook's ``ROUND(..., 2)`` does.  :class:`Summary`
+holds dollars, converted from cents only at the end.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import layout as L
+from .data import Ledger, YearInputs, casefold_equals, from_cents, to_cents
+from .hijri import next_hawl
+from .layout import (HAWL_DUE_NOW, HAWL_DUE_SOON, HAWL_IN_PROGRESS, NISAB_METHODS, NOT_STARTED,
+                     PAID_IN_FULL, PARTIALLY_PAID)
+from .store import LedgerStore
+
+ZAKAT_TYPE = "Zakat"
+# 2.5% is exactly 1/40, so Zakat Due in cents is an integer division.
+ZAKAT_DIVISOR = round(1 / L.ZAKAT_RATE)
+
+
+@dataclass
+class Summary:
+    """Zakat Summary columns A-N, one entry per year row."""
+
+    dates: np.ndarray           # A
+    stocks: np.ndarray          # B
+    cash: np.ndarray            # C
+    debts: np.ndarray           # D
+    gold_price: np.ndarray      # E
+    gold_oz: np.ndarray         # F
+    gold_value: np.ndarray      # G
+    net_assets: np.ndarray      # H
+    nisab: np.ndarray           # I
+    zakat_due: np.ndarray       # J
+    paid: np.ndarray            # K
+    balance: np.ndarray         # L
+    status: np.ndarray          # M
+    brought_forward: np.ndarray  # N
+    silver_price: np.ndarray    # P
+
+    def __len__(self):
+        return len(self.dates)
+
+    def rows(self):
+        """Yield one dict per year, blanks as ``None``, for display or export."""
+        names = list(self.__dataclass_fields__)
+        for i in range(len(self)):
+            row = {}
+            for name in names:
+                value = getattr(self, name)[i]
+                if name == "dates":
+                    value = None if np.isnat(value) else value.item()
+                elif name == "status":
+                    value = value or None
+                else:
+                    value = None if np.isnan(value) else float(value)
+                row[name] = value
+            yield row
+
+
+def zakat_mask(ledger):
+    """Rows the SUMIFS criterion ``"Zakat"`` matches (case-insensitive)."""
+    return casefold_equals(ledger.types, ZAKAT_TYPE)
+
+
+def nisab_thresholds(gold_price, silver_price, gold_oz=L.GOLD_NISAB_OZ, silver_oz=L.SILVER_NISAB_OZ):
+    """Column I in int64 cents under every Nisab method at once: a
+    ``(methods, years)`` array, rows in :data:`~.layout.NISAB_METHODS` order.
+
+    Gold and silver are each rounded to the cent.  The lower of the two
+    skips a metal whose price is 0 (blank), so a year with only a gold price
+    keeps the gold Nisab rather than dropping to nothing.
+    """
+    gold_price, silver_price = (np.asarray(p, dtype=np.float64) for p in (gold_price, silver_price))
+    gold, silver = to_cents(gold_price * gold_oz), to_cents(silver_price * silver_oz)
+    lower = np.where(silver_price == 0, gold,
+                     np.where(gold_price == 0, silver, np.minimum(gold, silver)))
+    thresholds = {"gold": gold, "silver": silver, "lower": lower}
+    return np.stack([thresholds[method] for method in NISAB_METHODS])
+
+
+def _method_index(method):
+    if method not in NISAB_METHODS:
+        raise ValueError(f"method must be one of {', '.join(NISAB_METHODS)}")
+    return list(NISAB_METHODS).index(method)
+
+
+def zakat_due_cents(net_cents):
+    """2.5% of Net Assets (int64 cents) in whole cents, half a cent rounded
+    away from zero: ``ROUND(H*2.5%, 2)`` in integer arithmetic."""
+    net = np.asarray(net_cents, dtype=np.int64)
+    return np.sign(net) * ((2 * np.abs(net) + ZAKAT_DIVISOR) // (2 * ZAKAT_DIVISOR))
+
+
+class ZakatIndex:
+    """Zakat-type Ledger totals (cents) sorted by date, with a running sum.
+
+    Built once in O(M log M); the total paid up to any date is then a
+    binary search, so a period total costs two lookups instead of a scan
+    over the whole Ledger.
+    """
+
+    def __init__(self, ledger):
+        mask = zakat_mask(ledger) & ~np.isnat(ledger.dates)
+        order = np.argsort(ledger.dates[mask], kind="stable")
+        self.dates = ledger.dates[mask][order]
+        self.cumulative = np.concatenate(
+            ([0], np.cumsum(ledger.total_cents[mask][order]))).astype(np.int64)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def paid_through(self, dates):
+        """Total, in cents, of entries dated on or before each of ``dates``."""
+        return self.cumulative[np.searchsorted(self.dates, dates, side="right")]
+
+
+def paid_per_period(dates, ledger):
+    """Column K: Zakat-type Ledger totals in each year's window.
+
+    The first row takes everything dated on or before its date; each later
+    row takes dates after the previous row's date up to its own, which is
+    empty (0) when its date is not later than the previous one.  Undated
+    Ledger rows never match.  A blank previous date turns the lower bound
+    into the text criterion ``">"``, which matches no dates, so that row's
+    total is 0.  Rows with a blank date are ``NaN``.
+
+    ``ledger`` may be a :class:`Ledger`, a prebuilt :class:`ZakatIndex` or a
+    :class:`~.store.LedgerStore`, which answers each window with an index
+    range query.
+    """
+    return _dollars(paid_cents(dates, ledger), dates)
+
+
+def paid_cents(dates, ledger):
+    """:func:`paid_per_period` in int64 cents, with 0 on rows with a blank date."""
+    if isinstance(ledger, LedgerStore):
+        paid = np.array(ledger.paid_per_period(dates), dtype=np.float64)
+        return to_cents(np.nan_to_num(paid, nan=0.0))
+    index = ledger if isinstance(ledger, ZakatIndex) else ZakatIndex(ledger)
+    paid = index.paid_through(dates)
+    # A date on or before the one above leaves an empty window, not a negative one.
+    paid[1:] = np.where(dates[1:] > dates[:-1], paid[1:] - index.paid_through(dates[:-1]), 0)
+    return _blank_windows(paid, dates)
+
+
+def paid_per_period_scan(dates, ledger):
+    """Reference version of :func:`paid_per_period` that tests every Ledger
+    row against every window, as SUMIFS does.  O(years x rows)."""
+    mask = zakat_mask(ledger) & ~np.isnat(ledger.dates)
+    entry_dates = ledger.dates[mask]
+    totals = ledger.total_cents[mask]
+
+    in_window = entry_dates[None, :] <= dates[:, None]
+    in_window[1:] &= entry_dates[None, :] > dates[:-1, None]
+    return _dollars(_blank_windows(in_window.astype(np.int64) @ totals, dates), dates)
+
+
+def _blank_windows(paid, dates):
+    paid[1:][np.isnat(dates[:-1])] = 0
+    paid[np.isnat(dates)] = 0
+    return paid
+
+
+def _dollars(cents, dates):
+    """Cents as dollars, ``NaN`` where the Zakat date is blank."""
+    return np.where(np.isnat(dates), np.nan, from_cents(cents))
+
+
+def segmented_cumsum(values, valid, carry=0):
+    """Running sum of ``values`` that restarts after every invalid entry.
+
+    This is the shape of both carried columns in the workbook: each valid
+    row adds to the row above unless that row was blank.  ``carry`` is the
+    running value just before the first entry.  Invalid entries are ``NaN``.
+    Integer cents are summed exactly; the result is float only so that it
+    can hold ``NaN``.
+    """
+    return np.where(valid, _segmented_sums(values, valid, carry), np.nan)
+
+
+def _segmented_sums(values, valid, carry=0):
+    """:func:`segmented_cumsum` in the dtype of ``values``, 0 where invalid."""
+    step = np.where(valid, values, 0)
+    total = np.cumsum(step)
+    idx = np.arange(len(step))
+    last_reset = np.maximum.accumulate(np.where(valid, -1, idx)) if len(idx) else idx
+    base = np.where(last_reset >= 0, total[np.maximum(last_reset, 0)], -carry)
+    return np.where(valid, total - base, 0)
+
+
+def running_balance(zakat_due, paid):
+    """Column L in cents: due minus paid (both int64 cents, paid 0 where
+    blank), carried from the row above.
+
+    A row with nothing due is blank (``NaN``) and restarts the carry.
+    """
+    return segmented_cumsum(zakat_due - paid, zakat_due != 0)
+
+
+def ledger_running_totals(totals):
+    """Ledger column I, in dollars, from column H (Total Paid).
+
+    ``IF(H="","",IF(Iprev="",H,Iprev+H))``: a row whose Amount + Fees is 0
+    is blank and the total starts again below it.  The sums are taken in
+    cents, so the millionth row carries no accumulated float error.
+    """
+    totals = np.nan_to_num(np.asarray(totals, dtype=np.float64), nan=0.0)
+    return from_cents(segmented_cumsum(to_cents(totals), totals != 0))
+
+
+class RunningTotals:
+    """Ledger column I kept current as rows are appended, edited or inserted.
+
+    Appending ``k`` rows costs O(k).  Editing a row's total shifts the rest
+    of its run (up to the next blank row) by the difference; only edits that
+    blank or un-blank a row, and insertions, recompute from the changed index
+    onwards.  Nothing above the change is touched.  Totals are kept in int64
+    cents, so any number of edits leaves the column exact.
+    """
+
+    def __init__(self, totals=()):
+        cents = to_cents(np.asarray(totals, dtype=np.float64))
+        self._n = len(cents)
+        self._totals = np.zeros(max(16, self._n), dtype=np.int64)
+        self._running = np.zeros(len(self._totals), dtype=np.int64)
+        self._totals[:self._n] = cents
+        self._recompute(0)
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def totals(self):
+        """Column H values in dollars (0 for a blank row)."""
+        return from_cents(self._totals[:self._n])
+
+    @property
+    def values(self):
+        """Column I values in dollars, ``NaN`` for blank rows."""
+        totals = self._totals[:self._n]
+        return np.where(totals != 0, from_cents(self._running[:self._n]), np.nan)
+
+    def _reserve(self, n):
+        if n > len(self._totals):
+            size = max(n, 2 * len(self._totals))
+            self._totals = np.resize(self._totals, size)
+            self._running = np.resize(self._running, size)
+
+    def _carry(self, index):
+        return self._running[index - 1] if index > 0 and self._totals[index - 1] else 0
+
+    def _recompute(self, index):
+        h = self._totals[index:self._n]
+        self._running[index:self._n] = _segmented_sums(h, h != 0, self._carry(index))
+
+    def append(self, totals):
+        cents = to_cents(np.atleast_1d(np.asarray(totals, dtype=np.float64)))
+        start = self._n
+        self._reserve(start + len(cents))
+        self._totals[start:start + len(cents)] = cents
+        self._n += len(cents)
+        self._recompute(start)
+
+    def set(self, index, total):
+        """Change row ``index`` (0-based) to Total Paid ``total`` dollars."""
+        if not 0 <= index < self._n:
+            raise IndexError(index)
+        old = self._totals[index]
+        new = int(to_cents(total))
+        self._totals[index] = new
+        if old != 0 and new != 0:
+            blanks = np.flatnonzero(self._totals[index + 1:self._n] == 0)
+            end = index + 1 + blanks[0] if len(blanks) else self._n
+            self._running[index:end] += new - old
+        else:
+            self._recompute(index)
+
+    def insert(self, index, totals):
+        """Insert rows before ``index`` (0-based), as inserting Ledger rows does."""
+        if not 0 <= index <= self._n:
+            raise IndexError(index)
+        cents = to_cents(np.atleast_1d(np.asarray(totals, dtype=np.float64)))
+        tail = self._totals[index:self._n].copy()
+        self._reserve(self._n + len(cents))
+        self._totals[index:index + len(cents)] = cents
+        self._totals[index + len(cents):self._n + len(cents)] = tail
+        self._n += len(cents)
+        self._recompute(index)
+
+
+def status_column(zakat_due, paid, balance):
+    """Column M.  A blank K compares unequal to 0, so it reads as partially paid."""
+    return np.where(zakat_due == 0, "",
+                    np.where(balance <= 0, PAID_IN_FULL,
+                             np.where(paid == 0, NOT_STARTED, PARTIALLY_PAID))).astype(object)
+
+
+def brought_forward_column(dates, balance):
+    """Column N: the previous row's positive balance, blank when the date is blank."""
+    forward = np.zeros(len(dates))
+    forward[1:] = np.maximum(0.0, np.nan_to_num(balance[:-1], nan=0.0))
+    forward[np.isnat(dates)] = np.nan
+    return forward
+
+
+def hawl_countdown(dates, today):
+    """The Hawl Tracker for Summary ``dates``: ``(last date, next due, days
+    remaining, status)``, or None when no year is dated.
+
+    The next due date is the same Umm al-Qura date one Hijri year after the
+    latest date, or 354 days after it outside the calendar table, as Hawl
+    Tracker C computes it; days remaining stop at 0 once it has passed.
+    """
+    dates = dates[~np.isnat(dates)]
+    if not len(dates):
+        return None
+    last = dates.max().item()
+    due = next_hawl(last, L.HAWL_DAYS)
+    left = (due - today).days
+    status = HAWL_DUE_NOW if left < 0 else HAWL_DUE_SOON if left <= 30 else HAWL_IN_PROGRESS
+    return last, due, max(0, left), status
+
+
+def _net_assets(years):
+    """Columns B-D, G and H in int64 cents."""
+    stocks, cash, debts = (to_cents(v) for v in (years.stocks, years.cash, years.debts))
+    gold_value = to_cents(years.gold_price * years.gold_oz)
+    return stocks, cash, debts, gold_value, stocks + cash + gold_value - debts
+
+
+def compute_summary(years, ledger=None, nisab_oz=L.GOLD_NISAB_OZ, silver_oz=L.SILVER_NISAB_OZ,
+                    method="gold"):
+    """Compute every Zakat Summary column for ``years`` (a :class:`YearInputs`).
+
+    ``ledger`` is anything :func:`paid_per_period` accepts.  ``nisab_oz`` and
+    ``silver_oz`` are the values of Settings D44 and D45, and ``method`` the
+    Nisab method of D43 (a key of :data:`~.layout.NISAB_METHODS`).
+    """
+    if ledger is None:
+        ledger = Ledger.empty()
+    if not isinstance(years, YearInputs):
+        raise TypeError("years must be a YearInputs instance")
+
+    stocks, cash, debts, gold_value, net_assets = _net_assets(years)
+    nisab = nisab_thresholds(years.gold_price, years.silver_price, nisab_oz,
+                             silver_oz)[_method_index(method)]
+    zakat_due = np.where(net_assets >= nisab, zakat_due_cents(net_assets), 0)
+    paid = paid_cents(years.dates, ledger)
+    balance = from_cents(running_balance(zakat_due, paid))
+    zakat_due, paid = from_cents(zakat_due), _dollars(paid, years.dates)
+    return Summary(
+        dates=years.dates,
+        stocks=from_cents(stocks),
+        cash=from_cents(cash),
+        debts=from_cents(debts),
+        gold_price=years.gold_price,
+        gold_oz=years.gold_oz,
+        gold_value=from_cents(gold_value),
+        net_assets=from_cents(net_assets),
+        nisab=from_cents(nisab),
+        zakat_due=zakat_due,
+        paid=paid,
+        balance=balance,
+        status=status_column(zakat_due, paid, balance),
+        brought_forward=brought_forward_column(years.dates, balance),
+        silver_price=years.silver_price,
+    )
+
+
+def compare_nisab_methods(years, nisab_oz=L.GOLD_NISAB_OZ, silver_oz=L.SILVER_NISAB_OZ):
+    """``{method: (nisab, zakat_due)}`` in dollars for every year of ``years``
+    under each Nisab method, as column I and J would show with that method
+    chosen in Settings D43.  The thresholds of all methods are one array, so
+    the comparison costs one pass whatever the number of years."""
+    if not isinstance(years, YearInputs):
+        raise TypeError("years must be a YearInputs instance")
+    net_assets = _net_assets(years)[-1]
+    nisab = nisab_thresholds(years.gold_price, years.silver_price, nisab_oz, silver_oz)
+    zakat_due = np.where(net_assets >= nisab, zakat_due_cents(net_assets), 0)
+    return {method: (from_cents(nisab[i]), from_cents(zakat_due[i]))
+            for i, method in enumerate(NISAB_METHODS)}
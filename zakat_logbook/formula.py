@@ -0,0 +1,1483 @@
+"""Evaluate the workbook's Excel formulas in Python.
+
+:func:`compile_formula` turns formula text into a function of the cell it
+sits in.  Relative references are kept as offsets from that cell, so every
+row of a filled column (the Ledger's Running Total, say) shares one
+compiled function.  Cell values come from a :class:`Grid`, which holds
+each sheet column as a NumPy object array with lazily built numeric,
+case-folded and exact-match views: SUMIFS, MATCH and SUMPRODUCT over a
+whole Ledger column are array operations, not per-cell Python.
+
+The operators and functions are the ones the generated workbook uses in
+either target, with Excel's rules: a blank cell reads as 0 or "", text
+compares without regard to case, errors propagate, ROUND rounds halves
+away from zero, and arrays broadcast (padding with #N/A) in array and
+spilled formulas.  One rule differs: empty text ("" from a formula)
+counts as 0 in arithmetic, as in LibreOffice, where Excel gives #VALUE!.
+The Ledger's Total Paid is "" on blank rows and the Reports SUMPRODUCT
+cards multiply by it.
+"""
+
+import datetime
+import math
+import operator
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+import numpy as np
+
+from .volatile import MAX_COL, MAX_ROW
+from .xlsx import EXCEL_EPOCH, col_index
+
+
+class FormulaError(ValueError):
+    """Formula text that cannot be parsed, or a function this module lacks."""
+
+
+class XLError:
+    """An Excel error value such as ``#N/A``."""
+
+    __slots__ = ("code",)
+
+    def __init__(self, code):
+        self.code = code
+
+    def __repr__(self):
+        return self.code
+
+    def __eq__(self, other):
+        return isinstance(other, XLError) and other.code == self.code
+
+    def __hash__(self):
+        return hash(self.code)
+
+
+ERRORS = {code: XLError(code) for code in
+          ("#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A", "#SPILL!", "#CALC!")}
+NA, VALUE, REF, DIV0, NUM = (ERRORS[c] for c in ("#N/A", "#VALUE!", "#REF!", "#DIV/0!", "#NUM!"))
+SPILL, CALC = ERRORS["#SPILL!"], ERRORS["#CALC!"]
+MISSING = type("Missing", (), {"__repr__": lambda self: "MISSING"})()
+
+
+def is_error(value):
+    return isinstance(value, XLError)
+
+
+def to_serial(value):
+    """A date as its Excel serial number (float); other values unchanged."""
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, datetime.date):
+        return float((value - EXCEL_EPOCH).days)
+    return value
+
+
+def cell_value(value):
+    """``value`` as the grid stores it: float, str, bool, None or :class:`XLError`."""
+    if value is None or isinstance(value, (str, bool, XLError)):
+        return value
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return to_serial(value)
+    if isinstance(value, np.str_):
+        return str(value)
+    raise TypeError(f"not a cell value: {value!r}")
+
+
+class Ref:
+    """A rectangle of cells on one sheet, 1-based and inclusive."""
+
+    __slots__ = ("sheet", "c1", "r1", "c2", "r2")
+
+    def __init__(self, sheet, c1, r1, c2=None, r2=None):
+        self.sheet, self.c1, self.r1 = sheet, c1, r1
+        self.c2 = c1 if c2 is None else c2
+        self.r2 = r1 if r2 is None else r2
+
+    def __repr__(self):
+        return f"Ref({self.sheet!r}, {self.c1}, {self.r1}, {self.c2}, {self.r2})"
+
+    @property
+    def single(self):
+        return self.c1 == self.c2 and self.r1 == self.r2
+
+    @property
+    def shape(self):
+        return self.r2 - self.r1 + 1, self.c2 - self.c1 + 1
+
+
+# -- cell store ------------------------------------------------------------------------
+
+class _Views:
+    """Per-column arrays derived from the stored values, rebuilt after a write."""
+
+    __slots__ = ("numbers", "arith", "folded", "bad", "mixed", "errors", "index")
+
+    def __init__(self, column):
+        values = column.tolist()
+        nan = math.nan
+        # Numbers only: NaN for text, logical values, blanks and errors.
+        self.numbers = np.array([v if type(v) is float else nan for v in values], dtype=np.float64)
+        # As arithmetic reads them: blanks and "" are 0, logical values 0/1.
+        self.arith = np.array([v if type(v) is float else 0.0 if v is None or v == "" else
+                               float(v) if type(v) is bool else nan for v in values],
+                              dtype=np.float64)
+        self.folded = np.array([v.casefold() if type(v) is str else "" if v is None else v
+                                for v in values], dtype=object)
+        self.bad = np.isnan(self.arith)                             # text or error
+        self.mixed = np.array([not (v is None or type(v) is float) for v in values], dtype=bool)
+        self.errors = np.array([type(v) is XLError for v in values], dtype=bool)
+        self.index = None
+
+    def rows_of(self, key):
+        """Rows holding ``key`` (see :func:`_match_key`), ascending."""
+        if self.index is None:
+            index = {}
+            for row, v in enumerate(self.folded.tolist()):
+                if v != "":
+                    index.setdefault(_match_key(v), []).append(row)
+            self.index = index
+        return self.index.get(key, ())
+
+
+class Grid:
+    """Cell values of a workbook, one object array per sheet column.
+
+    ``spills`` maps each array or spill anchor to the last column and row
+    its result currently covers; :func:`ANCHORARRAY` and dependency
+    tracking read it.
+    """
+
+    def __init__(self):
+        self._cols = {}             # sheet -> {col: object array indexed by row}
+        self._size = {}             # sheet -> length of that sheet's arrays
+        self.extent = {}            # sheet -> [last col, last row] ever holding a value
+        self.spills = {}
+        self._views = {}            # (sheet, col) -> _Views
+
+    def get(self, sheet, col, row):
+        column = self._cols.get(sheet, {}).get(col)
+        return column[row] if column is not None and row < len(column) else None
+
+    def set(self, sheet, col, row, value):
+        cols = self._cols.setdefault(sheet, {})
+        size = self._size.get(sheet, 0)
+        if row >= size:
+            size = self._size[sheet] = max(row + 1, 2 * size, 64)
+            for c, column in cols.items():
+                cols[c] = np.append(column, np.full(size - len(column), None, dtype=object))
+        column = cols.get(col)
+        if column is None:
+            column = cols[col] = np.full(size, None, dtype=object)
+        column[row] = value
+        self._views.pop((sheet, col), None)
+        if value is not None:
+            extent = self.extent.setdefault(sheet, [0, 0])
+            extent[0], extent[1] = max(extent[0], col), max(extent[1], row)
+
+    def clip(self, ref):
+        """Last column and row of ``ref`` to read: whole-column and whole-row
+        references stop at the sheet's used area."""
+        last_col, last_row = self.extent.get(ref.sheet, (0, 0))
+        return (min(ref.c2, max(last_col, ref.c1 - 1)) if ref.c2 == MAX_COL else ref.c2,
+                min(ref.r2, max(last_row, ref.r1 - 1)) if ref.r2 == MAX_ROW else ref.r2)
+
+    def _view(self, sheet, col):
+        views = self._views.get((sheet, col))
+        if views is None:
+            column = self._cols.get(sheet, {}).get(col)
+            if column is None:
+                return None
+            views = self._views[(sheet, col)] = _Views(column)
+        return views
+
+    def _gather(self, ref, source, fill, dtype):
+        c2, r2 = self.clip(ref)
+        out = np.full((max(0, r2 - ref.r1 + 1), max(0, c2 - ref.c1 + 1)), fill, dtype=dtype)
+        for j, col in enumerate(range(ref.c1, c2 + 1)):
+            part = source(ref.sheet, col)
+            if part is not None:
+                part = part[ref.r1:r2 + 1]
+                out[:len(part), j] = part
+        return out
+
+    def block(self, ref):
+        """The values of ``ref`` as a 2-D object array."""
+        return self._gather(ref, lambda sheet, col: self._cols.get(sheet, {}).get(col), None, object)
+
+    def _view_block(self, ref, attr, fill, dtype):
+        def source(sheet, col):
+            views = self._view(sheet, col)
+            return getattr(views, attr) if views is not None else None
+        return self._gather(ref, source, fill, dtype)
+
+    def numbers(self, ref):
+        """Numeric cells of ``ref`` as floats, NaN elsewhere."""
+        return self._view_block(ref, "numbers", np.nan, np.float64)
+
+    def folded(self, ref):
+        """Cells of ``ref`` with text case-folded and blanks as ""."""
+        return self._view_block(ref, "folded", "", object)
+
+    def errors(self, ref):
+        return self._view_block(ref, "errors", False, bool)
+
+    def arith(self, ref):
+        """``ref`` as arithmetic reads it, or None when a cell holds text or an error."""
+        if self._view_block(ref, "bad", False, bool).any():
+            return None
+        return self._view_block(ref, "arith", 0.0, np.float64)
+
+    def plain_numbers(self, ref):
+        """``ref`` as floats (blanks 0) when it holds only numbers and blanks, else None."""
+        if self._view_block(ref, "mixed", False, bool).any():
+            return None
+        return self._view_block(ref, "arith", 0.0, np.float64)
+
+    def find(self, ref, key):
+        """Position (1-based) of the first cell of one-column ``ref`` matching ``key``."""
+        views = self._view(ref.sheet, ref.c1)
+        if views is None:
+            return None
+        rows = views.rows_of(key)
+        i = bisect_left(rows, ref.r1)
+        return rows[i] - ref.r1 + 1 if i < len(rows) and rows[i] <= ref.r2 else None
+
+
+# -- tokens and parsing ----------------------------------------------------------------
+
+_TOKEN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<error>\#(?:NULL!|DIV/0!|VALUE!|REF!|NAME\?|NUM!|N/A|SPILL!|CALC!))
+  | (?P<func>[A-Za-z_][\w.]*)\(
+  | (?:(?P<sheet>'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?
+    (?P<area>\$?[A-Z]{1,3}\$?\d+(?::\$?[A-Z]{1,3}\$?\d+)?
+            |\$?[A-Z]{1,3}:\$?[A-Z]{1,3}
+            |\$?\d+:\$?\d+)(?![\w(])
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_][\w.]*)
+  | (?P<op><>|<=|>=|[-+*/^&=<>%(),;{}])
+""", re.VERBOSE)
+_CORNER = re.compile(r"(\$?)([A-Z]*)(\$?)(\d*)")
+
+
+def _corner(text, col, row):
+    """One corner of an area as ``(col or offset, col absolute, row or offset, row absolute)``."""
+    c_abs, letters, r_abs, digits = _CORNER.fullmatch(text).groups()
+    if not letters:                     # "$3": the anchor belongs to the row
+        c_abs, r_abs = "", c_abs or r_abs
+    c = col_index(letters) if letters else None
+    r = int(digits) if digits else None
+    return (c if c is None or c_abs else c - col, bool(c_abs) or c is None,
+            r if r is None or r_abs else r - row, bool(r_abs) or r is None)
+
+
+def _tokenize(text, col, row):
+    """Tokens of ``text`` with relative references as offsets from (``col``, ``row``)."""
+    tokens, pos = [], 0
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None:
+            raise FormulaError(f"cannot parse {text!r} at {text[pos:pos + 20]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "space":
+            continue
+        if kind == "area":
+            sheet = m.group("sheet")
+            if sheet:
+                sheet = sheet.strip("'").replace("''", "'")
+            first, _, last = m.group("area").partition(":")
+            c1, c1a, r1, r1a = _corner(first, col, row)
+            c2, c2a, r2, r2a = _corner(last or first, col, row)
+            if c1 is None:                  # 3:3 -- whole rows
+                c1, c2 = 1, MAX_COL
+            if r1 is None:                  # C:C -- whole columns
+                r1, r2 = 1, MAX_ROW
+            tokens.append(("ref", (sheet, c1, c1a, r1, r1a, c2, c2a, r2, r2a)))
+        else:
+            tokens.append((kind, m.group(kind)))
+    return tuple(tokens)
+
+
+def compile_formula(text, col, row):
+    """A function ``f(context)`` evaluating ``text`` (without the ``=``) as
+    written in cell (``col``, ``row``); see :class:`Context`."""
+    return _compile(_tokenize(text, col, row))
+
+
+@lru_cache(maxsize=4096)
+def _compile(tokens):
+    parser = _Parser(tokens)
+    node = parser.expression()
+    if parser.pos != len(tokens):
+        raise FormulaError(f"unexpected {parser.peek()[1]!r}")
+    return node
+
+
+_COMPARE = {"=": operator.eq, "<>": operator.ne, "<": operator.lt, ">": operator.gt,
+            "<=": operator.le, ">=": operator.ge}
+_ARITH = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv,
+          "^": operator.pow}
+
+
+class _Parser:
+    """Recursive descent over the tokens, building closures.
+
+    Precedence, loosest first: comparison, ``&``, ``+ -``, ``* /``, ``^``,
+    prefix ``- +``, postfix ``%``.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        token = self.peek()
+        if token[0] is None or (value is not None and token[1] != value):
+            raise FormulaError(f"expected {value or 'more'}, got {token[1]!r}")
+        self.pos += 1
+        return token
+
+    def _binary(self, operators, operand, combine):
+        node = operand()
+        while self.peek()[0] == "op" and self.peek()[1] in operators:
+            op = self.take()[1]
+            node = combine(op, node, operand())
+        return node
+
+    def expression(self):
+        return self._binary(_COMPARE, self.concat,
+                            lambda op, a, b: lambda ctx: compare(op, a(ctx), b(ctx), ctx))
+
+    def concat(self):
+        return self._binary(("&",), self.additive, lambda op, a, b: lambda ctx: concat(a(ctx), b(ctx), ctx))
+
+    def additive(self):
+        return self._binary(("+", "-"), self.term, _arith_node)
+
+    def term(self):
+        return self._binary(("*", "/"), self.power, _arith_node)
+
+    def power(self):
+        return self._binary(("^",), self.prefix, _arith_node)
+
+    def prefix(self):
+        if self.peek() == ("op", "-"):
+            self.take()
+            operand = self.prefix()
+            return lambda ctx: arith("*", operand(ctx), -1.0, ctx)
+        if self.peek() == ("op", "+"):
+            self.take()
+            return self.prefix()
+        node = self.primary()
+        while self.peek() == ("op", "%"):
+            self.take()
+            node = _arith_node("/", node, lambda ctx: 100.0)
+        return node
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == "number":
+            number = float(value)
+            return lambda ctx: number
+        if kind == "string":
+            text = value[1:-1].replace('""', '"')
+            return lambda ctx: text
+        if kind == "error":
+            error = ERRORS[value]
+            return lambda ctx: error
+        if kind == "ref":
+            return _ref_node(*value)
+        if kind == "name":
+            upper = value.upper()
+            if upper in ("TRUE", "FALSE"):
+                flag = upper == "TRUE"
+                return lambda ctx: flag
+            return lambda ctx: ctx.names.get(value, ERRORS["#NAME?"])
+        if kind == "func":
+            return self.call(value)
+        if value == "(":
+            node = self.expression()
+            self.take(")")
+            return node
+        if value == "{":
+            return self.array()
+        raise FormulaError(f"unexpected {value!r}")
+
+    def arguments(self):
+        args = []
+        if self.peek() == ("op", ")"):
+            self.take()
+            return args
+        while True:
+            if self.peek() in (("op", ","), ("op", ")")):
+                args.append(lambda ctx: MISSING)
+            else:
+                args.append(self.expression())
+            if self.take()[1] == ")":
+                return args
+
+    def call(self, name):
+        bare = name.upper().rpartition(".")[2]
+        if bare == "LET":
+            return self.let()
+        args = self.arguments()
+        spec = FUNCTIONS.get(bare)
+        if spec is None:
+            raise FormulaError(f"unsupported function {name}")
+        function, lazy = spec
+        if lazy:
+            return lambda ctx: function(ctx, *args)
+        return lambda ctx: function(ctx, *[arg(ctx) for arg in args])
+
+    def let(self):
+        names, values = [], []
+        while True:
+            if self.peek()[0] == "name" and self.tokens[self.pos + 1:self.pos + 2] == (("op", ","),):
+                names.append(self.take()[1])
+                self.take(",")
+                values.append(self.expression())
+                self.take(",")
+            else:
+                body = self.expression()
+                self.take(")")
+                break
+
+        def node(ctx):
+            for name, value in zip(names, values):
+                ctx = ctx.bind(name, value(ctx))
+            return body(ctx)
+        return node
+
+    def array(self):
+        rows, row = [], []
+        while True:
+            sign = -1.0 if self.peek() == ("op", "-") else 1.0
+            if sign < 0:
+                self.take()
+            kind, value = self.take()
+            if kind == "number":
+                row.append(sign * float(value))
+            elif kind == "string":
+                row.append(value[1:-1].replace('""', '"'))
+            elif kind == "name" and value.upper() in ("TRUE", "FALSE"):
+                row.append(value.upper() == "TRUE")
+            elif kind == "error":
+                row.append(ERRORS[value])
+            else:
+                raise FormulaError(f"unexpected {value!r} in an array constant")
+            sep = self.take()[1]
+            if sep in (";", "}"):
+                rows.append(row)
+                row = []
+            if sep == "}":
+                break
+        if len({len(r) for r in rows}) != 1:
+            raise FormulaError("array constant rows differ in length")
+        numeric = all(type(v) is float for r in rows for v in r)
+        constant = np.array(rows, dtype=np.float64 if numeric else object)
+        return lambda ctx: constant
+
+
+def _arith_node(op, a, b):
+    return lambda ctx: arith(op, a(ctx), b(ctx), ctx)
+
+
+def _ref_node(sheet, c1, c1a, r1, r1a, c2, c2a, r2, r2a):
+    if c1a and r1a and c2a and r2a:
+        return lambda ctx: Ref(sheet or ctx.sheet, c1, r1, c2, r2)
+
+    def node(ctx):
+        col, row = ctx.col, ctx.row
+        return Ref(sheet or ctx.sheet, c1 if c1a else col + c1, r1 if r1a else row + r1,
+                   c2 if c2a else col + c2, r2 if r2a else row + r2)
+    return node
+
+
+class Context:
+    """Where a formula is evaluated: the grid, the host cell, the date
+    ``TODAY()`` returns (as a serial number) and any LET names in scope."""
+
+    __slots__ = ("grid", "sheet", "col", "row", "today", "names")
+
+    def __init__(self, grid, sheet, col, row, today, names=None):
+        self.grid, self.sheet, self.col, self.row, self.today = grid, sheet, col, row, today
+        self.names = names or {}
+
+    def bind(self, name, value):
+        return Context(self.grid, self.sheet, self.col, self.row, self.today,
+                       {**self.names, name: value})
+
+
+# -- values ----------------------------------------------------------------------------
+
+def value_of(v, ctx):
+    """``v`` with references read: one cell gives its value, a range a 2-D array."""
+    if type(v) is Ref:
+        if v.r1 == v.r2 and v.c1 == v.c2:
+            return ctx.grid.get(v.sheet, v.c1, v.r1)
+        return ctx.grid.block(v)
+    return v
+
+
+def _as_2d(v):
+    if isinstance(v, np.ndarray):
+        return v
+    return np.array([[v]], dtype=np.float64 if type(v) is float else object)
+
+
+def _objects(v):
+    """``v`` as an object array (or the scalar itself) for per-element rules."""
+    return v.astype(object) if isinstance(v, np.ndarray) and v.dtype != object else v
+
+
+def _number(x):
+    """A scalar as arithmetic reads it."""
+    if isinstance(x, float):
+        return x
+    if x is None:
+        return 0.0
+    if isinstance(x, (bool, np.bool_)):
+        return float(x)
+    if isinstance(x, str):
+        if not x:
+            return 0.0
+        try:
+            return float(x.strip())
+        except ValueError:
+            return VALUE
+    if isinstance(x, XLError):
+        return x
+    if isinstance(x, (int, np.integer, np.floating)):
+        return float(x)
+    return VALUE
+
+
+def _text(x):
+    """A scalar as ``&`` and TEXT read it."""
+    if x is None:
+        return ""
+    if isinstance(x, (bool, np.bool_)):
+        return "TRUE" if x else "FALSE"
+    if isinstance(x, (float, int, np.number)):
+        x = float(x)
+        return str(int(x)) if x.is_integer() and abs(x) < 1e15 else format(x, ".15g")
+    return x if isinstance(x, XLError) else str(x)
+
+
+def _truth(x):
+    if x is None:
+        return False
+    if isinstance(x, (bool, np.bool_)):
+        return bool(x)
+    if isinstance(x, (float, int, np.number)):
+        return x != 0
+    if isinstance(x, str):
+        upper = x.upper()
+        return upper == "TRUE" if upper in ("TRUE", "FALSE") else VALUE
+    return x if isinstance(x, XLError) else VALUE
+
+
+def _broadcast(*arrays):
+    """Arrays (or scalars) brought to one shape: a single row or column repeats,
+    anything else missing is #N/A, as in Excel array formulas."""
+    shapes = [a.shape for a in arrays if isinstance(a, np.ndarray)]
+    if not shapes:
+        return arrays
+    rows, cols = max(s[0] for s in shapes), max(s[1] for s in shapes)
+    out = []
+    for a in arrays:
+        if not isinstance(a, np.ndarray) or a.shape == (rows, cols):
+            out.append(a)
+            continue
+        if a.shape[0] == 1 and a.shape[1] == 1:
+            out.append(a[0, 0].item() if a.dtype != object else a[0, 0])
+            continue
+        if a.shape[0] == 1:
+            a = np.repeat(a, rows, axis=0)
+        if a.shape[1] == 1:
+            a = np.repeat(a, cols, axis=1)
+        if a.shape != (rows, cols):
+            padded = np.full((rows, cols), NA, dtype=object)
+            padded[:a.shape[0], :a.shape[1]] = a
+            a = padded
+        out.append(a)
+    return out
+
+
+def _elementwise(function, *args):
+    """Apply scalar ``function`` to every element of the broadcast arguments."""
+    args = _broadcast(*args)
+    if not any(isinstance(a, np.ndarray) for a in args):
+        return function(*args)
+    out = np.frompyfunc(function, len(args), 1)(*[_objects(a) for a in args])
+    return out if isinstance(out, np.ndarray) else np.array([[out]], dtype=object)
+
+
+def _numeric(v, ctx):
+    """``v`` as floats for arithmetic, or None when an element needs :func:`_number`."""
+    if type(v) is Ref:
+        if v.single:
+            return _number(ctx.grid.get(v.sheet, v.c1, v.r1))
+        return ctx.grid.arith(v)
+    if isinstance(v, np.ndarray):
+        return v.astype(np.float64) if v.dtype.kind in "fbiu" else None
+    return _number(v)
+
+
+def _arith_scalar(op, a, b):
+    a, b = _number(a), _number(b)
+    if isinstance(a, XLError):
+        return a
+    if isinstance(b, XLError):
+        return b
+    if op == "/" and b == 0:
+        return DIV0
+    try:
+        result = _ARITH[op](a, b)
+    except (OverflowError, ZeroDivisionError):
+        return NUM
+    if isinstance(result, complex) or not math.isfinite(result):
+        return NUM
+    return result
+
+
+def arith(op, a, b, ctx):
+    x, y = _numeric(a, ctx), _numeric(b, ctx)
+    if not isinstance(x, np.ndarray) and not isinstance(y, np.ndarray) and x is not None and y is not None:
+        return _arith_scalar(op, x, y)
+    if x is not None and y is not None and not is_error(x) and not is_error(y):
+        x, y = _broadcast(x, y)
+        if not (isinstance(x, np.ndarray) and x.dtype == object
+                or isinstance(y, np.ndarray) and y.dtype == object):
+            with np.errstate(all="ignore"):
+                result = _ARITH[op](x, y)
+            if np.isfinite(result).all():
+                return result
+    return _elementwise(lambda p, q: _arith_scalar(op, p, q), value_of(a, ctx), value_of(b, ctx))
+
+
+def _rank(x):
+    return 2 if isinstance(x, (bool, np.bool_)) else 1 if isinstance(x, str) else 0
+
+
+def _compare_scalar(op, a, b):
+    if isinstance(a, XLError):
+        return a
+    if isinstance(b, XLError):
+        return b
+    if a is None:
+        a = "" if isinstance(b, str) else False if isinstance(b, (bool, np.bool_)) else 0.0
+    if b is None:
+        b = "" if isinstance(a, str) else False if isinstance(a, (bool, np.bool_)) else 0.0
+    ra, rb = _rank(a), _rank(b)
+    if ra != rb:
+        return _COMPARE[op](ra, rb)
+    if ra == 1:
+        a, b = a.casefold(), b.casefold()
+    return _COMPARE[op](a, b)
+
+
+def _plain(v, ctx):
+    """``v`` as floats when it holds only numbers and blanks, else None."""
+    if type(v) is Ref and not v.single:
+        return ctx.grid.plain_numbers(v)
+    if isinstance(v, np.ndarray):
+        return v if v.dtype.kind == "f" else None
+    v = value_of(v, ctx)
+    return v if isinstance(v, float) else 0.0 if v is None else None
+
+
+def _folded(v, ctx):
+    """``v`` case-folded for ``=``/``<>`` against text, or None if it holds errors."""
+    if type(v) is Ref and not v.single:
+        return None if ctx.grid.errors(v).any() else ctx.grid.folded(v)
+    if isinstance(v, np.ndarray):
+        v = _objects(v)
+        if any(isinstance(x, XLError) for x in v.flat):
+            return None
+        return _fold(v)
+    return None
+
+
+def compare(op, a, b, ctx):
+    if (type(a) is not Ref or a.single) and not isinstance(a, np.ndarray) \
+            and (type(b) is not Ref or b.single) and not isinstance(b, np.ndarray):
+        return _compare_scalar(op, value_of(a, ctx), value_of(b, ctx))
+    x, y = _plain(a, ctx), _plain(b, ctx)
+    if x is not None and y is not None:
+        x, y = _broadcast(x, y)
+        return _COMPARE[op](x, y)
+    if op in ("=", "<>"):
+        for array, other in ((a, b), (b, a)):
+            text = value_of(other, ctx)
+            if isinstance(text, str) and not isinstance(array, str):
+                folded = _folded(array, ctx)
+                if folded is not None:
+                    equal = folded == text.casefold()
+                    return equal if op == "=" else ~equal
+    return _elementwise(lambda p, q: _compare_scalar(op, p, q), value_of(a, ctx), value_of(b, ctx))
+
+
+def concat(a, b, ctx):
+    def join(p, q):
+        p, q = _text(p), _text(q)
+        return p if isinstance(p, XLError) else q if isinstance(q, XLError) else p + q
+    return _elementwise(join, value_of(a, ctx), value_of(b, ctx))
+
+
+def first_error(v):
+    """The first error in array ``v``, or None."""
+    if isinstance(v, np.ndarray) and v.dtype == object:
+        for x in v.flat:
+            if isinstance(x, XLError):
+                return x
+    return None
+
+
+def _truth_array(v):
+    """Truth values of array ``v`` as a bool array, or the first error in it."""
+    if v.dtype.kind == "b":
+        return v
+    if v.dtype.kind in "fiu":
+        return v != 0
+    truth = np.frompyfunc(_truth, 1, 1)(v)
+    return first_error(truth) or truth.astype(bool)
+
+
+def _whole(values):
+    """Integers from a number or array argument, or an error."""
+    if isinstance(values, np.ndarray):
+        numbers = np.frompyfunc(_number, 1, 1)(_objects(values))
+        error = first_error(numbers)
+        return error if error is not None else np.trunc(numbers.astype(np.float64)).astype(np.int64)
+    number = _number(values)
+    return number if isinstance(number, XLError) else int(number)
+
+
+def _round_half_away(x, digits):
+    """Excel's ROUND: halves away from zero after cleaning binary noise (see
+    :func:`~.data.to_cents`)."""
+    scale = 10.0 ** digits
+    scaled = np.round(np.abs(x) * scale, 6)
+    return np.sign(x) * np.floor(scaled + 0.5) / scale
+
+
+def serial_years(serials):
+    """YEAR of Excel serial numbers (array); serials below 61 fall in 1900."""
+    days = np.floor(serials).astype("timedelta64[D]")
+    years = (np.datetime64(EXCEL_EPOCH, "D") + days).astype("datetime64[Y]").astype(np.int64) + 1970
+    return np.where(serials < 61, 1900, years).astype(np.float64)
+
+
+# -- functions ---------------------------------------------------------------------------
+
+def _if(ctx, condition, then=None, otherwise=None):
+    c = value_of(condition(ctx), ctx)
+    if not isinstance(c, np.ndarray):
+        truth = _truth(c)
+        if isinstance(truth, XLError):
+            return truth
+        branch = then if truth else otherwise
+        if branch is None:
+            return truth
+        result = branch(ctx)
+        return 0.0 if result is MISSING else result
+    truth = _truth_array(c)
+    # An error in the condition gives that error in its place only.
+    errors = None
+    if isinstance(truth, XLError):
+        truth = np.frompyfunc(_truth, 1, 1)(c)
+        failed = _error_mask(truth)
+        errors = np.where(failed, truth, False)
+        truth = np.where(failed, False, truth).astype(bool)
+    a = value_of(then(ctx), ctx) if then is not None else True
+    b = value_of(otherwise(ctx), ctx) if otherwise is not None else False
+    a, b = (0.0 if v is MISSING else v for v in (a, b))
+    if errors is not None:
+        truth, a, b, errors = _broadcast(truth, a, b, errors)
+        out = np.where(truth, _objects(a), _objects(b))
+        failed = _error_mask(errors)
+        out[failed] = errors[failed]
+        return out
+    truth, a, b = _broadcast(truth, a, b)
+    if not isinstance(truth, np.ndarray):
+        return a if truth else b
+    if all(not isinstance(v, np.ndarray) and type(v) is float or
+           isinstance(v, np.ndarray) and v.dtype.kind == "f" for v in (a, b)):
+        return np.where(truth, a, b)
+    return np.where(truth, _objects(a), _objects(b))
+
+
+def _logical(ctx, args, combine):
+    """AND/OR: ``combine`` over the truth of every argument.  Text and blanks
+    read through references or arrays are skipped; with nothing left the
+    result is #VALUE!."""
+    truths = []
+    for arg in args:
+        if arg is MISSING:
+            continue
+        v = value_of(arg, ctx)
+        if isinstance(v, np.ndarray):
+            if v.dtype.kind in "fiub":
+                truths.extend((v != 0).flat)
+                continue
+            items = [x for x in v.flat if x is not None and not isinstance(x, str)]
+        elif type(arg) is Ref and (v is None or isinstance(v, str)):
+            continue
+        else:
+            items = [v]
+        for x in items:
+            truth = _truth(x)
+            if isinstance(truth, XLError):
+                return truth
+            truths.append(truth)
+    return combine(truths) if truths else VALUE
+
+
+def _and(ctx, *args):
+    return _logical(ctx, args, all)
+
+
+def _or(ctx, *args):
+    return _logical(ctx, args, any)
+
+
+def _n(ctx, value):
+    def one(x):
+        if isinstance(x, (bool, np.bool_)):
+            return float(x)
+        if isinstance(x, (float, int, np.number)):
+            return float(x)
+        return x if isinstance(x, XLError) else 0.0
+    return _elementwise(one, value_of(value, ctx))
+
+
+def _iferror(ctx, value, fallback):
+    v = value_of(value(ctx), ctx)
+    if isinstance(v, XLError):
+        return value_of(fallback(ctx), ctx)
+    if isinstance(v, np.ndarray) and v.dtype == object:
+        mask = np.frompyfunc(lambda x: isinstance(x, XLError), 1, 1)(v).astype(bool)
+        if mask.any():
+            alt = value_of(fallback(ctx), ctx)
+            out = v.copy()
+            alt = np.broadcast_to(_objects(alt), v.shape) if isinstance(alt, np.ndarray) else alt
+            out[mask] = alt[mask] if isinstance(alt, np.ndarray) else alt
+            return out
+    return v
+
+
+def _numbers_in(ctx, arg):
+    """The numbers SUM, MAX, MIN and SMALL take from one argument, as a flat float
+    array, or an error.  References and arrays give only their numeric
+    elements; a single value is converted."""
+    if arg is MISSING:
+        return np.empty(0)
+    if type(arg) is Ref and not arg.single:
+        grid = ctx.grid
+        if grid.errors(arg).any():
+            return first_error(grid.block(arg))
+        numbers = grid.numbers(arg).ravel()
+        return numbers[~np.isnan(numbers)]
+    if type(arg) is Ref:
+        v = value_of(arg, ctx)
+        if isinstance(v, XLError):
+            return v
+        return np.array([v]) if type(v) is float else np.empty(0)
+    if isinstance(arg, np.ndarray):
+        if arg.dtype.kind in "fiu":
+            return arg.astype(np.float64).ravel()
+        if arg.dtype.kind == "b":
+            return np.empty(0)
+        error = first_error(arg)
+        if error is not None:
+            return error
+        return np.array([x for x in arg.flat if type(x) is float], dtype=np.float64)
+    number = _number(arg)
+    return number if isinstance(number, XLError) else np.array([number])
+
+
+def _collect(ctx, args):
+    parts = []
+    for arg in args:
+        numbers = _numbers_in(ctx, arg)
+        if isinstance(numbers, XLError):
+            return numbers
+        parts.append(numbers)
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def _sum(ctx, *args):
+    numbers = _collect(ctx, args)
+    return numbers if isinstance(numbers, XLError) else float(numbers.sum())
+
+
+def _max(ctx, *args):
+    numbers = _collect(ctx, args)
+    return numbers if isinstance(numbers, XLError) else float(numbers.max()) if len(numbers) else 0.0
+
+
+def _min(ctx, *args):
+    numbers = _collect(ctx, args)
+    return numbers if isinstance(numbers, XLError) else float(numbers.min()) if len(numbers) else 0.0
+
+
+def _small(ctx, array, k):
+    numbers = _numbers_in(ctx, array)
+    if isinstance(numbers, XLError):
+        return numbers
+    numbers = np.sort(numbers)
+    k = _whole(value_of(k, ctx))
+    if isinstance(k, XLError):
+        return k
+    if isinstance(k, np.ndarray):
+        valid = (k >= 1) & (k <= len(numbers))
+        out = np.full(k.shape, NUM, dtype=object)
+        out[valid] = numbers[k[valid] - 1]
+        return out if not valid.all() else out.astype(np.float64)
+    return float(numbers[k - 1]) if 1 <= k <= len(numbers) else NUM
+
+
+def _counta(ctx, *args):
+    count = 0
+    for arg in args:
+        if arg is MISSING:
+            continue
+        v = value_of(arg, ctx)
+        if isinstance(v, np.ndarray):
+            count += sum(1 for x in v.flat if x is not None) if type(arg) is Ref else v.size
+        elif v is not None or type(arg) is not Ref:
+            count += 1
+    return float(count)
+
+
+def _sumproduct(ctx, *args):
+    arrays = [_as_2d(value_of(arg, ctx)) for arg in args]
+    if len({a.shape for a in arrays}) != 1:
+        return VALUE
+    product = None
+    for a in arrays:
+        if a.dtype.kind in "fiub":
+            numbers = a.astype(np.float64)
+        else:
+            error = first_error(a)
+            if error is not None:
+                return error
+            numbers = np.array([x if type(x) is float else 0.0 for x in a.flat],
+                               dtype=np.float64).reshape(a.shape)
+        product = numbers if product is None else product * numbers
+    return float(product.sum())
+
+
+def _round(ctx, number, digits=MISSING):
+    digits = 0 if digits is MISSING else _whole(value_of(digits, ctx))
+    if isinstance(digits, (XLError, np.ndarray)):
+        return digits if isinstance(digits, XLError) else VALUE
+    x = _numeric(number, ctx)
+    if isinstance(x, np.ndarray):
+        return _round_half_away(x, digits)
+    if x is not None and not isinstance(x, XLError):
+        return float(_round_half_away(x, digits))
+    if isinstance(x, XLError):
+        return x
+    def one(v):
+        v = _number(v)
+        return v if isinstance(v, XLError) else float(_round_half_away(v, digits))
+    return _elementwise(one, value_of(number, ctx))
+
+
+def _abs(ctx, number):
+    x = _numeric(number, ctx)
+    if isinstance(x, np.ndarray):
+        return np.abs(x)
+    if x is not None:
+        return x if isinstance(x, XLError) else abs(x)
+    def one(v):
+        v = _number(v)
+        return v if isinstance(v, XLError) else abs(v)
+    return _elementwise(one, value_of(number, ctx))
+
+
+def _year_scalar(x):
+    x = _number(x)
+    if isinstance(x, XLError):
+        return x
+    return NUM if x < 0 else float(serial_years(np.array([x]))[0])
+
+
+def _year(ctx, serial):
+    x = _numeric(serial, ctx)
+    if isinstance(x, np.ndarray) and (x >= 0).all():
+        return serial_years(x)
+    return _elementwise(_year_scalar, value_of(serial, ctx))
+
+
+def _date_scalar(y, m, d):
+    y, m, d = _number(y), _number(m), _number(d)
+    for v in (y, m, d):
+        if isinstance(v, XLError):
+            return v
+    y, m, d = int(y), int(m), int(d)
+    if 0 <= y < 1900:
+        y += 1900
+    year, month = divmod(y * 12 + m - 1, 12)
+    if not 1 <= year <= 9999:
+        return NUM
+    serial = (datetime.date(year, month + 1, 1) - EXCEL_EPOCH).days + d - 1
+    return float(serial) if serial >= 0 else NUM
+
+
+def _date(ctx, y, m, d):
+    return _elementwise(_date_scalar, value_of(y, ctx), value_of(m, ctx), value_of(d, ctx))
+
+
+def _value_scalar(x):
+    if isinstance(x, float) or isinstance(x, XLError):
+        return x
+    if x is None:
+        return 0.0
+    if isinstance(x, str):
+        text = x.strip().replace(",", "").replace("$", "")
+        scale = 1.0
+        if text.endswith("%"):
+            text, scale = text[:-1], 0.01
+        try:
+            return float(text) * scale
+        except ValueError:
+            pass
+        try:
+            return to_serial(datetime.date.fromisoformat(text))
+        except ValueError:
+            return VALUE
+    return VALUE
+
+
+def _value(ctx, x):
+    return _elementwise(_value_scalar, value_of(x, ctx))
+
+
+_NUMBER_FORMAT = re.compile(r'(?P<pre>[^#0.,]*)(?P<int>[#0,]+)(?:\.(?P<dec>[#0]+))?(?P<post>[^#0.,]*)')
+
+
+def _text_scalar(x, fmt):
+    if isinstance(fmt, XLError):
+        return fmt
+    x = _number(x)
+    if isinstance(x, XLError):
+        return x
+    m = _NUMBER_FORMAT.fullmatch(_text(fmt))
+    if m is None:
+        return VALUE
+    decimals = len(m.group("dec") or "")
+    digits = f"{float(_round_half_away(abs(x), decimals)):{',' if ',' in m.group('int') else ''}.{decimals}f}"
+    if "0" not in m.group("int") and digits.startswith("0"):
+        digits = digits[1:]
+
+    def literal(part):
+        return part.replace('"', "").replace("\\", "")
+    return f"{'-' if x < 0 else ''}{literal(m.group('pre'))}{digits}{literal(m.group('post'))}"
+
+
+def _text_fn(ctx, value, fmt):
+    return _elementwise(_text_scalar, value_of(value, ctx), value_of(fmt, ctx))
+
+
+def _today(ctx):
+    return ctx.today
+
+
+def _row(ctx, ref=MISSING):
+    if ref is MISSING:
+        return float(ctx.row)
+    if type(ref) is not Ref:
+        return VALUE
+    if ref.r1 == ref.r2:
+        return float(ref.r1)
+    return np.arange(ref.r1, ctx.grid.clip(ref)[1] + 1, dtype=np.float64).reshape(-1, 1)
+
+
+def _rows(ctx, v):
+    if type(v) is Ref:
+        return float(v.r2 - v.r1 + 1)
+    return float(v.shape[0]) if isinstance(v, np.ndarray) else 1.0
+
+
+def _error_mask(values):
+    """Where array ``values`` holds errors, as a bool array, or None."""
+    if not isinstance(values, np.ndarray) or values.dtype != object:
+        return None
+    mask = np.frompyfunc(lambda x: isinstance(x, XLError), 1, 1)(values).astype(bool)
+    return mask if mask.any() else None
+
+
+def _index(ctx, source, row=MISSING, col=MISSING):
+    ref = source if type(source) is Ref else None
+    values = None if ref is not None else _as_2d(value_of(source, ctx))
+    rows, cols = ref.shape if ref is not None else values.shape
+    # An error among array positions gives that error in its place only.
+    row = 0 if row is MISSING else value_of(row, ctx)
+    failed = _error_mask(row)
+    positions = row
+    row = _whole(np.where(failed, 1.0, row) if failed is not None else row)
+    if col is MISSING:
+        if rows == 1 and cols > 1 and not isinstance(row, np.ndarray):
+            row, col = 1, row
+        else:
+            col = 1 if cols == 1 else 0
+    else:
+        col = _whole(value_of(col, ctx))
+    for v in (row, col):
+        if isinstance(v, XLError):
+            return v
+    if not isinstance(row, np.ndarray) and not isinstance(col, np.ndarray):
+        if not (0 <= row <= rows and 0 <= col <= cols):
+            return REF
+        if ref is not None:
+            r1, r2 = (ref.r1, ref.r2) if row == 0 else (ref.r1 + row - 1,) * 2
+            c1, c2 = (ref.c1, ref.c2) if col == 0 else (ref.c1 + col - 1,) * 2
+            return Ref(ref.sheet, c1, r1, c2, r2)
+        part = values[slice(None) if row == 0 else slice(row - 1, row),
+                      slice(None) if col == 0 else slice(col - 1, col)]
+        return part if part.size > 1 else _objects(part)[0, 0]
+    # Arrays of positions pick one value each (INDEX(range, rows, {1,2,3})).
+    row, col = np.broadcast_arrays(np.asarray(row), np.asarray(col))
+    if row.ndim < 2:
+        row, col = row.reshape(1, -1), col.reshape(1, -1)
+    if ref is not None:
+        values = ctx.grid.block(ref)
+    valid = (row >= 1) & (row <= values.shape[0]) & (col >= 1) & (col <= values.shape[1])
+    out = np.full(row.shape, REF, dtype=object)
+    out[valid] = _objects(values)[row[valid] - 1, col[valid] - 1]
+    if failed is not None:
+        failed, positions = (np.broadcast_to(a if a.ndim == 2 else a.reshape(1, -1), row.shape)
+                             for a in (failed, positions))
+        out[failed] = positions[failed]
+    return out
+
+
+def _match_key(v):
+    return (2, bool(v)) if isinstance(v, (bool, np.bool_)) else (1, v) if isinstance(v, str) else (0, v)
+
+
+_WILDCARD = re.compile(r"~([*?~])|([*?])|([^*?~]+|~)")
+
+
+def _wildcard(text):
+    """A compiled pattern for Excel's ``*``/``?`` wildcards (``~`` escapes),
+    or None when ``text`` has none."""
+    if "*" not in text and "?" not in text:
+        return None
+    parts = []
+    for escaped, wild, plain in _WILDCARD.findall(text):
+        parts.append(re.escape(escaped) if escaped else ".*" if wild == "*" else "." if wild else re.escape(plain))
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+
+
+def _fold(values):
+    return np.frompyfunc(lambda x: x.casefold() if isinstance(x, str) else "" if x is None else x,
+                         1, 1)(_objects(values))
+
+
+def _match_one(ctx, v, lookup, kind):
+    if v is None or isinstance(v, XLError):
+        return NA if v is None else v
+    if type(lookup) is Ref:
+        if lookup.r1 != lookup.r2 and lookup.c1 != lookup.c2:
+            return NA
+    elif lookup.shape[0] != 1 and lookup.shape[1] != 1:
+        return NA
+    key = v.casefold() if isinstance(v, str) else v
+    if kind == 0:
+        pattern = _wildcard(key) if isinstance(key, str) else None
+        if pattern is None and type(lookup) is Ref and lookup.c1 == lookup.c2:
+            position = ctx.grid.find(lookup, _match_key(key))
+            return float(position) if position is not None else NA
+        folded = (ctx.grid.folded(lookup) if type(lookup) is Ref else _fold(lookup)).ravel().tolist()
+        for i, x in enumerate(folded):
+            if x == "" or isinstance(x, XLError):
+                continue
+            if pattern.fullmatch(x) if pattern is not None and isinstance(x, str) \
+                    else pattern is None and _match_key(x) == _match_key(key):
+                return float(i + 1)
+        return NA
+    if isinstance(key, float) and kind > 0:
+        # Binary search, as Excel does, over the numeric cells.
+        numbers = (ctx.grid.numbers(lookup) if type(lookup) is Ref else
+                   np.array([x if type(x) is float else math.nan for x in lookup.flat])).ravel()
+        positions = np.flatnonzero(~np.isnan(numbers))
+        i = np.searchsorted(numbers[positions], key, side="right")
+        return float(positions[i - 1] + 1) if i else NA
+    values = (ctx.grid.folded(lookup) if type(lookup) is Ref else _fold(lookup)).ravel().tolist()
+    rank = _rank(key)
+    same = [(x, i) for i, x in enumerate(values)
+            if x != "" and not isinstance(x, XLError) and _rank(x) == rank]
+    if kind > 0:
+        i = bisect_left([x for x, _ in same], key)
+        while i < len(same) and same[i][0] == key:
+            i += 1
+        return float(same[i - 1][1] + 1) if i else NA
+    hits = [i for x, i in same if x >= key]
+    return float(hits[-1] + 1) if hits else NA
+
+
+def _lookup(ctx, value, lookup, result=MISSING):
+    """LOOKUP in its vector form: the ``result`` entry (else the ``lookup``
+    one) at the last ``lookup`` value not above ``value``, a binary search
+    like MATCH type 1."""
+    position = _match(ctx, value, lookup, 1.0)
+    return _index(ctx, lookup if result is MISSING else result, position)
+
+
+def _match(ctx, value, lookup, kind=MISSING):
+    kind = 1 if kind is MISSING else _whole(value_of(kind, ctx))
+    if isinstance(kind, XLError):
+        return kind
+    kind = (kind > 0) - (kind < 0)
+    if type(lookup) is not Ref:
+        lookup = _as_2d(value_of(lookup, ctx))
+    v = value_of(value, ctx)
+    if isinstance(v, np.ndarray):
+        return _elementwise(lambda x: _match_one(ctx, x, lookup, kind), v)
+    return _match_one(ctx, v, lookup, kind)
+
+
+_CRITERION = re.compile(r"(<=|>=|<>|<|>|=)?(.*)", re.DOTALL)
+
+
+def _criterion_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _criteria_mask(ctx, rng, criterion):
+    """Cells of ``rng`` meeting one COUNTIF/SUMIFS criterion, as a bool array."""
+    if isinstance(criterion, XLError):
+        return criterion
+    if type(rng) is Ref:
+        numbers, folded = ctx.grid.numbers(rng), ctx.grid.folded(rng)
+    else:
+        values = _objects(_as_2d(rng))
+        numbers = np.frompyfunc(lambda x: x if type(x) is float else math.nan, 1, 1)(values).astype(np.float64)
+        folded = _fold(values)
+    if criterion is None:
+        criterion = 0.0
+    if isinstance(criterion, (bool, np.bool_)):
+        return np.frompyfunc(lambda x: isinstance(x, bool) and x == criterion, 1, 1)(folded).astype(bool)
+    if isinstance(criterion, float):
+        return numbers == criterion
+    op, rest = _CRITERION.fullmatch(str(criterion)).groups()
+    number = _criterion_number(rest)
+    if number is not None:
+        if op in (None, "="):
+            return numbers == number
+        if op == "<>":
+            return ~(numbers == number)
+        with np.errstate(invalid="ignore"):
+            return _COMPARE[op](numbers, number)
+    key = rest.casefold()
+    if op in (None, "=", "<>"):
+        pattern = _wildcard(key)
+        if pattern is not None:
+            hit = np.frompyfunc(lambda x: isinstance(x, str) and pattern.fullmatch(x) is not None,
+                                1, 1)(folded).astype(bool)
+        else:
+            hit = folded == key
+        return ~hit if op == "<>" else hit
+    compare_text = _COMPARE[op]
+    return np.frompyfunc(lambda x: isinstance(x, str) and x != "" and compare_text(x, key),
+                         1, 1)(folded).astype(bool)
+
+
+def _conditional(ctx, sum_range, pairs):
+    """SUMIFS (``sum_range`` given) or COUNTIFS over ``[(range, criterion)]``.
+
+    A criterion may be an array (a spilled formula's criteria), which gives
+    an array of results.
+    """
+    shapes = {(r.shape if type(r) is Ref else _as_2d(r).shape) for r, _ in pairs}
+    if sum_range is not None:
+        shapes.add(sum_range.shape if type(sum_range) is Ref else _as_2d(sum_range).shape)
+    if len(shapes) != 1:
+        return VALUE
+    criteria = [value_of(c, ctx) for _, c in pairs]
+    if sum_range is not None:
+        if type(sum_range) is Ref:
+            amounts = np.nan_to_num(ctx.grid.numbers(sum_range))
+            errors = ctx.grid.errors(sum_range)
+        else:
+            values = _objects(_as_2d(sum_range))
+            amounts = np.array([x if type(x) is float else 0.0 for x in values.flat]).reshape(values.shape)
+            errors = np.frompyfunc(lambda x: isinstance(x, XLError), 1, 1)(values).astype(bool)
+
+    def one(*values):
+        mask = None
+        for (rng, _), criterion in zip(pairs, values):
+            hit = _criteria_mask(ctx, rng, criterion)
+            if isinstance(hit, XLError):
+                return hit
+            mask = hit if mask is None else mask & hit
+        if sum_range is None:
+            return float(np.count_nonzero(mask))
+        if (errors & mask).any():
+            return first_error(ctx.grid.block(sum_range) if type(sum_range) is Ref else sum_range)
+        return float(amounts[mask].sum())
+
+    if any(isinstance(c, np.ndarray) for c in criteria):
+        return _elementwise(one, *criteria)
+    return one(*criteria)
+
+
+def _sumifs(ctx, sum_range, *args):
+    if len(args) % 2:
+        return VALUE
+    return _conditional(ctx, sum_range, list(zip(args[::2], args[1::2])))
+
+
+def _countifs(ctx, *args):
+    if len(args) % 2:
+        return VALUE
+    return _conditional(ctx, None, list(zip(args[::2], args[1::2])))
+
+
+def _sumif(ctx, rng, criterion, sum_range=MISSING):
+    if sum_range is MISSING:
+        sum_range = rng
+    elif type(sum_range) is Ref and type(rng) is Ref:
+        rows, cols = rng.shape
+        sum_range = Ref(sum_range.sheet, sum_range.c1, sum_range.r1,
+                        sum_range.c1 + cols - 1, sum_range.r1 + rows - 1)
+    return _conditional(ctx, sum_range, [(rng, criterion)])
+
+
+def _countif(ctx, rng, criterion):
+    return _conditional(ctx, None, [(rng, criterion)])
+
+
+def _isnumber(ctx, v):
+    if type(v) is Ref and not v.single:
+        return ~np.isnan(ctx.grid.numbers(v))
+    v = value_of(v, ctx)
+    if isinstance(v, np.ndarray):
+        if v.dtype.kind in "fiu":
+            return np.ones(v.shape, dtype=bool)
+        return np.frompyfunc(lambda x: type(x) is float, 1, 1)(v).astype(bool)
+    return isinstance(v, float)
+
+
+def _filter(ctx, array, include, if_empty=MISSING):
+    values = _as_2d(value_of(array, ctx))
+    keep = _as_2d(value_of(include, ctx))
+    keep = _truth_array(keep)
+    if isinstance(keep, XLError):
+        return keep
+    if keep.shape == (values.shape[0], 1):
+        out = values[keep[:, 0]]
+    elif keep.shape == (1, values.shape[1]):
+        out = values[:, keep[0]]
+    else:
+        return VALUE
+    if out.size == 0:
+        return CALC if if_empty is MISSING else value_of(if_empty, ctx)
+    return out
+
+
+def _sort_key(x):
+    if x is None:
+        return (3, 0)
+    if isinstance(x, XLError):
+        return (4, x.code)
+    return (_rank(x), x.casefold() if isinstance(x, str) else x)
+
+
+def _unique(ctx, array, by_col=MISSING, exactly_once=MISSING):
+    values = _as_2d(value_of(array, ctx))
+    seen, rows = set(), []
+    for i, row in enumerate(values.tolist()):
+        key = tuple(_sort_key(x) for x in row)
+        if key not in seen:
+            seen.add(key)
+            rows.append(i)
+    return values[rows]
+
+
+def _sort(ctx, array, index=MISSING, order=MISSING, by_col=MISSING):
+    values = _as_2d(value_of(array, ctx))
+    index = 1 if index is MISSING else _whole(value_of(index, ctx))
+    order = 1 if order is MISSING else _whole(value_of(order, ctx))
+    if isinstance(index, XLError) or isinstance(order, XLError):
+        return index if isinstance(index, XLError) else order
+    if not 1 <= index <= values.shape[1]:
+        return VALUE
+    column = values[:, index - 1].tolist()
+    rows = sorted(range(len(column)), key=lambda i: _sort_key(column[i]), reverse=order < 0)
+    return values[rows]
+
+
+def _sequence(ctx, rows, cols=MISSING, start=MISSING, step=MISSING):
+    rows, cols = _whole(value_of(rows, ctx)), 1 if cols is MISSING else _whole(value_of(cols, ctx))
+    start = 1.0 if start is MISSING else _number(value_of(start, ctx))
+    step = 1.0 if step is MISSING else _number(value_of(step, ctx))
+    for v in (rows, cols, start, step):
+        if isinstance(v, XLError):
+            return v
+    if rows < 1 or cols < 1:
+        return CALC
+    return (start + step * np.arange(rows * cols, dtype=np.float64)).reshape(rows, cols)
+
+
+def _anchorarray(ctx, ref):
+    if type(ref) is not Ref or not ref.single:
+        return REF
+    span = ctx.grid.spills.get((ref.sheet, ref.c1, ref.r1))
+    return Ref(ref.sheet, ref.c1, ref.r1, *span) if span else REF
+
+
+FUNCTIONS = {
+    # name: (function, takes unevaluated arguments)
+    "IF": (_if, True),
+    "IFERROR": (_iferror, True),
+    "AND": (_and, False),
+    "OR": (_or, False),
+    "N": (_n, False),
+    "SUM": (_sum, False),
+    "MAX": (_max, False),
+    "MIN": (_min, False),
+    "SMALL": (_small, False),
+    "COUNTA": (_counta, False),
+    "SUMPRODUCT": (_sumproduct, False),
+    "ROUND": (_round, False),
+    "ABS": (_abs, False),
+    "YEAR": (_year, False),
+    "DATE": (_date, False),
+    "VALUE": (_value, False),
+    "TEXT": (_text_fn, False),
+    "TODAY": (_today, False),
+    "ROW": (_row, False),
+    "ROWS": (_rows, False),
+    "INDEX": (_index, False),
+    "MATCH": (_match, False),
+    "LOOKUP": (_lookup, False),
+    "SUMIF": (_sumif, False),
+    "SUMIFS": (_sumifs, False),
+    "COUNTIF": (_countif, False),
+    "COUNTIFS": (_countifs, False),
+    "ISNUMBER": (_isnumber, False),
+    "FILTER": (_filter, False),
+    "UNIQUE": (_unique, False),
+    "SORT": (_sort, False),
+    "SEQUENCE": (_sequence, False),
+    "ANCHORARRAY": (_anchorarray, False),
+}
+VOLATILE = frozenset(("TODAY",))
@@ -0,0 +1,1282 @@
+"""Generate the Zakat-LogBook workbook.
+
+Every sheet is streamed through :mod:`zakat_logbook.xlsx`, so the Ledger
+can be sized from the classic 200 rows up to a million without holding cell
+objects in memory.  Run ``python -m zakat_logbook --help`` for the command
+line, or call :func:`generate` from Python.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, replace
+
+from . import layout as L
+from .styles import DUPLICATE, OK_GREEN, SEARCH_HIT, STYLES, WARN_ORANGE, WARN_RED
+from .ummalqura import MONTHS, month_label, month_starts
+from .xlsx import Field, Formula, Workbook, absolute, col_letter
+
+VERSION = "v3.0"   # bump this for future releases
+
+
+PAID_LOOKUPS = ("sumifs", "sorted")
+ASSET_REFS = ("match", "direct")
+TARGETS = ("2016", "365")
+
+
+@dataclass
+class LogbookOptions:
+    """Knobs that change the shape of the generated workbook."""
+
+    ledger_rows: int = L.DEFAULT_LEDGER_ROWS
+    years: int = L.DEFAULT_YEARS
+    # How Zakat Summary B-D read the Stocks/Cash/Debts totals: "match" looks
+    # the Total column up by its header on every row over the whole sheet;
+    # "direct" resolves it while generating and references the one cell.
+    asset_refs: str = "match"
+    # How Zakat Summary K finds each period's payments: "sumifs" scans the
+    # whole Ledger per year; "sorted" adds a cumulative Zakat column to the
+    # Ledger and takes the difference of two binary-search LOOKUPs, which
+    # requires Ledger entries to be kept in date order.
+    paid_lookup: str = "sumifs"
+    # Target Excel 365: the Reports detail table becomes a FILTER spill with
+    # no row cap instead of 100 fixed SMALL(IF(...)) rows, the person and
+    # year lists are UNIQUE spills, the Reports totals are LET/SUMIFS instead
+    # of SUMPRODUCT arrays, and the Zakat Summary columns that do not chain
+    # from the year before are one spill each.
+    dynamic_arrays: bool = False
+    # Write formulas that repeat down a column once, as Excel shared
+    # formulas; off gives every cell its own formula text.
+    shared_formulas: bool = True
+    # Store each formula's computed result in the file, so readers that do
+    # not calculate see the values and Excel skips the full recalculation
+    # on open.  The results are worked out with NumPy (the engine extra);
+    # without it they are left out, as if this were False.
+    cached_values: bool = True
+    # With a price history, how Zakat Summary E and P pick the close for a
+    # date: the last one on or before it ("previous") or the nearest.
+    price_policy: str = "previous"
+    # The Nisab method Settings D43 starts with (a key of L.NISAB_METHODS).
+    nisab_method: str = "gold"
+
+    def __post_init__(self):
+        if self.ledger_rows < 1:
+            raise ValueError("ledger_rows must be at least 1")
+        if self.years < 1:
+            raise ValueError("years must be at least 1")
+        if self.asset_refs not in ASSET_REFS:
+            raise ValueError(f"asset_refs must be one of {', '.join(ASSET_REFS)}")
+        if self.paid_lookup not in PAID_LOOKUPS:
+            raise ValueError(f"paid_lookup must be one of {', '.join(PAID_LOOKUPS)}")
+        if self.price_policy not in L.PRICE_POLICIES:
+            raise ValueError(f"price_policy must be one of {', '.join(L.PRICE_POLICIES)}")
+        if self.nisab_method not in L.NISAB_METHODS:
+            raise ValueError(f"nisab_method must be one of {', '.join(L.NISAB_METHODS)}")
+
+
+# -- Guide ----------------------------------------------------------------------
+
+GUIDE_LEGEND = [
+    ("Blue text", "Manual input cells — these are the cells you type into"),
+    ("Green text", "Auto-calculated or linked from another sheet — do not edit"),
+    ("Red text", "Debts, liabilities, or amounts still owed"),
+    ("Purple text", "Report totals in the Reports sheet"),
+    ("Orange text", "Qurbani and certain breakdown values"),
+    ("Yellow background", "The person-selector cell on the Reports sheet"),
+    ("Gold background", "Nisab threshold — highlights the minimum wealth threshold column"),
+    ("Orange background", "Zakat Due column — what you owe for each year"),
+    ("Pink / red bg", "Running balance — how much Zakat is still outstanding"),
+]
+
+GUIDE_SHEETS = [
+    ("Zakat Summary", "Main dashboard. One row per Zakat year. Enter the date, gold price, and oz of gold you own. Everything else is pulled automatically — Stocks, Cash, Debts, Paid amounts, Status, and Hawl countdown."),
+    ("Stocks", "Track your investment and brokerage accounts. One row per year. Each column = one account. Insert a new column before 'Total Portfolio' to add more accounts."),
+    ("Cash", "Track cash, checking, savings, and liquid accounts. Same row-per-year layout. Insert columns before 'Total Cash' to add more accounts."),
+    ("Debts", "List all outstanding debts. Totals are deducted from your zakatable assets in the Summary. Insert columns before 'Total Debts' to add more debt types."),
+    ("Ledger", "Record every payment — Zakat, Sadaqah, Fitrana, Qurbani, and other types. Use the Type, Service, and Given To dropdowns. Amount + Fees = Total Paid. Running Total auto-cumulates."),
+    ("Reports", "Select any person from the dropdown to see all payments made to them, broken down by type, with full transaction history and service fee summary. Filter by year with the C5 dropdown."),
+    ("Settings", "Manage your dropdown lists — Payment Types (col B), Transfer Services (col D), Recipients (col F). Configure Nisab oz values and use the live Nisab calculator. All changes take effect immediately."),
+    ("Guide (this)", "Reference sheet. All colour codes, column explanations, and FAQ. Nothing here affects any calculations."),
+]
+
+GUIDE_COLUMNS = [
+    ("Zakat Date", "The date on which you calculate your annual Zakat. Typically the same date each lunar year (your 'Zakat anniversary'). Enter this first — other columns reference it."),
+    ("Stock Portfolio ($)", "Auto-pulled from the Stocks sheet — total of all brokerage/investment accounts for that row. Make sure the Stocks row matches this Zakat year."),
+    ("Cash & Liquid ($)", "Auto-pulled from the Cash sheet — total of all checking, savings, and liquid balances for that row."),
+    ("Total Debts ($)", "Auto-pulled from the Debts sheet — subtracted from your assets when calculating net zakatable wealth."),
+    ("Gold Price ($/oz)", "Enter the gold spot price in USD per troy oz on your Zakat date. Look up at goldprice.org or kitco.com. This also drives the Nisab threshold."),
+    ("Gold Owned (oz)", "How many troy oz of gold you personally own on that date (jewelry, coins, bars, etc.)."),
+    ("Value of Gold ($)", "Auto-calculated: Gold Price × Gold Owned oz."),
+    ("Net Zakatable Assets ($)", "Stocks + Cash + Gold Value − Debts. This is the total wealth on which Zakat is assessed."),
+    ("Nisab Threshold ($)", "The minimum wealth threshold for Zakat to be obligatory. Calculated from the Nisab Standard chosen in Settings D43: Gold Price × 2.7315 oz (85g gold, the default), Silver Price × 19.1358 oz (595g silver), or the lower of the two. If Net Assets < Nisab, no Zakat is due."),
+    ("Zakat Due (2.5%) ($)", "2.5% of Net Zakatable Assets — but ONLY if Net Assets ≥ Nisab. Shows $0 if below threshold. Zakat is on your FULL net wealth, not just the surplus above Nisab."),
+    ("Paid This Period ($)", "Auto-calculated from the Ledger: total of all 'Zakat' type payments with dates between the previous Zakat date and this one."),
+    ("Running Balance ($)", "Cumulative: Zakat Due − Paid This Period + previous year's balance. Positive = you still owe. Negative = you have overpaid (credit carries forward)."),
+    ("Status", "Auto status: ✅ Paid in Full (balance ≤ 0), ⚠️ Partially Paid (some paid, balance remains), ❌ Not Started (nothing paid yet for this year)."),
+    ("Brought Forward ($)", "The unpaid Zakat balance carried in from the prior year. Read-only. Highlighted red if > 0 to remind you there is outstanding Zakat from a previous year."),
+]
+
+GUIDE_NISAB = [
+    ("Definition", "Nisab (نصاب) is the minimum amount of wealth a Muslim must possess continuously for one lunar year before Zakat becomes obligatory. If your net zakatable assets fall below Nisab at any point, the Hawl (year cycle) resets."),
+    ("Gold Standard (default)", "85 grams of gold. Divide 85 by 31.1035 (grams per troy oz) = 2.7315 troy oz. Multiply by the current gold spot price to get the Nisab in dollars. This is the default Nisab Standard in Settings D43. The 2.7315 value is stored in Settings D44."),
+    ("Silver Standard", "595 grams of silver = 19.1358 troy oz × silver price. Because silver is much cheaper, the silver Nisab threshold is significantly lower — meaning more people qualify. Choose Silver in Settings D43 and enter silver prices in Zakat Summary column P. The 19.1358 value is stored in Settings D45."),
+    ("Which should I use?", "Follow the guidance of your scholar or local mosque. The gold standard is most widely used in North America and by the four major Sunni schools. Change the Nisab Standard in Settings D43 at any time — all calculations update immediately."),
+    ("One Lunar Year (Hawl) Rule", "You must possess wealth above Nisab for a complete lunar year before Zakat is due. The Hawl Tracker in Zakat Summary calculates your next due date automatically: the same date one year later in the Umm al-Qura (Hijri) calendar."),
+    ("Full Wealth Rule", "Zakat is 2.5% of your ENTIRE net zakatable wealth — not just the amount above Nisab. Nisab is a qualifying threshold only. Once crossed, 2.5% applies to the full amount. This is the majority position of all four Sunni schools (Hanafi, Maliki, Shafi'i, Hanbali)."),
+]
+
+GUIDE_FAQ = [
+    ("How do I add a new account?", "Go to Stocks, Cash, or Debts sheet → right-click the 'Total' column header → Insert → type your account name in the header row. The Total formula expands automatically."),
+    ("How do I add a new payment type?", "Go to Settings sheet → type the new type in any empty cell under 'PAYMENT TYPES' (col B). It will immediately appear in the Type dropdown in the Ledger."),
+    ("How do I add a new transfer service?", "Go to Settings sheet → type the new service in any empty cell under 'SERVICES / TRANSFER METHODS' (col D). It will appear in the Service Used dropdown in the Ledger."),
+    ("How do I add a new recipient?", "Go to Settings sheet → type the name in any empty cell under 'RECIPIENTS / GIVEN TO' (col F). It will appear in the Given To dropdown in the Ledger and in the Reports person selector."),
+    ("Can I change the Nisab standard?", "Yes — go to Settings → Nisab Settings and pick Gold, Silver or Lower of the two from the 'Nisab Standard' dropdown in D43. The Zakat Summary recalculates immediately. Silver and Lower of the two need the silver price in Zakat Summary column P. D44 and D45 only hold the gold and silver weights in troy oz; edit them if your scholar uses different values."),
+    ("What if I paid Zakat in multiple instalments?", "Enter each payment as a separate row in the Ledger with Type = 'Zakat'. The 'Paid This Period' column in the Summary sums all matching Ledger entries automatically."),
+    ("Why does Running Balance show positive?", "Positive balance means you still owe Zakat — you have not yet paid the full amount due. Negative means you overpaid (credit carries forward to next year in the Brought Forward column)."),
+    ("Why is the Brought Forward column highlighted red?", "Column N turns red when it is > 0, meaning unpaid Zakat was carried in from a prior year. It clears once the Running Balance for that year reaches zero or below."),
+]
+
+
+def build_guide(wb):
+    ws = wb.add_sheet(L.GUIDE, widths={1: 3, 2: 26, 3: 3, 4: 70, 5: 3}, selected=True, fit_to_page=False)
+
+    def banner(row, text, style="band", height=26):
+        ws.write_row(row, [(1, text, style)], height=height)
+        ws.merge(f"A{row}:D{row}")
+
+    def entries(first, items, term_style, text_style=None):
+        for i, (term, text) in enumerate(items):
+            ts = term_style(i) if callable(term_style) else term_style
+            xs = text_style(i) if callable(text_style) else (text_style or "guide_text")
+            ws.write_row(first + i, [(2, term, ts), (4, text, xs)], height=24)
+
+    banner(1, f"📖  Zakat-LogBook {VERSION} — WORKBOOK GUIDE & REFERENCE", "title", 32)
+    banner(2, "Everything you need to know about using this Zakat LogBook. All colour codes, "
+              "column explanations, and FAQ consolidated here.", "subtitle_plain", 22)
+    banner(4, "🎨  Colour Coding Standard")
+    entries(5, GUIDE_LEGEND, lambda i: f"legend_label_{i}", lambda i: f"legend_text_{i}")
+    banner(15, "📋  Sheet-by-Sheet Guide")
+    entries(16, GUIDE_SHEETS, "guide_term")
+    banner(25, "📊  Zakat Summary — Column-by-Column Explanation")
+    entries(26, GUIDE_COLUMNS, "guide_term")
+    banner(41, "🌙  What Is Nisab? — Detailed Explanation", "header_purple")
+    entries(42, GUIDE_NISAB, "guide_nisab")
+    banner(49, "❓  Frequently Asked Questions")
+    entries(50, GUIDE_FAQ, "guide_term")
+    banner(59, "This workbook is for personal tracking only. Consult a qualified Islamic scholar "
+               "for formal Zakat rulings specific to your situation.", "footnote")
+    return ws
+
+
+# -- Settings ---------------------------------------------------------------------
+
+SETTINGS_LEGEND = [
+    "Blue text: Manual input cells — type here",
+    "Green text: Calculated / linked from another sheet",
+    "Red text: Debts or amounts owed",
+    "Purple text: Report totals",
+    "Gold background: Nisab-related cells",
+    "Orange background: Zakat due amounts",
+]
+
+
+def build_settings(wb, types=L.DEFAULT_TYPES, services=L.DEFAULT_SERVICES,
+                   recipients=L.DEFAULT_RECIPIENTS, results=None, prices=None, nisab_method="gold"):
+    """Write the Settings sheet.  With ``prices`` (a
+    :class:`~.prices.PriceHistory`) today's gold and silver prices start at
+    the latest closes.  ``nisab_method`` is the Nisab Standard (D43) chosen."""
+    ws = wb.add_sheet(L.SETTINGS, widths={1: 3, 2: 22, 3: 35, 4: 22, 5: 18, 6: 28, 7: 10, 8: 45},
+                      fit_to_page=False)
+    ws.write_row(1, [(1, f"⚙  Zakat-LogBook {VERSION} — SETTINGS", "sheet_title")], height=32)
+    ws.write_row(2, [(1, "Add or remove items in the lists below. Changes take effect immediately "
+                         "in all dropdown menus.", "subtitle")], height=22)
+    ws.write_row(3, [(2, "PAYMENT TYPES", "band"), (4, "SERVICES / TRANSFER METHODS", "band"),
+                     (6, "RECIPIENTS / GIVEN TO", "band"), (8, "COLOUR LEGEND", "band")], height=24)
+    ws.write_row(4, [(2, "Type Name", "header_steel"), (4, "Service Name", "header_steel"),
+                     (6, "Recipient Name", "header_steel"), (8, "Description", "header_steel")],
+                 height=20)
+    for merge in ("A1:H1", "A2:H2", "B3:C3", "D3:E3", "F3:G3"):
+        ws.merge(merge)
+
+    columns = ((L.TYPE_COL, types), (L.SERVICE_COL, services), (L.RECIPIENT_COL, recipients))
+    for i in range(L.LIST_SLOTS):
+        row = L.LIST_FIRST_ROW + i
+        cells = [(col, items[i] if i < len(items) else None, "input_list") for col, items in columns]
+        if i < len(SETTINGS_LEGEND):
+            cells.append((8, SETTINGS_LEGEND[i], "legend"))
+        ws.write_row(row, cells, height=20)
+    ws.write_row(L.LIST_LAST_ROW + 1, [(2, "← Add more types above", "slot_hint"),
+                                       (4, "← Add more services above", "slot_hint"),
+                                       (6, "← Add recipients above", "slot_hint")], height=18)
+
+    ws.write_row(37, [(1, "NISAB SETTINGS", "section")], height=26)
+    explain = [
+        ("What is Nisab?", "Nisab is the minimum threshold of wealth a Muslim must possess for one full lunar year before Zakat becomes obligatory. If your net zakatable assets are below Nisab on your Zakat date, no Zakat is due. Once above it, 2.5% of your FULL net wealth is owed."),
+        ("Two standards:", "Scholars use two measures: (1) Gold Nisab = 85 grams of gold. (2) Silver Nisab = 595 grams of silver. Gold (85g) is the most widely used standard today. Silver gives a lower threshold."),
+        ("How it's calculated:", "Gold Nisab = 85g ÷ 31.1035g per troy oz = 2.7315 troy oz × current gold price. Example: if gold = $3,000/oz then Nisab = 2.7315 × $3,000 = $8,194.50. The Nisab Standard in D43 below chooses gold, silver or the lower of the two for the Zakat Summary. The oz values are stored in cells D44 and D45 — edit them if your scholar uses different values."),
+    ]
+    for i, (label, text) in enumerate(explain):
+        ws.write_row(38 + i, [(2, label, "header_blue"), (3, text, "note_wide")], height=44)
+        ws.merge(f"C{38 + i}:H{38 + i}")
+    ws.merge("A37:H37")
+
+    ws.write_row(42, [(2, "Setting", "header_steel"), (4, "Your Value", "header_steel"),
+                      (6, "Notes", "header_steel")], height=22)
+    nisab_rows = [
+        ("Nisab Standard", L.NISAB_METHODS[nisab_method], "input_nisab",
+         "Gold (85g), Silver (595g) or the Lower of the two — sets the Zakat Summary Nisab"),
+        ("Gold Nisab (troy oz)", L.GOLD_NISAB_OZ, "input_nisab_oz",
+         "85g ÷ 31.1035 g/oz = 2.7315 oz  |  Change if your scholar uses a different value"),
+        ("Silver Nisab (troy oz)", L.SILVER_NISAB_OZ, "input_nisab_oz",
+         "595g ÷ 31.1035 g/oz = 19.1358 oz  |  Used by the Silver and Lower of the two standards"),
+    ]
+    for i, (label, value, style, note) in enumerate(nisab_rows):
+        row = 43 + i
+        ws.write_row(row, [(2, label, "label"), (4, value, style), (6, note, "note")], height=28)
+        for merge in (f"B{row}:C{row}", f"D{row}:E{row}", f"F{row}:H{row}"):
+            ws.merge(merge)
+    for merge in ("B42:C42", "D42:E42", "F42:H42"):
+        ws.merge(merge)
+    ws.data_validation(L.NISAB_STANDARD_CELL, "list", f'"{",".join(L.NISAB_METHODS.values())}"',
+                       error_title="Invalid Nisab Standard",
+                       error="Choose Gold, Silver or Lower of the two.")
+
+    ws.write_row(47, [(1, "⚡  CURRENT NISAB CALCULATOR  —  Enter today's gold price to see "
+                          "threshold instantly", "band")], height=28)
+    ws.merge("A47:H47")
+    ws.write_row(48, [(2, "Today's Gold Price ($/oz)", "header_steel"),
+                      (4, "Gold Nisab Today ($)", "header_steel"),
+                      (6, "Silver Price ($/oz) — optional", "header_steel")], height=22)
+    gold, silver = L.TODAY_GOLD_CELL, L.TODAY_SILVER_CELL
+    today = [(prices.latest(metal) or (None, 0))[1] if prices is not None else 0
+             for metal in ("gold", "silver")]
+    nisab, silver_nisab = results.nisab_today(*today) if results else (None, None)
+    ws.write_row(49, [
+        (2, today[0], "input_price"),
+        (4, Formula(f'IF({gold}=0,"{L.TODAY_PROMPT}",{gold}*{absolute(L.GOLD_NISAB_CELL)})', nisab),
+         "nisab_today"),
+        (6, today[1], "input_price_small"),
+    ], height=34)
+    ws.write_row(50, [(4, Formula(
+        f'IF({gold}=0,"","Silver Nisab = "&TEXT({silver}*{absolute(L.SILVER_NISAB_CELL)},"$#,##0.00"))',
+        silver_nisab), "nisab_silver")],
+        height=20)
+    return ws
+
+
+# -- Stocks / Cash / Debts -----------------------------------------------------------
+
+ASSET_SHEETS = {
+    L.STOCKS: ("STOCK & INVESTMENT PORTFOLIO",
+               "Enter the total value of each account on your Zakat calculation date. Match the "
+               "date to the Zakat Summary row. Total column auto-sums."),
+    L.CASH: ("CASH & LIQUID ASSETS",
+             "Enter the total balance of each account on your Zakat calculation date. Match the "
+             "date to the Zakat Summary row. Total column auto-sums."),
+    L.DEBTS: ("OUTSTANDING DEBTS",
+              "Enter current balances of debts on your Zakat calculation date. Match the date to "
+              "the Zakat Summary row. Total column auto-sums."),
+}
+
+
+ASSET_SOURCES = [
+    (L.STOCKS, L.STOCK_ACCOUNTS, L.STOCKS_TOTAL),
+    (L.CASH, L.CASH_ACCOUNTS, L.CASH_TOTAL),
+    (L.DEBTS, L.DEBT_ACCOUNTS, L.DEBTS_TOTAL),
+]
+
+
+def asset_sources(assets=None):
+    """:data:`ASSET_SOURCES`, with a sheet's accounts taken from its records
+    in ``assets`` (``{sheet: [AssetRecord, ...]}``) when it has any."""
+    assets = assets or {}
+    return [(name, list(assets[name][0].balances) if assets.get(name) else accounts, total)
+            for name, accounts, total in ASSET_SOURCES]
+
+
+def build_asset_sheet(wb, name, accounts, total_label, years=L.DEFAULT_YEARS, results=None,
+                      records=None):
+    """Write a Stocks/Cash/Debts sheet: one row per year, one column per account.
+
+    The Zakat Summary finds the total column by its ``total_label`` header,
+    so accounts can be added or renamed freely.  ``records``
+    (:class:`~.reader.AssetRecord` values for this sheet) fill the year rows
+    they name; balances are matched to ``accounts`` by header.
+    """
+    debts = name == L.DEBTS
+    total_col = len(accounts) + 2
+    last_col = col_letter(total_col)
+    ws = wb.add_sheet(name, widths={1: 14, **{c: 18 for c in range(2, total_col + 1)}},
+                      freeze=L.ASSET_FIRST_ROW)
+    title, note = ASSET_SHEETS.get(name, (name.upper(), ""))
+    ws.write_row(1, [(1, title, "sheet_title")], height=30)
+    ws.write_row(2, [(1, note, "subtitle")], height=26)
+    ws.merge(f"A1:{last_col}1")
+    ws.merge(f"A2:{last_col}2")
+
+    header = [(1, "Date", "header")]
+    header += [(2 + i, account, "header") for i, account in enumerate(accounts)]
+    header.append((total_col, total_label, "header_red" if debts else "header"))
+    ws.write_row(L.ASSET_HEADER_ROW, header, height=26)
+
+    first, last = L.ASSET_FIRST_ROW, L.ASSET_FIRST_ROW + years - 1
+    patterns = []
+    for band in ("input_money_band", "input_money"):
+        cells = [(1, None, "input_date")]
+        cells += [(c, None, "input_debt" if debts else band) for c in range(2, total_col)]
+        cells.append((total_col, Formula(f"SUM(B{{r}}:{col_letter(total_col - 1)}{{r}})",
+                                         results and results.asset_total()),
+                      "calc_money_bold"))
+        patterns.append(cells)
+    if records:
+        by_row = {record.row: record for record in records}
+        rows = []
+        for row in range(first, last + 1):
+            record = by_row.get(row)
+            balances = [record.balances.get(a, 0.0) if record else 0.0 for a in accounts]
+            rows.append((record and record.date, *[b or None for b in balances], sum(balances)))
+        patterns = [[(col, Field(col - 1) if value is None else Formula(value.text, Field(col - 1)),
+                      style) for col, value, style in cells] for cells in patterns]
+        ws.write_records(first, rows, *patterns, height=22)
+    else:
+        ws.write_rows(first, last, *patterns, height=22)
+
+    ref = f"{name}!$A${L.ASSET_HEADER_ROW}:${last_col}${last}"
+    ws.auto_filter(f"A{L.ASSET_HEADER_ROW}:{last_col}{last}")
+    wb.define_name("_xlnm._FilterDatabase", ref, sheet=ws, hidden=True)
+    wb.define_name("_xlnm.Print_Area", f"{name}!$A$1:${last_col}${last}", sheet=ws)
+    wb.define_name("_xlnm.Print_Titles", f"{name}!$1:${L.ASSET_HEADER_ROW}", sheet=ws)
+    return ws
+
+
+# -- Zakat Summary -------------------------------------------------------------------
+
+SUMMARY_HEADERS = [
+    ("Zakat Date", "Enter your Zakat calculation date", "header"),
+    ("Stock Portfolio ($)", "Auto-pulled from Stocks sheet total for matching date", "header"),
+    ("Cash & Liquid ($)", "Auto-pulled from Cash sheet total for matching date", "header"),
+    ("Total Debts ($)", "Auto-pulled from Debts sheet total for matching date", "header"),
+    ("Gold Price ($/oz)", "Enter gold spot price on this date ($ per troy oz)", "header"),
+    ("Gold Owned (oz)", "Enter how many troy oz of gold you own", "header"),
+    ("Value of Gold ($)", "Gold Value = Gold Price × oz (auto-calculated)", "header"),
+    ("Net Zakatable\nAssets ($)", "Net Assets = Stocks + Cash + Gold − Debts", "header"),
+    ("Nisab\nThreshold ($)", "Nisab = Gold Price × 2.7315 oz (= 85g), Silver Price × 19.1358 oz (= 595g) or the lower of the two, as chosen in Settings D43. Edit the oz values in D44/D45. Zakat is ONLY due if Net Assets ≥ Nisab.", "header"),
+    ("Zakat Due\n(2.5%) ($)", "2.5% of Net Assets, rounded to the cent, if ≥ Nisab, else $0. Zakat is on your FULL net wealth, not just the surplus above Nisab.", "header"),
+    ("Paid This\nPeriod ($)", "Zakat payments pulled automatically from Ledger entries within this Zakat period", "header"),
+    ("Running\nBalance ($)", "Cumulative balance: positive = still owed, zero or negative = fully paid", "header"),
+    ("Status", "Auto status: ✅ Paid in Full / ⚠️ Partially Paid / ❌ Not Started", "header_blue"),
+    ("Brought\nForward ($)", "Unpaid Zakat balance carried forward from the prior year (read-only)", "header_brown"),
+    ("Hijri Date", "Umm al-Qura date of the Zakat date (auto-calculated)", "header"),
+    ("Silver Price ($/oz)", "Enter silver spot price on this date — needed for the Silver and "
+                            "Lower of the two Nisab standards", "header"),
+]
+
+
+def _hijri_ranges():
+    """Hijri sheet month starts and names, each with the row past the table."""
+    last = L.HIJRI_FIRST_ROW + MONTHS
+    return (f"{L.HIJRI}!$A${L.HIJRI_FIRST_ROW}:$A${last}",
+            f"{L.HIJRI}!$B${L.HIJRI_FIRST_ROW}:$B${last}", f"{L.HIJRI}!$A${last}")
+
+
+def hijri_date_formula(date, month=None):
+    """``"1 Ramadan 1446"`` for the date in ``date``, ``""`` when it is blank or
+    outside the Hijri sheet.  ``month`` is the date's Hijri sheet position
+    when a LET name already holds it."""
+    starts, names, end = _hijri_ranges()
+    month = month or f"MATCH({date},{starts},1)"
+    return (f'IF({date}="","",IFERROR(IF({date}<{end},{date}-INDEX({starts},{month})+1'
+            f'&" "&INDEX({names},{month}),""),""))')
+
+
+def hijri_due_formula(date):
+    """One Hijri year after ``date``: the same day of the month twelve rows
+    down the Hijri sheet, or its last day when that month is shorter.
+    Outside the table, ``date`` plus 354 days."""
+    starts, _, _ = _hijri_ranges()
+    month = f"MATCH({date},{starts},1)"
+    later = f"INDEX({starts},{month}+12)"
+    return (f"IFERROR({later}+MIN({date}-INDEX({starts},{month})+1,"
+            f"INDEX({starts},{month}+13)-{later})-1,{date}+{L.HAWL_DAYS})")
+
+
+def price_ranges(prices, metal, policy):
+    """Prices sheet ``(from, dates, prices)`` ranges of ``metal`` in ``prices``
+    (a :class:`~.prices.PriceHistory`), or None when it has no closes."""
+    count = len(prices.breakpoints(metal, policy, L.PRICE_MAX_GAP_DAYS)[0])
+    if not count:
+        return None
+    first, last = L.PRICES_FIRST_ROW, L.PRICES_FIRST_ROW + count - 1
+    return tuple(f"{L.PRICES}!${c}${first}:${c}${last}"
+                 for c in map(col_letter, range(L.PRICE_COLS[metal], L.PRICE_COLS[metal] + 3)))
+
+
+def price_formula(date, ranges, match=None):
+    """The close for the date in ``date`` from Prices sheet ``ranges``: one
+    binary search over the first days the closes apply from.  0 when the
+    date is blank or the close is more than a week away.  ``match`` is the
+    date's position when a LET name already holds it."""
+    starts, dates, prices = ranges
+    match = match or f"MATCH({date},{starts},1)"
+    return (f'IF({date}="",0,IFERROR(IF(ABS({date}-INDEX({dates},{match}))<={L.PRICE_MAX_GAP_DAYS},'
+            f'INDEX({prices},{match}),0),0))')
+
+
+def nisab_formula(gold_price, silver_price):
+    """Zakat Summary I from the gold and silver prices in ``gold_price`` and
+    ``silver_price`` (cells, or the year ranges of a spill) by the Settings
+    D43 standard.  The lower of the two skips a metal with no price; any
+    other D43 value counts as gold."""
+    method = f"{L.SETTINGS}!{absolute(L.NISAB_STANDARD_CELL)}"
+    gold = f"{gold_price}*{L.SETTINGS}!{absolute(L.GOLD_NISAB_CELL)}"
+    silver = f"{silver_price}*{L.SETTINGS}!{absolute(L.SILVER_NISAB_CELL)}"
+    return (f'ROUND(IF({method}="{L.NISAB_METHODS["silver"]}",{silver},'
+            f'IF({method}="{L.NISAB_METHODS["lower"]}",IF({silver_price}=0,{gold},'
+            f'IF({gold_price}=0,{silver},IF({silver}<{gold},{silver},{gold}))),{gold})),2)')
+
+
+def asset_total_formula(sheet, total_label, row, accounts=None):
+    """Zakat Summary B-D on Summary row ``row``.  With ``accounts`` given, the
+    Total column position is known and the formula is a single-cell
+    reference.  Otherwise the asset row is taken from ``ROW()`` so every
+    year row has the same formula."""
+    if accounts is not None:
+        return f"{sheet}!${col_letter(len(accounts) + 2)}{L.ASSET_FIRST_ROW + row - L.SUMMARY_FIRST_ROW}"
+    return (f'IFERROR(INDEX({sheet}!$1:$1048576,ROW()-{L.SUMMARY_FIRST_ROW - L.ASSET_FIRST_ROW},'
+            f'MATCH("{total_label}",{sheet}!${L.ASSET_HEADER_ROW}:${L.ASSET_HEADER_ROW},0)),0)')
+
+
+def paid_this_period_formula(row, ledger_rows, lookup="sumifs"):
+    """Column K: Zakat-type Ledger totals dated after the previous Zakat date."""
+    dates = L.ledger_range(L.L_DATE, ledger_rows, absolute_col=False)
+    if lookup == "sorted":
+        to_date = L.ledger_range(L.L_ZAKAT_TO_DATE, ledger_rows, absolute_col=False)
+        paid = f"IFERROR(LOOKUP(A{row},{dates},{to_date}),0)"
+        if row == L.SUMMARY_FIRST_ROW:
+            return f'IF(A{row}="","",{paid})'
+        before = f"IFERROR(LOOKUP(A{row - 1},{dates},{to_date}),0)"
+        # A date not after the previous one has an empty window, as in SUMIFS.
+        return (f'IF(A{row}="","",IF(A{row - 1}="",0,'
+                f'IF(A{row}>A{row - 1},{paid}-{before},0)))')
+    total = L.ledger_range(L.L_TOTAL, ledger_rows, absolute_col=False)
+    types = L.ledger_range(L.L_TYPE, ledger_rows, absolute_col=False)
+    if row == L.SUMMARY_FIRST_ROW:
+        window = f'{dates},"<="&A{row}'
+    else:
+        window = f'{dates},">"&A{row - 1},{dates},"<="&A{row}'
+    return f'IF(A{row}="","",SUMIFS({total},{types},"Zakat",{window}))'
+
+
+def asset_total_spill(sheet, total_label, first, last, accounts=None):
+    """Excel 365 Zakat Summary B-D: the Total column of every year row, spilled."""
+    top, bottom = L.ASSET_FIRST_ROW, L.ASSET_FIRST_ROW + last - first
+    if accounts is not None:
+        col = col_letter(len(accounts) + 2)
+        return f"{sheet}!${col}${top}:${col}${bottom}"
+    return (f'IFERROR(INDEX({sheet}!$A${top}:$XFD${bottom},0,'
+            f'MATCH("{total_label}",{sheet}!${L.ASSET_HEADER_ROW}:${L.ASSET_HEADER_ROW},0)),0)')
+
+
+def paid_this_period_spill(first, last, ledger_rows, lookup="sumifs"):
+    """Excel 365 column K: every period's Zakat payments from one formula.
+
+    ``_xlpm.p`` holds each row's previous Zakat date, 0 on the first row so
+    its window starts at the beginning of the Ledger.
+    """
+    dates = L.ledger_range(L.L_DATE, ledger_rows, absolute_col=False)
+    head = (f"_xlfn.LET(_xlpm.d,A{first}:A{last},"
+            f"_xlpm.p,IF(ROW(_xlpm.d)={first},0,A{first - 1}:A{last - 1}),")
+    if lookup == "sorted":
+        to_date = L.ledger_range(L.L_ZAKAT_TO_DATE, ledger_rows, absolute_col=False)
+        return (f'{head}IF(_xlpm.d="","",IF(_xlpm.p="",0,IF(_xlpm.d>_xlpm.p,'
+                f'IFERROR(LOOKUP(_xlpm.d,{dates},{to_date}),0)'
+                f'-IFERROR(LOOKUP(_xlpm.p,{dates},{to_date}),0),0))))')
+    total = L.ledger_range(L.L_TOTAL, ledger_rows, absolute_col=False)
+    types = L.ledger_range(L.L_TYPE, ledger_rows, absolute_col=False)
+    return (f'{head}IF(_xlpm.d="","",SUMIFS({total},{types},"Zakat",'
+            f'{dates},">"&_xlpm.p,{dates},"<="&_xlpm.d)))')
+
+
+def _summary_spills(options, first, last, assets, gold=None, silver=None):
+    """Excel 365 Zakat Summary: ``{column: formula}`` for the columns written
+    as one spill over the year rows.  The running balance, status and
+    brought-forward columns read the row above, so they stay per row."""
+    rows = {c: f"{c}{first}:{c}{last}" for c in "BCDEFGHIP"}
+    spills = {col: asset_total_spill(sheet, total, first, last, accounts)
+              for col, (sheet, total, accounts) in zip((2, 3, 4), assets)}
+    for col, ranges in ((5, gold), (16, silver)):
+        if ranges:
+            spills[col] = (f"_xlfn.LET(_xlpm.d,A{first}:A{last},_xlpm.m,MATCH(_xlpm.d,{ranges[0]},1),"
+                           f"{price_formula('_xlpm.d', ranges, '_xlpm.m')})")
+    spills.update({
+        7: f"ROUND({rows['E']}*{rows['F']},2)",
+        8: f"{rows['B']}+{rows['C']}+{rows['G']}-{rows['D']}",
+        9: nisab_formula(rows['E'], rows['P']),
+        10: f"IF({rows['H']}>={rows['I']},ROUND({rows['H']}*{L.ZAKAT_RATE},2),0)",
+        11: paid_this_period_spill(first, last, options.ledger_rows, options.paid_lookup),
+        15: (f"_xlfn.LET(_xlpm.d,A{first}:A{last},_xlpm.m,MATCH(_xlpm.d,{_hijri_ranges()[0]},1),"
+             f"{hijri_date_formula('_xlpm.d', '_xlpm.m')})"),
+    })
+    return spills
+
+
+def build_summary(wb, options, results=None, sources=ASSET_SOURCES, prices=None):
+    """Write the Zakat Summary.  With ``prices`` (a
+    :class:`~.prices.PriceHistory`) the gold and silver price columns look
+    each date's close up on the Prices sheet."""
+    gold, silver = (price_ranges(prices, metal, options.price_policy) if prices is not None else None
+                    for metal in ("gold", "silver"))
+    headers = list(SUMMARY_HEADERS)
+    for col, metal, ranges in ((5, "gold", gold), (16, "silver", silver)):
+        if ranges:
+            headers[col - 1] = (headers[col - 1][0],
+                                f"Auto-filled: the {options.price_policy} {metal} close to the "
+                                f"date from the price history. Type over it to override.",
+                                headers[col - 1][2])
+    ws = wb.add_sheet(L.SUMMARY, widths={1: 14, 2: 18, 3: 18, 4: 14, 5: 16, 6: 16, 7: 16, 8: 20,
+                                         9: 16, 10: 16, 11: 18, 12: 16, 13: 18, 14: 18, 15: 20,
+                                         16: 16},
+                      freeze=L.SUMMARY_FIRST_ROW)
+    ws.write_row(1, [(1, f"Zakat-LogBook {VERSION} — ANNUAL ZAKAT SUMMARY", "title")], height=32)
+    ws.write_row(2, [(1, "One row per Zakat year. Enter the date in col A — Stocks, Cash, and "
+                         "Debts pull automatically from their sheets. Enter gold price + oz. All "
+                         "other cells calculate automatically.", "subtitle")], height=26)
+    ws.write_row(L.SUMMARY_HEADER_ROW,
+                 [(i + 1, h, style) for i, (h, _, style) in enumerate(headers)], height=32)
+    ws.write_row(L.SUMMARY_HEADER_ROW + 1,
+                 [(i + 1, hint, "hint") for i, (_, hint, _) in enumerate(headers)], height=38)
+
+    years = options.years
+    first, last = L.SUMMARY_FIRST_ROW, L.summary_last_row(years)
+    direct = options.asset_refs == "direct"
+    assets = [(sheet, total, accounts if direct else None)
+              for sheet, accounts, total in sources]
+    spills = (_summary_spills(options, first, last, assets, gold, silver)
+              if options.dynamic_arrays else {})
+    # Placed cell by cell so the writer can share each column's formula.
+    for row in range(first, last + 1):
+        cached = results.summary_row(row - first) if results else {}
+        # Money products are rounded to the cent and the balance is kept to
+        # whole cents, so "Paid in Full" (L <= 0) is not missed by a stray
+        # float remainder of the Ledger sums.
+        if row == first:
+            balance = f'IF(J{row}=0,"",ROUND(J{row}-IF(K{row}="",0,K{row}),2))'
+            forward = f'IF(A{row}="","",0)'
+        else:
+            balance = (f'IF(J{row}=0,"",ROUND(J{row}-IF(K{row}="",0,K{row})'
+                       f'+IF(L{row - 1}="",0,L{row - 1}),2))')
+            forward = f'IF(A{row}="","",IF(L{row - 1}="",0,MAX(0,L{row - 1})))'
+        for col, value, style in [
+            (1, None, "input_date"),
+            *[(col, asset_total_formula(sheet, total, row, accounts), style)
+              for col, (sheet, total, accounts), style in zip(
+                  (2, 3, 4), assets, ("calc_money", "calc_money", "input_debt"))],
+            (5, price_formula(f"A{row}", gold), "calc_money") if gold else (5, None, "input_money"),
+            (6, None, "input_oz"),
+            (7, f"ROUND(E{row}*F{row},2)", "calc_money"),
+            (8, f"B{row}+C{row}+G{row}-D{row}", "calc_money_bold"),
+            (9, nisab_formula(f"E{row}", f"P{row}"), "nisab_money"),
+            (10, f"IF(H{row}>=I{row},ROUND(H{row}*{L.ZAKAT_RATE},2),0)", "due_money"),
+            (11, paid_this_period_formula(row, options.ledger_rows, options.paid_lookup),
+             "paid_money"),
+            (12, balance, "balance_money"),
+            (13, f'IF(J{row}=0,"",IF(L{row}<=0,"{L.PAID_IN_FULL}",IF(K{row}=0,'
+                 f'"{L.NOT_STARTED}","{L.PARTIALLY_PAID}")))', "status"),
+            (14, forward, "forward_money"),
+            (15, hijri_date_formula(f"A{row}"), "hijri_date"),
+            (16, price_formula(f"A{row}", silver), "calc_money") if silver
+            else (16, None, "input_money"),
+        ]:
+            if col in spills:
+                # Cells below a spill's anchor hold only its cached values.
+                letter = col_letter(col)
+                value = (Formula(spills[col], cached.get(col), dynamic=True,
+                                 ref=f"{letter}{first}:{letter}{last}")
+                         if row == first else cached.get(col))
+            elif value is not None:
+                value = Formula(value, cached.get(col))
+            ws.cell(row, col, value, style)
+        ws.row_height(row, 22)
+
+    dates = f"A{first}:A{last}"
+    ws.conditional_format(dates, f'AND(A{first}<>"",COUNTIF($A${first}:$A${last},A{first})>1)',
+                          DUPLICATE)
+    status = f"M{first}:M{last}"
+    ws.conditional_format(status, f'NOT(ISERROR(SEARCH("✅",M{first})))', OK_GREEN)
+    ws.conditional_format(status, f'NOT(ISERROR(SEARCH("⚠️",M{first})))', WARN_ORANGE)
+    ws.conditional_format(status, f'NOT(ISERROR(SEARCH("❌",M{first})))', WARN_RED)
+    ws.conditional_format(f"N{first}:N{last}", f'AND(N{first}<>"",N{first}>0)', WARN_RED)
+
+    _build_dashboard(ws, options, first, last, L.dashboard_row(years), results)
+    _build_hawl_tracker(ws, first, last, L.hawl_row(years), results)
+
+    ws.auto_filter(f"A{L.SUMMARY_HEADER_ROW}:P{last}")
+    sheet = f"'{L.SUMMARY}'"
+    wb.define_name("_xlnm._FilterDatabase", f"{sheet}!$A${L.SUMMARY_HEADER_ROW}:$P${last}",
+                   sheet=ws, hidden=True)
+    wb.define_name("_xlnm.Print_Area", f"{sheet}!$A$1:$P${L.hawl_row(years) + 3}", sheet=ws)
+    wb.define_name("_xlnm.Print_Titles", f"{sheet}!$1:${L.SUMMARY_HEADER_ROW + 1}", sheet=ws)
+    return ws
+
+
+DASHBOARD_CARDS = [
+    (1, "B", "Total Zakat\nOwed (All Years)", "card_owed"),
+    (3, "D", "Total Zakat\nPaid (Ledger)", "card_paid"),
+    (5, "F", "Total Sadaqah\nPaid (Ledger)", "card_sadaqah"),
+    (7, "H", "Total Fitrana\nPaid (Ledger)", "card_fitrana"),
+    (9, "J", "Total Qurbani\nPaid (Ledger)", "card_qurbani"),
+    (11, "N", "Outstanding Balance\n(Zakat Owed − Paid)", "card_outstanding"),
+]
+
+
+def _build_dashboard(ws, options, first, last, row, results=None):
+    types = L.ledger_range(L.L_TYPE, options.ledger_rows, absolute_col=False)
+    total = L.ledger_range(L.L_TOTAL, options.ledger_rows, absolute_col=False)
+    owed = f'SUMIF(J{first}:J{last},">"&0,J{first}:J{last})'
+    paid = {t: f'SUMIF({types},"{t}",{total})' for t in L.DEFAULT_TYPES}
+    values = [owed, paid["Zakat"], paid["Sadaqah"], paid["Fitrana"], paid["Qurbani"],
+              f'{owed}-{paid["Zakat"]}']
+
+    ws.write_row(row, [(1, "ZAKAT SUMMARY DASHBOARD", "section")], height=26)
+    ws.merge(f"A{row}:P{row}")
+    ws.write_row(row + 1, [(col, label, "header_blue") for col, _, label, _ in DASHBOARD_CARDS],
+                 height=36)
+    cached = results.dashboard() if results else [None] * len(values)
+    ws.write_row(row + 2, [(col, Formula(value, result), style) for (col, _, _, style), value, result
+                           in zip(DASHBOARD_CARDS, values, cached)], height=42)
+    for col, end, _, _ in DASHBOARD_CARDS:
+        ws.merge(f"{col_letter(col)}{row + 1}:{end}{row + 1}")
+        ws.merge(f"{col_letter(col)}{row + 2}:{end}{row + 2}")
+
+
+def _build_hawl_tracker(ws, first, last, row, results=None):
+    ws.write_row(row, [(1, "🌙  HAWL TRACKER — Next Zakat Due Date", "section")], height=28)
+    ws.write_row(row + 1, [(1, "Hawl = one complete lunar year of wealth above Nisab, counted in "
+                               "the Umm al-Qura (Hijri) calendar. Countdown updates automatically "
+                               "based on your most recent Zakat date in column A.", "subtitle")],
+                 height=32)
+    ws.write_row(row + 2, [(1, "Last Zakat Date", "header_blue"),
+                           (3, "Next Due (+1 Hijri year)", "header_blue"),
+                           (5, "Days Remaining", "header_blue"), (7, "Status", "header_blue"),
+                           (10, "Today (auto)", "header_blue")], height=26)
+    v = row + 3
+    # TODAY() is volatile, so it lives in one cell (J) and only the
+    # countdown and status beside it read that cell.
+    today = f"$J${v}"
+    last_date, due, days, status, now = results.hawl() if results else [None] * 5
+    ws.write_row(v, [
+        (1, Formula(f'IF(COUNTA(A{first}:A{last})=0,"{L.NO_DATES}",MAX(A{first}:A{last}))',
+                    last_date), "hawl_last"),
+        (3, Formula(f'IF(A{v}="{L.NO_DATES}","",{hijri_due_formula(f"A{v}")})', due), "hawl_next"),
+        (5, Formula(f'IF(C{v}="","",MAX(0,C{v}-{today}))', days), "hawl_days"),
+        (7, Formula(f'IF(C{v}="","",IF({today}>C{v},"{L.HAWL_DUE_NOW}",IF(C{v}-{today}<=30,'
+                    f'"{L.HAWL_DUE_SOON}","{L.HAWL_IN_PROGRESS}")))', status), "hawl_status"),
+        (10, Formula("TODAY()", now), "hawl_today"),
+    ], height=38)
+    ws.conditional_format(f"G{v}:I{v}", f'NOT(ISERROR(SEARCH("🕌",G{v})))', WARN_RED)
+    ws.conditional_format(f"G{v}:I{v}", f'NOT(ISERROR(SEARCH("⚠️",G{v})))', WARN_ORANGE)
+    ws.conditional_format(f"G{v}:I{v}", f'NOT(ISERROR(SEARCH("✅",G{v})))', OK_GREEN)
+    for r in (row, row + 1):
+        ws.merge(f"A{r}:P{r}")
+    for r in (row + 2, v):
+        for merge in (f"A{r}:B{r}", f"C{r}:D{r}", f"E{r}:F{r}", f"G{r}:I{r}", f"J{r}:K{r}"):
+            ws.merge(merge)
+
+
+# -- Ledger ------------------------------------------------------------------------
+
+ALL_ENTRIES = "All entries shown"
+
+
+def build_ledger(wb, options, ledger=None, results=None):
+    """Write the Ledger sheet, filled from ``ledger`` (a :class:`~.data.Ledger`)
+    when given.  Entries are written with cached Total Paid and Running Total
+    values, so the workbook shows them without evaluating the I-column chain.
+    With ``results`` (a :class:`~.cached.WorkbookResults`) every other
+    formula carries its cached value too."""
+    rows = options.ledger_rows
+    first, last = L.LEDGER_FIRST_ROW, L.ledger_last_row(rows)
+    sorted_lookup = options.paid_lookup == "sorted"
+    widths = {1: 13, 2: 14, 3: 16, 4: 18, 5: 28, 6: 14, 7: 12, 8: 15, 9: 16, 10: 20}
+    if sorted_lookup:
+        widths[L.L_ZAKAT_TO_DATE] = 14
+    ws = wb.add_sheet(L.LEDGER, widths=widths, freeze=first)
+    ws.write_row(1, [(1, "🔍  Search / Filter:", "search_label"), (3, None, "search"),
+                     (4, "Type any keyword, name, or type — matching rows highlight yellow. "
+                         "Leave blank to show all rows.", "caption")], height=30)
+    given_to = f"D{first}:D{last}"
+    details = f"E{first}:E{last}"
+    types = f"B{first}:B{last}"
+    ws.write_row(2, [(1, Formula(
+        f'IF(C1="","{ALL_ENTRIES}",COUNTIF({given_to},"*"&C1&"*")+COUNTIF({details},"*"&C1&"*")'
+        f'+COUNTIF({types},"*"&C1&"*")&" matching rows highlighted")', results and ALL_ENTRIES),
+        "search_count")], height=20)
+    ws.write_row(3, [(1, "ZAKAT & SADAQAH LEDGER", "sheet_title")], height=30)
+    ws.write_row(4, [(1, "Record every payment — Zakat, Sadaqah, Fitrana, Qurbani, etc. Amount + "
+                         "Fees = Total Paid. Use the dropdowns for Type, Service, and Given To.",
+                      "subtitle")], height=26)
+    headers = [(i + 1, h, "header") for i, h in enumerate(L.LEDGER_HEADERS)]
+    if sorted_lookup:
+        headers.append((L.L_ZAKAT_TO_DATE, "Zakat to Date", "helper"))
+    ws.write_row(L.LEDGER_HEADER_ROW, headers, height=26)
+    for merge in ("A1:B1", "D1:J1", "A2:J2", "A3:J3", "A4:J4"):
+        ws.merge(merge)
+
+    # Blank rows show "" in H to J and carry the helper column's last value.
+    blank = zakat_to_date = None
+    if results:
+        blank = ""
+        zakat_to_date = results.zakat_to_date()
+        tail = float(zakat_to_date[-1]) if len(zakat_to_date) else 0.0
+    total = 'IF(F{r}+G{r}=0,"",F{r}+G{r})'
+    patterns = []
+    for text, running in (("ledger_text", "ledger_running"),
+                          ("ledger_text_band", "ledger_running_band")):
+        patterns.append([
+            (L.L_DATE, None, "ledger_date"),
+            *[(c, None, text) for c in (L.L_TYPE, L.L_SERVICE, L.L_GIVEN_TO, L.L_DETAILS)],
+            (L.L_AMOUNT, None, "ledger_money"),
+            (L.L_FEES, None, "ledger_money"),
+            (L.L_TOTAL, Formula(total, blank), "ledger_total"),
+            (L.L_RUNNING, Formula('IF(H{r}="","",IF(I{prev}="",H{r},I{prev}+H{r}))', blank),
+             running),
+            (L.L_HIJRI, Formula(hijri_date_formula("A{r}"), blank), "ledger_hijri"),
+        ])
+    first_row = [(c, Formula(v.text.replace("{prev}", "{r}"), v.value)
+                  if isinstance(v, Formula) else v, s) for c, v, s in patterns[0]]
+    first_row[L.L_RUNNING - 1] = (L.L_RUNNING, Formula('IF(H{r}="","",H{r})', blank),
+                                  "ledger_running")
+    if sorted_lookup:
+        # Cumulative Zakat paid through each row, read by Zakat Summary K.
+        zakat = 'IF(AND(A{r}<>"",B{r}="Zakat"),N(H{r}),0)'
+        first_row.append((L.L_ZAKAT_TO_DATE, Formula(zakat, results and 0.0), "helper"))
+        for pattern in patterns:
+            pattern.append((L.L_ZAKAT_TO_DATE, Formula(f"{col_letter(L.L_ZAKAT_TO_DATE)}{{prev}}+"
+                                                       + zakat, results and tail), "helper"))
+    filled = 0
+    if ledger is not None and len(ledger):
+        records = _ledger_records(ledger, zakat_to_date)
+        cached = results is not None
+        ws.write_records(first, records[:1], _record_pattern(first_row, cached), height=20)
+        ws.write_records(first + 1, records[1:], _record_pattern(patterns[1], cached),
+                         _record_pattern(patterns[0], cached), height=20)
+        filled = len(records)
+    if filled == 0:
+        ws.write_rows(first, first, first_row, height=20)
+        filled = 1
+    if rows > filled:
+        ws.write_rows(first + filled, last, patterns[filled % 2], patterns[(filled + 1) % 2],
+                      height=20)
+
+    data = f"A{first}:J{last}"
+    ws.conditional_format(data, f'AND($C$1<>"",OR(ISNUMBER(SEARCH($C$1,$D{first})),'
+                                f'ISNUMBER(SEARCH($C$1,$E{first})),ISNUMBER(SEARCH($C$1,$B{first}))))',
+                          SEARCH_HIT)
+    lists = L.LIST_FIRST_ROW, L.LIST_LAST_ROW
+    for col, list_col, title, error in (
+            (L.L_TYPE, L.TYPE_COL, "Invalid Type",
+             "Select a payment type or add it in Settings → Payment Types."),
+            (L.L_SERVICE, L.SERVICE_COL, "Invalid Service",
+             "Select a service or add it in Settings → Transfer Services."),
+            (L.L_GIVEN_TO, L.RECIPIENT_COL, "Invalid Recipient",
+             "Select a recipient or add them in Settings → Recipients / Given To.")):
+        letter, src = col_letter(col), col_letter(list_col)
+        ws.data_validation(f"{letter}{first}:{letter}{last}", "list",
+                           f"{L.SETTINGS}!${src}${lists[0]}:${src}${lists[1]}",
+                           error_title=title, error=error)
+    ws.data_validation(f"F{first}:G{last}", "decimal", "0", operator="greaterThanOrEqual",
+                       error_title="Invalid Amount",
+                       error="Amount must be 0 or greater. Use positive numbers only.")
+
+    ws.auto_filter(f"A{L.LEDGER_HEADER_ROW}:J{last}")
+    wb.define_name("_xlnm._FilterDatabase", f"{L.LEDGER}!$A${L.LEDGER_HEADER_ROW}:$J${last}",
+                   sheet=ws, hidden=True)
+    wb.define_name("_xlnm.Print_Area", f"{L.LEDGER}!$A$1:$J${last + 5}", sheet=ws)
+    wb.define_name("_xlnm.Print_Titles", f"{L.LEDGER}!$1:${L.LEDGER_HEADER_ROW}", sheet=ws)
+    return ws
+
+
+def _record_pattern(pattern, cached=False):
+    """Turn a blank Ledger row pattern into one filled from :func:`_ledger_records`.
+
+    ``cached`` also fills the helper column's cached values from the records.
+    """
+    helpers = (L.L_ZAKAT_TO_DATE,) if cached else ()
+    out = []
+    for col, value, style in pattern:
+        if col <= L.L_FEES:
+            value = Field(col - 1)
+        elif col in (L.L_TOTAL, L.L_RUNNING, L.L_HIJRI, *helpers):
+            value = Formula(value.text, Field(col - 1))
+        out.append((col, value, style))
+    return out
+
+
+def _ledger_records(ledger, zakat_to_date=None):
+    """Ledger entries as row tuples A-J, with H to J as cached formula results.
+
+    Given the helper column's values (see :class:`~.cached.WorkbookResults`),
+    the tuples run on to K.
+    """
+    import numpy as np
+
+    from .engine import ledger_running_totals
+    from .hijri import labels
+
+    totals = ledger.totals
+    running = ledger_running_totals(totals)
+
+    def blank_zero(values):
+        return [v if v else None for v in values.tolist()]
+
+    def blank_nan(values):
+        return ["" if v != v else v for v in values.tolist()]
+
+    columns = [
+        ledger.dates.tolist(), ledger.types.tolist(), ledger.services.tolist(),
+        ledger.recipients.tolist(), ledger.details.tolist(),
+        blank_zero(ledger.amounts), blank_zero(ledger.fees),
+        blank_nan(np.where(totals != 0, totals, np.nan)), blank_nan(running),
+        labels(ledger.dates).tolist(),
+    ]
+    if zakat_to_date is not None:
+        columns.append(zakat_to_date.tolist())
+    return list(zip(*columns))
+
+
+# -- Reports -----------------------------------------------------------------------
+
+NO_PERSON = "—"
+
+
+def _year_mask(dates):
+    return (f'IF({L.REPORT_YEAR_CELL}="{L.ALL_YEARS}",1,YEAR({dates})='
+            f'IF({L.REPORT_YEAR_CELL}="{L.ALL_YEARS}",0,VALUE({L.REPORT_YEAR_CELL})))')
+
+
+def _period_formula(function, criteria, dates):
+    """Excel 365 ``SUMIFS``/``COUNTIFS`` over the Reports year filter.
+
+    The chosen year becomes a date window, so nothing is evaluated as an
+    array; All Years drops the window and counts undated entries too.
+    """
+    year = L.REPORT_YEAR_CELL
+    return (f'_xlfn.LET(_xlpm.y,IF({year}="{L.ALL_YEARS}",0,VALUE({year})),'
+            f'IF(_xlpm.y=0,{function}({criteria}),{function}({criteria},'
+            f'{dates},">="&DATE(_xlpm.y,1,1),{dates},"<"&DATE(_xlpm.y+1,1,1))))')
+
+
+def build_reports(wb, options, ledger=None, results=None):
+    rows = options.ledger_rows
+    rng = {col: L.ledger_range(col, rows) for col in range(L.L_DATE, L.L_RUNNING)}
+    person, year = L.REPORT_PERSON_CELL, L.REPORT_YEAR_CELL
+    dates, given_to, total = rng[L.L_DATE], rng[L.L_GIVEN_TO], rng[L.L_TOTAL]
+    is_person = f"({given_to}={person})"
+
+    ws = wb.add_sheet(L.REPORTS, widths={1: 16, 2: 14, 3: 18, 4: 8, 5: 12, 6: 8, 7: 16, 8: 14,
+                                         9: 10, 11: 14, 13: 10}, freeze=11)
+    ws.portrait()
+    ws.cell(1, 1, f"Zakat-LogBook {VERSION} — PERSON REPORT", "sheet_title")
+    ws.row_height(1, 30)
+    ws.cell(2, 1, "Select a person from the dropdown in C4. Use the year filter in C5 to narrow "
+                  "results. All cards and the transaction table update automatically.", "subtitle")
+    ws.row_height(2, 26)
+
+    # Distinct-name helper column feeding the person dropdown.
+    name_col = L.REPORT_NAME_COL
+    ws.cell(3, name_col, "Unique Names", "helper")
+    first_name = 4
+    if options.dynamic_arrays:
+        sorted_names = results.sorted_names() if results else [None]
+        ws.cell(first_name, name_col, Formula(
+            f'_xlfn._xlws.SORT(_xlfn.UNIQUE(_xlfn._xlws.FILTER({given_to},{given_to}<>"","")))',
+            sorted_names[0], dynamic=True,
+            ref=f"K{first_name}:K{first_name + len(sorted_names) - 1}"), "helper")
+        for n, name in enumerate(sorted_names[1:], first_name + 1):
+            ws.cell(n, name_col, name, "helper")
+        names = f"_xlfn.ANCHORARRAY($K${first_name})"
+    else:
+        # The names the list can show are N: each Settings recipient, read
+        # live, then the Ledger's other names, sorted, as written.  One MATCH
+        # per name looks for it on the Ledger and O counts the names found
+        # so far, so slot n is a binary search on O for the n-th.
+        candidate, seen = col_letter(L.REPORT_CANDIDATE_COL), col_letter(L.REPORT_SEEN_COL)
+        ws.cell(3, L.REPORT_CANDIDATE_COL, "Candidates", "helper")
+        ws.cell(3, L.REPORT_SEEN_COL, "Found #", "helper")
+        listed = (f"{L.SETTINGS}!${col_letter(L.RECIPIENT_COL)}${L.LIST_FIRST_ROW}"
+                  f":${col_letter(L.RECIPIENT_COL)}${L.LIST_LAST_ROW}")
+        if results:
+            candidates, found, cached = results.person_list()
+            found = found.tolist()
+        else:
+            candidates = [None] * L.LIST_SLOTS
+            if ledger is not None and len(ledger):
+                from .reports import unlisted_recipients
+
+                candidates += unlisted_recipients(ledger, L.DEFAULT_RECIPIENTS)
+            found = cached = [None] * len(candidates)
+        last_name = first_name + len(candidates) - 1
+        for i, name in enumerate(candidates):
+            row = first_name + i
+            if i < L.LIST_SLOTS:
+                name = Formula(f"{L.SETTINGS}!${col_letter(L.RECIPIENT_COL)}"
+                               f"${L.LIST_FIRST_ROW + i}&\"\"", name)
+            ws.cell(row, L.REPORT_CANDIDATE_COL, name, "helper")
+            prev = f"{seen}{row - 1}+" if i else ""
+            ws.cell(row, L.REPORT_SEEN_COL, Formula(
+                f'{prev}IF({candidate}{row}="",0,ISNUMBER(MATCH({candidate}{row},{given_to},0))'
+                f'*(IFERROR(MATCH({candidate}{row},{listed},0),{i + 1})={i + 1}))',
+                found[i]), "helper")
+            ws.cell(row, name_col, Formula(
+                f'IFERROR(INDEX(${candidate}${first_name}:${candidate}${last_name},'
+                f'IFERROR(MATCH(ROW()-{first_name},${seen}${first_name}:${seen}${last_name},1),0)'
+                f'+1),"")', cached[i]), "helper")
+        names = f"$K${first_name}:$K${last_name}"
+    ws.cell(5, L.REPORT_YEAR_COL, L.ALL_YEARS, "helper")
+    if options.dynamic_arrays:
+        # The years that have Ledger entries, newest first, under All Years.
+        years = (results.ledger_years() or [""]) if results else [None]
+        ws.cell(6, L.REPORT_YEAR_COL, Formula(
+            f'IFERROR(_xlfn._xlws.SORT(_xlfn.UNIQUE(YEAR(_xlfn._xlws.FILTER({dates},'
+            f'ISNUMBER({dates})))),,-1),"")', years[0], dynamic=True,
+            ref=f"M6:M{6 + len(years) - 1}"), "helper")
+        for n, value in enumerate(years[1:], 7):
+            ws.cell(n, L.REPORT_YEAR_COL, value, "helper")
+
+    ws.cell(4, 1, "Select Person:", "band")
+    ws.cell(4, 3, None, "input_person")
+    ws.cell(4, 4, "Total Given:", "band")
+    # With no person chosen the cards, the type breakdown and its total show "—".
+    none = results and NO_PERSON
+    if options.dynamic_arrays:
+        given = _period_formula("SUMIFS", f"{total},{given_to},{person}", dates)
+        count = _period_formula("COUNTIFS", f"{given_to},{person}", dates)
+        given, count = (f'IF({person}="","{NO_PERSON}",{f})' for f in (given, count))
+    else:
+        given = (f'IF({person}="","{NO_PERSON}",IF({year}="{L.ALL_YEARS}",SUMIF({given_to},{person},{total}),'
+                 f'SUMPRODUCT({is_person}*(YEAR({dates})=VALUE({year}))*{total})))')
+        count = (f'IF({person}="","{NO_PERSON}",IF({year}="{L.ALL_YEARS}",COUNTIF({given_to},{person}),'
+                 f'SUMPRODUCT({is_person}*(YEAR({dates})=VALUE({year})))))')
+    ws.cell(4, 6, Formula(given, none), "report_card")
+    ws.cell(4, 8, "# Transactions:", "band")
+    ws.cell(4, 9, Formula(count, none), "report_count")
+    ws.row_height(4, 30)
+    ws.cell(5, 1, "Filter by Year:", "band")
+    ws.cell(5, 3, L.ALL_YEARS, "input_year")
+    ws.cell(5, 4, "Select a year to filter, or leave as 'All Years'", "caption")
+    ws.row_height(5, 28)
+    for merge in ("A1:I1", "A2:I2", "A4:B4", "A5:B5", "F4:G4"):
+        ws.merge(merge)
+
+    # Breakdown by payment type.
+    ws.cell(6, 1, "BREAKDOWN BY TYPE  (add types in Settings → Payment Types to extend this table)",
+            "subsection")
+    ws.row_height(6, 24)
+    ws.merge("A6:I6")
+    ws.cell(7, 1, "Type", "header_blue")
+    ws.cell(7, 6, "Total Paid to Selected Person (Amount + Fees)", "header_blue")
+    ws.row_height(7, 22)
+    ws.merge("A7:E7")
+    ws.merge("F7:I7")
+    year_mask = _year_mask(dates)
+    type_rows = results.type_rows() if results else [(None, None)] * L.LIST_SLOTS
+    for i, (name, paid) in enumerate(type_rows):
+        row = L.REPORT_TYPE_FIRST_ROW + i
+        slot = f"{L.SETTINGS}!$B{L.LIST_FIRST_ROW + i}"
+        ws.cell(row, 1, Formula(f'IF({slot}="","",{slot})', name), "report_type")
+        if options.dynamic_arrays:
+            by_type = _period_formula("SUMIFS", f"{total},{given_to},{person},{rng[L.L_TYPE]},{slot}",
+                                      dates)
+            paid = Formula(f'IF({slot}="","",IF({person}="","{NO_PERSON}",{by_type}))', paid)
+        else:
+            paid = Formula(
+                f'IF({slot}="","",IF({person}="","{NO_PERSON}",SUMPRODUCT({is_person}*({rng[L.L_TYPE]}={slot})'
+                f'*{year_mask}*{total})))', paid, array=True, ref=f"F{row}")
+        ws.cell(row, 6, paid, "report_type_money")
+        ws.row_height(row, 20)
+        ws.merge(f"A{row}:E{row}")
+        ws.merge(f"F{row}:I{row}")
+    total_row = L.REPORT_TOTAL_ROW
+    ws.cell(total_row, 1, "TOTAL (all types)", "header_blue")
+    if options.dynamic_arrays:
+        all_types = Formula(given, none)
+    else:
+        all_types = Formula(f'IF({person}="","{NO_PERSON}",SUMPRODUCT({is_person}*{year_mask}*{total}))',
+                            none, array=True, ref=f"F{total_row}")
+    ws.cell(total_row, 6, all_types, "calc_total")
+    ws.row_height(total_row, 24)
+    ws.merge(f"A{total_row}:E{total_row}")
+    ws.merge(f"F{total_row}:I{total_row}")
+
+    if options.dynamic_arrays:
+        fee_row = L.REPORT_SPILL_FEE_ROW
+        _build_fee_table(ws, fee_row, rng, results)
+        last_row = _build_detail_spill(ws, L.REPORT_SPILL_HEADER_ROW, rng, rows, year_mask, results)
+    else:
+        _build_detail_table(ws, L.REPORT_DETAIL_HEADER_ROW, rng, year_mask, results)
+        fee_row = L.report_fee_row()
+        last_row = _build_fee_table(ws, fee_row, rng, results)
+
+    ws.data_validation("C4", "list", names)
+    ws.data_validation("C5", "list", f"$M$5:$M${5 + L.REPORT_YEAR_SLOTS - 1}")
+    wb.define_name("_xlnm.Print_Area", f"{L.REPORTS}!$A$1:$I${last_row}", sheet=ws)
+    wb.define_name("_xlnm.Print_Titles", f"{L.REPORTS}!$1:$5", sheet=ws)
+    return ws
+
+
+DETAIL_HEADERS = ["#", "Date", "Type", "Service Used", "Given To", "Details / Notes",
+                  "Amount ($)", "Fees ($)", "Total Paid ($)"]
+DETAIL_COLS = [L.L_DATE, L.L_TYPE, L.L_SERVICE, L.L_GIVEN_TO, L.L_DETAILS,
+               L.L_AMOUNT, L.L_FEES, L.L_TOTAL]
+
+
+def _detail_style(ledger_col):
+    return ("detail_date" if ledger_col == L.L_DATE else
+            "detail_money" if ledger_col >= L.L_AMOUNT else "detail_text")
+
+
+def _detail_header(ws, header):
+    for col, label in enumerate(DETAIL_HEADERS, 1):
+        ws.cell(header, col, label, "header_blue")
+    ws.row_height(header, 22)
+
+
+def _build_detail_table(ws, header, rng, year_mask, results=None):
+    """Fixed-size transaction table.  Helper L(n-1) holds the Ledger position
+    of the k-th matching payment shown on row n; the whole helper column is
+    one array formula, so the Ledger is filtered once, not once per row."""
+    _detail_header(ws, header)
+    given_to = rng[L.L_GIVEN_TO]
+    is_person = f"({given_to}={L.REPORT_PERSON_CELL})"
+    first_ledger = f"{L.LEDGER}!$D${L.LEDGER_FIRST_ROW}"
+    rows = L.REPORT_DETAIL_ROWS
+    ks = ";".join(str(k) for k in range(1, rows + 1))
+    # The rest of the helper array holds values only; its cells carry the
+    # cached positions.
+    helper, table = results.detail_rows(rows) if results else ([None] * rows, [None] * rows)
+    blank = results and ""
+    ws.cell(header, L.REPORT_INDEX_COL, Formula(
+        f'IFERROR(SMALL(IF({is_person}*{year_mask},ROW({given_to})-ROW({first_ledger})+1),{{{ks}}}),"")',
+        helper[0], array=True, ref=f"L{header}:L{header + rows - 1}"), "helper")
+    for k in range(1, rows + 1):
+        helper_row, row = header + k - 1, header + k
+        if k > 1:
+            ws.cell(helper_row, L.REPORT_INDEX_COL, helper[k - 1] if results else None, "helper")
+        band = "" if k % 2 else "_band"
+        pos = f"$L{helper_row}"
+        cached = table[k - 1] or [blank] * len(DETAIL_HEADERS)
+        ws.cell(row, 1, Formula(f'IF({pos}="","",ROW()-{header})', cached[0]),
+                f"detail_index{band}")
+        for col, ledger_col in enumerate(DETAIL_COLS, 2):
+            ws.cell(row, col, Formula(
+                f'IFERROR(IF({pos}="","",INDEX({rng[ledger_col]},{pos})),"—")',
+                cached[col - 1]), _detail_style(ledger_col) + band)
+        ws.row_height(row, 20)
+
+
+def _build_detail_spill(ws, header, rng, ledger_rows, year_mask, results=None):
+    """Excel 365 transaction table: one FILTER spills the matching Ledger
+    positions into column L and the detail columns project from that list.
+
+    Every Ledger row could match, so the styled area below the header is as
+    long as the Ledger.  Returns the last row of the sheet.
+    """
+    _detail_header(ws, header)
+    first, last = header + 1, header + ledger_rows
+    given_to = rng[L.L_GIVEN_TO]
+    positions = f"_xlfn.ANCHORARRAY(L{first})"
+    block = (f"{L.LEDGER}!$A${L.LEDGER_FIRST_ROW}:"
+             f"${col_letter(L.L_TOTAL)}${L.ledger_last_row(ledger_rows)}")
+    columns = ",".join(str(c) for c in DETAIL_COLS)
+    # No person is chosen, so every spill is a single "".
+    blank = results and ""
+    formulas = {
+        1: Formula(f'IF(L{first}="","",_xlfn.SEQUENCE(ROWS({positions})))', blank, dynamic=True),
+        2: Formula(f'IF(L{first}="","",INDEX({block},{positions},{{{columns}}}))', blank,
+                   dynamic=True),
+        L.REPORT_INDEX_COL: Formula(
+            f'IF({L.REPORT_PERSON_CELL}="","",_xlfn._xlws.FILTER(ROW({given_to})-'
+            f'ROW({L.LEDGER}!$D${L.LEDGER_FIRST_ROW})+1,({given_to}={L.REPORT_PERSON_CELL})'
+            f'*{year_mask},""))', blank, dynamic=True),
+    }
+    patterns = []
+    for band in ("", "_band"):
+        pattern = [(1, None, f"detail_index{band}")]
+        pattern += [(col, None, _detail_style(c) + band) for col, c in enumerate(DETAIL_COLS, 2)]
+        pattern.append((L.REPORT_INDEX_COL, None, "helper"))
+        patterns.append(pattern)
+    ws.write_row(first, [(c, formulas.get(c, v), s) for c, v, s in patterns[0]], height=20)
+    if last > first:
+        ws.write_rows(first + 1, last, patterns[1], patterns[0], height=20)
+    return last
+
+
+def _build_fee_table(ws, fee_row, rng, results=None):
+    """Fees-by-service summary; returns its last row."""
+    ws.cell(fee_row, 1, "FEES PAID BY SERVICE — All Time (independent of person / year filter)",
+            "subsection")
+    ws.row_height(fee_row, 26)
+    ws.merge(f"A{fee_row}:I{fee_row}")
+    heads = [(1, "Service", "A{0}:C{0}"), (4, "Total Amount ($)", "D{0}:E{0}"),
+             (6, "Total Fees ($)", "F{0}:G{0}"), (8, "# Payments", "H{0}:I{0}")]
+    for col, label, merge in heads:
+        ws.cell(fee_row + 1, col, label, "header_blue")
+        ws.merge(merge.format(fee_row + 1))
+    ws.row_height(fee_row + 1, 22)
+    services = rng[L.L_SERVICE]
+    cached = results.fee_rows() if results else [(None,) * 4] * L.LIST_SLOTS
+    for i, (name, amount, fees, count) in enumerate(cached):
+        row = fee_row + 2 + i
+        slot = f"{L.SETTINGS}!$D{L.LIST_FIRST_ROW + i}"
+        ws.cell(row, 1, Formula(f'IF({slot}="","",{slot})', name), "fee_service")
+        ws.cell(row, 4, Formula(f'IF({slot}="","",SUMIF({services},{slot},{rng[L.L_AMOUNT]}))',
+                                amount), "fee_amount")
+        ws.cell(row, 6, Formula(f'IF({slot}="","",SUMIF({services},{slot},{rng[L.L_FEES]}))',
+                                fees), "fee_fees")
+        ws.cell(row, 8, Formula(f'IF({slot}="","",COUNTIF({services},{slot}))', count),
+                "fee_count")
+        ws.row_height(row, 20)
+        for _, _, merge in heads:
+            ws.merge(merge.format(row))
+    return fee_row + 1 + L.LIST_SLOTS
+
+
+# -- Hijri ------------------------------------------------------------------------
+
+def build_hijri(wb):
+    """The hidden month table read by the Hijri date and Hawl Tracker formulas."""
+    ws = wb.add_sheet(L.HIJRI, widths={1: 14, 2: 22}, freeze=L.HIJRI_FIRST_ROW, hidden=True)
+    ws.write_row(1, [(1, "Month Starts", "header"), (2, "Hijri Month", "header")])
+    for i, start in enumerate(month_starts()):
+        ws.write_row(L.HIJRI_FIRST_ROW + i, [(1, start, "hijri_start"),
+                                             (2, month_label(i), "hijri_month")])
+    return ws
+
+
+# -- Prices -----------------------------------------------------------------------
+
+PRICE_HEADERS = ("From", "Close Date", "{} ($/oz)")
+
+
+def build_prices(wb, prices, policy="previous"):
+    """The hidden gold and silver closes read by Zakat Summary E and P, each
+    with the first day it applies from under ``policy`` (see :mod:`~.prices`)."""
+    widths = {}
+    for col in L.PRICE_COLS.values():
+        widths.update({col: 12, col + 1: 12, col + 2: 14})
+    ws = wb.add_sheet(L.PRICES, widths=widths, freeze=L.PRICES_FIRST_ROW, hidden=True)
+    ws.write_row(1, [(col + i, header.format(metal.title()), "header")
+                     for metal, col in L.PRICE_COLS.items() for i, header in enumerate(PRICE_HEADERS)])
+    series = {metal: [column.tolist() for column in prices.breakpoints(metal, policy, L.PRICE_MAX_GAP_DAYS)]
+              for metal in L.PRICE_COLS}
+    for i in range(max(len(starts) for starts, _, _ in series.values())):
+        ws.write_row(L.PRICES_FIRST_ROW + i, [
+            cell for metal, col in L.PRICE_COLS.items() if i < len(series[metal][0])
+            for cell in ((col, series[metal][0][i], "hijri_start"),
+                         (col + 1, series[metal][1][i], "hijri_start"),
+                         (col + 2, series[metal][2][i], "ledger_money"))])
+    return ws
+
+
+# -- Entry points ------------------------------------------------------------------
+
+def generate(path, options=None, ledger=None, assets=None, prices=None):
+    """Write a complete logbook to ``path`` and return the path.
+
+    ``ledger`` optionally pre-fills the Ledger sheet; its capacity grows to
+    fit the entries if ``options.ledger_rows`` is smaller.  ``assets``
+    (``{sheet: [AssetRecord, ...]}``, as :func:`~.reader.iter_assets`
+    yields them) pre-fills the Stocks/Cash/Debts sheets, with their account
+    headers, and grows ``options.years`` to reach the last record.
+    ``prices`` (a :class:`~.prices.PriceHistory`) fills the Zakat Summary
+    gold and silver prices of each date by ``options.price_policy``, and
+    today's prices in Settings.
+    """
+    options = options or LogbookOptions()
+    if ledger is not None and len(ledger) > options.ledger_rows:
+        options = replace(options, ledger_rows=len(ledger))
+    assets = assets or {}
+    years = max((r.row - L.ASSET_FIRST_ROW + 1 for records in assets.values() for r in records),
+                default=0)
+    if years > options.years:
+        options = replace(options, years=years)
+    sources = asset_sources(assets)
+    results = None
+    if options.cached_values:
+        try:
+            from .cached import WorkbookResults
+        except ImportError:     # no engine extra: Excel calculates on open instead
+            WorkbookResults = None
+        if WorkbookResults is not None:
+            results = WorkbookResults(options, ledger, assets=assets, prices=prices)
+    wb = Workbook(path, STYLES)
+    wb.title = "Zakat-LogBook"
+    wb.creator = "Jad00gar"
+    wb.shared_formulas = options.shared_formulas
+    wb.full_calc_on_load = results is None
+    build_guide(wb)
+    build_settings(wb, results=results, prices=prices, nisab_method=options.nisab_method)
+    build_summary(wb, options, results, sources, prices)
+    for name, accounts, total_label in sources:
+        build_asset_sheet(wb, name, accounts, total_label, options.years, results,
+                          assets.get(name))
+    build_ledger(wb, options, ledger, results)
+    build_reports(wb, options, ledger, results)
+    build_hijri(wb)
+    if prices is not None:
+        build_prices(wb, prices, options.price_policy)
+    wb.close()
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"Generate the Zakat-LogBook {VERSION} workbook.")
+    parser.add_argument("-o", "--output", default="Zakat-LogBook.xlsx",
+                        help="workbook to write (default: %(default)s)")
+    parser.add_argument("--ledger-rows", type=int, default=L.DEFAULT_LEDGER_ROWS,
+                        help="number of Ledger rows (default: %(default)s)")
+    parser.add_argument("--years", type=int, default=L.DEFAULT_YEARS,
+                        help="number of Zakat years (default: %(default)s)")
+    parser.add_argument("--asset-refs", choices=ASSET_REFS, default="match",
+                        help="how Zakat Summary reads the Stocks/Cash/Debts totals: 'direct' "
+                             "references the Total cell instead of a whole-sheet INDEX/MATCH "
+                             "(default: %(default)s)")
+    parser.add_argument("--paid-lookup", choices=PAID_LOOKUPS, default="sumifs",
+                        help="how Zakat Summary finds each period's payments: 'sorted' uses "
+                             "cumulative sums and binary search but needs the Ledger in date "
+                             "order (default: %(default)s)")
+    parser.add_argument("--target", choices=TARGETS, default="2016",
+                        help="Excel version to write for: '365' uses dynamic arrays (FILTER, "
+                             "UNIQUE, LET, spilled SUMIFS) (default: %(default)s)")
+    parser.add_argument("--dynamic-arrays", action="store_true",
+                        help="same as --target 365")
+    parser.add_argument("--no-cached-values", dest="cached_values", action="store_false",
+                        help="leave formula results out of the file; Excel recalculates on open")
+    parser.add_argument("--no-shared-formulas", dest="shared_formulas", action="store_false",
+                        help="write every formula in full instead of as shared formulas")
+    parser.add_argument("--prices", metavar="FILE",
+                        help="gold and silver price history (.csv, .arrow or .parquet) that fills "
+                             "the Zakat Summary gold and silver prices for each date; needs the "
+                             "engine extra")
+    parser.add_argument("--price-policy", choices=L.PRICE_POLICIES, default="previous",
+                        help="which close --prices gives a date: 'previous' is the last one on or "
+                             "before it, 'nearest' the closest (default: %(default)s)")
+    parser.add_argument("--nisab-method", choices=L.NISAB_METHODS, default="gold",
+                        help="Nisab standard Settings starts with: gold (85g), silver (595g) or "
+                             "lower, the lower of the two (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    options = LogbookOptions(ledger_rows=args.ledger_rows, years=args.years,
+                             asset_refs=args.asset_refs, paid_lookup=args.paid_lookup,
+                             dynamic_arrays=args.dynamic_arrays or args.target == "365",
+                             shared_formulas=args.shared_formulas,
+                             cached_values=args.cached_values, price_policy=args.price_policy,
+                             nisab_method=args.nisab_method)
+    prices = None
+    if args.prices:
+        from .prices import load_prices
+
+        prices = load_prices(args.prices)
+    start = time.perf_counter()
+    generate(args.output, options, prices=prices)
+    print(f"Wrote {args.output} ({options.ledger_rows:,} Ledger rows) "
+          f"in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,121 @@
+"""Umm al-Qura (Hijri) dates as NumPy arrays.
+
+Conversions are table lookups on :mod:`zakat_logbook.ummalqura`, so a
+column of a million dates converts in milliseconds:
+
+* :func:`to_hijri` -- ``datetime64[D]`` dates to Hijri year, month and day
+  arrays.  A day-by-day table of month numbers makes each date one
+  indexing operation, with no search;
+* :func:`to_gregorian` -- Hijri year, month and day arrays back to dates;
+* :func:`add_years` -- the same Hijri day some lunar years later, which is
+  when a Hawl that starts on a date completes.  The 30th of a month that
+  has 29 days in the later year moves to the 29th.
+
+Dates outside the table give -1 (Hijri) or ``NaT`` (Gregorian).
+
+    >>> to_hijri(np.array(["2025-03-01"], dtype="datetime64[D]"))
+    (array([1446]), array([9]), array([1]))
+"""
+
+import datetime
+
+import numpy as np
+
+from .ummalqura import (FIRST_DATE, FIRST_YEAR, LAST_YEAR, MONTH_LENGTHS, MONTH_OFFSETS, MONTHS,
+                        month_label)
+
+EPOCH = np.datetime64(FIRST_DATE, "D")
+DAYS = MONTH_OFFSETS[-1]
+_MONTH_LENGTHS = np.array(MONTH_LENGTHS, dtype=np.int64)
+_MONTH_OFFSETS = np.array(MONTH_OFFSETS, dtype=np.int64)     # days from EPOCH
+# The month (0-based from Muharram 1343) of every day in the table.
+_MONTH_OF_DAY = np.repeat(np.arange(MONTHS, dtype=np.int32), _MONTH_LENGTHS)
+
+
+def _offsets(dates):
+    """Days from :data:`EPOCH` and whether each date is inside the table."""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    offset = (dates - EPOCH).astype(np.int64)
+    valid = ~np.isnat(dates) & (offset >= 0) & (offset < DAYS)
+    return np.where(valid, offset, 0), valid
+
+
+def to_hijri(dates):
+    """Hijri ``(years, months, days)`` int64 arrays for ``dates``; -1 where a
+    date is ``NaT`` or outside the table."""
+    offset, valid = _offsets(dates)
+    month = _MONTH_OF_DAY[offset]
+    day = offset - _MONTH_OFFSETS[month] + 1
+    return (np.where(valid, FIRST_YEAR + month // 12, -1),
+            np.where(valid, month % 12 + 1, -1),
+            np.where(valid, day, -1))
+
+
+def to_gregorian(years, months, days):
+    """``datetime64[D]`` dates for Hijri years, months and days (broadcast
+    together); ``NaT`` where the date does not exist or is outside the table."""
+    years, months, days = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.int64) for v in (years, months, days)))
+    month = (years - FIRST_YEAR) * 12 + months - 1
+    valid = (months >= 1) & (months <= 12) & (month >= 0) & (month < MONTHS) & (days >= 1)
+    month = np.where(valid, month, 0)
+    valid &= days <= _MONTH_LENGTHS[month]
+    dates = EPOCH + (_MONTH_OFFSETS[month] + days - 1)
+    return np.where(valid, dates, np.datetime64("NaT"))
+
+
+def add_years(dates, years=1):
+    """``dates`` moved ``years`` Hijri years on, keeping the Hijri day and
+    month (the 30th becomes the 29th in a 29-day month); ``NaT`` where either
+    end falls outside the table."""
+    offset, valid = _offsets(dates)
+    month = _MONTH_OF_DAY[offset]
+    day = offset - _MONTH_OFFSETS[month] + 1
+    target = month + 12 * years
+    valid &= (target >= 0) & (target < MONTHS)
+    target = np.where(valid, target, 0)
+    later = EPOCH + (_MONTH_OFFSETS[target] + np.minimum(day, _MONTH_LENGTHS[target]) - 1)
+    return np.where(valid, later, np.datetime64("NaT"))
+
+
+def labels(dates):
+    """``"1 Ramadan 1446"`` for each date, ``""`` where :func:`to_hijri` gives -1.
+
+    Each distinct month is formatted once; the per-date work is array
+    indexing and one string concatenation.
+    """
+    offset, valid = _offsets(dates)
+    month = _MONTH_OF_DAY[offset]
+    day = offset - _MONTH_OFFSETS[month] + 1
+    used, inverse = np.unique(month[valid], return_inverse=True)
+    out = np.full(len(offset), "", dtype=object)
+    names = np.array([" " + month_label(m) for m in used.tolist()], dtype=object)
+    out[valid] = day[valid].astype(str).astype(object) + names[inverse]
+    return out
+
+
+def hijri_date(date):
+    """``(year, month, day)`` of one ``datetime.date``, or None outside the table."""
+    years, months, days = to_hijri(np.array([date], dtype="datetime64[D]"))
+    return None if years[0] < 0 else (int(years[0]), int(months[0]), int(days[0]))
+
+
+def gregorian_date(year, month, day):
+    """The ``datetime.date`` of a Hijri date; ValueError if there is none."""
+    date = to_gregorian([year], [month], [day])[0]
+    if np.isnat(date):
+        raise ValueError(f"no Umm al-Qura date {year}-{month:02d}-{day:02d} "
+                         f"between {FIRST_YEAR} and {LAST_YEAR} AH")
+    return date.item()
+
+
+def next_hawl(date, fallback_days=None):
+    """The date one Hijri year after ``date``.
+
+    Outside the table the result is ``date + fallback_days`` when given,
+    else None.
+    """
+    due = add_years(np.array([date], dtype="datetime64[D]"))[0]
+    if not np.isnat(due):
+        return due.item()
+    return None if fallback_days is None else date + datetime.timedelta(days=fallback_days)
@@ -0,0 +1,237 @@
+"""Import bank or brokerage CSV exports into a Ledger store.
+
+The file is streamed with :mod:`csv` and written in chunks of
+``chunk_rows``, so memory stays flat however long the statement is.
+Each row is mapped onto Ledger columns A-G and checked against the
+Settings lists (payment types, services, recipients); rows that fail are
+counted and, if asked, written to a rejects CSV with the reason.
+
+Every accepted row gets a content hash that is stored in the database
+(:meth:`~.store.LedgerStore.add_unique`), so re-importing a statement, or
+an overlapping one, only adds the rows not seen before.  Identical rows
+on the same day within one file are separate payments: the hash includes
+their occurrence number, which assumes the statement lists rows in date
+order, as bank exports do.
+
+    python -m zakat_logbook.importer statement.csv ledger.db \\
+        --column date="Posting Date" --column given_to=Description \\
+        --column amount=Amount --set type=Sadaqah --set service="Bank Transfer" \\
+        --date-format %m/%d/%Y --settings Zakat-LogBook.xlsx --rejects rejects.csv
+"""
+
+import argparse
+import csv
+import datetime
+import hashlib
+import re
+from dataclasses import dataclass, field
+
+from . import layout as L
+
+FIELDS = ("date", "type", "service", "given_to", "details", "amount", "fees")
+# A Ledger sheet saved as CSV imports without any mapping.
+LEDGER_COLUMNS = dict(zip(FIELDS, L.LEDGER_HEADERS))
+_MONEY_NOISE = re.compile(r"[^\d.\-]")
+
+
+@dataclass
+class ImportOptions:
+    """How the columns of a CSV file map onto the Ledger."""
+
+    # Ledger field -> CSV header; fields not mapped take their default.
+    columns: dict = field(default_factory=lambda: dict(LEDGER_COLUMNS))
+    # Ledger field -> constant value for every row (e.g. type="Sadaqah").
+    defaults: dict = field(default_factory=dict)
+    date_format: str = "%Y-%m-%d"
+    delimiter: str = ","
+    encoding: str = "utf-8-sig"
+    # Bank exports show money going out as negative amounts.
+    absolute: bool = True
+    chunk_rows: int = 10_000
+
+    def __post_init__(self):
+        for name in (*self.columns, *self.defaults):
+            if name not in FIELDS:
+                raise ValueError(f"unknown Ledger field {name!r}; expected one of {', '.join(FIELDS)}")
+        for name in ("date", "amount"):
+            if name not in self.columns and name not in self.defaults:
+                raise ValueError(f"no CSV column mapped to {name!r}")
+        if self.chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+
+
+@dataclass
+class ImportResult:
+    read: int = 0
+    added: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+
+
+class Rejected(ValueError):
+    """A CSV row that cannot go into the Ledger."""
+
+
+def parse_money(text):
+    """``"$1,234.50"`` -> 1234.5; ``"(12.00)"`` -> -12.0; blank -> 0.0."""
+    text = text.strip()
+    if not text:
+        return 0.0
+    negative = text.startswith("(") and text.endswith(")")
+    cleaned = _MONEY_NOISE.sub("", text)
+    try:
+        value = float(cleaned)
+    except ValueError:
+        raise Rejected(f"not an amount: {text!r}") from None
+    return -value if negative else value
+
+
+def _canonical(lists):
+    """Case-insensitive lookup from a Settings list to its own spelling."""
+    return {name.casefold(): name for name in lists}
+
+
+class _RowMapper:
+    def __init__(self, options, types, services, recipients):
+        self.options = options
+        self.lists = {"type": _canonical(types), "service": _canonical(services),
+                      "given_to": _canonical(recipients)}
+
+    def __call__(self, record):
+        """Ledger tuple ``(ISO date, type, service, given_to, details, amount, fees)``."""
+        opts = self.options
+        raw = {name: str(opts.defaults.get(name, "")) for name in FIELDS}
+        for name, header in opts.columns.items():
+            value = record.get(header)
+            if value not in (None, ""):
+                raw[name] = value.strip()
+
+        try:
+            date = datetime.datetime.strptime(raw["date"], opts.date_format).date()
+        except ValueError:
+            raise Rejected(f"not a date in {opts.date_format}: {raw['date']!r}") from None
+        amount, fees = parse_money(raw["amount"]), parse_money(raw["fees"])
+        if opts.absolute:
+            amount, fees = abs(amount), abs(fees)
+        if amount == 0 and fees == 0:
+            raise Rejected("no amount")
+
+        row = {"date": date.isoformat(), "details": raw["details"], "amount": amount, "fees": fees}
+        for name, allowed in self.lists.items():
+            value = raw[name]
+            if name == "type" and not value:
+                raise Rejected("no payment type")
+            if value and value.casefold() not in allowed:
+                raise Rejected(f"{value!r} is not in the Settings {name.replace('_', ' ')} list")
+            row[name] = allowed.get(value.casefold(), "")
+        return tuple(row[name] for name in FIELDS)
+
+
+def row_key(row, occurrence):
+    """Content hash of a mapped Ledger row and its occurrence on that day."""
+    text = "\x1f".join(str(v).casefold() if isinstance(v, str) else repr(v) for v in row)
+    return hashlib.blake2b(f"{text}\x1f{occurrence}".encode(), digest_size=16).digest()
+
+
+def import_csv(path, store, options=None, types=L.DEFAULT_TYPES, services=L.DEFAULT_SERVICES,
+               recipients=L.DEFAULT_RECIPIENTS, rejects=None):
+    """Stream the CSV at ``path`` into ``store`` (a :class:`~.store.LedgerStore`).
+
+    ``types``, ``services`` and ``recipients`` are the Settings lists to
+    validate against; accepted values take the spelling used there.
+    ``rejects`` is an optional path for a CSV of the rows that were
+    refused.  Returns an :class:`ImportResult`.
+    """
+    options = options or ImportOptions()
+    mapper = _RowMapper(options, types, services, recipients)
+    result = ImportResult()
+    with open(path, newline="", encoding=options.encoding) as source:
+        reader = csv.DictReader(source, delimiter=options.delimiter)
+        missing = [h for h in options.columns.values() if h not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"{path}: no column {', '.join(map(repr, missing))}")
+        reject_file = open(rejects, "w", newline="", encoding="utf-8") if rejects else None
+        try:
+            reject_writer = None
+            if reject_file:
+                reject_writer = csv.writer(reject_file)
+                reject_writer.writerow(["line", "reason", *reader.fieldnames])
+            day, seen = None, {}
+            rows, keys = [], []
+            for record in reader:
+                result.read += 1
+                try:
+                    row = mapper(record)
+                except Rejected as exc:
+                    result.rejected += 1
+                    if reject_writer:
+                        reject_writer.writerow([reader.line_num, str(exc),
+                                                *(record.get(h, "") for h in reader.fieldnames)])
+                    continue
+                if row[0] != day:
+                    day, seen = row[0], {}
+                occurrence = seen[row] = seen.get(row, 0) + 1
+                rows.append(row)
+                keys.append(row_key(row, occurrence))
+                if len(rows) >= options.chunk_rows:
+                    result.added += store.add_unique(rows, keys)
+                    rows, keys = [], []
+            result.added += store.add_unique(rows, keys)
+        finally:
+            if reject_file:
+                reject_file.close()
+    result.duplicates = result.read - result.rejected - result.added
+    return result
+
+
+def _pairs(items, flag):
+    out = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"{flag} expects FIELD=VALUE, got {item!r}")
+        out[name.strip()] = value
+    return out
+
+
+def main(argv=None):
+    from .reader import read_settings_lists
+    from .store import LedgerStore
+
+    parser = argparse.ArgumentParser(description="Import a bank CSV export into a Ledger database.")
+    parser.add_argument("csv", help="CSV file to import")
+    parser.add_argument("database", help="SQLite Ledger database (see zakat_logbook.store)")
+    parser.add_argument("--column", action="append", default=[], metavar="FIELD=HEADER",
+                        help=f"map a Ledger field ({', '.join(FIELDS)}) to a CSV header; "
+                             "without any, the Ledger sheet headers are used")
+    parser.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE",
+                        help="give a Ledger field the same value on every row")
+    parser.add_argument("--date-format", default="%Y-%m-%d", help="strptime format of the dates")
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--signed", action="store_true",
+                        help="keep the sign of amounts instead of taking absolute values")
+    parser.add_argument("--settings", metavar="XLSX",
+                        help="workbook whose Settings lists to validate against (default: the built-in lists)")
+    parser.add_argument("--rejects", metavar="CSV", help="write refused rows here with the reason")
+    args = parser.parse_args(argv)
+
+    columns = _pairs(args.column, "--column") or dict(LEDGER_COLUMNS)
+    defaults = _pairs(args.set, "--set")
+    for name in defaults:
+        columns.pop(name, None)
+    try:
+        options = ImportOptions(columns, defaults, args.date_format, args.delimiter,
+                                absolute=not args.signed)
+    except ValueError as exc:
+        parser.error(str(exc))
+    lists = read_settings_lists(args.settings) if args.settings else (
+        L.DEFAULT_TYPES, L.DEFAULT_SERVICES, L.DEFAULT_RECIPIENTS)
+
+    with LedgerStore(args.database) as store:
+        result = import_csv(args.csv, store, options, *lists, rejects=args.rejects)
+    print(f"{args.csv}: {result.read:,} rows read, {result.added:,} added, "
+          f"{result.duplicates:,} already imported, {result.rejected:,} rejected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Sheet names, cell positions and default lists shared by every module.
+
+Row and column numbers are 1-based, as in Excel.  Anything that depends on
+the configurable Ledger length or number of Zakat years is a function of
+that size rather than a constant.
+"""
+
+from .xlsx import col_letter
+
+GUIDE = "Guide"
+SETTINGS = "Settings"
+SUMMARY = "Zakat Summary"
+STOCKS = "Stocks"
+CASH = "Cash"
+DEBTS = "Debts"
+LEDGER = "Ledger"
+REPORTS = "Reports"
+HIJRI = "Hijri"     # hidden: Umm al-Qura month starts for the Hijri date formulas
+PRICES = "Prices"   # hidden, with a price history: gold and silver closes for Summary E
+
+SHEET_ORDER = (GUIDE, SETTINGS, SUMMARY, STOCKS, CASH, DEBTS, LEDGER, REPORTS, HIJRI, PRICES)
+
+# -- Zakat rules ----------------------------------------------------------------
+
+ZAKAT_RATE = 0.025
+GOLD_NISAB_OZ = 2.7315
+SILVER_NISAB_OZ = 19.1358
+HAWL_DAYS = 354
+# Nisab methods and how Settings D43 names them.
+NISAB_METHODS = {"gold": "Gold", "silver": "Silver", "lower": "Lower of the two"}
+
+# -- Settings ---------------------------------------------------------------------
+
+LIST_FIRST_ROW = 5
+LIST_SLOTS = 30
+LIST_LAST_ROW = LIST_FIRST_ROW + LIST_SLOTS - 1
+
+TYPE_COL = 2        # B
+SERVICE_COL = 4     # D
+RECIPIENT_COL = 6   # F
+
+NISAB_STANDARD_CELL = "D43"     # the Nisab method: Gold, Silver or Lower of the two
+GOLD_NISAB_CELL = "D44"
+SILVER_NISAB_CELL = "D45"
+TODAY_GOLD_CELL = "B49"
+TODAY_SILVER_CELL = "F49"
+TODAY_PROMPT = "Enter price →"
+
+DEFAULT_TYPES = ["Zakat", "Sadaqah", "Fitrana", "Qurbani"]
+DEFAULT_SERVICES = [
+    "Remitly", "Western Union", "Wise (TransferWise)", "PayPal", "Zelle", "Bank Transfer",
+    "Cash", "Check", "Venmo", "CashApp", "MoneyGram", "Other",
+]
+DEFAULT_RECIPIENTS = [
+    "Islamic Relief USA", "Zakat Foundation", "LaunchGood", "Local Mosque", "Family Member",
+]
+
+# -- Stocks / Cash / Debts --------------------------------------------------------
+
+ASSET_HEADER_ROW = 3
+ASSET_FIRST_ROW = 4
+
+STOCK_ACCOUNTS = ["TD Ameritrade", "Charles Schwab", "Fidelity", "Vanguard", "Robinhood", "Other Account"]
+CASH_ACCOUNTS = ["Chase Checking", "Chase Savings", "Bank of America", "Money Market", "Cash on Hand", "Other Liquid"]
+DEBT_ACCOUNTS = ["Chase Credit Card", "Citi Credit Card", "Amex Credit Card", "Car Loan", "Personal Loan", "Other Debt"]
+
+STOCKS_TOTAL = "Total Portfolio"
+CASH_TOTAL = "Total Cash"
+DEBTS_TOTAL = "Total Debts"
+
+# -- Zakat Summary ----------------------------------------------------------------
+
+SUMMARY_HEADER_ROW = 3
+SUMMARY_FIRST_ROW = 5
+DEFAULT_YEARS = 10
+
+
+# Status column (M) and Hawl Tracker status texts.
+PAID_IN_FULL = "✅ Paid in Full"
+NOT_STARTED = "❌ Not Started"
+PARTIALLY_PAID = "⚠️ Partially Paid"
+
+HAWL_DUE_NOW = "🕌 Zakat Due Now!"
+HAWL_DUE_SOON = "⚠️ Due Soon (< 30 days)"
+HAWL_IN_PROGRESS = "✅ Hawl in progress"
+NO_DATES = "No dates yet"
+
+
+def summary_last_row(years):
+    return SUMMARY_FIRST_ROW + years - 1
+
+
+def dashboard_row(years):
+    """Row of the dashboard banner; its labels and totals follow directly below."""
+    return summary_last_row(years) + 3
+
+
+def hawl_row(years):
+    """Row of the Hawl Tracker banner; the tracker values sit three rows below."""
+    return summary_last_row(years) + 8
+
+
+# -- Ledger -----------------------------------------------------------------------
+
+LEDGER_HEADER_ROW = 5
+LEDGER_FIRST_ROW = 6
+DEFAULT_LEDGER_ROWS = 200
+
+LEDGER_HEADERS = [
+    "Date", "Type", "Service Used", "Given To", "Details / Notes",
+    "Amount ($)", "Fees ($)", "Total Paid ($)", "Running Total ($)", "Hijri Date",
+]
+(L_DATE, L_TYPE, L_SERVICE, L_GIVEN_TO, L_DETAILS,
+ L_AMOUNT, L_FEES, L_TOTAL, L_RUNNING, L_HIJRI) = range(1, 11)
+L_ZAKAT_TO_DATE = 11    # helper column, only in the "sorted" Paid This Period mode
+
+
+def ledger_last_row(rows):
+    return LEDGER_FIRST_ROW + rows - 1
+
+
+def ledger_range(col, rows, sheet=True, absolute_col=True):
+    """Return the data range of one Ledger column, e.g. ``Ledger!$H$6:$H$205``.
+
+    ``absolute_col=False`` yields the ``Ledger!H$6:H$205`` form used by the
+    Summary formulas.
+    """
+    letter = col_letter(col)
+    dollar = "$" if absolute_col else ""
+    ref = f"{dollar}{letter}${LEDGER_FIRST_ROW}:{dollar}{letter}${ledger_last_row(rows)}"
+    return f"{LEDGER}!{ref}" if sheet else ref
+
+
+# -- Hijri ------------------------------------------------------------------------
+
+# Column A holds the first day of each Umm al-Qura month, column B its name
+# ("Ramadan 1446"); a final row marks the day after the table ends.
+HIJRI_FIRST_ROW = 2
+
+
+# -- Prices -----------------------------------------------------------------------
+
+# Each metal's closes take three columns: the first day a close applies from
+# under the price policy, the date of the close and the price.
+PRICES_FIRST_ROW = 2
+PRICE_COLS = {"gold": 1, "silver": 5}     # A-C, E-G
+
+PRICE_POLICIES = ("previous", "nearest")
+PRICE_MAX_GAP_DAYS = 7      # a price history close further from a date is no price
+
+
+# -- Reports ----------------------------------------------------------------------
+
+REPORT_PERSON_CELL = "$C$4"
+REPORT_YEAR_CELL = "$C$5"
+REPORT_TYPE_FIRST_ROW = 8
+REPORT_TOTAL_ROW = REPORT_TYPE_FIRST_ROW + LIST_SLOTS + 1
+REPORT_DETAIL_HEADER_ROW = REPORT_TOTAL_ROW + 2
+REPORT_DETAIL_ROWS = 100
+REPORT_NAME_COL = 11    # K
+REPORT_INDEX_COL = 12   # L
+REPORT_YEAR_COL = 13    # M
+REPORT_CANDIDATE_COL = 14   # N: names the person list may show
+REPORT_SEEN_COL = 15        # O: running count of those found on the Ledger
+REPORT_YEAR_SLOTS = 20
+ALL_YEARS = "All Years"
+
+
+def report_fee_row(detail_rows=REPORT_DETAIL_ROWS):
+    """Row of the fee-summary banner, two rows below the detail table."""
+    return REPORT_DETAIL_HEADER_ROW + detail_rows + 3
+
+
+# With dynamic arrays the detail table spills without a row cap, so the fee
+# summary moves above it and the detail table goes last on the sheet.
+REPORT_SPILL_FEE_ROW = REPORT_DETAIL_HEADER_ROW
+REPORT_SPILL_HEADER_ROW = REPORT_SPILL_FEE_ROW + LIST_SLOTS + 3
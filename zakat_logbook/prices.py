@@ -0,0 +1,235 @@
+"""Local history of gold and silver prices.
+
+Zakat Summary columns E and P want the gold and silver spot prices on each
+Zakat date, and Settings B49 and F49 today's.  :class:`PriceHistory` holds
+daily closes (US dollars per troy ounce) from a file kept next to the
+logbooks and resolves the price for any date:
+
+* ``previous`` -- the last close on or before the date, as a price quoted
+  for that day would be;
+* ``nearest`` -- the close nearest the date, the earlier one on a tie.
+
+A date further than ``max_gap`` days (:data:`MAX_GAP_DAYS`) from the close
+it resolves to, or before the history starts, has no price.  Each metal's
+closes are turned into *breakpoints* for the policy, the first day each
+close applies from, so resolving any number of dates is one binary search
+(``np.searchsorted``) over them.  The generator writes the same breakpoints
+to a hidden Prices sheet, where Summary E and P find them with one ``MATCH``.
+
+Files have the columns ``date``, ``gold`` and optionally ``silver``, one
+row per day; a blank price is a day without a close for that metal:
+
+* ``.csv`` -- ISO dates, as exported by most price services;
+* ``.arrow``/``.feather`` -- Arrow IPC, memory-mapped on read;
+* anything else -- Parquet.
+
+Arrow and Parquet need the ``parquet`` extra.  :func:`load_prices` reads
+each file once per process and hands the same history back until the file
+changes.
+
+    python -m zakat_logbook.prices convert prices.csv prices.arrow
+    python -m zakat_logbook.prices lookup prices.arrow 2024-03-01 2025-02-19 --policy nearest
+"""
+
+import argparse
+import csv
+import functools
+import os
+
+import numpy as np
+
+from .data import YearInputs, to_dates
+from .layout import PRICE_MAX_GAP_DAYS as MAX_GAP_DAYS
+from .layout import PRICE_POLICIES as POLICIES
+
+METALS = ("gold", "silver")
+
+
+def _price_array(values):
+    """CSV prices as float64, NaN for blanks."""
+    return np.array([float(v) if v.strip() else np.nan for v in values], dtype=np.float64)
+
+
+class PriceHistory:
+    """Daily ``gold`` and ``silver`` closes by ``dates``.
+
+    Rows are sorted by date; a date given twice keeps its last row.
+    """
+
+    def __init__(self, dates, gold, silver=None):
+        dates = to_dates(dates)
+        columns = {"gold": np.asarray(gold, dtype=np.float64),
+                   "silver": (np.asarray(silver, dtype=np.float64) if silver is not None
+                              else np.full(len(dates), np.nan))}
+        keep = ~np.isnat(dates)
+        # The last row of each date: unique over the reversed, stably sorted rows.
+        order = np.argsort(dates[keep], kind="stable")[::-1]
+        _, last = np.unique(dates[keep][order], return_index=True)
+        rows = np.flatnonzero(keep)[order[last]]
+        self.dates = dates[rows]
+        for metal, prices in columns.items():
+            prices = prices[rows]
+            prices[~(prices > 0)] = np.nan
+            setattr(self, metal, prices)
+        self._breaks = {}
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            fields = {name.strip().lower(): name for name in reader.fieldnames or ()}
+            if "date" not in fields or "gold" not in fields:
+                raise ValueError(f"{path}: expected date and gold columns, found "
+                                 f"{', '.join(reader.fieldnames or ()) or 'none'}")
+            rows = list(reader)
+        column = {name: [row[original] for row in rows] for name, original in fields.items()}
+        dates = np.array([d.strip() or "NaT" for d in column["date"]], dtype="datetime64[D]")
+        return cls(dates, _price_array(column["gold"]),
+                   _price_array(column["silver"]) if "silver" in column else None)
+
+    @classmethod
+    def load(cls, path):
+        """Read a price file (see the module docstring for the formats)."""
+        if str(path).lower().endswith(".csv"):
+            return cls.from_csv(path)
+        from .columnar import read_table
+
+        table = read_table(path)
+        names = set(table.column_names)
+
+        def prices(name):
+            return np.asarray(table.column(name).to_numpy(), dtype=np.float64) if name in names else None
+
+        return cls(np.array(table.column("date").to_numpy(), dtype="datetime64[D]"),
+                   prices("gold"), prices("silver"))
+
+    def save(self, path):
+        """Write the history as CSV, Arrow IPC or Parquet, by extension."""
+        if str(path).lower().endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(("date", *METALS))
+                for date, *prices in zip(self.dates.astype(str).tolist(), self.gold.tolist(),
+                                         self.silver.tolist()):
+                    writer.writerow((date, *("" if p != p else repr(p) for p in prices)))
+            return path
+        from .columnar import _arrow, _dates, write_table
+
+        pa = _arrow()
+        table = pa.table({"date": _dates(pa, self.dates),
+                          **{metal: pa.array(getattr(self, metal), type=pa.float64(),
+                                             mask=np.isnan(getattr(self, metal)))
+                             for metal in METALS}})
+        return write_table(table, path)
+
+    def series(self, metal):
+        """``(dates, prices)`` of the days with a ``metal`` close."""
+        prices = getattr(self, _metal(metal))
+        has = ~np.isnan(prices)
+        return self.dates[has], prices[has]
+
+    def breakpoints(self, metal, policy="previous", max_gap=MAX_GAP_DAYS):
+        """``(from, dates, prices)``: the first day each ``metal`` close applies
+        from under ``policy``, with the closes.  A date resolves to the last
+        row whose ``from`` is on or before it."""
+        key = (_metal(metal), _policy(policy), max_gap)
+        if key not in self._breaks:
+            dates, prices = self.series(metal)
+            starts = dates.copy()
+            if policy == "nearest" and len(dates):
+                # A close applies from the day after the midpoint with the one
+                # before it; ties go to the earlier close.
+                starts[1:] = dates[:-1] + (dates[1:] - dates[:-1]) // 2 + 1
+                starts[0] = dates[0] - max_gap
+            self._breaks[key] = starts, dates, prices
+        return self._breaks[key]
+
+    def lookup(self, dates, metal="gold", policy="previous", max_gap=MAX_GAP_DAYS):
+        """The ``metal`` price for each of ``dates`` under ``policy``; NaN where
+        a date is blank or no close is within ``max_gap`` days."""
+        dates = to_dates(dates)
+        starts, closes, prices = self.breakpoints(metal, policy, max_gap)
+        i = np.searchsorted(starts, dates, side="right") - 1
+        found = (i >= 0) & ~np.isnat(dates)
+        i = np.where(found, i, 0)
+        if len(closes):
+            found &= np.abs((dates - closes[i]).astype(np.int64)) <= max_gap
+        return np.where(found, prices[i] if len(prices) else np.nan, np.nan)
+
+    def latest(self, metal="gold"):
+        """``(date, price)`` of the last ``metal`` close, or None."""
+        dates, prices = self.series(metal)
+        return (dates[-1].item(), float(prices[-1])) if len(dates) else None
+
+
+def _metal(metal):
+    if metal not in METALS:
+        raise ValueError(f"metal must be one of {', '.join(METALS)}")
+    return metal
+
+
+def _policy(policy):
+    if policy not in POLICIES:
+        raise ValueError(f"policy must be one of {', '.join(POLICIES)}")
+    return policy
+
+
+@functools.lru_cache(maxsize=8)
+def _load(path, signature):
+    return PriceHistory.load(path)
+
+
+def load_prices(path):
+    """:meth:`PriceHistory.load`, once per process while the file is unchanged."""
+    stat = os.stat(path)
+    return _load(os.path.abspath(path), (stat.st_mtime_ns, stat.st_size))
+
+
+def fill_year_inputs(years, history, policy="previous", max_gap=MAX_GAP_DAYS):
+    """``years`` (a :class:`~.data.YearInputs`) with each blank (0) gold and
+    silver price of a dated row taken from ``history``.  Prices already
+    entered are kept."""
+    gold, silver = (_fill(getattr(years, f"{metal}_price"),
+                          history.lookup(years.dates, metal, policy, max_gap))
+                    for metal in METALS)
+    return YearInputs(years.dates, gold, years.gold_oz, years.stocks, years.cash, years.debts, silver)
+
+
+def _fill(entered, looked_up):
+    return np.where((entered == 0) & ~np.isnan(looked_up), looked_up, entered)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep and query a local gold and silver price history.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="rewrite a price file in another format")
+    convert.add_argument("source")
+    convert.add_argument("target", help=".csv, .arrow (memory-mapped on read) or .parquet")
+    find = commands.add_parser("lookup", help="print the prices for dates")
+    find.add_argument("prices")
+    find.add_argument("dates", nargs="+", help="ISO dates")
+    find.add_argument("--policy", choices=POLICIES, default="previous",
+                      help="'previous' takes the last close on or before the date, 'nearest' the "
+                           "closest one (default: %(default)s)")
+    find.add_argument("--max-gap", type=int, default=MAX_GAP_DAYS,
+                      help="days a close may be from the date (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        history = PriceHistory.load(args.source)
+        history.save(args.target)
+        print(f"{args.target}: {len(history):,} days")
+        return
+    history = load_prices(args.prices)
+    dates = to_dates(args.dates)
+    prices = [history.lookup(dates, metal, args.policy, args.max_gap) for metal in METALS]
+    print(f"{'date':<12}" + "".join(f"{metal:>12}" for metal in METALS))
+    for date, *row in zip(args.dates, *prices):
+        print(f"{date:<12}" + "".join(f"{'-' if p != p else f'{p:,.2f}':>12}" for p in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""Read data back out of a logbook ``.xlsx`` without a spreadsheet library.
+
+Users keep their own copies of the workbook, often saved by Excel with
+many styles.  This reader streams each worksheet part through an expat
+parser in fixed-size chunks, so memory does not grow with the sheet:
+
+* ``xl/styles.xml`` is never opened -- dates are recognised by column,
+  not by number format;
+* shared strings are parsed lazily, only as far as the highest index a
+  cell has asked for (:class:`SharedStrings`);
+* cells outside the requested columns are skipped without decoding.
+
+:func:`iter_ledger` and :func:`iter_assets` turn the rows into typed
+:class:`LedgerRecord` / :class:`AssetRecord` values.
+"""
+
+import datetime
+import posixpath
+import re
+import xml.parsers.expat
+import zipfile
+from dataclasses import dataclass
+from xml.etree import ElementTree
+
+from . import layout as L
+from .xlsx import EXCEL_EPOCH, col_index, translate_formula
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_CELL_REF = re.compile(r"\$?([A-Z]*)\$?(\d*)")
+_CHUNK = 1 << 20
+
+ASSET_TOTALS = {L.STOCKS: L.STOCKS_TOTAL, L.CASH: L.CASH_TOTAL, L.DEBTS: L.DEBTS_TOTAL}
+
+
+def split_ref(ref):
+    """``"AB12"`` -> ``("AB", "12")``; either part may be empty."""
+    m = _CELL_REF.match(ref)
+    return m.group(1), m.group(2)
+
+
+def _part_path(target):
+    return target.lstrip("/") if target.startswith("/") else posixpath.join("xl", target)
+
+
+def _workbook_rels(zf):
+    rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    return [(r.get("Id"), r.get("Type", ""), r.get("Target"))
+            for r in rels.iter(f"{_PKG_REL_NS}Relationship")]
+
+
+def sheet_parts(zf):
+    """Return ``[(sheet name, sheetId, part path)]`` in workbook order."""
+    targets = {rid: target for rid, _, target in _workbook_rels(zf)}
+    book = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+    return [(sheet.get("name"), int(sheet.get("sheetId")),
+             _part_path(targets[sheet.get(f"{_REL_NS}id")]))
+            for sheet in book.iter(f"{_NS}sheet")]
+
+
+class SharedStrings:
+    """The shared string table, parsed only as far as it has been indexed.
+
+    Workbooks written by this package use inline strings and have no table
+    at all; for Excel-saved files only the prefix up to the largest index
+    referenced so far is held in memory.
+    """
+
+    def __init__(self, zf):
+        parts = [_part_path(target) for _, kind, target in _workbook_rels(zf)
+                 if kind.endswith("/sharedStrings")]
+        self._items = []
+        self._events = None
+        self._stream = None
+        if parts and parts[0] in zf.namelist():
+            self._stream = zf.open(parts[0])
+            self._events = ElementTree.iterparse(self._stream, events=("end",))
+
+    def __getitem__(self, index):
+        while index >= len(self._items):
+            if not self._advance():
+                raise IndexError(f"shared string {index} out of range")
+        return self._items[index]
+
+    def _advance(self):
+        if self._events is None:
+            return False
+        for _, elem in self._events:
+            if elem.tag == f"{_NS}si":
+                # Plain text or rich-text runs; phonetic runs (rPh) are not part of the value.
+                runs = [elem.find(f"{_NS}t")] + elem.findall(f"{_NS}r/{_NS}t")
+                self._items.append("".join(t.text or "" for t in runs if t is not None))
+                elem.clear()
+                return True
+        self.close()
+        return False
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+        self._stream = self._events = None
+
+
+class SharedFormulas:
+    """Formula text of the cells of one sheet, shared formulas expanded.
+
+    Only the first cell of a shared formula carries its text; the others
+    (``<f t="shared" si="3"/>``) get it moved by their offset from that cell.
+    """
+
+    def __init__(self):
+        self._masters = {}      # si -> (text, col, row)
+
+    def text(self, ref, text, kind=None, si=None):
+        """Formula of cell ``ref`` from its ``<f>`` text and ``t``/``si`` attributes."""
+        if kind != "shared" or si is None:
+            return text
+        col, row = split_ref(ref)
+        col, row = col_index(col), int(row)
+        if text:
+            self._masters[si] = (text, col, row)
+            return text
+        master = self._masters.get(si)
+        if master is None:
+            return None
+        text, master_col, master_row = master
+        return translate_formula(text, row - master_row, col - master_col)
+
+
+def _number(text):
+    number = float(text)
+    return int(number) if number.is_integer() and "." not in text and "E" not in text else number
+
+
+class _SheetParser:
+    """expat handlers that collect ``(row, {column: value})`` pairs."""
+
+    def __init__(self, strings, columns):
+        self.strings = strings
+        self.columns = columns
+        self.rows = []
+        self._row = self._cells = None
+        self._col = self._kind = self._value = None
+        self._text = None           # list while inside a <v> or an inline <t>
+        self._phonetic = False
+        self._letters = {}
+
+    def start(self, name, attrs):
+        if ":" in name:
+            name = name.rpartition(":")[2]
+        if name == "c":
+            letters = attrs["r"].rstrip("0123456789")
+            col = self._letters.get(letters)
+            if col is None:
+                col = self._letters[letters] = col_index(letters)
+            if self.columns is None or col in self.columns:
+                self._col, self._kind, self._value = col, attrs.get("t"), None
+        elif self._col is None:
+            if name == "row":
+                self._row, self._cells = int(attrs["r"]), {}
+        elif name == "v" or (name == "t" and not self._phonetic):
+            self._text = []
+        elif name == "rPh":
+            self._phonetic = True
+
+    def end(self, name):
+        if ":" in name:
+            name = name.rpartition(":")[2]
+        if name == "row":
+            self.rows.append((self._row, self._cells))
+        elif self._col is None:
+            return
+        elif name in ("v", "t") and self._text is not None:
+            text, self._text = "".join(self._text), None
+            self._value = text if self._value is None or name == "v" else self._value + text
+        elif name == "rPh":
+            self._phonetic = False
+        elif name == "c":
+            value = self._convert(self._value)
+            if value is not None:
+                self._cells[self._col] = value
+            self._col = None
+
+    def text(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def _convert(self, text):
+        kind = self._kind
+        if kind in ("inlineStr", "str"):
+            return text or ""
+        if not text:
+            return None
+        if kind in ("e", "d"):
+            return text
+        if kind == "s":
+            return self.strings[int(text)]
+        if kind == "b":
+            return text == "1"
+        return _number(text)
+
+
+def iter_rows(path, sheet, columns=None):
+    """Yield ``(row number, {column index: value})`` for each row of ``sheet``.
+
+    Values are the stored (cached) values: str, int, float, bool or None;
+    dates come back as serial numbers.  ``columns`` limits the cells read
+    to those column indexes.
+    """
+    columns = frozenset(columns) if columns is not None else None
+    with zipfile.ZipFile(path) as zf:
+        parts = {name: part for name, _, part in sheet_parts(zf)}
+        if sheet not in parts:
+            raise KeyError(f"{path}: no sheet named {sheet!r}")
+        strings = SharedStrings(zf)
+        handler = _SheetParser(strings, columns)
+        parser = xml.parsers.expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = handler.start
+        parser.EndElementHandler = handler.end
+        parser.CharacterDataHandler = handler.text
+        try:
+            with zf.open(parts[sheet]) as stream:
+                while True:
+                    chunk = stream.read(_CHUNK)
+                    parser.Parse(chunk, not chunk)
+                    yield from handler.rows
+                    handler.rows.clear()
+                    if not chunk:
+                        break
+        finally:
+            strings.close()
+
+
+# -- typed records -------------------------------------------------------------------
+
+def to_date(value):
+    """A cell value as a date: serial numbers and ISO text convert, anything else is None."""
+    if isinstance(value, bool) or value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return EXCEL_EPOCH + datetime.timedelta(days=int(value))
+    try:
+        return datetime.date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+def to_amount(value):
+    """A cell value as money; text and blanks count as 0, as SUM treats them."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return 0.0
+
+
+def to_str(value):
+    return "" if value is None else str(value)
+
+
+@dataclass
+class LedgerRecord:
+    """One Ledger entry (columns A-G)."""
+
+    row: int
+    date: datetime.date     # None when blank
+    type: str
+    service: str
+    given_to: str
+    details: str
+    amount: float
+    fees: float
+
+    @property
+    def total(self):
+        """Column H: Amount + Fees."""
+        return self.amount + self.fees
+
+    def astuple(self):
+        """``(date, type, service, given_to, details, amount, fees)``."""
+        return (self.date, self.type, self.service, self.given_to, self.details,
+                self.amount, self.fees)
+
+
+@dataclass
+class AssetRecord:
+    """One year row of the Stocks, Cash or Debts sheet."""
+
+    sheet: str
+    row: int
+    date: datetime.date     # None when blank
+    balances: dict          # account header -> amount, in column order
+    total: float            # cached Total column, or the sum of the balances
+
+
+LEDGER_INPUT_COLS = (L.L_DATE, L.L_TYPE, L.L_SERVICE, L.L_GIVEN_TO, L.L_DETAILS,
+                     L.L_AMOUNT, L.L_FEES)
+
+
+def iter_ledger(path):
+    """Yield a :class:`LedgerRecord` for every non-blank Ledger row."""
+    for row, cells in iter_rows(path, L.LEDGER, LEDGER_INPUT_COLS):
+        if row < L.LEDGER_FIRST_ROW or not any(v != "" for v in cells.values()):
+            continue
+        yield LedgerRecord(row, to_date(cells.get(L.L_DATE)), to_str(cells.get(L.L_TYPE)),
+                           to_str(cells.get(L.L_SERVICE)), to_str(cells.get(L.L_GIVEN_TO)),
+                           to_str(cells.get(L.L_DETAILS)), to_amount(cells.get(L.L_AMOUNT)),
+                           to_amount(cells.get(L.L_FEES)))
+
+
+def iter_assets(path, sheet):
+    """Yield an :class:`AssetRecord` for every dated or non-empty row of a
+    Stocks/Cash/Debts sheet.
+
+    Accounts are the headers between Date and the Total column, which is
+    found by its label (``Total Portfolio`` etc.) or else taken as the last
+    header, so renamed or added accounts are picked up.
+    """
+    accounts, total_col = {}, None
+    for row, cells in iter_rows(path, sheet):
+        if row == L.ASSET_HEADER_ROW:
+            headers = {col: to_str(v) for col, v in cells.items() if col > 1 and v != ""}
+            label = ASSET_TOTALS.get(sheet)
+            total_col = next((c for c, h in headers.items() if h == label), max(headers, default=None))
+            accounts = {c: h for c, h in sorted(headers.items()) if c != total_col}
+            continue
+        if row < L.ASSET_FIRST_ROW or total_col is None:
+            continue
+        date = to_date(cells.get(1))
+        if date is None and not any(cells.get(col) not in (None, "") for col in accounts):
+            continue
+        balances = {name: to_amount(cells.get(col)) for col, name in accounts.items()}
+        cached = cells.get(total_col)
+        total = to_amount(cached) if isinstance(cached, (int, float)) else sum(balances.values())
+        yield AssetRecord(sheet, row, date, balances, total)
+
+
+def read_ledger(path):
+    """Read Ledger columns A-G into a :class:`~.data.Ledger`.
+
+    Position ``i`` is worksheet row ``LEDGER_FIRST_ROW + i``; blank rows
+    inside the data are kept (they restart the Running Total) and trailing
+    blank rows are dropped.
+    """
+    from .data import Ledger
+
+    rows = []
+    blank = (None, "", "", "", "", 0.0, 0.0)
+    for record in iter_ledger(path):
+        while len(rows) < record.row - L.LEDGER_FIRST_ROW:
+            rows.append(blank)
+        rows.append(record.astuple())
+    return Ledger.from_rows(rows)
+
+
+def read_settings_lists(path):
+    """Return the Settings lists ``(types, services, recipients)`` of a workbook."""
+    lists = {L.TYPE_COL: [], L.SERVICE_COL: [], L.RECIPIENT_COL: []}
+    for row, cells in iter_rows(path, L.SETTINGS, lists):
+        if row < L.LIST_FIRST_ROW:
+            continue
+        if row > L.LIST_LAST_ROW:
+            break
+        for col, items in lists.items():
+            value = cells.get(col)
+            if value not in (None, ""):
+                items.append(str(value))
+    return lists[L.TYPE_COL], lists[L.SERVICE_COL], lists[L.RECIPIENT_COL]
+
+
+def _ounces(value, default):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) \
+        else default
+
+
+def read_nisab_settings(path):
+    """Settings D43-D45 in one pass: ``(method, gold oz, silver oz)``.
+
+    ``method`` is the key of :data:`~.layout.NISAB_METHODS` whose name
+    D43 holds (any case); anything else is ``"gold"``, as the Zakat Summary
+    Nisab formula reads it.  Blank ounces are the defaults.
+    """
+    letters, first = split_ref(L.NISAB_STANDARD_CELL)
+    col, first = col_index(letters), int(first)
+    values = {}
+    for number, cells in iter_rows(path, L.SETTINGS, (col,)):
+        if number > first + 2:
+            break
+        if number >= first:
+            values[number - first] = cells.get(col)
+    names = {name.casefold(): method for method, name in L.NISAB_METHODS.items()}
+    standard = values.get(0)
+    method = names.get(standard.casefold(), "gold") if isinstance(standard, str) else "gold"
+    return (method, _ounces(values.get(1), L.GOLD_NISAB_OZ),
+            _ounces(values.get(2), L.SILVER_NISAB_OZ))
+
+
+def read_year_inputs(path):
+    """Read the Zakat Summary inputs of a workbook into a :class:`~.data.YearInputs`.
+
+    Dates, gold price, gold oz and silver price come from Summary A, E, F
+    and P; Stocks, Cash and Debts totals from the asset sheet row at the
+    same offset, as the Summary formulas take them.  The year rows end two
+    rows above the dashboard banner, so workbooks with any number of years
+    are read.
+    """
+    from .data import YearInputs
+
+    cols = (1, 5, 6, 16)
+    rows, last = {}, None
+    for row, cells in iter_rows(path, L.SUMMARY, cols):
+        if row < L.SUMMARY_FIRST_ROW:
+            continue
+        label = cells.get(1)
+        if isinstance(label, str) and label.strip() and to_date(label) is None:
+            last = row - 3
+            break
+        rows[row] = cells
+    if last is None:
+        last = max(rows, default=L.SUMMARY_FIRST_ROW - 1)
+    count = last - L.SUMMARY_FIRST_ROW + 1
+    year_rows = [rows.get(L.SUMMARY_FIRST_ROW + i, {}) for i in range(count)]
+
+    totals = []
+    for sheet in (L.STOCKS, L.CASH, L.DEBTS):
+        by_row = {record.row: record.total for record in iter_assets(path, sheet)}
+        totals.append([by_row.get(L.ASSET_FIRST_ROW + i, 0.0) for i in range(count)])
+    return YearInputs([to_date(cells.get(1)) for cells in year_rows],
+                      [to_amount(cells.get(5)) for cells in year_rows],
+                      [to_amount(cells.get(6)) for cells in year_rows],
+                      *totals,
+                      [to_amount(cells.get(16)) for cells in year_rows])
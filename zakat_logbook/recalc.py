@@ -0,0 +1,477 @@
+"""Recalculate a logbook workbook in Python, one edit at a time.
+
+:class:`Recalculator` loads a workbook's formulas (through
+:class:`~.volatile.FormulaGraph`) and stored values into a
+:class:`~.formula.Grid`, and indexes the cells each formula reads.  The
+generated workbooks carry no ``calcChain.xml``, and Excel's chain is only
+an evaluation order anyway, so the dependency graph is built from the
+formulas' references.
+
+An edit marks dirty only the formula cells downstream of it and
+re-evaluates them in dependency order.  A dirty cell none of whose
+precedents changed value is skipped, so the work stops where the edit's
+effect does.  Changing one Ledger amount re-evaluates that row's Total
+Paid, the Running Total below it, the Zakat Summary rows that sum Total
+Paid (their balances and statuses only where a total moved) and the
+Reports cells that read the column, not every formula in the workbook.
+
+    calc = Recalculator("Zakat-LogBook.xlsx")
+    result = calc.set("Ledger", "F10", 125)
+    result.changed      # {("Ledger", 8, 10): 125.0, ("Zakat Summary", 11, 7): ..., ...}
+
+A formula the evaluator cannot compile (a function it does not implement)
+evaluates to ``#NAME?`` and is listed in :attr:`Recalculator.unsupported`
+with the reason; the rest of the workbook is recalculated as usual.
+
+Stored values are the starting point, so the workbook should carry cached
+results (the generator writes them unless told not to) or be brought up to
+date once with :meth:`Recalculator.recalculate_all`.
+
+    python -m zakat_logbook.recalc Zakat-LogBook.xlsx "Ledger!F10=125"
+    python -m zakat_logbook.recalc Zakat-LogBook.xlsx --check
+"""
+
+import argparse
+import datetime
+import math
+import re
+import sys
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .formula import (ERRORS, SPILL, Context, FormulaError, Grid, cell_value, compile_formula,
+                      to_serial, value_of)
+from .reader import iter_rows, split_ref
+from .volatile import FormulaGraph, cell_name
+from .xlsx import col_index
+
+
+class CircularReference(ValueError):
+    """Formula cells that depend on each other."""
+
+
+@dataclass
+class Recalculation:
+    """What one edit (or full recalculation) did.
+
+    ``dirty`` counts the formula cells downstream of the edit, ``evaluated``
+    those actually re-evaluated; ``changed`` maps every cell whose value
+    changed, edited cells included, to its new value.
+    """
+
+    dirty: int
+    evaluated: int
+    changed: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def by_sheet(self):
+        """``{sheet: cells changed}``."""
+        counts = defaultdict(int)
+        for sheet, _, _ in self.changed:
+            counts[sheet] += 1
+        return dict(counts)
+
+
+class DependencyIndex:
+    """Formula cells by the cells they read.
+
+    Single-cell references are a dict lookup, one-column ranges are arrays
+    of first and last rows per sheet column, and the few wider ranges are
+    scanned.
+    """
+
+    def __init__(self, references):
+        self._cells = defaultdict(list)
+        self._wide = defaultdict(list)
+        ranges = defaultdict(list)
+        for dep, refs in references.items():
+            for sheet, c1, r1, c2, r2 in set(refs):
+                if c1 == c2 and r1 == r2:
+                    self._cells[(sheet, c1, r1)].append(dep)
+                elif c1 == c2:
+                    ranges[(sheet, c1)].append((r1, r2, dep))
+                else:
+                    self._wide[sheet].append((c1, r1, c2, r2, dep))
+        self._columns = {key: (np.array([r1 for r1, _, _ in items]),
+                               np.array([r2 for _, r2, _ in items]),
+                               [dep for _, _, dep in items])
+                         for key, items in ranges.items()}
+
+    def dependents(self, sheet, c1, r1, c2, r2):
+        """Formula cells reading any cell of the rectangle, each once."""
+        out = set()
+        for col in range(c1, c2 + 1):
+            for row in range(r1, r2 + 1):
+                out.update(self._cells.get((sheet, col, row), ()))
+            column = self._columns.get((sheet, col))
+            if column is not None:
+                firsts, lasts, deps = column
+                out.update(deps[i] for i in np.flatnonzero((firsts <= r2) & (lasts >= r1)))
+        out.update(dep for a1, b1, a2, b2, dep in self._wide.get(sheet, ())
+                   if a1 <= c2 and c1 <= a2 and b1 <= r2 and r1 <= b2)
+        return out
+
+
+def _result(value):
+    """A formula result as the cell holds it: a blank read through a
+    reference shows as 0."""
+    return 0.0 if value is None else cell_value(value)
+
+
+def _unsupported(ctx):
+    return ERRORS["#NAME?"]
+
+
+def _same(a, b):
+    """Equal values; numbers that differ only by float rounding count as equal,
+    as they would in Excel's 15 significant digits."""
+    if type(a) is float and type(b) is float:
+        return math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-9)
+    return type(a) is type(b) and a == b
+
+
+class Recalculator:
+    """A workbook held in memory and kept up to date as cells are edited."""
+
+    def __init__(self, path, today=None):
+        self.path = path
+        self.graph = FormulaGraph(path)
+        self.grid = Grid()
+        self.today = today or datetime.date.today()
+        self._index = DependencyIndex(self.graph.references)
+        self._compiled = {}
+        self.unsupported = {}       # cell -> why its formula could not be compiled
+        self._changed = {}
+        self._volatile = set(self.graph.volatile_cells())
+        self.grid.spills.update(self.graph.spans)
+        for sheet, col, row in self.graph.dynamic:
+            self.grid.spills.setdefault((sheet, col, row), (col, row))
+        self._load_values()
+
+    def _load_values(self):
+        spilled = set()
+        for (sheet, col, row), (c2, r2) in self.grid.spills.items():
+            spilled.update((sheet, c, r) for c in range(col, c2 + 1) for r in range(row, r2 + 1))
+        for sheet in self.graph.extent:
+            for row, values in iter_rows(self.path, sheet):
+                for col, value in values.items():
+                    cell = (sheet, col, row)
+                    if type(value) is str and value in ERRORS and (
+                            cell in self.graph.formulas or cell in spilled):
+                        value = ERRORS[value]
+                    self.grid.set(sheet, col, row, cell_value(value))
+
+    # -- reading and editing -------------------------------------------------------------
+
+    def value(self, sheet, ref):
+        """The current value of ``sheet!ref`` ("F10")."""
+        col, row = split_ref(ref)
+        return self.grid.get(sheet, col_index(col), int(row))
+
+    def set(self, sheet, ref, value):
+        """Put ``value`` in ``sheet!ref`` and recalculate what depends on it."""
+        return self.update({(sheet, ref): value})
+
+    def update(self, edits):
+        """Apply ``{(sheet, ref): value}`` and recalculate what depends on them.
+
+        Formula cells and the cells an array or spill covers cannot be set.
+        """
+        start = time.perf_counter()
+        self._changed = {}
+        seeds = []
+        for (sheet, ref), value in edits.items():
+            col, row = split_ref(ref)
+            cell = (sheet, col_index(col), int(row))
+            if cell in self.graph.formulas:
+                raise ValueError(f"{cell_name(cell)} holds a formula")
+            anchor = self._spill_over(cell)
+            if anchor is not None:
+                raise ValueError(f"{cell_name(cell)} is part of the array at {cell_name(anchor)}")
+            if self._write(cell, cell_value(to_serial(value))):
+                seeds.append((cell[0], cell[1], cell[2], cell[1], cell[2]))
+        dirty, evaluated = self._run(seeds, ())
+        return Recalculation(dirty, evaluated, self._changed, time.perf_counter() - start)
+
+    def set_today(self, today):
+        """Move ``TODAY()`` to ``today`` and recalculate what depends on it."""
+        start = time.perf_counter()
+        self._changed = {}
+        if today == self.today:
+            return Recalculation(0, 0)
+        self.today = today
+        dirty, evaluated = self._run((), self._volatile)
+        return Recalculation(dirty, evaluated, self._changed, time.perf_counter() - start)
+
+    def recalculate_all(self):
+        """Evaluate every formula cell, as Excel's full recalculation does."""
+        start = time.perf_counter()
+        self._changed = {}
+        dirty, evaluated = self._run((), self.graph.formulas)
+        return Recalculation(dirty, evaluated, self._changed, time.perf_counter() - start)
+
+    def downstream(self, sheet, ref):
+        """Formula cells an edit of ``sheet!ref`` marks dirty."""
+        col, row = split_ref(ref)
+        col, row = col_index(col), int(row)
+        return set(self._dirty([(sheet, col, row, col, row)], ())[0])
+
+    def _spill_over(self, cell):
+        sheet, col, row = cell
+        for anchor, (c2, r2) in self.grid.spills.items():
+            if anchor[0] == sheet and anchor[1] <= col <= c2 and anchor[2] <= row <= r2:
+                return anchor
+        return None
+
+    def _write(self, cell, value):
+        sheet, col, row = cell
+        if _same(self.grid.get(sheet, col, row), value):
+            return False
+        self.grid.set(sheet, col, row, value)
+        self._changed[cell] = value
+        return True
+
+    # -- propagation ---------------------------------------------------------------------
+
+    def _dependents_of(self, cell):
+        sheet, col, row = cell
+        c2, r2 = self.grid.spills.get(cell, (col, row))
+        deps = self._index.dependents(sheet, col, row, c2, r2)
+        deps.discard(cell)
+        return deps
+
+    def _dirty(self, seeds, marked):
+        """``(children, seeded)``: every formula cell downstream of the
+        rectangles ``seeds`` and the cells ``marked``, with its dependents, and
+        the cells to evaluate whatever their precedents do."""
+        seeded = set(marked)
+        for rect in seeds:
+            seeded.update(self._index.dependents(*rect))
+        children, queue = {}, deque(seeded)
+        while queue:
+            cell = queue.popleft()
+            if cell in children:
+                continue
+            children[cell] = kids = self._dependents_of(cell)
+            queue.extend(kid for kid in kids if kid not in children)
+        return children, seeded
+
+    def _propagate(self, seeds, marked):
+        """Re-evaluate downstream of ``seeds`` and ``marked`` in dependency
+        order, skipping cells whose precedents kept their values.
+
+        Returns ``(dirty, evaluated, rectangles whose spill range moved)``.
+        """
+        children, needed = self._dirty(seeds, marked)
+        waiting = defaultdict(int)
+        for kids in children.values():
+            for kid in kids:
+                waiting[kid] += 1
+        ready = [cell for cell in children if not waiting[cell]]
+        evaluated, done, moved = 0, 0, []
+        while ready:
+            cell = ready.pop()
+            done += 1
+            if cell in needed:
+                evaluated += 1
+                changed, rect = self._evaluate(cell)
+                if changed:
+                    needed.update(children[cell])
+                if rect:
+                    moved.append(rect)
+            for kid in children[cell]:
+                waiting[kid] -= 1
+                if not waiting[kid]:
+                    ready.append(kid)
+        if done < len(children):
+            stuck = min(cell for cell in children if waiting[cell])
+            raise CircularReference(f"circular reference through {cell_name(stuck)}")
+        return len(children), evaluated, moved
+
+    def _run(self, seeds, marked):
+        """Propagate, again from any spill range that moved, until none does."""
+        dirty = evaluated = 0
+        while seeds or marked:
+            count, done, seeds = self._propagate(seeds, marked)
+            dirty, evaluated, marked = dirty + count, evaluated + done, ()
+        return dirty, evaluated
+
+    # -- evaluation ----------------------------------------------------------------------
+
+    def _evaluate(self, cell):
+        """Evaluate one formula cell; returns ``(changed, moved rectangle)``."""
+        sheet, col, row = cell
+        function = self._compiled.get(cell)
+        if function is None:
+            try:
+                function = compile_formula(self.graph.formulas[cell], col, row)
+            except FormulaError as exc:
+                self.unsupported[cell] = str(exc)
+                function = _unsupported
+            self._compiled[cell] = function
+        ctx = Context(self.grid, sheet, col, row, to_serial(self.today))
+        result = value_of(function(ctx), ctx)
+        if cell in self.graph.dynamic:
+            return self._spill(cell, result)
+        if cell in self.graph.spans:
+            return self._fill(cell, result), None
+        if isinstance(result, np.ndarray):
+            result = result.flat[0]
+        return self._write(cell, _result(result)), None
+
+    def _fill(self, cell, result):
+        """Write an array formula's result over its fixed range, padding with #N/A."""
+        sheet, col, row = cell
+        c2, r2 = self.graph.spans[cell]
+        block = np.full((r2 - row + 1, c2 - col + 1), ERRORS["#N/A"], dtype=object)
+        if isinstance(result, np.ndarray):
+            result = result.reshape(result.shape[0], -1) if result.ndim else result.reshape(1, 1)
+            if result.shape[0] == 1:
+                result = np.repeat(result, block.shape[0], axis=0)
+            if result.shape[1] == 1:
+                result = np.repeat(result, block.shape[1], axis=1)
+            h, w = min(block.shape[0], result.shape[0]), min(block.shape[1], result.shape[1])
+            block[:h, :w] = result[:h, :w]
+        else:
+            block[:, :] = result
+        changed = False
+        for (i, j), value in np.ndenumerate(block):
+            changed |= self._write((sheet, col + j, row + i), _result(value))
+        return changed
+
+    def _spill(self, cell, result):
+        """Write a dynamic-array result from its anchor, moving the spill range."""
+        sheet, col, row = cell
+        old_c2, old_r2 = self.grid.spills[cell]
+        if isinstance(result, np.ndarray) and result.size > 1:
+            result = result.reshape(result.shape[0], -1)
+            c2, r2 = col + result.shape[1] - 1, row + result.shape[0] - 1
+            if self._blocked(cell, c2, r2, old_c2, old_r2):
+                result, c2, r2 = SPILL, col, row
+        else:
+            if isinstance(result, np.ndarray):
+                result = result.flat[0] if result.size else ERRORS["#CALC!"]
+            c2, r2 = col, row
+        changed = False
+        if isinstance(result, np.ndarray):
+            for (i, j), value in np.ndenumerate(result):
+                changed |= self._write((sheet, col + j, row + i), _result(value))
+        else:
+            changed = self._write(cell, _result(result))
+        for c in range(col, old_c2 + 1):
+            for r in range(row, old_r2 + 1):
+                if c > c2 or r > r2:
+                    changed |= self._write((sheet, c, r), None)
+        if (c2, r2) == (old_c2, old_r2):
+            return changed, None
+        self.grid.spills[cell] = (c2, r2)
+        return changed, (sheet, col, row, max(c2, old_c2), max(r2, old_r2))
+
+    def _blocked(self, anchor, c2, r2, old_c2, old_r2):
+        """Whether a spill out to ``(c2, r2)`` would cover a formula or a value
+        it did not write itself."""
+        sheet, col, row = anchor
+        for c in range(col, c2 + 1):
+            for r in range(row, r2 + 1):
+                if (c, r) == (col, row):
+                    continue
+                if (sheet, c, r) in self.graph.formulas:
+                    return True
+                owner = self._spill_over((sheet, c, r)) if c > old_c2 or r > old_r2 else anchor
+                if owner not in (None, anchor) or (
+                        owner is None and self.grid.get(sheet, c, r) is not None):
+                    return True
+        return False
+
+
+# -- command line ----------------------------------------------------------------------
+
+_EDIT = re.compile(r"(?:(?P<sheet>'(?:[^']|'')+'|[^!=]+)!)(?P<ref>\$?[A-Z]{1,3}\$?\d+)=(?P<value>.*)",
+                   re.DOTALL)
+
+
+def parse_edit(text):
+    """``"Ledger!F10=125"`` as ``(("Ledger", "F10"), 125.0)``.
+
+    The value is a number, an ISO date, TRUE/FALSE, empty (a blank cell)
+    or else text.
+    """
+    m = _EDIT.fullmatch(text)
+    if not m:
+        raise ValueError(f"expected SHEET!CELL=VALUE, got {text!r}")
+    sheet = m.group("sheet")
+    if sheet.startswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+    value = m.group("value")
+    if value == "":
+        parsed = None
+    elif value.upper() in ("TRUE", "FALSE"):
+        parsed = value.upper() == "TRUE"
+    else:
+        try:
+            parsed = float(value)
+        except ValueError:
+            try:
+                parsed = datetime.date.fromisoformat(value)
+            except ValueError:
+                parsed = value
+    return (sheet, m.group("ref").replace("$", "")), parsed
+
+
+def _show(cells, limit, out):
+    for cell, value in sorted(cells.items())[:limit]:
+        print(f"  {cell_name(cell):<28} {value!r}", file=out)
+    if len(cells) > limit:
+        print(f"  ... and {len(cells) - limit:,} more", file=out)
+
+
+def check(calc, limit=20, out=sys.stdout):
+    """Recalculate everything and report values that differ from the stored
+    ones.  Returns the number of differing cells."""
+    result = calc.recalculate_all()
+    formulas = len(calc.graph.formulas)
+    print(f"{calc.path}: {formulas:,} formula cells recalculated in {result.seconds:.3f} s, "
+          f"{len(result.changed):,} values differ from the stored ones", file=out)
+    _show(result.changed, limit, out)
+    if calc.unsupported:
+        print(f"{len(calc.unsupported):,} formula cells could not be evaluated (shown as #NAME?):",
+              file=out)
+        _show(calc.unsupported, limit, out)
+    return len(result.changed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recalculate a logbook in Python after editing cells.")
+    parser.add_argument("workbook")
+    parser.add_argument("edits", nargs="*", metavar="SHEET!CELL=VALUE",
+                        help="cells to change, e.g. Ledger!F10=125 or 'Reports'!C4=Ahmed")
+    parser.add_argument("--today", type=datetime.date.fromisoformat,
+                        help="date TODAY() returns (default: today)")
+    parser.add_argument("--check", action="store_true",
+                        help="first recalculate everything and list values that differ "
+                             "from the workbook's stored results")
+    parser.add_argument("--show", type=int, default=20, metavar="N",
+                        help="changed cells to list (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    calc = Recalculator(args.workbook, args.today)
+    print(f"{args.workbook}: {len(calc.graph.formulas):,} formula cells loaded "
+          f"in {time.perf_counter() - start:.3f} s")
+    if args.check:
+        check(calc, args.show)
+    if args.edits:
+        result = calc.update(dict(parse_edit(edit) for edit in args.edits))
+        print(f"{result.dirty:,} formula cells dirty, {result.evaluated:,} re-evaluated, "
+              f"{len(result.changed):,} values changed in {result.seconds:.3f} s")
+        for sheet, count in result.by_sheet().items():
+            print(f"  {sheet}: {count:,} changed")
+        _show(result.changed, args.show, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Headless calculation of the Reports sheet.
+
+The sheet answers every question with its own SUMPRODUCT / SUMIF over the
+whole Ledger.  :func:`build_cubes` instead makes one pass over the Ledger
+into two dense arrays:
+
+* :class:`ReportCube` -- Total Paid and entry counts by recipient x
+  calendar year x payment type, which serves the person cards and the
+  breakdown by type;
+* :class:`FeeCube` -- Amount, Fees and entry counts by service x year,
+  which serves the fees-by-service table.
+
+Every Reports cell is then a lookup or a sum over a small slice.
+:class:`DetailIndex` groups Ledger positions by recipient once, so the
+transaction table for any person is a slice rather than a SMALL(IF(...))
+per row, and has no row cap; :func:`distinct_recipients` likewise lists
+every payee, where the sheet's person list is one slot per name.
+Text matching is case-insensitive, like the worksheet formulas.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import layout as L
+from .data import calendar_years, factorize, from_cents, to_cents
+
+NO_DATE = -1
+
+
+def _year_axis(ledger):
+    """Sorted calendar years of the Ledger and each row's position on that axis.
+
+    Undated rows go to one extra slot at the end of the axis.
+    """
+    years = calendar_years(ledger.dates)
+    axis = np.unique(years[years != NO_DATE])
+    pos = np.searchsorted(axis, years)
+    pos[years == NO_DATE] = len(axis)
+    return axis, pos
+
+
+def _lookup(labels):
+    return {str(label).casefold(): i for i, label in enumerate(labels)}
+
+
+def _year_slice(axis, year):
+    """Index into the year axis for the Reports year filter (C5)."""
+    if year is None or year == L.ALL_YEARS:
+        return slice(None)
+    i = np.searchsorted(axis, int(year))
+    if i < len(axis) and axis[i] == int(year):
+        return slice(i, i + 1)
+    return slice(0, 0)
+
+
+def distinct_recipients(ledger):
+    """Sorted distinct Given To names (case-insensitive, blanks dropped).
+
+    One hash pass over the Ledger, then a sort of the distinct names only --
+    the person list on Reports without its slot limit.
+    """
+    _, labels = factorize(ledger.recipients)
+    return sorted((name for name in labels if name != ""), key=lambda name: name.casefold())
+
+
+def unlisted_recipients(ledger, listed):
+    """:func:`distinct_recipients` that are not among ``listed`` (the
+    Settings Recipients), which the person list covers on its own."""
+    listed = {str(name).casefold() for name in listed}
+    return [name for name in distinct_recipients(ledger) if name.casefold() not in listed]
+
+
+@dataclass
+class PersonReport:
+    """The Reports cards and breakdown for one person and year filter."""
+
+    person: str
+    year: str
+    total: float            # F4, and the all-types total in F39
+    count: int              # I4
+    by_type: list           # [(type, total)] in the order asked for (rows 8-37)
+
+
+@dataclass
+class ReportCube:
+    recipients: list
+    years: np.ndarray
+    types: list
+    totals: np.ndarray      # (recipients, years + 1, types) sum of Total Paid, int64 cents
+    counts: np.ndarray      # (recipients, years + 1, types) number of entries
+
+    def __post_init__(self):
+        self._recipient = _lookup(self.recipients)
+        self._type = _lookup(self.types)
+
+    def year_totals(self, year=L.ALL_YEARS):
+        """``(totals, counts)`` of every recipient for the year filter:
+        ``(recipients, types)`` cents and ``(recipients,)`` entries."""
+        years = _year_slice(self.years, year)
+        return self.totals[:, years].sum(axis=1), self.counts[:, years].sum(axis=(1, 2))
+
+    def person_report(self, person, year=L.ALL_YEARS, types=L.DEFAULT_TYPES):
+        """Reproduce the Reports cards for ``person`` filtered to ``year``.
+
+        ``types`` are the Settings payment types in slot order.  Types that
+        never occur in the Ledger report 0.
+        """
+        r = self._recipient.get(str(person).casefold())
+        years = _year_slice(self.years, year)
+        if r is None:
+            totals = np.zeros(len(self.types))
+            count = 0
+        else:
+            totals = self.totals[r, years].sum(axis=0)
+            count = int(self.counts[r, years].sum())
+        by_type = []
+        for name in types:
+            t = self._type.get(str(name).casefold())
+            by_type.append((name, float(from_cents(totals[t])) if t is not None else 0.0))
+        return PersonReport(person, str(year), float(from_cents(totals.sum())), count, by_type)
+
+
+@dataclass
+class FeeCube:
+    services: list
+    years: np.ndarray
+    amounts: np.ndarray     # (services, years + 1) int64 cents
+    fees: np.ndarray        # (services, years + 1) int64 cents
+    counts: np.ndarray      # (services, years + 1)
+
+    def __post_init__(self):
+        self._service = _lookup(self.services)
+
+    def by_service(self, services=L.DEFAULT_SERVICES, year=L.ALL_YEARS):
+        """Rows of the fees table: ``(service, amount, fees, count)`` per service."""
+        years = _year_slice(self.years, year)
+        rows = []
+        for name in services:
+            s = self._service.get(str(name).casefold())
+            if s is None:
+                rows.append((name, 0.0, 0.0, 0))
+            else:
+                rows.append((name, float(from_cents(self.amounts[s, years].sum())),
+                             float(from_cents(self.fees[s, years].sum())),
+                             int(self.counts[s, years].sum())))
+        return rows
+
+
+def _cent_sums(flat, cents, size):
+    """Per-cell sums of int64 ``cents``.  ``bincount`` adds in float64, which is
+    exact for whole numbers below 2**53 cents (about 90 trillion dollars)."""
+    return np.bincount(flat, weights=cents, minlength=size).astype(np.int64)
+
+
+def build_cubes(ledger):
+    """Build the :class:`ReportCube` and :class:`FeeCube` in one pass over ``ledger``."""
+    recipient, recipients = factorize(ledger.recipients)
+    kind, types = factorize(ledger.types)
+    service, services = factorize(ledger.services)
+    axis, year = _year_axis(ledger)
+    n_years = len(axis) + 1
+
+    shape = (len(recipients), n_years, len(types))
+    flat = (recipient * n_years + year) * len(types) + kind
+    size = int(np.prod(shape))
+    report = ReportCube(
+        recipients, axis, types,
+        _cent_sums(flat, ledger.total_cents, size).reshape(shape),
+        np.bincount(flat, minlength=size).reshape(shape),
+    )
+
+    shape = (len(services), n_years)
+    flat = service * n_years + year
+    size = int(np.prod(shape))
+    fees = FeeCube(
+        services, axis,
+        _cent_sums(flat, to_cents(ledger.amounts), size).reshape(shape),
+        _cent_sums(flat, to_cents(ledger.fees), size).reshape(shape),
+        np.bincount(flat, minlength=size).reshape(shape),
+    )
+    return report, fees
+
+
+class DetailIndex:
+    """Ledger positions grouped by recipient, in Ledger order within each group."""
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        codes, labels = factorize(ledger.recipients)
+        self._recipient = _lookup(labels)
+        self._order = np.argsort(codes, kind="stable")
+        self._bounds = np.searchsorted(codes[self._order], np.arange(len(labels) + 1))
+        self._years = calendar_years(ledger.dates)
+
+    def positions(self, person, year=L.ALL_YEARS):
+        """0-based Ledger positions listed for ``person`` under the year filter."""
+        r = self._recipient.get(str(person).casefold())
+        if r is None or person == "":
+            return np.empty(0, dtype=np.int64)
+        rows = self._order[self._bounds[r]:self._bounds[r + 1]]
+        if year is None or year == L.ALL_YEARS:
+            return rows
+        return rows[self._years[rows] == int(year)]
+
+    def rows(self, person, year=L.ALL_YEARS):
+        """Yield the detail table: ``(#, date, type, service, given to, details,
+        amount, fees, total)`` per matching payment."""
+        ledger = self.ledger
+        totals = ledger.totals
+        for k, i in enumerate(self.positions(person, year).tolist(), 1):
+            date = ledger.dates[i]
+            yield (k, None if np.isnat(date) else date.item(), ledger.types[i], ledger.services[i],
+                   ledger.recipients[i], ledger.details[i], float(ledger.amounts[i]),
+                   float(ledger.fees[i]), float(totals[i]))
@@ -0,0 +1,222 @@
+"""Search the Ledger from Python instead of the C1 search box.
+
+The box highlights rows whose Type (B), Given To (D) or Details (E) contain
+the search text, case-insensitively (``SEARCH``), by testing every row.
+:class:`LedgerSearch` indexes each distinct value of those columns once:
+
+* a trigram index (trigram -> values containing it) narrows a substring
+  query to a few candidate values, which are then checked exactly;
+* a token index (word -> values containing it) answers whole-word queries
+  with set intersections alone;
+* a posting list per value maps matching values back to Ledger rows.
+
+Type and Given To have few distinct values, so a query touches a small
+part of the index and the rows come out as one concatenation of postings.
+Appending rows updates the postings and indexes any new values only.
+
+    python -m zakat_logbook.search Zakat-LogBook.xlsx "zakat"
+    python -m zakat_logbook.search Zakat-LogBook.xlsx --words "school fees"
+"""
+
+import argparse
+import re
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from . import layout as L
+from .data import to_text
+
+SEARCH_FIELDS = ("types", "recipients", "details")
+# Above this many matching values, rows are found by one vectorised lookup
+# over the per-row value codes instead of by concatenating posting lists.
+POSTINGS_LIMIT = 64
+_TOKEN = re.compile(r"\w+")
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def tokens(text):
+    return set(_TOKEN.findall(text))
+
+
+def _pattern(query):
+    """Regex for a SEARCH pattern: ``?`` and ``*`` are wildcards, ``~`` escapes."""
+    out, escaped = [], False
+    for ch in query:
+        if escaped:
+            out.append(re.escape(ch))
+            escaped = False
+        elif ch == "~":
+            escaped = True
+        elif ch == "*":
+            out.append(".*")
+        elif ch == "?":
+            out.append(".")
+        else:
+            out.append(re.escape(ch))
+    return re.compile("".join(out), re.DOTALL)
+
+
+def _literals(query):
+    """The literal runs of a SEARCH pattern (the text between wildcards)."""
+    return [part.replace("~", "") for part in re.split(r"(?<!~)[*?]", query) if part]
+
+
+class _Column:
+    """Distinct values of one searched column with their indexes."""
+
+    def __init__(self):
+        self.ids = {}           # value -> value id
+        self.folded = []        # value id -> case-folded value
+        self.postings = []      # value id -> array of 0-based Ledger positions
+        self.trigrams = {}      # trigram -> set of value ids
+        self.tokens = {}        # token -> set of value ids
+        self.codes = array("q")  # Ledger position -> value id
+
+    def add(self, values, start):
+        ids, postings, codes = self.ids, self.postings, self.codes
+        for position, value in enumerate(values, start):
+            vid = ids.get(value)
+            if vid is None:
+                vid = ids[value] = self._new_value(value)
+            postings[vid].append(position)
+            codes.append(vid)
+
+    def _new_value(self, value):
+        vid = len(self.folded)
+        folded = value.casefold()
+        self.folded.append(folded)
+        self.postings.append(array("q"))
+        for gram in trigrams(folded):
+            self.trigrams.setdefault(gram, set()).add(vid)
+        for token in tokens(folded):
+            self.tokens.setdefault(token, set()).add(vid)
+        return vid
+
+    def substring(self, query):
+        """Value ids whose text matches the SEARCH pattern ``query`` (case-folded)."""
+        wildcard = re.search(r"[*?~]", query) is not None
+        literals = _literals(query) if wildcard else [query]
+        candidates = None
+        for literal in literals:
+            for gram in trigrams(literal):
+                hits = self.trigrams.get(gram, set())
+                candidates = hits if candidates is None else candidates & hits
+                if not candidates:
+                    return set()
+        if candidates is None:
+            candidates = range(len(self.folded))
+        if wildcard:
+            match = _pattern(query).search
+            return {vid for vid in candidates if self.folded[vid] and match(self.folded[vid])}
+        return {vid for vid in candidates if query in self.folded[vid]}
+
+    def mark(self, vids, mask):
+        """Set ``mask`` at every Ledger position holding one of ``vids``."""
+        if len(vids) > POSTINGS_LIMIT:
+            hit = np.zeros(len(self.folded), dtype=bool)
+            hit[list(vids)] = True
+            mask |= hit[np.frombuffer(self.codes, dtype=np.int64)]
+        else:
+            for vid in vids:
+                mask[np.frombuffer(self.postings[vid], dtype=np.int64)] = True
+        return mask
+
+
+class LedgerSearch:
+    """Token and trigram indexes over Ledger columns B, D and E."""
+
+    def __init__(self, ledger=None):
+        self._columns = {name: _Column() for name in SEARCH_FIELDS}
+        self._n = 0
+        if ledger is not None:
+            self.append(ledger)
+
+    def __len__(self):
+        return self._n
+
+    def append(self, ledger):
+        """Index the rows of ``ledger`` as the next Ledger rows.
+
+        ``ledger`` is a :class:`~.data.Ledger` or any object with ``types``,
+        ``recipients`` and ``details`` sequences of equal length.
+        """
+        columns = [to_text(getattr(ledger, name)) for name in SEARCH_FIELDS]
+        n = len(columns[0])
+        if any(len(values) != n for values in columns):
+            raise ValueError("types, recipients and details must have the same length")
+        for name, values in zip(SEARCH_FIELDS, columns):
+            self._columns[name].add(values.tolist(), self._n)
+        self._n += n
+
+    def positions(self, query):
+        """0-based Ledger positions whose Type, Given To or Details contain
+        ``query`` (case-insensitive, ``*``/``?`` wildcards), sorted."""
+        query = str(query).casefold()
+        if not query:
+            return np.empty(0, dtype=np.int64)
+        mask = np.zeros(self._n, dtype=bool)
+        for column in self._columns.values():
+            column.mark(column.substring(query), mask)
+        return np.flatnonzero(mask)
+
+    def word_positions(self, text):
+        """0-based Ledger positions that contain every word of ``text``, each
+        in any of the three columns, sorted."""
+        words = sorted(tokens(str(text).casefold()))
+        if not words:
+            return np.empty(0, dtype=np.int64)
+        result = None
+        for word in words:
+            mask = np.zeros(self._n, dtype=bool)
+            for column in self._columns.values():
+                column.mark(column.tokens.get(word, ()), mask)
+            result = mask if result is None else result & mask
+        return np.flatnonzero(result)
+
+    def rows(self, query):
+        """Worksheet row numbers for :meth:`positions`."""
+        return self.positions(query) + L.LEDGER_FIRST_ROW
+
+    def word_rows(self, text):
+        """Worksheet row numbers for :meth:`word_positions`."""
+        return self.word_positions(text) + L.LEDGER_FIRST_ROW
+
+
+def main(argv=None):
+    from .reader import read_ledger
+
+    parser = argparse.ArgumentParser(
+        description="Find Ledger rows whose Type, Given To or Details match a query.")
+    parser.add_argument("workbook", help=".xlsx file to search")
+    parser.add_argument("query", nargs="+", help="text to look for")
+    parser.add_argument("--words", action="store_true",
+                        help="match whole words, in any order, instead of a substring")
+    parser.add_argument("--limit", type=int, default=50,
+                        help="row numbers to print (default 50, 0 for all)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = LedgerSearch(read_ledger(args.workbook))
+    loaded = time.perf_counter() - start
+    query = " ".join(args.query)
+    start = time.perf_counter()
+    rows = index.word_rows(query) if args.words else index.rows(query)
+    took = time.perf_counter() - start
+
+    shown = rows if args.limit == 0 else rows[:args.limit]
+    for row in shown.tolist():
+        print(row)
+    if len(shown) < len(rows):
+        print(f"... {len(rows) - len(shown):,} more", file=sys.stderr)
+    print(f"{len(rows):,} of {len(index):,} rows match {query!r} "
+          f"(indexed in {loaded:.1f}s, searched in {took * 1000:.1f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""Serve a logbook's figures from memory to local tools.
+
+Every tool that opens the workbook itself pays for unzipping and parsing
+it.  ``python -m zakat_logbook.server serve`` reads the Ledger, the Zakat
+Summary inputs and the Settings once, builds the indexes the queries need
+(:class:`Logbook`) and answers over HTTP, on a Unix-domain socket or on a
+localhost port.  Before each request the file's modification time and size
+are checked, and the logbook is read again only when they have changed; a
+file caught half-saved keeps the previous figures until the next request.
+
+Queries are ``GET`` requests answered with JSON:
+
+* ``/period?start=2024-01-01&end=2024-12-31&type=Zakat`` -- Total Paid by
+  payment type between two dates (inclusive; either may be left out, and
+  without ``type`` every type is listed);
+* ``/recipients?year=2024`` -- Total Paid per Given To name, largest first,
+  with the split by type; ``/recipient?name=...&year=...`` -- one person's
+  Reports cards;
+* ``/hawl?today=2025-03-01`` -- the Hawl Tracker: last Zakat date, next due
+  date, days remaining and status;
+* ``/balance`` -- Zakat Due, paid and outstanding balance per year, and the
+  dashboard's total outstanding;
+* ``/summary`` -- every Zakat Summary column per year;
+* ``/nisab`` -- the Nisab and Zakat Due of every year under each Nisab
+  standard (gold, silver, lower of the two) side by side, and the one
+  Settings chooses;
+* ``/status`` -- what is loaded, when, and the last reload error.
+
+    python -m zakat_logbook.server serve Zakat-LogBook.xlsx --socket /tmp/zakat.sock
+    curl --unix-socket /tmp/zakat.sock http://logbook/hawl
+    python -m zakat_logbook.server query --socket /tmp/zakat.sock "/period?start=2024-01-01"
+
+Needs the ``engine`` extra (``pip install .[engine]``).
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+import numpy as np
+
+from . import layout as L
+from .data import factorize, from_cents
+from .engine import compare_nisab_methods, compute_summary, hawl_countdown, zakat_mask
+from .reader import read_ledger, read_nisab_settings, read_settings_lists, read_year_inputs
+from .reports import build_cubes
+
+DEFAULT_PORT = 8754
+
+
+class QueryError(ValueError):
+    """A request with a missing or malformed parameter."""
+
+
+class PeriodIndex:
+    """Ledger Total Paid by payment type, sorted by date with running sums.
+
+    Rows are grouped by type (case-insensitive, as SUMIFS matches) and
+    sorted by date within each group, so the total of any type over any
+    date range is two binary searches.
+    """
+
+    def __init__(self, ledger):
+        dated = ~np.isnat(ledger.dates)
+        codes, self.types = factorize(ledger.types[dated])
+        dates = ledger.dates[dated]
+        order = np.lexsort((dates, codes))
+        self._dates = dates[order]
+        self._cumulative = np.concatenate(([0], np.cumsum(ledger.total_cents[dated][order])))
+        self._bounds = np.searchsorted(codes[order], np.arange(len(self.types) + 1))
+        self._type = {str(name).casefold(): i for i, name in enumerate(self.types)}
+
+    def totals(self, start=None, end=None, types=None):
+        """``{type: (Total Paid in cents, entries)}`` dated from ``start`` to
+        ``end`` inclusive (open-ended when None), for ``types`` (all when None)."""
+        if types is None:
+            wanted = [(name, i) for i, name in enumerate(self.types) if name != ""]
+        else:
+            wanted = [(name, self._type.get(str(name).casefold())) for name in types]
+        out = {}
+        for name, i in wanted:
+            if i is None:
+                out[name] = (0, 0)
+                continue
+            first, last = self._bounds[i], self._bounds[i + 1]
+            dates = self._dates[first:last]
+            lo = first + (np.searchsorted(dates, np.datetime64(start, "D")) if start else 0)
+            hi = first + (np.searchsorted(dates, np.datetime64(end, "D"), side="right")
+                          if end else len(dates))
+            hi = max(lo, hi)
+            out[name] = (int(self._cumulative[hi] - self._cumulative[lo]), int(hi - lo))
+        return out
+
+
+class Logbook:
+    """The figures of one workbook, read once and served from memory."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        start = time.perf_counter()
+        stat = os.stat(self.path)
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        self.ledger = read_ledger(self.path)
+        self.nisab_method, self.nisab_oz, self.silver_oz = read_nisab_settings(self.path)
+        self.payment_types = read_settings_lists(self.path)[0]
+        self.years = read_year_inputs(self.path)
+        self.summary = compute_summary(self.years, self.ledger, self.nisab_oz, self.silver_oz,
+                                       self.nisab_method)
+        self.cube, _ = build_cubes(self.ledger)
+        self.periods = PeriodIndex(self.ledger)
+        self.zakat_paid = int(self.ledger.total_cents[zakat_mask(self.ledger)].sum())
+        self.loaded_at = datetime.datetime.now().replace(microsecond=0)
+        self.load_seconds = time.perf_counter() - start
+
+    # -- queries ---------------------------------------------------------------------------
+
+    def period(self, start=None, end=None, types=None):
+        totals = self.periods.totals(start, end, types)
+        by_type = {name: float(from_cents(cents)) for name, (cents, _) in totals.items()}
+        return {"start": start, "end": end, "by_type": by_type,
+                "total": float(from_cents(sum(cents for cents, _ in totals.values()))),
+                "entries": sum(count for _, count in totals.values())}
+
+    def recipients(self, year=L.ALL_YEARS):
+        cube = self.cube
+        totals, counts = cube.year_totals(year)             # (recipients, types), cents
+        rows = []
+        for r in np.argsort(-totals.sum(axis=1), kind="stable").tolist():
+            name = cube.recipients[r]
+            if name == "" or not counts[r]:
+                continue
+            rows.append({"name": name, "total": float(from_cents(totals[r].sum())),
+                         "entries": int(counts[r]),
+                         "by_type": {t: float(from_cents(totals[r, i]))
+                                     for i, t in enumerate(cube.types) if totals[r, i]}})
+        return {"year": str(year), "recipients": rows}
+
+    def recipient(self, name, year=L.ALL_YEARS):
+        report = self.cube.person_report(name, year, self.payment_types or L.DEFAULT_TYPES)
+        return {"name": report.person, "year": report.year, "total": report.total,
+                "entries": report.count, "by_type": dict(report.by_type)}
+
+    def hawl(self, today=None):
+        today = today or datetime.date.today()
+        hawl = hawl_countdown(self.summary.dates, today)
+        if hawl is None:
+            return {"last_zakat_date": None, "next_due": None, "days_remaining": None,
+                    "status": None, "today": today}
+        last, due, left, status = hawl
+        return {"last_zakat_date": last, "next_due": due, "days_remaining": left,
+                "status": status, "today": today}
+
+    def balance(self):
+        summary = self.summary
+        years = [{"date": row["dates"], "zakat_due": row["zakat_due"], "paid": row["paid"],
+                  "balance": row["balance"], "status": row["status"]}
+                 for row in summary.rows() if row["dates"] is not None]
+        # The dashboard's Outstanding card: Zakat owed over all years less
+        # every Zakat-type Ledger entry, dated or not.
+        due = np.nan_to_num(summary.zakat_due, nan=0.0)
+        owed = float(due[due > 0].sum())
+        paid = float(from_cents(self.zakat_paid))
+        return {"owed": owed, "paid": paid, "outstanding": round(owed - paid, 2), "years": years}
+
+    def summary_rows(self):
+        return {"years": list(self.summary.rows())}
+
+    def nisab(self):
+        methods = compare_nisab_methods(self.years, self.nisab_oz, self.silver_oz)
+        dated = np.flatnonzero(~np.isnat(self.years.dates)).tolist()
+        years = [{"date": self.years.dates[i].item(),
+                  "net_assets": float(self.summary.net_assets[i]),
+                  **{method: {"nisab": float(nisab[i]), "zakat_due": float(due[i])}
+                     for method, (nisab, due) in methods.items()}}
+                 for i in dated]
+        return {"method": self.nisab_method, "years": years}
+
+    def status(self):
+        return {"path": self.path, "loaded_at": self.loaded_at,
+                "load_seconds": round(self.load_seconds, 3), "ledger_rows": len(self.ledger),
+                "years": int((~np.isnat(self.summary.dates)).sum())}
+
+
+class LogbookCache:
+    """The current :class:`Logbook` of ``path``, read again when the file changes."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._logbook = Logbook(self.path)
+        self.reloads = 0
+        self.error = None
+
+    def current(self):
+        """The logbook, reloaded first if the file's mtime or size changed.
+
+        A reload that fails (the file is being written, say) keeps the
+        previous logbook and is retried on the next call.
+        """
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError as exc:
+            self.error = str(exc)
+            return self._logbook
+        if signature != self._logbook.signature:
+            with self._lock:
+                if signature != self._logbook.signature:
+                    try:
+                        self._logbook = Logbook(self.path)
+                        self.reloads += 1
+                        self.error = None
+                    except Exception as exc:    # keep serving the last good copy
+                        self.error = f"{type(exc).__name__}: {exc}"
+        return self._logbook
+
+
+# -- HTTP ---------------------------------------------------------------------------------
+
+def _date_param(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise QueryError(f"{name} must be a date (YYYY-MM-DD), got {value!r}") from None
+
+
+def _year_param(params):
+    value = params.get("year", L.ALL_YEARS)
+    if value == L.ALL_YEARS:
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"year must be a year or {L.ALL_YEARS!r}, got {value!r}") from None
+
+
+def answer(cache, target):
+    """``(HTTP status, JSON-able body)`` for a request ``target`` ("/hawl?...")."""
+    url = urlsplit(target)
+    params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    route = url.path.rstrip("/") or "/"
+    logbook = cache.current()
+    try:
+        if route == "/period":
+            types = params["type"].split(",") if params.get("type") else None
+            return 200, logbook.period(_date_param(params, "start"), _date_param(params, "end"),
+                                       types)
+        if route == "/recipients":
+            return 200, logbook.recipients(_year_param(params))
+        if route == "/recipient":
+            if not params.get("name"):
+                raise QueryError("name is required")
+            return 200, logbook.recipient(params["name"], _year_param(params))
+        if route == "/hawl":
+            return 200, logbook.hawl(_date_param(params, "today"))
+        if route == "/balance":
+            return 200, logbook.balance()
+        if route == "/summary":
+            return 200, logbook.summary_rows()
+        if route == "/nisab":
+            return 200, logbook.nisab()
+        if route in ("/", "/status"):
+            return 200, dict(logbook.status(), reloads=cache.reloads, error=cache.error)
+    except QueryError as exc:
+        return 400, {"error": str(exc)}
+    return 404, {"error": f"no such query: {url.path}"}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"cannot serialise {type(value).__name__}")
+
+
+def _clean(value):
+    """``value`` with NaN floats as None, which JSON can carry."""
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, dict):
+        return {key: _clean(v) for key, v in value.items()}
+    if isinstance(value, list):
+        return [_clean(v) for v in value]
+    return value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "zakat-logbook"
+    quiet = False
+
+    def do_GET(self):
+        status, body = answer(self.server.cache, self.path)
+        payload = json.dumps(_clean(body), default=_json_default, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def address_string(self):
+        # Unix-socket peers have no address.
+        return self.client_address[0] if self.client_address else "local"
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(path, socket_path=None, port=DEFAULT_PORT, quiet=False):
+    """An HTTP server for the logbook at ``path``, on the Unix socket
+    ``socket_path`` or else on ``127.0.0.1:port``."""
+    cache = LogbookCache(path)
+    handler = type("Handler", (_Handler,), {"quiet": quiet})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, handler)
+        os.chmod(socket_path, 0o600)        # the figures are the owner's business
+    else:
+        server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        server.daemon_threads = True
+    server.cache = cache
+    return server
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=10):
+        super().__init__("logbook", timeout=timeout)
+        self._socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._socket_path)
+
+
+def query(target, socket_path=None, port=DEFAULT_PORT):
+    """Ask a running server for ``target`` ("/hawl"); returns the decoded JSON.
+
+    Raises :class:`QueryError` for a rejected query.
+    """
+    connection = (_UnixConnection(socket_path) if socket_path
+                  else http.client.HTTPConnection("127.0.0.1", port, timeout=10))
+    try:
+        connection.request("GET", quote(target, safe="/?&=,:%+"))
+        response = connection.getresponse()
+        body = json.loads(response.read().decode("utf-8"))
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise QueryError(body.get("error", f"HTTP {response.status}"))
+    return body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve a logbook's totals, balances and Hawl countdown from memory.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="load a workbook and answer queries")
+    serve.add_argument("workbook")
+    ask = commands.add_parser("query", help="send one query to a running server")
+    ask.add_argument("target", help='e.g. /hawl or "/period?start=2024-01-01&type=Zakat"')
+    for command in (serve, ask):
+        where = command.add_mutually_exclusive_group()
+        where.add_argument("--socket", metavar="PATH", help="Unix-domain socket to use")
+        where.add_argument("--port", type=int, default=DEFAULT_PORT,
+                           help="localhost port, without --socket (default: %(default)s)")
+    serve.add_argument("--quiet", action="store_true", help="do not log requests")
+    args = parser.parse_args(argv)
+
+    if args.command == "query":
+        try:
+            body = query(args.target, args.socket, args.port)
+        except (OSError, QueryError) as exc:
+            raise SystemExit(f"{args.target}: {exc}") from None
+        print(json.dumps(body, indent=2, ensure_ascii=False))
+        return
+
+    server = make_server(args.workbook, args.socket, args.port, args.quiet)
+    logbook = server.cache.current()
+    where = args.socket or f"http://127.0.0.1:{args.port}"
+    print(f"{args.workbook}: {len(logbook.ledger):,} Ledger rows loaded in "
+          f"{logbook.load_seconds:.3f} s, serving on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
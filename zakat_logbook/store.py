@@ -0,0 +1,245 @@
+"""SQLite store for Ledger entries.
+
+The workbook answers every question with a formula that scans the whole
+Ledger.  :class:`LedgerStore` keeps the entries (Ledger columns A-G) in a
+SQLite table instead, with covering indexes on (Type, Date), (Given To,
+Date) and (Service, Date).  The Summary period totals, the Reports cards
+and the fees-by-service table are then index range queries, and the
+``.xlsx`` becomes an export of the store.
+
+Text columns use SQLite's ``NOCASE`` collation so ``=`` matches the way
+SUMIF criteria do (SQLite folds ASCII letters only).  Dates are stored as
+ISO ``YYYY-MM-DD`` text, ``NULL`` when blank.
+
+    python -m zakat_logbook.store load Zakat-LogBook.xlsx ledger.db
+    python -m zakat_logbook.store export ledger.db -o Zakat-LogBook.xlsx
+"""
+
+import argparse
+import datetime
+import sqlite3
+
+import numpy as np
+
+from . import layout as L
+from .data import Ledger, to_dates
+from .reports import PersonReport
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger (
+    id       INTEGER PRIMARY KEY,
+    date     TEXT,
+    type     TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    service  TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    given_to TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    details  TEXT NOT NULL DEFAULT '',
+    amount   REAL NOT NULL DEFAULT 0,
+    fees     REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ledger_type_date ON ledger (type, date, amount, fees);
+CREATE INDEX IF NOT EXISTS ledger_given_to_date ON ledger (given_to, date, type, amount, fees);
+CREATE INDEX IF NOT EXISTS ledger_service_date ON ledger (service, date, amount, fees);
+CREATE TABLE IF NOT EXISTS imported (hash BLOB PRIMARY KEY) WITHOUT ROWID;
+"""
+
+COLUMNS = ("date", "type", "service", "given_to", "details", "amount", "fees")
+ZAKAT_TYPE = "Zakat"
+
+
+def _iso_dates(dates):
+    """ISO date strings for ``dates``, ``None`` where blank."""
+    dates = to_dates(dates)
+    iso = np.datetime_as_string(dates, unit="D").astype(object)
+    iso[np.isnat(dates)] = None
+    return iso.tolist()
+
+
+def _year_filter(year):
+    """SQL condition and parameters for the Reports year filter (C5)."""
+    if year is None or year == L.ALL_YEARS:
+        return "", ()
+    year = int(year)
+    return " AND date >= ? AND date < ?", (f"{year:04d}-01-01", f"{year + 1:04d}-01-01")
+
+
+class LedgerStore:
+    """Ledger entries in a SQLite database at ``path`` (``":memory:"`` works)."""
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT count(*) FROM ledger").fetchone()[0]
+
+    # -- writing -------------------------------------------------------------------
+
+    def add(self, rows):
+        """Append ``(date, type, service, given_to, details, amount, fees)`` tuples."""
+        return self.add_ledger(Ledger.from_rows(rows))
+
+    def add_ledger(self, ledger):
+        """Append the entries of a :class:`~.data.Ledger`; blank rows are skipped.
+
+        Returns the number of entries added.
+        """
+        keep = ~(np.isnat(ledger.dates) & (ledger.types == "") & (ledger.services == "")
+                 & (ledger.recipients == "") & (ledger.details == "")
+                 & (ledger.amounts == 0) & (ledger.fees == 0))
+        columns = (_iso_dates(ledger.dates[keep]), ledger.types[keep].tolist(),
+                   ledger.services[keep].tolist(), ledger.recipients[keep].tolist(),
+                   ledger.details[keep].tolist(), ledger.amounts[keep].tolist(),
+                   ledger.fees[keep].tolist())
+        with self.db:
+            self._insert(zip(*columns))
+        return int(keep.sum())
+
+    def add_unique(self, rows, keys):
+        """Append the rows whose key has not been added before.
+
+        ``rows`` are ``(ISO date, type, service, given_to, details, amount,
+        fees)`` tuples and ``keys`` one content hash (bytes) per row.  The
+        keys are kept in the database, so re-importing the same data adds
+        nothing.  Returns the number of rows added.
+        """
+        fresh = []
+        with self.db:
+            for row, key in zip(rows, keys):
+                if self.db.execute("INSERT OR IGNORE INTO imported (hash) VALUES (?)",
+                                   (key,)).rowcount:
+                    fresh.append(row)
+            self._insert(fresh)
+        return len(fresh)
+
+    def _insert(self, rows):
+        self.db.executemany(f"INSERT INTO ledger ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            rows)
+
+    # -- reading -------------------------------------------------------------------
+
+    def to_ledger(self):
+        """All entries, in the order they were added, as a :class:`~.data.Ledger`."""
+        rows = self.db.execute(f"SELECT {', '.join(COLUMNS)} FROM ledger ORDER BY id").fetchall()
+        if not rows:
+            return Ledger.empty()
+        dates, *rest = zip(*rows)
+        return Ledger(np.array(dates, dtype="datetime64[D]"), *rest)
+
+    def export(self, path, options=None):
+        """Write the store out as a logbook workbook (see :func:`~.generator.generate`)."""
+        from .generator import generate
+
+        return generate(path, options, self.to_ledger())
+
+    # -- Zakat Summary ---------------------------------------------------------------
+
+    def paid_through(self, date):
+        """Total Paid of Zakat entries dated on or before ``date`` (ISO text)."""
+        return self.db.execute(
+            "SELECT total(amount + fees) FROM ledger WHERE type = ? AND date <= ?",
+            (ZAKAT_TYPE, date)).fetchone()[0]
+
+    def paid_per_period(self, dates):
+        """Zakat Summary column K for ``dates``, one index range sum per year.
+
+        Same windows as :func:`~.engine.paid_per_period`: the first row takes
+        everything up to its date, later rows the dates after the previous
+        row's; a blank previous date gives 0 and a blank date ``None``.
+        """
+        iso = _iso_dates(dates)
+        paid = []
+        for i, date in enumerate(iso):
+            if date is None:
+                paid.append(None)
+            elif i == 0:
+                paid.append(self.paid_through(date))
+            elif iso[i - 1] is None:
+                paid.append(0.0)
+            else:
+                paid.append(self.db.execute(
+                    "SELECT total(amount + fees) FROM ledger WHERE type = ? AND date > ? AND date <= ?",
+                    (ZAKAT_TYPE, iso[i - 1], date)).fetchone()[0])
+        return paid
+
+    # -- Reports ---------------------------------------------------------------------
+
+    def person_report(self, person, year=L.ALL_YEARS, types=L.DEFAULT_TYPES):
+        """The Reports cards for ``person`` and ``year``, as
+        :meth:`~.reports.ReportCube.person_report` returns them."""
+        where, params = _year_filter(year)
+        found = {}
+        for kind, total, count in self.db.execute(
+                "SELECT type, total(amount + fees), count(*) FROM ledger "
+                f"WHERE given_to = ?{where} GROUP BY type", (str(person), *params)):
+            found[kind.casefold()] = (total, count)
+        by_type = [(name, found.get(str(name).casefold(), (0.0, 0))[0]) for name in types]
+        return PersonReport(person, str(year), sum(t for t, _ in found.values()),
+                            sum(c for _, c in found.values()), by_type)
+
+    def distinct_recipients(self):
+        """Sorted distinct Given To names, first spelling of each, blanks dropped."""
+        return [name for name, in self.db.execute(
+            "SELECT given_to FROM ledger WHERE id IN "
+            "(SELECT min(id) FROM ledger WHERE given_to <> '' GROUP BY given_to) "
+            "ORDER BY given_to")]
+
+    def detail_rows(self, person, year=L.ALL_YEARS):
+        """Yield the transaction table for ``person``: ``(#, date, type, service,
+        given to, details, amount, fees, total)`` in Ledger order."""
+        if person == "":
+            return
+        where, params = _year_filter(year)
+        rows = self.db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM ledger WHERE given_to = ?{where} ORDER BY id",
+            (str(person), *params))
+        for k, (date, *rest, amount, fees) in enumerate(rows, 1):
+            date = datetime.date.fromisoformat(date) if date else None
+            yield (k, date, *rest, amount, fees, amount + fees)
+
+    def by_service(self, services=L.DEFAULT_SERVICES, year=L.ALL_YEARS):
+        """Rows of the fees table: ``(service, amount, fees, count)`` per service."""
+        where, params = _year_filter(year)
+        found = {}
+        for service, amount, fees, count in self.db.execute(
+                "SELECT service, total(amount), total(fees), count(*) FROM ledger "
+                f"WHERE service IN ({', '.join('?' * len(services))}){where} GROUP BY service",
+                (*map(str, services), *params)):
+            found[service.casefold()] = (amount, fees, count)
+        return [(name, *found.get(str(name).casefold(), (0.0, 0.0, 0))) for name in services]
+
+
+def main(argv=None):
+    from .reader import read_ledger
+
+    parser = argparse.ArgumentParser(description="Keep Ledger entries in a SQLite database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="append the Ledger of a workbook to a database")
+    load.add_argument("workbook")
+    load.add_argument("database")
+    export = commands.add_parser("export", help="write a workbook from a database")
+    export.add_argument("database")
+    export.add_argument("-o", "--output", default="Zakat-LogBook.xlsx",
+                        help="workbook to write (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    with LedgerStore(args.database) as store:
+        if args.command == "load":
+            added = store.add_ledger(read_ledger(args.workbook))
+            print(f"{args.database}: added {added:,} entries ({len(store):,} in total)")
+        else:
+            store.export(args.output)
+            print(f"{args.output}: exported {len(store):,} entries")
+
+
+if __name__ == "__main__":
+    main()
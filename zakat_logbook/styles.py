@@ -0,0 +1,179 @@
+"""Named cell styles for the generated workbook.
+
+The colour coding follows the legend on the Guide sheet: blue text for
+manual inputs, green for calculated or linked values, red for debts,
+purple for report totals, orange for Zakat due and gold for Nisab cells.
+"""
+
+from .xlsx import Dxf, Font, Style
+
+# Palette
+NAVY = "1F4E79"
+BLUE = "2E75B6"
+STEEL = "3D5A80"
+SKY = "2471A3"
+WHITE = "FFFFFF"
+BLACK = "000000"
+INPUT_BLUE = "0000FF"
+CALC_GREEN = "008000"
+DEBT_RED = "C0392B"
+REPORT_PURPLE = "6C3483"
+DUE_ORANGE = "E67E22"
+NISAB_GOLD = "7D6608"
+GREY = "888888"
+MUTED = "AAAAAA"
+
+INPUT_BG = "EBF5FB"
+CALC_BG = "D5F5E3"
+DEBT_BG = "FADBD8"
+NISAB_BG = "FEF9E7"
+DUE_BG = "FDEBD0"
+BALANCE_BG = "F4ECF7"
+NOTE_BG = "F0F4F8"
+STATUS_BG = "F8F9FA"
+PERSON_BG = "E8F8F5"
+PRICE_BG = "FFFDE7"
+BAND_BG = "F2F3F4"
+
+CURRENCY = '\\$#,##0.00;\\(\\$#,##0.00\\);"-"'
+DOLLARS = "\\$#,##0.00"
+DATE = "mm/dd/yyyy"
+OUNCES = "0.0000"
+DAYS = '0\\ "days"'
+
+
+def _font(size=10, color=BLACK, bold=False, italic=False):
+    return Font(size=size, color=color, bold=bold, italic=italic)
+
+
+def _header(fill, size=9, color=WHITE, bold=True, italic=False):
+    return Style(_font(size, color, bold, italic), fill, align="center", wrap=True)
+
+
+def _card(color, fill, num_fmt=CURRENCY, size=14):
+    return Style(_font(size, color, bold=True), fill, num_fmt, align="center", border="medium")
+
+
+STYLES = {
+    # Banners and headers
+    "title": _header(NAVY, size=14),
+    "sheet_title": _header(NAVY, size=13),
+    "section": _header(NAVY, size=11),
+    "subsection": _header(NAVY, size=10),
+    "band": _header(BLUE, size=10),
+    "header": _header(NAVY),
+    "header_blue": _header(BLUE),
+    "header_steel": _header(STEEL),
+    "header_brown": _header("7D3C02"),
+    "header_red": _header(DEBT_RED),
+    "header_purple": _header("4A235A", size=10),
+    "hint": _header(SKY, size=8, italic=True, bold=False),
+    "subtitle": Style(_font(9, "444444", italic=True), NOTE_BG, align="center", wrap=True),
+    "subtitle_plain": Style(_font(9, "444444", italic=True), WHITE, align="center", wrap=True),
+    "footnote": Style(_font(9, GREY, italic=True), WHITE, align="center", wrap=True),
+    "caption": Style(_font(9, "555555", italic=True), STATUS_BG, align="left"),
+    "label": Style(_font(9, BLACK, bold=True), NOTE_BG, align="left"),
+    "note": Style(_font(8, "555555"), NOTE_BG, align="left", wrap=True),
+    "note_wide": Style(_font(9, "333333"), NOTE_BG, align="left", wrap=True),
+    "legend": Style(_font(9, "444444"), NOTE_BG, align="left"),
+    "slot_hint": Style(_font(8, MUTED, italic=True), WHITE, align="left"),
+    "helper": Style(_font(7, MUTED), WHITE, align="center"),
+    # Guide
+    "guide_term": Style(_font(9, BLACK, bold=True), INPUT_BG, align="left"),
+    "guide_text": Style(_font(9, BLACK), WHITE, align="left", wrap=True),
+    "guide_nisab": Style(_font(9, BLACK, bold=True), "E8DAEF", align="left"),
+    # Inputs
+    "input_date": Style(_font(10, INPUT_BLUE), INPUT_BG, DATE, align="center"),
+    "input_money": Style(_font(10, INPUT_BLUE), INPUT_BG, CURRENCY, align="right"),
+    "input_money_band": Style(_font(10, INPUT_BLUE), NOTE_BG, CURRENCY, align="right"),
+    "input_debt": Style(_font(10, DEBT_RED), DEBT_BG, CURRENCY, align="right"),
+    "input_oz": Style(_font(10, INPUT_BLUE), INPUT_BG, OUNCES, align="right"),
+    "input_list": Style(_font(10, INPUT_BLUE, bold=True), INPUT_BG, align="left"),
+    "input_nisab": Style(_font(11, INPUT_BLUE, bold=True), NISAB_BG, align="center", border="medium"),
+    "input_nisab_oz": Style(_font(11, INPUT_BLUE, bold=True), NISAB_BG, OUNCES, align="center", border="medium"),
+    "input_price": Style(_font(13, INPUT_BLUE, bold=True), PRICE_BG, DOLLARS, align="center", border="medium"),
+    "input_price_small": Style(_font(11, INPUT_BLUE, bold=True), PRICE_BG, DOLLARS, align="center", border="medium"),
+    "input_person": Style(_font(12, INPUT_BLUE, bold=True), PERSON_BG, align="center", border="medium"),
+    "input_year": Style(_font(11, INPUT_BLUE, bold=True), PERSON_BG, align="center", border="medium"),
+    "search": Style(_font(10, INPUT_BLUE, bold=True), PRICE_BG, align="left", border="medium"),
+    "search_label": Style(_font(10, WHITE, bold=True), BLUE, align="right"),
+    "search_count": Style(_font(9, CALC_GREEN, bold=True), CALC_BG, align="center"),
+    # Calculated
+    "calc_money": Style(_font(10, CALC_GREEN), CALC_BG, CURRENCY, align="right"),
+    "calc_money_bold": Style(_font(10, CALC_GREEN, bold=True), CALC_BG, CURRENCY, align="right"),
+    "calc_total": Style(_font(10, CALC_GREEN, bold=True), CALC_BG, CURRENCY, align="right", border="medium"),
+    "paid_money": Style(_font(10, INPUT_BLUE), INPUT_BG, CURRENCY, align="right"),
+    "nisab_money": Style(_font(10, NISAB_GOLD), NISAB_BG, CURRENCY, align="right"),
+    "due_money": Style(_font(10, DUE_ORANGE, bold=True), DUE_BG, CURRENCY, align="right"),
+    "balance_money": Style(_font(10, REPORT_PURPLE, bold=True), BALANCE_BG, CURRENCY, align="right"),
+    "forward_money": Style(_font(10, BLACK, bold=True), NISAB_BG, CURRENCY, align="right"),
+    "status": Style(_font(10, BLACK, bold=True), STATUS_BG, align="center"),
+    "hijri_date": Style(_font(10, CALC_GREEN), CALC_BG, align="center"),
+    "nisab_today": Style(_font(13, CALC_GREEN, bold=True), CALC_BG, CURRENCY, align="center", border="medium"),
+    "nisab_silver": Style(_font(9, "666666", italic=True), NOTE_BG, align="center"),
+    # Dashboard cards
+    "card_owed": _card(DUE_ORANGE, DUE_BG),
+    "card_paid": _card(CALC_GREEN, CALC_BG),
+    "card_sadaqah": _card(INPUT_BLUE, INPUT_BG),
+    "card_fitrana": _card(REPORT_PURPLE, BALANCE_BG),
+    "card_qurbani": _card(NISAB_GOLD, NISAB_BG),
+    "card_outstanding": _card(DEBT_RED, DEBT_BG),
+    # Hawl tracker
+    "hawl_last": Style(_font(11, INPUT_BLUE, bold=True), INPUT_BG, DATE, align="center"),
+    "hawl_next": Style(_font(11, REPORT_PURPLE, bold=True), BALANCE_BG, DATE, align="center"),
+    "hawl_days": Style(_font(11, BLACK, bold=True), NISAB_BG, DAYS, align="center"),
+    "hawl_status": Style(_font(11, BLACK, bold=True), STATUS_BG, align="center"),
+    "hawl_today": Style(_font(11, GREY, bold=True), BAND_BG, DATE, align="center"),
+    # Ledger
+    "ledger_date": Style(_font(9, INPUT_BLUE), INPUT_BG, DATE, align="center"),
+    "ledger_text": Style(_font(9, BLACK), "E8DCF5", align="left"),
+    "ledger_text_band": Style(_font(9, BLACK), "F0EAF8", align="left"),
+    "ledger_money": Style(_font(9, INPUT_BLUE), INPUT_BG, CURRENCY, align="right"),
+    "ledger_total": Style(_font(9, CALC_GREEN, bold=True), CALC_BG, CURRENCY, align="right"),
+    "ledger_running": Style(_font(9, REPORT_PURPLE, bold=True), "E8DCF5", CURRENCY, align="right"),
+    "ledger_running_band": Style(_font(9, REPORT_PURPLE, bold=True), "F0EAF8", CURRENCY, align="right"),
+    "ledger_hijri": Style(_font(9, CALC_GREEN), CALC_BG, align="center"),
+    # Reports
+    "report_card": Style(_font(12, CALC_GREEN, bold=True), CALC_BG, CURRENCY, align="center", border="medium"),
+    "report_count": Style(_font(12, REPORT_PURPLE, bold=True), BALANCE_BG, align="center", border="medium"),
+    "report_type": Style(_font(9, BLACK, bold=True), NOTE_BG, align="left"),
+    "report_type_money": Style(_font(9, CALC_GREEN), NOTE_BG, CURRENCY, align="right"),
+    "detail_index": Style(_font(8, MUTED), STATUS_BG, align="center"),
+    "detail_date": Style(_font(9, BLACK), STATUS_BG, DATE, align="left"),
+    "detail_text": Style(_font(9, BLACK), STATUS_BG, align="left"),
+    "detail_money": Style(_font(9, CALC_GREEN), STATUS_BG, CURRENCY, align="left"),
+    "detail_index_band": Style(_font(8, MUTED), WHITE, align="center"),
+    "detail_date_band": Style(_font(9, BLACK), WHITE, DATE, align="left"),
+    "detail_text_band": Style(_font(9, BLACK), WHITE, align="left"),
+    "detail_money_band": Style(_font(9, CALC_GREEN), WHITE, CURRENCY, align="left"),
+    "fee_service": Style(_font(9, BLACK, bold=True), STATUS_BG, align="left"),
+    "fee_amount": Style(_font(9, CALC_GREEN), STATUS_BG, CURRENCY, align="right"),
+    "fee_fees": Style(_font(9, DEBT_RED), STATUS_BG, CURRENCY, align="right"),
+    "fee_count": Style(_font(9, REPORT_PURPLE), STATUS_BG, align="center"),
+    # Hijri (hidden month table)
+    "hijri_start": Style(_font(9, BLACK), WHITE, DATE, align="center"),
+    "hijri_month": Style(_font(9, BLACK), WHITE, align="left"),
+}
+
+# Guide colour legend swatches: (label fill, description fill)
+LEGEND_FILLS = [
+    ("DBEAFE", "EFF6FF"),
+    ("D1FAE5", "ECFDF5"),
+    ("FEE2E2", "FFF5F5"),
+    ("EDE9FE", "F5F3FF"),
+    ("FFEDD5", "FFF7ED"),
+    ("FEF9C3", "FEFCE8"),
+    ("FEF9E7", "FFFDF0"),
+    ("FDEBD0", "FFFBF5"),
+    ("FADBD8", "FFF5F5"),
+]
+for _i, (_label, _desc) in enumerate(LEGEND_FILLS):
+    STYLES[f"legend_label_{_i}"] = Style(_font(9, BLACK, bold=True), _label, align="left")
+    STYLES[f"legend_text_{_i}"] = Style(_font(9, BLACK), _desc, align="left", wrap=True)
+
+# Conditional formats
+SEARCH_HIT = Dxf("1A1A1A", "FFF176")
+WARN_RED = Dxf(DEBT_RED, DEBT_BG)
+WARN_ORANGE = Dxf(DUE_ORANGE, DUE_BG)
+OK_GREEN = Dxf(CALC_GREEN, CALC_BG)
+DUPLICATE = Dxf(DEBT_RED, "FFCCCC")
@@ -0,0 +1,75 @@
+"""The Umm al-Qura month table.
+
+Umm al-Qura is the calendar of Saudi Arabia, by which most Zakat guidance
+counts the lunar year.  Its months begin by astronomical criteria, not by
+a rule, so the month lengths are data: these are the published lengths
+for 1343-1500 AH (1 August 1924 to 16 November 2077).
+
+This module is plain Python so the workbook generator can write the table
+into the hidden Hijri sheet without NumPy; :mod:`zakat_logbook.hijri`
+converts dates in bulk from the same table.
+"""
+
+import datetime
+from itertools import accumulate
+
+FIRST_YEAR = 1343
+LAST_YEAR = 1500
+FIRST_DATE = datetime.date(1924, 8, 1)     # 1 Muharram 1343
+
+MONTH_NAMES = (
+    "Muharram", "Safar", "Rabi' al-Awwal", "Rabi' al-Thani", "Jumada al-Awwal",
+    "Jumada al-Thani", "Rajab", "Sha'ban", "Ramadan", "Shawwal", "Dhu al-Qi'dah",
+    "Dhu al-Hijjah",
+)
+
+# Month lengths of each year from 1343, one group of twelve per year, as
+# the last digit of the length: 9 = 29 days, 0 = 30.  A few years before
+# 1365 have 28 (8) and 31 (1) day months, as published.
+_LENGTHS = """
+    090090008000 990909090909 090919080090 990090099009 990090090099 090909009918
+    090909000810 909099090090 090909990090 090909090909 090090900990 909090090909
+    090909090090 990909009909 090909090900 009099099009 000909909909 090909090900
+    090909090909 090909090909 090909090900 090909080009 090909090900 090909090909
+    090909090909 090909090900 090909009009 090909090909 090990909000 909090990900
+    909090909090 090909009900 090909099009 909900090909 099090900900 090909090909
+    909090909090 090909090909 090090990909 090090099090 909009090909 090909090909
+    090099090009 009909090900 990909090900 900909090909 090909090900 090909009099
+    090909090900 990909090900 090999090900 090909099009 090090990909 090009099090
+    909009090909 090909009090 909090909009 009099090900 909090990909 000909099090
+    900090909909 900900090990 990090090909 090909090090 909090909090 090909099090
+    090090909909 090009090990 909009009099 099009000909 909900900900 990990900090
+    909099090090 090909099090 090900909099 090900090909 909090090090 909909000090
+    990999000090 099099900090 090909909090 090090990909 090090900909 909090090090
+    990909009009 099099000900 909909900900 900990909090 900909090990 900090909099
+    090090090909 909090090099 090909090090 909090909090 090099090990 090009909909
+    090009090990 909000909099 090900900909 909090900909 090909090900 909009909090
+    900090990990 900090099099 090009090909 909009009090 990909009009 090990909009
+    009099090909 000909909090 900099090909 900090909090 990090900909 099090900090
+    909909900900 090990990090 009099099009 009090909900 909009090909 090909090090
+    909909009009 090990909000 909099099000 090909909090 090090990909 090090909090
+    990090090099 099009090009 909909009009 090909909009 090090990909 009009099090
+    909000909909 909000900990 990900900099 099090090090 909909090090 900990909090
+    900900909909 090090090990 990090009099 099009009009 909900909000 990909090900
+    909090990900 900909099090 900090909909 090090090990 909090090900 990909090090
+    099090990090 009909909090 009090990909 000909099090 900900990909 090900909090
+    909090909009 009909909000
+"""
+_DAYS_OF = {"8": 28, "9": 29, "0": 30, "1": 31}
+
+MONTH_LENGTHS = tuple(_DAYS_OF[c] for c in "".join(_LENGTHS.split()))
+MONTHS = len(MONTH_LENGTHS)
+# Days from FIRST_DATE to the first of each month, and to the day after the
+# table as a last entry.
+MONTH_OFFSETS = (0, *accumulate(MONTH_LENGTHS))
+LAST_DATE = FIRST_DATE + datetime.timedelta(days=MONTH_OFFSETS[-1] - 1)
+
+
+def month_starts():
+    """First day of every month in the table, then 1 Muharram 1501, as dates."""
+    return [FIRST_DATE + datetime.timedelta(days=offset) for offset in MONTH_OFFSETS]
+
+
+def month_label(month):
+    """``"Ramadan 1446"`` for a 0-based month index from Muharram 1343."""
+    return f"{MONTH_NAMES[month % 12]} {FIRST_YEAR + month // 12}"
@@ -0,0 +1,218 @@
+"""List volatile cells in a workbook and everything that recalculates with them.
+
+Excel recalculates volatile functions (TODAY, NOW, RAND, OFFSET, INDIRECT,
+...) on every edit anywhere, together with every cell that depends on them.
+This tool reads the formulas straight from the ``.xlsx``, follows the
+dependency edges out of each volatile cell and prints every path with a cost
+estimate.
+
+The cost of a recalculated cell is one evaluation plus the number of cells
+its references read (clipped to the sheet's used area).  When the file has
+an ``xl/calcChain.xml`` (any workbook saved by Excel does), the dirty cells
+are also reported as a share of the calculation chain; otherwise every
+formula cell counts as one chain entry.
+
+    python -m zakat_logbook.volatile Zakat-LogBook.xlsx
+"""
+
+import argparse
+import re
+import sys
+import zipfile
+from collections import defaultdict, deque
+from xml.etree import ElementTree
+
+from .reader import SharedFormulas, sheet_parts, split_ref
+from .xlsx import col_index, col_letter
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+MAX_ROW, MAX_COL = 1_048_576, 16_384
+
+VOLATILE_FUNCTIONS = ("TODAY", "NOW", "RAND", "RANDBETWEEN", "RANDARRAY", "OFFSET", "INDIRECT",
+                      "CELL", "INFO")
+_VOLATILE = re.compile(r"(?<![\w.])(?:_xlfn\.)?(%s)\(" % "|".join(VOLATILE_FUNCTIONS))
+_STRING = re.compile(r'"(?:[^"]|"")*"')
+_REF = re.compile(
+    r"(?<![\w.$])(?:(?P<sheet>'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?"
+    r"(?P<ref>\$?[A-Z]{1,3}\$?\d+(?::\$?[A-Z]{1,3}\$?\d+)?"
+    r"|\$?[A-Z]{1,3}:\$?[A-Z]{1,3}"
+    r"|\$?\d+:\$?\d+)"
+    r"(?![\w(!])"
+)
+
+
+def parse_references(formula, sheet):
+    """Yield ``(sheet, col1, row1, col2, row2)`` for every reference in ``formula``."""
+    text = _STRING.sub('""', formula)
+    for m in _REF.finditer(text):
+        target = m.group("sheet")
+        if target:
+            target = target.strip("'").replace("''", "'")
+        parts = m.group("ref").split(":")
+        (c1, r1), (c2, r2) = split_ref(parts[0]), split_ref(parts[-1])
+        yield (target or sheet,
+               col_index(c1) if c1 else 1, int(r1) if r1 else 1,
+               col_index(c2) if c2 else MAX_COL, int(r2) if r2 else MAX_ROW)
+
+
+class FormulaGraph:
+    """Formula cells of a workbook with their references."""
+
+    def __init__(self, path):
+        self.formulas = {}          # (sheet, col, row) -> formula text
+        self.references = {}        # (sheet, col, row) -> [(sheet, c1, r1, c2, r2)]
+        self.spans = {}             # array/spill anchor -> (last col, last row) of its range
+        self.dynamic = set()        # anchors of Excel 365 spilled (dynamic-array) formulas
+        self.extent = defaultdict(lambda: (0, 0))
+        self.calc_chain = None
+        with zipfile.ZipFile(path) as zf:
+            parts = sheet_parts(zf)
+            for name, _, part in parts:
+                self._read_sheet(zf, name, part)
+            if "xl/calcChain.xml" in zf.namelist():
+                self.calc_chain = self._read_calc_chain(zf, {sid: name for name, sid, _ in parts})
+        self._by_sheet = defaultdict(list)
+        for cell, refs in self.references.items():
+            for ref in refs:
+                self._by_sheet[ref[0]].append((ref, cell))
+
+    def _read_sheet(self, zf, sheet, part):
+        max_col = max_row = 0
+        shared = SharedFormulas()
+        with zf.open(part) as stream:
+            for _, elem in ElementTree.iterparse(stream):
+                if elem.tag != f"{_NS}c":
+                    continue
+                col, row = split_ref(elem.get("r"))
+                col, row = col_index(col), int(row)
+                max_col, max_row = max(max_col, col), max(max_row, row)
+                f = elem.find(f"{_NS}f")
+                text = f is not None and shared.text(elem.get("r"), f.text, f.get("t"), f.get("si"))
+                if text:
+                    key = (sheet, col, row)
+                    self.formulas[key] = text
+                    self.references[key] = list(parse_references(text, sheet))
+                    if f.get("t") == "array" and ":" in f.get("ref", ""):
+                        c2, r2 = split_ref(f.get("ref").split(":")[1])
+                        self.spans[key] = (col_index(c2), int(r2))
+                    if f.get("t") == "array" and elem.get("cm"):
+                        self.dynamic.add(key)
+                elem.clear()
+        self.extent[sheet] = (max_col, max_row)
+
+    @staticmethod
+    def _read_calc_chain(zf, sheet_names):
+        chain, sheet = [], None
+        for c in ElementTree.fromstring(zf.read("xl/calcChain.xml")).iter(f"{_NS}c"):
+            if c.get("i"):
+                sheet = sheet_names.get(int(c.get("i")))
+            col, row = split_ref(c.get("r"))
+            chain.append((sheet, col_index(col), int(row)))
+        return chain
+
+    def volatile_cells(self):
+        """``{cell: function name}`` for formulas that call a volatile function."""
+        out = {}
+        for cell, text in self.formulas.items():
+            m = _VOLATILE.search(_STRING.sub('""', text))
+            if m:
+                out[cell] = m.group(1)
+        return out
+
+    def dependents(self, cell):
+        """Formula cells that reference ``cell`` directly, or any cell of its
+        array or spill range."""
+        sheet, col, row = cell
+        last_col, last_row = self.spans.get(cell, (col, row))
+        return [dep for (_, c1, r1, c2, r2), dep in self._by_sheet[sheet]
+                if c1 <= last_col and col <= c2 and r1 <= last_row and row <= r2 and dep != cell]
+
+    def read_cost(self, cell):
+        """One evaluation plus the cells its references read.
+
+        A range named twice (say in both branches of an ``IF``) is read once.
+        """
+        cost = 1
+        for sheet, c1, r1, c2, r2 in set(self.references.get(cell, ())):
+            max_col, max_row = self.extent[sheet]
+            cost += max(0, min(c2, max_col) - c1 + 1) * max(0, min(r2, max_row) - r1 + 1)
+        return cost
+
+    def volatile_paths(self):
+        """Breadth-first walk out of every volatile cell.
+
+        Returns ``(sources, parent)`` where ``parent`` maps each dirtied cell
+        to the cell it was reached from (``None`` for the sources).
+        """
+        sources = self.volatile_cells()
+        parent = {cell: None for cell in sources}
+        queue = deque(sources)
+        while queue:
+            cell = queue.popleft()
+            for dep in self.dependents(cell):
+                if dep not in parent:
+                    parent[dep] = cell
+                    queue.append(dep)
+        return sources, parent
+
+
+def cell_name(cell):
+    sheet, col, row = cell
+    sheet = f"'{sheet}'" if re.search(r"[^\w.]", sheet) else sheet
+    return f"{sheet}!{col_letter(col)}{row}"
+
+
+def report(path, out=sys.stdout):
+    graph = FormulaGraph(path)
+    sources, parent = graph.volatile_paths()
+    children = defaultdict(list)
+    for cell, up in parent.items():
+        if up is not None:
+            children[up].append(cell)
+
+    def path_of(cell):
+        steps = []
+        while cell is not None:
+            steps.append(cell_name(cell))
+            cell = parent[cell]
+        return " -> ".join(reversed(steps))
+
+    print(f"{path}: {len(graph.formulas):,} formula cells, {len(sources)} volatile", file=out)
+    for source, function in sorted(sources.items()):
+        print(f"\n{cell_name(source)}  {function}()  ={graph.formulas[source]}", file=out)
+        leaves = []
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            if children[cell]:
+                queue.extend(sorted(children[cell]))
+            elif cell != source:
+                leaves.append(cell)
+        for leaf in leaves:
+            print(f"  {path_of(leaf)}", file=out)
+
+    dirty = set(parent)
+    cost = sum(graph.read_cost(cell) for cell in dirty)
+    if graph.calc_chain is not None:
+        chain = len(graph.calc_chain)
+        in_chain = sum(1 for cell in graph.calc_chain if cell in dirty)
+        source = "calcChain.xml entries"
+    else:
+        chain, in_chain, source = len(graph.formulas), len(dirty), "formula cells (no calcChain.xml)"
+    share = in_chain / chain * 100 if chain else 0.0
+    print(f"\nRecalculated on every edit: {len(dirty)} cells, {in_chain} of {chain:,} "
+          f"{source} ({share:.2f}%), estimated cost {cost:,} cell reads", file=out)
+    return dirty, cost
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="List volatile cells and the dependency paths they force to recalculate.")
+    parser.add_argument("workbook", help=".xlsx file to inspect")
+    args = parser.parse_args(argv)
+    report(args.workbook)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,854 @@
+"""Streaming, write-only XLSX writer.
+
+Each worksheet is serialised straight into its zip member as rows are
+appended, so memory use is bounded by the rows still pending on the open
+sheet, never by the length of the sheet.  Only the features the logbook
+needs are supported: styled values and formulas, column widths, frozen
+panes, merges, auto-filters, conditional formats, data validations and
+defined names.
+
+Sheets are written one at a time and rows must be produced in ascending
+order.  Cells placed with :meth:`Worksheet.cell` are held back until a later
+row is written, which lets the small fixed-layout sheets be filled in any
+order while the Ledger streams straight through.
+
+Where consecutive rows of a column carry the same formula shifted down one
+row at a time, the column is written as a shared formula: the text appears
+once on the first cell and the rest refer to it (``<f t="shared" si=.../>``).
+"""
+
+import datetime
+import re
+import zipfile
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from xml.sax.saxutils import escape, quoteattr
+
+EXCEL_EPOCH = datetime.date(1899, 12, 30)
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_FLUSH_BYTES = 1 << 16
+
+
+@lru_cache(maxsize=None)
+def col_letter(col):
+    """Return the column letters for a 1-based column index (1 -> 'A')."""
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def col_index(letters):
+    """Return the 1-based column index for column letters ('A' -> 1)."""
+    index = 0
+    for ch in letters:
+        index = index * 26 + ord(ch) - 64
+    return index
+
+
+def cell_ref(col, row, absolute=False):
+    """Return an A1 reference for a 1-based column and row."""
+    if absolute:
+        return f"${col_letter(col)}${row}"
+    return f"{col_letter(col)}{row}"
+
+
+def absolute(ref):
+    """Return ``ref`` with both column and row anchored ('D44' -> '$D$44')."""
+    letters = ref.rstrip("0123456789")
+    return f"${letters}${ref[len(letters):]}"
+
+
+def excel_date(value):
+    """Return the Excel serial day number for a date or datetime."""
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return (value - EXCEL_EPOCH).days
+
+
+# Relative parts of A1 references move when a formula is filled or shared;
+# string literals and quoted sheet names are left alone.
+_LITERALS = re.compile(r"(\"(?:[^\"]|\"\")*\"|'(?:[^']|'')*')")
+_REFERENCE = re.compile(
+    r"(?<![\w.$])(?:"
+    r"(?P<cd>\$?)(?P<c>[A-Z]{1,3})(?P<rd>\$?)(?P<r>\d+)(?![\w(!])"
+    r"|(?P<r1d>\$?)(?P<r1>\d+):(?P<r2d>\$?)(?P<r2>\d+)(?![\w(.])"
+    r"|(?P<c1d>\$?)(?P<c1>[A-Z]{1,3}):(?P<c2d>\$?)(?P<c2>[A-Z]{1,3})(?![\w(])"
+    r")"
+)
+
+
+def translate_formula(text, rows=0, cols=0):
+    """Return ``text`` with its relative references moved by ``rows`` and
+    ``cols``, as Excel does when it fills a formula or expands a shared one.
+
+    ``$``-anchored parts stay put.
+    """
+    def move_row(anchor, row):
+        return row if anchor or not rows else str(int(row) + rows)
+
+    def move_col(anchor, col):
+        return col if anchor or not cols else col_letter(col_index(col) + cols)
+
+    def shift(m):
+        g = m.group
+        if g("c"):
+            return f"{g('cd')}{move_col(g('cd'), g('c'))}{g('rd')}{move_row(g('rd'), g('r'))}"
+        if g("r1"):
+            return (f"{g('r1d')}{move_row(g('r1d'), g('r1'))}:"
+                    f"{g('r2d')}{move_row(g('r2d'), g('r2'))}")
+        return f"{g('c1d')}{move_col(g('c1d'), g('c1'))}:{g('c2d')}{move_col(g('c2d'), g('c2'))}"
+
+    parts = _LITERALS.split(text)
+    return "".join(part if i % 2 else _REFERENCE.sub(shift, part) for i, part in enumerate(parts))
+
+
+@dataclass(frozen=True)
+class Font:
+    size: float = 10
+    color: str = "000000"
+    bold: bool = False
+    italic: bool = False
+    name: str = "Aptos"
+
+
+@dataclass(frozen=True)
+class Style:
+    """A cell format: font, solid fill, number format, alignment and border."""
+
+    font: Font = Font()
+    fill: str = None
+    num_fmt: str = None
+    align: str = None
+    valign: str = "center"
+    wrap: bool = False
+    border: str = "thin"
+
+
+@dataclass(frozen=True)
+class Dxf:
+    """A differential format used by conditional formatting rules."""
+
+    color: str
+    fill: str
+    bold: bool = True
+
+
+class Formula:
+    """A formula cell.
+
+    ``text`` is the formula without the leading ``=``.  ``value`` is an
+    optional cached result written as the cell's ``<v>``; ``array`` marks a
+    legacy CSE array formula over ``ref``.  ``dynamic`` marks an Excel 365
+    dynamic-array formula that spills from this cell; newer functions must
+    carry their file-format prefix (``_xlfn._xlws.FILTER``, ``_xlfn.SEQUENCE``).
+    """
+
+    __slots__ = ("text", "value", "array", "ref", "dynamic")
+
+    def __init__(self, text, value=None, array=False, ref=None, dynamic=False):
+        self.text = text
+        self.value = value
+        self.array = array
+        self.ref = ref
+        self.dynamic = dynamic
+
+
+class Field:
+    """Placeholder for the ``index``-th item of each record in
+    :meth:`Worksheet.write_records`, usable as a cell value or as a
+    formula's cached ``value``."""
+
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+
+_BUILTIN_NUM_FMTS = {"General": 0, "0": 1, "0.00": 2, "#,##0": 3, "#,##0.00": 4}
+
+
+class StyleSheet:
+    """Registry that turns named :class:`Style` objects into ``cellXfs``."""
+
+    def __init__(self, named):
+        self._named = dict(named)
+        self._xf_by_style = {}
+        self._xfs = [None]
+        self._fonts = [Font(size=11, color="000000", name="Calibri")]
+        self._fills = [None, "gray125"]
+        self._num_fmts = {}
+        self._dxfs = []
+        self.index = {}
+
+    def xf(self, name):
+        """Return the ``s`` index for a named style, registering it on first use."""
+        try:
+            return self.index[name]
+        except KeyError:
+            pass
+        if name is None:
+            return 0
+        style = self._named[name]
+        xf = self._xf_by_style.get(style)
+        if xf is None:
+            xf = len(self._xfs)
+            self._xfs.append(style)
+            self._xf_by_style[style] = xf
+        self.index[name] = xf
+        return xf
+
+    def dxf(self, dxf):
+        """Return the index of a differential format, registering it on first use."""
+        if dxf not in self._dxfs:
+            self._dxfs.append(dxf)
+        return self._dxfs.index(dxf)
+
+    def _font_id(self, font):
+        if font not in self._fonts:
+            self._fonts.append(font)
+        return self._fonts.index(font)
+
+    def _fill_id(self, fill):
+        if fill is None:
+            return 0
+        if fill not in self._fills:
+            self._fills.append(fill)
+        return self._fills.index(fill)
+
+    def _num_fmt_id(self, code):
+        if code is None:
+            return 0
+        if code in _BUILTIN_NUM_FMTS:
+            return _BUILTIN_NUM_FMTS[code]
+        if code not in self._num_fmts:
+            self._num_fmts[code] = 164 + len(self._num_fmts)
+        return self._num_fmts[code]
+
+    def to_xml(self):
+        borders = {None: 0, "thin": 1, "medium": 2}
+        xfs = ['<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>']
+        for style in self._xfs[1:]:
+            attrs = (
+                f'numFmtId="{self._num_fmt_id(style.num_fmt)}" '
+                f'fontId="{self._font_id(style.font)}" '
+                f'fillId="{self._fill_id(style.fill)}" '
+                f'borderId="{borders[style.border]}" xfId="0" applyNumberFormat="1" '
+                'applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1"'
+            )
+            align = f'vertical="{style.valign}"'
+            if style.align:
+                align = f'horizontal="{style.align}" ' + align
+            if style.wrap:
+                align += ' wrapText="1"'
+            xfs.append(f"<xf {attrs}><alignment {align}/></xf>")
+
+        fonts = []
+        for font in self._fonts:
+            parts = "<b/>" if font.bold else ""
+            parts += "<i/>" if font.italic else ""
+            fonts.append(
+                f'<font>{parts}<sz val="{font.size:g}"/><color rgb="FF{font.color}"/>'
+                f'<name val="{font.name}"/></font>'
+            )
+        fills = ['<fill><patternFill patternType="none"/></fill>',
+                 '<fill><patternFill patternType="gray125"/></fill>']
+        for fill in self._fills[2:]:
+            fills.append(
+                f'<fill><patternFill patternType="solid"><fgColor rgb="FF{fill}"/>'
+                "</patternFill></fill>"
+            )
+        num_fmts = "".join(
+            f"<numFmt numFmtId={quoteattr(str(i))} formatCode={quoteattr(code)}/>"
+            for code, i in self._num_fmts.items()
+        )
+        edge = '<{0} style="{1}"><color auto="1"/></{0}>'
+        border_xml = ["<border><left/><right/><top/><bottom/><diagonal/></border>"]
+        for weight in ("thin", "medium"):
+            sides = "".join(edge.format(side, weight) for side in ("left", "right", "top", "bottom"))
+            border_xml.append(f"<border>{sides}<diagonal/></border>")
+        dxfs = "".join(
+            f'<dxf><font>{"<b/>" if d.bold else ""}<color rgb="FF{d.color}"/></font>'
+            f'<fill><patternFill patternType="solid"><fgColor rgb="FF{d.fill}"/>'
+            f'<bgColor rgb="FF{d.fill}"/></patternFill></fill></dxf>'
+            for d in self._dxfs
+        )
+        return (
+            f'{_XML_DECL}<styleSheet xmlns="{_NS_MAIN}">'
+            f'<numFmts count="{len(self._num_fmts)}">{num_fmts}</numFmts>'
+            f'<fonts count="{len(fonts)}">{"".join(fonts)}</fonts>'
+            f'<fills count="{len(fills)}">{"".join(fills)}</fills>'
+            f'<borders count="{len(border_xml)}">{"".join(border_xml)}</borders>'
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            f'<cellXfs count="{len(xfs)}">{"".join(xfs)}</cellXfs>'
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            f'<dxfs count="{len(self._dxfs)}">{dxfs}</dxfs>'
+            "</styleSheet>"
+        )
+
+
+def _shareable(value):
+    return isinstance(value, Formula) and not (value.array or value.dynamic)
+
+
+def _formula_xml(value, shared=None):
+    """The ``<f>`` element of a formula cell.
+
+    ``shared`` is ``(si, span)`` for a shared formula: the first cell carries
+    the text and the span, the others (``span`` None) only the index.
+    """
+    if shared is not None:
+        si, span = shared
+        if span is None:
+            return f'<f t="shared" si="{si}"/>'
+        return f'<f t="shared" ref="{span}" si="{si}">{escape(value.text)}</f>'
+    attrs = ""
+    if value.array or value.dynamic:
+        attrs = f' t="array" ref="{value.ref}"'
+    return f"<f{attrs}>{escape(value.text)}</f>"
+
+
+def _value_xml(ref, xf, value, shared=None):
+    """Serialise one cell.  ``value`` may be None, str, number, bool, date or Formula."""
+    s = f' s="{xf}"' if xf else ""
+    if value is None:
+        return f'<c r="{ref}"{s}/>'
+    if isinstance(value, Formula):
+        if (value.array or value.dynamic) and value.ref is None:
+            value = Formula(value.text, value.value, value.array, ref, value.dynamic)
+        if value.dynamic:
+            s += ' cm="1"'
+        f = _formula_xml(value, shared)
+        cached = value.value
+        if cached is None:
+            return f'<c r="{ref}"{s}>{f}</c>'
+        if isinstance(cached, bool):
+            return f'<c r="{ref}"{s} t="b">{f}<v>{int(cached)}</v></c>'
+        if isinstance(cached, str):
+            return f'<c r="{ref}"{s} t="str">{f}<v>{escape(cached)}</v></c>'
+        if isinstance(cached, (datetime.date, datetime.datetime)):
+            cached = excel_date(cached)
+        return f'<c r="{ref}"{s}>{f}<v>{cached!r}</v></c>'
+    if isinstance(value, str):
+        return (
+            f'<c r="{ref}"{s} t="inlineStr"><is><t xml:space="preserve">'
+            f"{escape(value)}</t></is></c>"
+        )
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        value = excel_date(value)
+    return f'<c r="{ref}"{s}><v>{value!r}</v></c>'
+
+
+def _value_parts(value, cached=False):
+    """Split a value into its ``t`` attribute and inner XML for record templates.
+
+    ``cached`` renders strings as a formula result (``t="str"``) rather than
+    an inline string.
+    """
+    if value is None or value == "" and not cached:
+        return "", ""
+    if isinstance(value, str):
+        if cached:
+            return ' t="str"', f"<v>{escape(value)}</v>"
+        return ' t="inlineStr"', f'<is><t xml:space="preserve">{escape(value)}</t></is>'
+    if isinstance(value, bool):
+        return ' t="b"', f"<v>{int(value)}</v>"
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        value = excel_date(value)
+    return "", f"<v>{value!r}</v>"
+
+
+class Worksheet:
+    """A sheet being streamed into the workbook archive.
+
+    Obtain one from :meth:`Workbook.add_sheet`; it is finished by
+    :meth:`close` (or by adding the next sheet).
+    """
+
+    def __init__(self, workbook, name, stream, index):
+        self.workbook = workbook
+        self.name = name
+        self.index = index
+        self._stream = stream
+        self._chunks = []
+        self._size = 0
+        self._last_row = 0
+        self._pending = {}
+        self._heights = {}
+        self._shared_count = 0
+        self._merges = []
+        self._auto_filter = None
+        self._cond_formats = []
+        self._validations = []
+        self._landscape = True
+        self.hidden = False
+        self.closed = False
+
+    # -- low level output -------------------------------------------------
+
+    def _write(self, text):
+        self._chunks.append(text)
+        self._size += len(text)
+        if self._size >= _FLUSH_BYTES:
+            self._flush_chunks()
+
+    def _flush_chunks(self):
+        if self._chunks:
+            self._stream.write("".join(self._chunks).encode("utf-8"))
+            self._chunks = []
+            self._size = 0
+
+    def _open_row(self, row, height):
+        if height:
+            return f'<row r="{row}" ht="{height:g}" customHeight="1">'
+        return f'<row r="{row}">'
+
+    def _emit_row(self, row, cells, height, shared=None):
+        xf = self.workbook.styles.xf
+        parts = [self._open_row(row, height)]
+        for col in sorted(cells):
+            value, style = cells[col]
+            if isinstance(value, Formula) and value.dynamic:
+                self.workbook.dynamic_arrays = True
+            spec = shared.get((row, col)) if shared else None
+            parts.append(_value_xml(f"{col_letter(col)}{row}", xf(style), value, spec))
+        parts.append("</row>")
+        self._write("".join(parts))
+        self._last_row = row
+
+    def _flush_pending(self, below):
+        rows = sorted(r for r in self._pending if r < below)
+        if not rows:
+            return
+        batch = [(row, self._pending.pop(row)) for row in rows]
+        shared = self._share_runs(batch)
+        for row, cells in batch:
+            self._emit_row(row, cells, self._heights.pop(row, None), shared)
+
+    # -- shared formulas -----------------------------------------------------
+
+    def _next_si(self):
+        si = self._shared_count
+        self._shared_count += 1
+        return si
+
+    def _share_runs(self, batch):
+        """``{(row, col): (si, span)}`` for the vertical runs of one formula
+        among the placed cells of ``batch``."""
+        if not self.workbook.shared_formulas:
+            return {}
+        columns = defaultdict(list)
+        for row, cells in batch:
+            for col, (value, _) in cells.items():
+                if _shareable(value):
+                    columns[col].append((row, value.text))
+        shared = {}
+        for col, cells in columns.items():
+            run = []
+            for row, text in cells:
+                if run and row == run[-1][0] + 1 and \
+                        text == translate_formula(run[0][1], row - run[0][0]):
+                    run.append((row, text))
+                    continue
+                self._share_run(col, run, shared)
+                run = [(row, text)]
+            self._share_run(col, run, shared)
+        return shared
+
+    def _share_run(self, col, run, shared):
+        if len(run) < 2:
+            return
+        si, letter = self._next_si(), col_letter(col)
+        shared[run[0][0], col] = (si, f"{letter}{run[0][0]}:{letter}{run[-1][0]}")
+        for row, _ in run[1:]:
+            shared[row, col] = (si, None)
+
+    def _share_patterns(self, first, last, patterns):
+        """Shared-formula specs for a block of pattern rows ``first..last``.
+
+        A column is shared when every pattern has a plain formula there and
+        the formulas of the following rows are the first row's, moved down
+        (checked over two full pattern cycles).  Returns ``(head, rest)``:
+        the specs for row ``first`` and for the rows after it.
+        """
+        if not self.workbook.shared_formulas or last <= first:
+            return {}, {}
+        by_col = [{col: value for col, value, _ in cells} for cells in patterns]
+        n = len(patterns)
+
+        def text(k, col):
+            return (by_col[k % n][col].text.replace("{r}", str(first + k))
+                    .replace("{prev}", str(first + k - 1)))
+
+        head, rest = {}, {}
+        for col, value in by_col[0].items():
+            if not all(_shareable(cells.get(col)) for cells in by_col):
+                continue
+            master = text(0, col)
+            if all(text(k, col) == translate_formula(master, k)
+                   for k in range(1, min(2 * n, last - first) + 1)):
+                si, letter = self._next_si(), col_letter(col)
+                head[col] = (si, f"{letter}{first}:{letter}{last}")
+                rest[col] = (si, None)
+        return head, rest
+
+    # -- cell API ------------------------------------------------------------
+
+    def cell(self, row, col, value=None, style=None):
+        """Place one cell; it is written once a later row is emitted."""
+        if row <= self._last_row:
+            raise ValueError(f"{self.name}: row {row} has already been written")
+        self._pending.setdefault(row, {})[col] = (value, style)
+
+    def row_height(self, row, height):
+        self._heights[row] = height
+
+    def write_row(self, row, cells, height=None):
+        """Write row ``row`` from an iterable of ``(col, value, style)`` tuples."""
+        self._flush_pending(row)
+        if row <= self._last_row:
+            raise ValueError(f"{self.name}: row {row} has already been written")
+        merged = self._pending.pop(row, {})
+        for col, value, style in cells:
+            merged[col] = (value, style)
+        self._emit_row(row, merged, height or self._heights.pop(row, None))
+
+    def write_rows(self, first, last, *patterns, height=None):
+        """Stream rows ``first..last`` that follow a fixed cell pattern.
+
+        Each pattern is a list of ``(col, value, style)``; any ``{r}`` in a
+        string or formula is replaced by the row number and ``{prev}`` by the
+        row above.  Several patterns alternate row by row (for banding).  The
+        row XML is compiled once, so each row costs a single string
+        substitution -- this is the path that makes million-row ledgers cheap.
+        Formula columns that repeat down the block are written as shared
+        formulas.
+        """
+        self._flush_pending(first)
+        if first <= self._last_row:
+            raise ValueError(f"{self.name}: row {first} has already been written")
+        head, rest = self._share_patterns(first, last, patterns)
+        if head:
+            self._write(self._compile(patterns[0], height, head) % {"r": first, "p": first - 1})
+            self._last_row = first
+            first += 1
+            patterns = patterns[1:] + patterns[:1]
+        templates = [self._compile(cells, height, rest) for cells in patterns]
+        write = self._write
+        if len(templates) == 1:
+            template = templates[0]
+            for row in range(first, last + 1):
+                write(template % {"r": row, "p": row - 1})
+        else:
+            n = len(templates)
+            for row in range(first, last + 1):
+                write(templates[(row - first) % n] % {"r": row, "p": row - 1})
+        self._last_row = max(self._last_row, last)
+
+    def write_records(self, first, records, *patterns, height=None):
+        """Stream one row per record starting at row ``first``.
+
+        Patterns are as for :meth:`write_rows`, except that a :class:`Field`
+        (as a value, or as a formula's cached value) is filled from the
+        record.  Returns the last row written.
+        """
+        self._flush_pending(first)
+        if first <= self._last_row:
+            raise ValueError(f"{self.name}: row {first} has already been written")
+        if not hasattr(records, "__len__"):
+            records = list(records)
+        head, rest = self._share_patterns(first, first + len(records) - 1, patterns)
+        compiled = [self._compile_record(cells, height, rest) for cells in patterns]
+        if head:
+            compiled[0] = self._compile_record(patterns[0], height, head)
+        write, n, row = self._write, len(compiled), first - 1
+        for row, record in enumerate(records, first):
+            template, fields = compiled[(row - first) % n]
+            values = {"r": row, "p": row - 1}
+            for key, index, cached in fields:
+                values["t" + key], values["v" + key] = _value_parts(record[index], cached)
+            write(template % values)
+            if head:
+                compiled[0], head = self._compile_record(patterns[0], height, rest), None
+        self._last_row = max(self._last_row, row)
+        return row
+
+    def _compile_record(self, cells, height, shared=None):
+        xf = self.workbook.styles.xf
+        parts = [self._open_row(0, height).replace('r="0"', 'r="{r}"').replace("%", "%%")]
+        fields = []
+        for col, value, style in cells:
+            ref = f"{col_letter(col)}{{r}}"
+            spec = shared.get(col) if shared else None
+            field = value if isinstance(value, Field) else None
+            if isinstance(value, Formula) and isinstance(value.value, Field):
+                field = value.value
+            if field is None:
+                parts.append(_value_xml(ref, xf(style), value, spec).replace("%", "%%"))
+                continue
+            key = str(len(fields))
+            fields.append((key, field.index, field is not value))
+            s = f' s="{xf(style)}"' if xf(style) else ""
+            inner = f"%(v{key})s"
+            if field is not value:
+                inner = _formula_xml(value, spec).replace("%", "%%") + inner
+            parts.append(f'<c r="{ref}"{s}%(t{key})s>{inner}</c>')
+        template = "".join(parts) + "</row>"
+        return template.replace("{r}", "%(r)d").replace("{prev}", "%(p)d"), fields
+
+    def _compile(self, cells, height, shared=None):
+        xf = self.workbook.styles.xf
+        parts = [self._open_row(0, height).replace('r="0"', 'r="{r}"')]
+        for col, value, style in cells:
+            if isinstance(value, Formula) and value.dynamic:
+                self.workbook.dynamic_arrays = True
+            spec = shared.get(col) if shared else None
+            parts.append(_value_xml(f"{col_letter(col)}{{r}}", xf(style), value, spec))
+        template = "".join(parts).replace("%", "%%") + "</row>"
+        return template.replace("{r}", "%(r)d").replace("{prev}", "%(p)d")
+
+    # -- sheet features ------------------------------------------------------
+
+    def merge(self, ref):
+        self._merges.append(ref)
+
+    def auto_filter(self, ref):
+        self._auto_filter = ref
+
+    def conditional_format(self, sqref, formula, dxf, priority=None):
+        dxf_id = self.workbook.styles.dxf(dxf)
+        self._cond_formats.append((sqref, formula, dxf_id, priority))
+
+    def data_validation(self, sqref, kind, formula, operator=None, error_title=None, error=None):
+        self._validations.append((sqref, kind, formula, operator, error_title, error))
+
+    def portrait(self):
+        self._landscape = False
+
+    # -- finishing -------------------------------------------------------------
+
+    def close(self):
+        if self.closed:
+            return
+        self._flush_pending(float("inf"))
+        out = ["</sheetData>"]
+        if self._auto_filter:
+            out.append(f'<autoFilter ref="{self._auto_filter}"/>')
+        if self._merges:
+            out.append(f'<mergeCells count="{len(self._merges)}">')
+            out.extend(f'<mergeCell ref="{ref}"/>' for ref in self._merges)
+            out.append("</mergeCells>")
+        priority = 0
+        for sqref, formula, dxf_id, rule_priority in self._cond_formats:
+            priority += 1
+            out.append(
+                f'<conditionalFormatting sqref="{sqref}"><cfRule type="expression" '
+                f'dxfId="{dxf_id}" priority="{rule_priority or priority}">'
+                f"<formula>{escape(formula)}</formula></cfRule></conditionalFormatting>"
+            )
+        if self._validations:
+            out.append(f'<dataValidations count="{len(self._validations)}">')
+            for sqref, kind, formula, operator, title, error in self._validations:
+                attrs = f'type="{kind}" allowBlank="1" showErrorMessage="1"'
+                if operator:
+                    attrs += f' operator="{operator}"'
+                if title:
+                    attrs += f" errorTitle={quoteattr(title)}"
+                if error:
+                    attrs += f" error={quoteattr(error)}"
+                out.append(
+                    f'<dataValidation {attrs} sqref="{sqref}">'
+                    f"<formula1>{escape(formula)}</formula1></dataValidation>"
+                )
+            out.append("</dataValidations>")
+        out.append(
+            '<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>'
+            f'<pageSetup fitToHeight="0" orientation="{"landscape" if self._landscape else "portrait"}"/>'
+            "</worksheet>"
+        )
+        self._write("".join(out))
+        self._flush_chunks()
+        self._stream.close()
+        self.closed = True
+
+
+# Cell metadata that tells Excel 365 a ``cm="1"`` formula spills (XLDAPR).
+_DYNAMIC_ARRAY_METADATA = (
+    f'{_XML_DECL}<metadata xmlns="{_NS_MAIN}" '
+    'xmlns:xda="http://schemas.microsoft.com/office/spreadsheetml/2017/dynamicarray">'
+    '<metadataTypes count="1"><metadataType name="XLDAPR" minSupportedVersion="120000" copy="1" '
+    'pasteAll="1" pasteValues="1" merge="1" splitFirst="1" rowColShift="1" clearFormats="1" '
+    'clearComments="1" assign="1" coerce="1" cellMeta="1"/></metadataTypes>'
+    '<futureMetadata name="XLDAPR" count="1"><bk><extLst>'
+    '<ext uri="{bdbb8cdc-fa1e-496e-a857-3c3f30c029c3}">'
+    '<xda:dynamicArrayProperties fDynamic="1" fCollapsed="0"/></ext></extLst></bk></futureMetadata>'
+    '<cellMetadata count="1"><bk><rc t="1" v="0"/></bk></cellMetadata></metadata>'
+)
+_METADATA_OVERRIDE = (
+    '<Override PartName="/xl/metadata.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheetMetadata+xml"/>'
+)
+
+
+class Workbook:
+    """Write-only workbook that streams sheets into ``path``.
+
+    ``styles`` maps style names to :class:`Style` objects; cells refer to
+    styles by name.
+    """
+
+    def __init__(self, path, styles, compresslevel=1):
+        self.path = path
+        self.styles = StyleSheet(styles)
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self._sheets = []
+        self._defined_names = []
+        self._current = None
+        self.title = None
+        self.creator = None
+        self.dynamic_arrays = False     # set once a dynamic-array formula is written
+        self.shared_formulas = True     # write repeated column formulas as shared formulas
+        self.full_calc_on_load = True   # have Excel recalculate everything when opening
+
+    def add_sheet(self, name, widths=None, freeze=None, selected=False, fit_to_page=True,
+                  hidden=False):
+        """Start a new worksheet and write its header.
+
+        ``widths`` maps 1-based column indexes to widths; ``freeze`` is the
+        first scrolling row (rows above it stay frozen).  A ``hidden`` sheet
+        holds lookup data the other sheets' formulas read.
+        """
+        if self._current is not None:
+            self._current.close()
+        index = len(self._sheets) + 1
+        stream = self._zip.open(f"xl/worksheets/sheet{index}.xml", "w", force_zip64=True)
+        ws = Worksheet(self, name, stream, index)
+        ws.hidden = hidden
+        head = [_XML_DECL, f'<worksheet xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">']
+        if fit_to_page:
+            head.append('<sheetPr><pageSetUpPr fitToPage="1"/></sheetPr>')
+        view = '<sheetView showGridLines="0" workbookViewId="0"'
+        view += ' tabSelected="1">' if selected else ">"
+        if freeze:
+            view += (
+                f'<pane ySplit="{freeze - 1}" topLeftCell="A{freeze}" activePane="bottomLeft" '
+                'state="frozen"/><selection pane="bottomLeft"/>'
+            )
+        head.append(f"<sheetViews>{view}</sheetView></sheetViews>")
+        head.append('<sheetFormatPr defaultRowHeight="14.5"/>')
+        if widths:
+            head.append("<cols>")
+            head.extend(
+                f'<col min="{c}" max="{c}" width="{w:g}" customWidth="1"/>'
+                for c, w in sorted(widths.items())
+            )
+            head.append("</cols>")
+        head.append("<sheetData>")
+        ws._write("".join(head))
+        self._sheets.append(ws)
+        self._current = ws
+        return ws
+
+    def define_name(self, name, value, sheet=None, hidden=False):
+        """Add a defined name, optionally local to ``sheet`` (a Worksheet)."""
+        self._defined_names.append((name, value, sheet, hidden))
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+        z = self._zip
+        sheets = "".join(
+            f"<sheet name={quoteattr(ws.name)} sheetId=\"{ws.index}\""
+            + (' state="hidden"' if ws.hidden else "")
+            + f" r:id=\"rId{ws.index}\"/>"
+            for ws in self._sheets
+        )
+        names = ""
+        if self._defined_names:
+            items = []
+            for name, value, sheet, hidden in self._defined_names:
+                attrs = f'name="{name}"'
+                if sheet is not None:
+                    attrs += f' localSheetId="{sheet.index - 1}"'
+                if hidden:
+                    attrs += ' hidden="1"'
+                items.append(f"<definedName {attrs}>{escape(value)}</definedName>")
+            names = f"<definedNames>{''.join(items)}</definedNames>"
+        full_calc = ' fullCalcOnLoad="1"' if self.full_calc_on_load else ""
+        z.writestr(
+            "xl/workbook.xml",
+            f'{_XML_DECL}<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">'
+            f"<workbookPr/><bookViews><workbookView/></bookViews><sheets>{sheets}</sheets>"
+            f'{names}<calcPr calcId="191029"{full_calc}/></workbook>',
+        )
+        n = len(self._sheets)
+        rels = "".join(
+            f'<Relationship Id="rId{i}" Type="{_NS_REL}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, n + 1)
+        )
+        rels += f'<Relationship Id="rId{n + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+        if self.dynamic_arrays:
+            rels += (f'<Relationship Id="rId{n + 2}" Type="{_NS_REL}/sheetMetadata" '
+                     'Target="metadata.xml"/>')
+            z.writestr("xl/metadata.xml", _DYNAMIC_ARRAY_METADATA)
+        z.writestr(
+            "xl/_rels/workbook.xml.rels",
+            f'{_XML_DECL}<Relationships xmlns="{_NS_PKG_REL}">{rels}</Relationships>',
+        )
+        z.writestr("xl/styles.xml", self.styles.to_xml())
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, n + 1)
+        )
+        z.writestr(
+            "[Content_Types].xml",
+            f'{_XML_DECL}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f"{overrides}"
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f"{_METADATA_OVERRIDE if self.dynamic_arrays else ''}"
+            '<Override PartName="/docProps/core.xml" '
+            'ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+            "</Types>",
+        )
+        z.writestr(
+            "_rels/.rels",
+            f'{_XML_DECL}<Relationships xmlns="{_NS_PKG_REL}">'
+            f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+            '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/'
+            'relationships/metadata/core-properties" Target="docProps/core.xml"/>'
+            "</Relationships>",
+        )
+        now = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        z.writestr(
+            "docProps/core.xml",
+            f"{_XML_DECL}<cp:coreProperties "
+            'xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+            f"<dc:title>{escape(self.title or '')}</dc:title>"
+            f"<dc:creator>{escape(self.creator or '')}</dc:creator>"
+            f'<dcterms:created xsi:type="dcterms:W3CDTF">{now}</dcterms:created>'
+            "</cp:coreProperties>",
+        )
+        z.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()